@@ -16,6 +16,9 @@ from config.agent import AgentConfig, PerformanceMode, AgentProfile
 from models import JobStatus, JobDataBase
 from database import DatabaseClient
 from logging_system import get_logger
+from tracing import get_tracer
+from services.llm_cache import llm_cache_policy
+from services.usage import bind_usage_ledger
 
 logger = get_logger(__name__)
 
@@ -237,63 +240,92 @@ class BaseAgent(ABC):
             user_id=user_id
         )
         
-        try:
-            # Update job status to running
-            if self._db_client:
-                await self._update_job_status(job_id, JobStatus.running)
-            
-            # Execute job with performance monitoring
-            result = await self._execute_job_logic(job_data)
-            
-            # Calculate execution time
-            execution_time = (datetime.now(timezone.utc) - start_time).total_seconds()
-            result.execution_time = execution_time
-            
-            # Update agent state
-            self.execution_count += 1
-            self.last_execution_time = datetime.now(timezone.utc)
-            
-            # Update job status based on result
-            if self._db_client:
-                if result.success:
-                    await self._update_job_status(job_id, JobStatus.completed, result.result, result_format=result.result_format)
-                else:
-                    await self._update_job_status(job_id, JobStatus.failed, error_message=result.error_message)
-            
-            logger.info(
-                f"Job execution completed",
-                job_id=job_id,
-                execution_id=execution_id,
-                success=result.success,
-                execution_time=execution_time
-            )
-            
-            return result
-            
-        except Exception as e:
-            execution_time = (datetime.now(timezone.utc) - start_time).total_seconds()
-            error_message = f"Unexpected error during job execution: {str(e)}"
-            
-            logger.error(
-                error_message,
-                job_id=job_id,
-                execution_id=execution_id,
-                exception=e,
-                execution_time=execution_time
-            )
-            
-            # Update job status to failed
-            if self._db_client:
+        # Token usage of the job's LLM calls (the pipeline's ledger when run from it)
+        with bind_usage_ledger(user_id=user_id, agent=self.name) as usage:
+            try:
+                # Update job status to running
+                if self._db_client:
+                    await self._update_job_status(job_id, JobStatus.running)
+                
+                # Execute job with performance monitoring
+                with get_tracer().start_span(
+                    "agent.execute",
+                    attributes={"agent.name": self.name, "job.id": job_id, "execution.id": execution_id}
+                ) as span, llm_cache_policy(
+                    enabled=self.agent_config.execution.enable_caching,
+                    ttl_seconds=self.agent_config.execution.cache_ttl_seconds,
+                    similarity_threshold=self.agent_config.execution.similarity_cache_threshold
+                ):
+                    result = await self._execute_job_logic(job_data)
+                    span.set_attribute("agent.success", result.success)
+                
+                # Calculate execution time
+                execution_time = (datetime.now(timezone.utc) - start_time).total_seconds()
+                result.execution_time = execution_time
+                usage_data = usage.to_dict() if usage.calls else None
+                if usage_data:
+                    result.metadata["llm_usage"] = usage_data
+                
+                # Update agent state
+                self.execution_count += 1
+                self.last_execution_time = datetime.now(timezone.utc)
+                
+                # Update job status based on result
+                if self._db_client:
+                    if result.success:
+                        await self._update_job_status(
+                            job_id, JobStatus.completed, result.result, result_format=result.result_format, usage=usage_data
+                        )
+                    else:
+                        await self._update_job_status(job_id, JobStatus.failed, error_message=result.error_message, usage=usage_data)
+                
+                logger.info(
+                    f"Job execution completed",
+                    job_id=job_id,
+                    execution_id=execution_id,
+                    success=result.success,
+                    execution_time=execution_time
+                )
+                
+                return result
+                
+            except asyncio.CancelledError:
+                # Cancelling the task has already aborted in-flight LLM requests
+                logger.info("Job execution cancelled", job_id=job_id, execution_id=execution_id, agent_name=self.name)
                 try:
-                    await self._update_job_status(job_id, JobStatus.failed, error_message=error_message)
-                except Exception as db_error:
-                    logger.error(f"Failed to update job status in database: {db_error}")
-            
-            return AgentExecutionResult(
-                success=False,
-                error_message=error_message,
-                execution_time=execution_time
-            )
+                    await self.on_job_cancelled(job_id)
+                except Exception as e:
+                    logger.error(f"Agent cancellation hook failed: {e}", job_id=job_id)
+                raise
+                
+            except Exception as e:
+                execution_time = (datetime.now(timezone.utc) - start_time).total_seconds()
+                error_message = f"Unexpected error during job execution: {str(e)}"
+                
+                logger.error(
+                    error_message,
+                    job_id=job_id,
+                    execution_id=execution_id,
+                    exception=e,
+                    execution_time=execution_time
+                )
+                
+                usage_data = usage.to_dict() if usage.calls else None
+                
+                # Update job status to failed
+                if self._db_client:
+                    try:
+                        await self._update_job_status(job_id, JobStatus.failed, error_message=error_message, usage=usage_data)
+                    except Exception as db_error:
+                        logger.error(f"Failed to update job status in database: {db_error}")
+                
+                return AgentExecutionResult(
+                    success=False,
+                    error_message=error_message,
+                    metadata={"llm_usage": usage_data} if usage_data else None,
+                    execution_time=execution_time
+                )
+        
     
     async def _update_job_status(
         self,
@@ -301,7 +333,8 @@ class BaseAgent(ABC):
         status: JobStatus,
         result: Optional[str] = None,
         error_message: Optional[str] = None,
-        result_format: Optional[str] = None
+        result_format: Optional[str] = None,
+        usage: Optional[Dict[str, Any]] = None
     ) -> None:
         """
         Update job status in database.
@@ -312,6 +345,7 @@ class BaseAgent(ABC):
             result: Job result (if completed successfully)
             error_message: Error message (if failed)
             result_format: Format of the result data
+            usage: LLM token and cost usage of the job
         """
         if not self._db_client:
             logger.warning("Database client not initialized, cannot update job status")
@@ -329,6 +363,8 @@ class BaseAgent(ABC):
                 update_data["error_message"] = error_message
             if result_format is not None:
                 update_data["result_format"] = result_format
+            if usage is not None:
+                update_data["usage"] = usage
             
             await self._db_client.update_job(job_id, update_data)
             logger.debug(f"Updated job {job_id} status to {status.value}")
@@ -432,6 +468,19 @@ class BaseAgent(ABC):
         
         return health_status
     
+    async def on_job_cancelled(self, job_id: str) -> None:
+        """
+        Release job-specific resources of a cancelled or timed-out job.
+        
+        Called while the cancellation propagates out of execute_job; override
+        to close browser pages, temporary files or partial uploads. The job's
+        status is updated by whoever requested the cancellation (the pipeline,
+        for timeouts).
+        
+        Args:
+            job_id: ID of the cancelled job
+        """
+    
     async def cleanup(self) -> None:
         """Clean up agent resources."""
         try:
@@ -22,7 +22,7 @@ from pydantic import BaseModel
 from agent import BaseAgent, AgentExecutionResult
 from auth import get_current_user
 from models import ApiResponse
-from utils.responses import create_success_response, create_error_response
+from utils.responses import create_success_response, create_error_response, create_sse_response
 from logging_system import get_logger
 
 logger = get_logger(__name__)
@@ -49,14 +49,28 @@ def job_model(cls: Type[BaseModel]) -> Type[BaseModel]:
     
     return cls
 
-def endpoint(path: str, methods: List[str] = ["POST"], auth_required: bool = True, public: bool = False):
+def endpoint(
+    path: str,
+    methods: List[str] = ["POST"],
+    auth_required: bool = True,
+    public: bool = False,
+    streaming: bool = False
+):
     """
     Decorator to register an endpoint for an agent.
     
+    Streaming endpoints return an async iterator of text chunks, which is
+    served as Server-Sent Events. They may still return an ApiResponse
+    (e.g. a validation error) instead of a stream.
+    
     Usage:
         @endpoint("/my-agent/process", methods=["POST"], auth_required=True)
         async def process_data(self, request_data: dict, user: dict):
             return {"result": "processed"}
+        
+        @endpoint("/my-agent/stream", methods=["POST"], streaming=True)
+        async def stream_data(self, request_data: dict, user: dict):
+            return self.llm_service.query_stream(request_data["prompt"])
     """
     def decorator(func: Callable) -> Callable:
         # Store endpoint metadata on the function
@@ -65,6 +79,7 @@ def endpoint(path: str, methods: List[str] = ["POST"], auth_required: bool = Tru
             'methods': methods,
             'auth_required': auth_required,
             'public': public,
+            'streaming': streaming,
             'function_name': func.__name__
         }
         logger.debug(f"Registered endpoint {path} for function {func.__name__}")
@@ -270,7 +285,8 @@ class SelfContainedAgent(BaseAgent, metaclass=AgentMeta):
                     'path': ep['path'],
                     'methods': ep['methods'],
                     'auth_required': ep['auth_required'],
-                    'public': ep['public']
+                    'public': ep['public'],
+                    'streaming': ep.get('streaming', False)
                 }
                 for ep in self.get_endpoints()
             ],
@@ -323,6 +339,13 @@ def create_endpoint_wrapper(agent_instance: SelfContainedAgent, method: Callable
                        user_id=user.get('id') if user else None,
                        execution_time=execution_time)
             
+            # Streaming endpoints return an async iterator of text chunks
+            if endpoint_info.get('streaming') and hasattr(result, '__aiter__'):
+                return create_sse_response(result, metadata={
+                    "endpoint": endpoint_info['path'],
+                    "operation": operation_name
+                })
+            
             # All agent endpoints must return ApiResponse instances
             if not isinstance(result, ApiResponse):
                 logger.error(f"Agent endpoint {endpoint_info['path']} returned invalid type: {type(result)}. Expected ApiResponse.")
@@ -422,6 +445,9 @@ def register_agent_endpoints(app, agent_registry):
             # Update the wrapper name for better error messages
             final_endpoint.__name__ = f"{agent_name}_{method.__name__}_endpoint"
             
+            # Streaming endpoints serve Server-Sent Events, so skip response model validation
+            response_model = None if endpoint_info.get('streaming') else ApiResponse[Dict[str, Any]]
+            
             # Register with FastAPI using ApiResponse response model
             for http_method in methods:
                 app.add_api_route(
@@ -431,7 +457,7 @@ def register_agent_endpoints(app, agent_registry):
                     tags=[f"{agent_name}-agent"],
                     summary=f"{agent_name.title()} Agent - {method.__name__.replace('_', ' ').title()}",
                     description=method.__doc__ or f"{method.__name__} operation for {agent_name} agent",
-                    response_model=ApiResponse[Dict[str, Any]]
+                    response_model=response_model
                 )
                 registered_count += 1
             
@@ -451,7 +477,8 @@ def get_all_agent_info() -> Dict[str, Any]:
                     'path': ep['path'],
                     'methods': ep['methods'],
                     'auth_required': ep['auth_required'],
-                    'public': ep['public']
+                    'public': ep['public'],
+                    'streaming': ep.get('streaming', False)
                 }
                 for ep in agent_class.get_endpoints()
             ],
@@ -166,6 +166,31 @@ class SimplePromptAgent(SelfContainedAgent):
                 endpoint="/simple-prompt/process"
             )
 
+    @endpoint("/simple-prompt/stream", methods=["POST"], auth_required=True, streaming=True)
+    async def stream_prompt(self, request_data: dict, user: dict):
+        """Stream the response to a text prompt as Server-Sent Events"""
+        try:
+            job_data = validate_job_data(request_data, PromptJobData)
+        except Exception as e:
+            # Handle validation errors with proper ApiResponse format
+            return self.error_response(
+                error_message=f"Validation failed: {str(e)}",
+                message="Invalid request data",
+                endpoint="/simple-prompt/stream"
+            )
+
+        # Use custom system instruction if provided, otherwise use default
+        system_instruction = job_data.system_instruction or self._get_system_instruction()
+
+        return self.llm_service.query_stream(
+            prompt=job_data.prompt,
+            provider=job_data.provider,
+            model=job_data.model,
+            system_instruction=system_instruction,
+            temperature=job_data.temperature,
+            max_tokens=job_data.max_tokens
+        )
+
     @endpoint("/simple-prompt/info", methods=["GET"], auth_required=False)
     async def get_agent_info(self):
         """Get basic agent information including available providers"""
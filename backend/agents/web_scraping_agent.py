@@ -19,7 +19,9 @@ from pydantic import BaseModel, Field, field_validator
 from agent_framework import SelfContainedAgent, endpoint, job_model, validate_job_data
 from agent import AgentExecutionResult
 from services.google_ai_service import get_google_ai_service
+from services.token_budget import DEFAULT_OUTPUT_TOKENS, get_context_window, get_token_estimator
 from logging_system import get_logger
+from tracing import get_tracer
 
 logger = get_logger(__name__)
 
@@ -59,6 +61,9 @@ class WebScrapingJobData(BaseModel):
 class WebScrapingAgent(SelfContainedAgent):
     """Agent that scrapes websites and provides AI-powered analysis"""
     
+    # Most page content sent for analysis; pages are trimmed further if the model's context is smaller
+    MAX_ANALYSIS_CONTENT_TOKENS = 8000
+    
     def __init__(self, **kwargs):
         super().__init__(
             name="web_scraping",
@@ -164,12 +169,17 @@ Focus on extracting meaningful information and presenting it in a structured, us
 
     async def _scrape_website(self, job_data: WebScrapingJobData) -> Dict[str, Any]:
         """Scrape the website and extract content"""
+        tracer = get_tracer()
         try:
             # Fetch the main page
-            response = self.session.get(job_data.url, timeout=30)
-            response.raise_for_status()
+            with tracer.start_span("scrape.fetch", attributes={"http.url": job_data.url}) as span:
+                response = self.session.get(job_data.url, timeout=30)
+                span.set_attribute("http.status_code", response.status_code)
+                span.set_attribute("http.response_bytes", len(response.content))
+                response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            with tracer.start_span("scrape.parse", attributes={"http.url": job_data.url}):
+                soup = BeautifulSoup(response.content, 'html.parser')
             
             # Extract basic metadata
             scraped_data = {
@@ -393,11 +403,21 @@ Focus on extracting meaningful information and presenting it in a structured, us
             if extract_keywords:
                 prompt += "\n6. KEYWORDS: Extract 5-10 important keywords/topics"
             
-            # Truncate content if too long to avoid token limits
-            max_content_length = 4000
-            truncated_content = content[:max_content_length]
-            if len(content) > max_content_length:
-                logger.warning(f"Content truncated from {len(content)} to {max_content_length} characters for AI analysis")
+            # Fit the content to the token budget left by the model's context window
+            estimator = get_token_estimator()
+            content_budget = self.MAX_ANALYSIS_CONTENT_TOKENS
+            context_window = get_context_window("google")
+            if context_window:
+                content_budget = min(
+                    content_budget,
+                    context_window - estimator.estimate(prompt, "google") - DEFAULT_OUTPUT_TOKENS
+                )
+            truncated_content = estimator.truncate(content, content_budget, "google")
+            if len(truncated_content) < len(content):
+                logger.warning(
+                    f"Content truncated from {len(content)} to {len(truncated_content)} characters "
+                    f"(~{content_budget} tokens) for AI analysis"
+                )
             
             prompt += f"\n\nContent to analyze:\n\n{truncated_content}"
             
@@ -44,6 +44,7 @@ class AgentExecutionConfig:
     retry_delay_base: float = 2.0
     enable_caching: bool = True
     cache_ttl_seconds: int = 3600
+    similarity_cache_threshold: Optional[float] = None  # e.g. 0.95 to reuse near-duplicate prompts
     priority: int = 5
     memory_limit_mb: Optional[int] = None
     cpu_limit_percent: Optional[float] = None
@@ -442,6 +443,12 @@ class AgentConfigManager:
         if config.execution.max_retries < 0:
             errors.append("Max retries cannot be negative")
         
+        if config.execution.memory_limit_mb is not None and config.execution.memory_limit_mb <= 0:
+            errors.append("Memory limit must be positive")
+        
+        if config.execution.cpu_limit_percent is not None and not 0 < config.execution.cpu_limit_percent <= 100:
+            errors.append("CPU limit must be between 0 and 100 percent")
+        
         # Model validation
         if config.model.temperature < 0 or config.model.temperature > 2:
             errors.append("Model temperature must be between 0 and 2")
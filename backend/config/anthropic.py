@@ -6,6 +6,7 @@ Provides clean integration with Anthropic's Claude services.
 """
 
 import os
+import json
 import logging
 from typing import Optional, Dict, Any, List
 from dotenv import load_dotenv
@@ -24,6 +25,11 @@ class AnthropicConfig:
         self.api_key = os.getenv("ANTHROPIC_API_KEY")
         self.default_model = os.getenv("ANTHROPIC_DEFAULT_MODEL", "claude-3-5-sonnet-20241022")
         
+        # Shared rate limits for this provider (0 disables a limit)
+        self.requests_per_minute = int(os.getenv("ANTHROPIC_REQUESTS_PER_MINUTE", "50"))
+        self.tokens_per_minute = int(os.getenv("ANTHROPIC_TOKENS_PER_MINUTE", "40000"))
+        self.model_rate_limits = self._load_model_rate_limits(os.getenv("ANTHROPIC_MODEL_RATE_LIMITS"))
+        
         # Validate configuration
         self._validate_config()
         
@@ -118,6 +124,33 @@ class AnthropicConfig:
             "training_data": "Unknown"
         })
     
+    def get_context_window(self, model: Optional[str] = None) -> Optional[int]:
+        """Get the context window (prompt plus output tokens) of a model, or None if unknown."""
+        context_window = self.get_model_info(model).get("context_window")
+        return context_window if isinstance(context_window, int) else None
+    
+    def _load_model_rate_limits(self, value: Optional[str]) -> Dict[str, Dict[str, int]]:
+        """Parse per-model rate limit overrides, e.g. {"claude-3-5-haiku-20241022": {"requests_per_minute": 100}}."""
+        if not value:
+            return {}
+        try:
+            return {
+                model: {name: int(limit) for name, limit in limits.items()}
+                for model, limits in json.loads(value).items()
+            }
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring invalid ANTHROPIC_MODEL_RATE_LIMITS: {e}")
+            return {}
+    
+    def get_rate_limits(self, model: Optional[str] = None) -> Dict[str, int]:
+        """Get the requests and tokens per minute allowed for a model (0 means unlimited)."""
+        limits = {
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute
+        }
+        limits.update(self.model_rate_limits.get(model or self.default_model, {}))
+        return limits
+    
     def test_connection(self) -> Dict[str, Any]:
         """
         Test the connection to Anthropic services.
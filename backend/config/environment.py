@@ -65,7 +65,86 @@ class Settings(BaseSettings):
     google_default_model: str = Field(default="gemini-2.0-flash", description="Default Google AI model")
     
     # LLM Service settings
-    default_llm_provider: str = Field(default="google", description="Default LLM provider to use (google|openai|anthropic|grok|deepseek|llama)")
+    default_llm_provider: str = Field(default="google", description="Default LLM provider to use (google|openai|anthropic|grok|deepseek|llama|local)")
+    
+    # LLM response cache (used when an agent's execution config enables caching)
+    llm_cache_enabled: bool = Field(default=True, description="Allow agents to cache LLM responses")
+    llm_cache_max_entries: int = Field(default=1000, description="Responses kept in the in-memory LRU tier")
+    llm_cache_disk_path: Optional[str] = Field(default=None, description="SQLite file for the persistent cache tier (disabled if unset)")
+    llm_cache_disk_max_mb: int = Field(default=100, description="Size budget of the persistent cache tier")
+    llm_cache_max_temperature: float = Field(default=0.3, description="Requests above this temperature, or without one, bypass the cache")
+    llm_cache_similarity_max_entries: int = Field(default=1000, description="Prompt fingerprints kept for near-duplicate lookups")
+    
+    # LLM circuit breakers (per provider and model)
+    llm_circuit_breaker_enabled: bool = Field(default=True, description="Route around providers whose recent calls are failing")
+    llm_circuit_breaker_failure_rate: float = Field(default=0.5, description="Recent error rate that opens a breaker")
+    llm_circuit_breaker_consecutive_failures: int = Field(default=5, description="Consecutive errors that open a breaker")
+    llm_circuit_breaker_minimum_requests: int = Field(default=10, description="Requests in the window before rates are evaluated")
+    llm_circuit_breaker_slow_call_seconds: float = Field(default=60.0, description="Calls slower than this count as slow; mostly slow calls open a breaker")
+    llm_circuit_breaker_open_seconds: float = Field(default=30.0, description="Cool-down before an open breaker lets a probe through")
+    
+    # Hedged LLM requests (opt-in per query with hedge=True)
+    llm_hedge_provider: Optional[str] = Field(default=None, description="Default provider for hedge requests (the primary provider if unset)")
+    llm_hedge_model: Optional[str] = Field(default=None, description="Default model for hedge requests")
+    llm_hedge_budget_percent: float = Field(default=5.0, description="Maximum hedge requests as a percentage of hedge-eligible requests")
+    llm_hedge_min_samples: int = Field(default=20, description="Latency samples needed before hedging at the tracked p95")
+    llm_hedge_default_delay_seconds: float = Field(default=10.0, description="Hedge delay used until enough latency samples exist")
+    llm_hedge_min_delay_seconds: float = Field(default=0.5, description="Lower bound on the hedge delay")
+    
+    # Provider routing (see services/routing.py)
+    llm_routing_policy: str = Field(default="preferred", description="Default policy for choosing the provider that serves an LLM request (preferred|pinned|fastest|cheapest)")
+    llm_routing_max_error_rate: float = Field(default=0.5, description="Providers whose EWMA error rate reaches this are skipped when routing")
+    
+    # Shared HTTP connection pool for OpenAI-compatible providers (OpenAI, Grok, DeepSeek, Llama)
+    llm_http_max_connections: int = Field(default=100, description="Maximum open connections across all OpenAI-compatible providers")
+    llm_http_max_keepalive_connections: int = Field(default=20, description="Idle connections kept open for reuse")
+    llm_http_keepalive_expiry_seconds: float = Field(default=30.0, description="How long an idle connection is kept open")
+    llm_http_max_connections_per_host: int = Field(default=0, description="Concurrent requests per provider host (0 = limited only by the pool)")
+    llm_http2_enabled: bool = Field(default=True, description="Use HTTP/2 where the provider supports it (requires the h2 package)")
+    llm_http_timeout_seconds: float = Field(default=600.0, description="Read/write timeout for LLM HTTP requests")
+    llm_http_connect_timeout_seconds: float = Field(default=10.0, description="Connect timeout for LLM HTTP requests")
+    llm_http_warmup_enabled: bool = Field(default=False, description="Open connections to configured providers at startup")
+    
+    # Structured output
+    llm_native_json_mode: bool = Field(default=True, description="Request JSON from providers' native structured-output modes in query_structured")
+    
+    # Token estimation and context-window budgeting (see services/token_budget.py)
+    llm_context_overflow: str = Field(default="trim", description="What to do with requests exceeding the model's context window (trim|chunk|error|off)")
+    llm_tiktoken_enabled: bool = Field(default=False, description="Count OpenAI-family tokens exactly with tiktoken instead of the heuristic (requires the tiktoken package)")
+    
+    # Token and cost accounting (see services/usage.py)
+    llm_usage_retention_days: int = Field(default=31, description="Days of in-memory daily usage rollups kept for /pipeline/usage")
+    
+    # Prompt-prefix caching of long system instructions (see services/prefix_cache.py)
+    llm_prefix_cache_enabled: bool = Field(default=True, description="Mark long system instructions as cacheable prompt prefixes")
+    llm_prefix_cache_min_tokens: int = Field(default=1024, description="Shortest system instruction (in estimated tokens) marked as cacheable")
+    llm_prefix_cache_ttl_seconds: int = Field(default=3600, description="Lifetime of Gemini cached content created for system instructions")
+    
+    # Provider model catalogs (see services/model_registry.py)
+    llm_model_catalog_ttl_seconds: float = Field(default=3600.0, description="Age after which provider model catalogs and info are refreshed")
+    llm_model_catalog_remote_refresh: bool = Field(default=True, description="Add the models listed by provider APIs to the configured ones")
+    
+    # Aggregate provider health (see services/provider_health.py)
+    llm_provider_health_timeout_seconds: float = Field(default=5.0, description="Timeout of each provider health check")
+    llm_provider_health_cache_seconds: float = Field(default=30.0, description="How long an aggregate provider health snapshot is served")
+    llm_provider_health_refresh_seconds: float = Field(default=60.0, description="Interval of background provider health refreshes (0 disables them)")
+    
+    # Provider batch-API lane for LOW-priority and scheduled jobs (see services/batch_lane.py)
+    llm_batch_enabled: bool = Field(default=False, description="Send LLM queries of LOW-priority jobs through provider batch APIs")
+    llm_batch_scheduled_jobs: bool = Field(default=True, description="Also send LLM queries of scheduled jobs through the batch lane")
+    llm_batch_max_size: int = Field(default=100, description="Requests per provider batch before it is submitted")
+    llm_batch_max_wait_seconds: float = Field(default=30.0, description="Longest a request waits for its batch to fill before submission")
+    llm_batch_poll_interval_seconds: float = Field(default=30.0, description="Interval between provider batch status checks")
+    llm_batch_timeout_seconds: float = Field(default=86400.0, description="Give up on a provider batch after this long")
+    
+    # LLM traffic record/replay (see services/cassette.py)
+    llm_cassette_mode: str = Field(default="off", description="Record LLM traffic to, or replay it from, a cassette file (off|record|replay)")
+    llm_cassette_path: str = Field(default="cassettes/llm_traffic.ndjson.gz", description="Cassette file (gzip-compressed NDJSON)")
+    llm_cassette_latency_scale: float = Field(default=1.0, description="Multiplier applied to recorded latencies on replay (0 = no delay)")
+    
+    # Shared provider rate limits (per-provider limits live in config/<provider>.py)
+    llm_rate_limit_enabled: bool = Field(default=True, description="Throttle LLM requests to each provider's requests/tokens per minute")
+    llm_rate_limit_max_wait_seconds: float = Field(default=300.0, description="Longest a request waits for rate limit capacity (0 waits indefinitely)")
     
     # Performance settings
     max_concurrent_jobs: int = Field(default=10, description="Maximum concurrent job executions")
@@ -74,6 +153,20 @@ class Settings(BaseSettings):
     # Logging settings
     log_level: LogLevel = Field(default=LogLevel.INFO, description="Logging level")
     log_format: str = Field(default="json", description="Log format (json or text)")
+    log_sampling_enabled: bool = Field(default=True, description="Sample and rate limit high-volume debug/info logs")
+    
+    # Tracing settings
+    tracing_enabled: bool = Field(default=True, description="Record in-process tracing spans")
+    tracing_buffer_size: int = Field(default=10000, description="Number of finished spans kept in memory")
+    tracing_export_path: Optional[str] = Field(default=None, description="Optional OTLP/JSON file to append finished spans to")
+    
+    # Metrics settings
+    metrics_enabled: bool = Field(default=True, description="Record latency metrics and expose them at /metrics")
+    
+    # Event loop monitoring (stacks of blocking calls are captured in debug mode)
+    loop_monitor_enabled: bool = Field(default=True, description="Continuously measure event loop lag")
+    loop_monitor_interval_seconds: float = Field(default=0.5, description="Event loop heartbeat interval")
+    loop_block_threshold_seconds: float = Field(default=0.1, description="Lag above which the loop counts as blocked")
     
     # CORS settings
     cors_origins: List[str] = Field(default=[], description="Allowed CORS origins")
@@ -95,11 +188,47 @@ class Settings(BaseSettings):
         if isinstance(v, str):
             v = v.lower()
         
-        valid_providers = ["google", "openai", "anthropic", "grok", "deepseek", "llama"]
+        valid_providers = ["google", "openai", "anthropic", "grok", "deepseek", "llama", "local"]
         if v not in valid_providers:
             raise ValueError(f"Invalid default_llm_provider. Must be one of: {', '.join(valid_providers)}")
         return v
     
+    @field_validator('llm_routing_policy', mode='before')
+    @classmethod
+    def validate_llm_routing_policy(cls, v):
+        """Validate LLM routing policy value"""
+        if isinstance(v, str):
+            v = v.lower()
+        
+        valid_policies = ["preferred", "pinned", "fastest", "cheapest"]
+        if v not in valid_policies:
+            raise ValueError(f"Invalid llm_routing_policy. Must be one of: {', '.join(valid_policies)}")
+        return v
+    
+    @field_validator('llm_context_overflow', mode='before')
+    @classmethod
+    def validate_llm_context_overflow(cls, v):
+        """Validate LLM context overflow policy value"""
+        if isinstance(v, str):
+            v = v.lower()
+        
+        valid_policies = ["trim", "chunk", "error", "off"]
+        if v not in valid_policies:
+            raise ValueError(f"Invalid llm_context_overflow. Must be one of: {', '.join(valid_policies)}")
+        return v
+    
+    @field_validator('llm_cassette_mode', mode='before')
+    @classmethod
+    def validate_llm_cassette_mode(cls, v):
+        """Validate LLM cassette mode value"""
+        if isinstance(v, str):
+            v = v.lower()
+        
+        valid_modes = ["off", "record", "replay"]
+        if v not in valid_modes:
+            raise ValueError(f"Invalid llm_cassette_mode. Must be one of: {', '.join(valid_modes)}")
+        return v
+    
     def get_cors_origins(self) -> List[str]:
         """Get parsed CORS origins list with environment-appropriate defaults"""
         # Check for ALLOWED_ORIGINS environment variable first
@@ -206,6 +335,17 @@ def validate_required_settings() -> None:
         if not settings.google_api_key and not settings.google_cloud_project:
             logger.warning("No Google AI configuration found - Google AI features will not be available")
 
+# Per-logger sampling rules for high-volume debug/info logs. Warnings and
+# errors are always kept. Rules apply per call site and match child loggers.
+LOG_SAMPLING_RULES = {
+    # "Retrieving job", "Updating job status", query debug logs, ...
+    'database': {'sample_rate': 0.1, 'rate_per_second': 5, 'burst': 20},
+    # Two records per HTTP request from the logging middleware
+    'request': {'sample_rate': 0.25, 'rate_per_second': 20, 'burst': 50},
+    # Several records per job
+    'job_pipeline': {'rate_per_second': 10, 'burst': 50},
+}
+
 def get_logging_config() -> dict:
     """Get logging configuration dictionary"""
     settings = get_settings()
@@ -219,11 +359,20 @@ def get_logging_config() -> dict:
                 'datefmt': '%Y-%m-%d %H:%M:%S'
             }
         },
+        'filters': {
+            'sampling': {
+                '()': 'logging_system.SamplingFilter',
+                'rules': LOG_SAMPLING_RULES,
+                'always_keep_level': 'WARNING',
+                'enabled': settings.log_sampling_enabled
+            }
+        },
         'handlers': {
             'console': {
                 'class': 'logging.StreamHandler',
                 'level': settings.log_level.value,
-                'formatter': 'default'
+                'formatter': 'default',
+                'filters': ['sampling']
             }
         },
         'root': {
@@ -6,6 +6,7 @@ Provides clean integration with Google AI services without additional framework
 """
 
 import os
+import json
 import logging
 from typing import Optional, Dict, Any, List
 import google.generativeai as genai
@@ -33,6 +34,11 @@ class GoogleAIConfig:
         # Initialize Google AI authentication
         self._setup_google_ai_auth()
         
+        # Shared rate limits for this provider (0 disables a limit)
+        self.requests_per_minute = int(os.getenv("GOOGLE_REQUESTS_PER_MINUTE", "300"))
+        self.tokens_per_minute = int(os.getenv("GOOGLE_TOKENS_PER_MINUTE", "1000000"))
+        self.model_rate_limits = self._load_model_rate_limits(os.getenv("GOOGLE_MODEL_RATE_LIMITS"))
+        
         # Validate configuration
         self._validate_config()
     
@@ -96,21 +102,27 @@ class GoogleAIConfig:
         
         return config
     
-    def get_generative_model(self, model: Optional[str] = None) -> genai.GenerativeModel:
+    def get_generative_model(
+        self,
+        model: Optional[str] = None,
+        system_instruction: Optional[str] = None
+    ) -> genai.GenerativeModel:
         """
         Get a configured GenerativeModel instance for direct usage.
         
         Args:
             model: Optional model override
+            system_instruction: Optional system instruction bound to the model
             
         Returns:
             Configured GenerativeModel instance
         """
         model_name = model or self.default_model
+        model_kwargs = {"system_instruction": system_instruction} if system_instruction else {}
         
         try:
             # Create GenerativeModel using direct google.generativeai
-            model_instance = genai.GenerativeModel(model_name)
+            model_instance = genai.GenerativeModel(model_name, **model_kwargs)
             
             logger.info(f"Created GenerativeModel '{model_name}'")
             return model_instance
@@ -138,6 +150,82 @@ class GoogleAIConfig:
                 "gemini-1.0-pro"
             ]
     
+    def get_model_info(self, model: Optional[str] = None) -> Dict[str, Any]:
+        """Get information about a specific model."""
+        model_name = model or self.default_model
+        
+        # Model specifications
+        model_specs = {
+            "gemini-2.0-flash": {
+                "description": "Fast multimodal Gemini 2.0 model",
+                "context_window": 1048576,
+                "max_output": 8192,
+                "cost_per_1k_input": 0.0001,
+                "cost_per_1k_output": 0.0004,
+                "training_data": "Up to Aug 2024"
+            },
+            "gemini-1.5-pro": {
+                "description": "Gemini 1.5 model for complex reasoning over long context",
+                "context_window": 2097152,
+                "max_output": 8192,
+                "cost_per_1k_input": 0.00125,
+                "cost_per_1k_output": 0.005,
+                "training_data": "Up to Nov 2023"
+            },
+            "gemini-1.5-flash": {
+                "description": "Fast and cost-efficient Gemini 1.5 model",
+                "context_window": 1048576,
+                "max_output": 8192,
+                "cost_per_1k_input": 0.000075,
+                "cost_per_1k_output": 0.0003,
+                "training_data": "Up to Nov 2023"
+            },
+            "gemini-1.0-pro": {
+                "description": "First-generation Gemini Pro model",
+                "context_window": 32760,
+                "max_output": 8192,
+                "cost_per_1k_input": 0.0005,
+                "cost_per_1k_output": 0.0015,
+                "training_data": "Up to Feb 2023"
+            }
+        }
+        
+        return model_specs.get(model_name, {
+            "description": f"Unknown model: {model_name}",
+            "context_window": "Unknown",
+            "max_output": "Unknown",
+            "cost_per_1k_input": "Unknown",
+            "cost_per_1k_output": "Unknown",
+            "training_data": "Unknown"
+        })
+    
+    def get_context_window(self, model: Optional[str] = None) -> Optional[int]:
+        """Get the context window (prompt plus output tokens) of a model, or None if unknown."""
+        context_window = self.get_model_info(model).get("context_window")
+        return context_window if isinstance(context_window, int) else None
+    
+    def _load_model_rate_limits(self, value: Optional[str]) -> Dict[str, Dict[str, int]]:
+        """Parse per-model rate limit overrides, e.g. {"gemini-1.5-pro": {"requests_per_minute": 100}}."""
+        if not value:
+            return {}
+        try:
+            return {
+                model: {name: int(limit) for name, limit in limits.items()}
+                for model, limits in json.loads(value).items()
+            }
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring invalid GOOGLE_MODEL_RATE_LIMITS: {e}")
+            return {}
+    
+    def get_rate_limits(self, model: Optional[str] = None) -> Dict[str, int]:
+        """Get the requests and tokens per minute allowed for a model (0 means unlimited)."""
+        limits = {
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute
+        }
+        limits.update(self.model_rate_limits.get(model or self.default_model, {}))
+        return limits
+    
     def test_connection(self) -> Dict[str, Any]:
         """
         Test the connection to Google AI services using direct google.generativeai.
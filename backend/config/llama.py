@@ -6,6 +6,7 @@ Provides clean integration with Meta Llama models through OpenAI-compatible APIs
 """
 
 import os
+import json
 import logging
 from typing import Optional, Dict, Any, List
 from dotenv import load_dotenv
@@ -25,6 +26,13 @@ class LlamaConfig:
         self.default_model = os.getenv("LLAMA_DEFAULT_MODEL", "meta-llama/Llama-3-8b-chat-hf")
         self.base_url = os.getenv("LLAMA_BASE_URL", "https://api.together.xyz/v1")
         self.api_provider = os.getenv("LLAMA_API_PROVIDER", "together")
+        # Whether the endpoint accepts response_format={"type": "json_object"}
+        self.json_mode = os.getenv("LLAMA_JSON_MODE", "false").lower() == "true"
+        
+        # Shared rate limits for this provider (0 disables a limit)
+        self.requests_per_minute = int(os.getenv("LLAMA_REQUESTS_PER_MINUTE", "600"))
+        self.tokens_per_minute = int(os.getenv("LLAMA_TOKENS_PER_MINUTE", "180000"))
+        self.model_rate_limits = self._load_model_rate_limits(os.getenv("LLAMA_MODEL_RATE_LIMITS"))
         
         # Validate configuration
         self._validate_config()
@@ -208,6 +216,33 @@ class LlamaConfig:
             "size": "Unknown"
         })
     
+    def get_context_window(self, model: Optional[str] = None) -> Optional[int]:
+        """Get the context window (prompt plus output tokens) of a model, or None if unknown."""
+        context_window = self.get_model_info(model).get("context_window")
+        return context_window if isinstance(context_window, int) else None
+    
+    def _load_model_rate_limits(self, value: Optional[str]) -> Dict[str, Dict[str, int]]:
+        """Parse per-model rate limit overrides, e.g. {"meta-llama/Llama-3-70b-chat-hf": {"requests_per_minute": 100}}."""
+        if not value:
+            return {}
+        try:
+            return {
+                model: {name: int(limit) for name, limit in limits.items()}
+                for model, limits in json.loads(value).items()
+            }
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring invalid LLAMA_MODEL_RATE_LIMITS: {e}")
+            return {}
+    
+    def get_rate_limits(self, model: Optional[str] = None) -> Dict[str, int]:
+        """Get the requests and tokens per minute allowed for a model (0 means unlimited)."""
+        limits = {
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute
+        }
+        limits.update(self.model_rate_limits.get(model or self.default_model, {}))
+        return limits
+    
     def test_connection(self) -> Dict[str, Any]:
         """
         Test the connection to Meta Llama services.
@@ -0,0 +1,214 @@
+"""
+Local Mock LLM Configuration Module
+
+This module handles configuration for the local mock LLM provider used to
+benchmark the job pipeline, scheduler and HTTP API without network access.
+Responses are deterministic (or templated) and latency, errors, 429s and
+streaming are simulated from the settings below.
+"""
+
+import os
+import json
+import logging
+from typing import Optional, Dict, Any, List
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Supported latency distributions for simulated responses
+LATENCY_DISTRIBUTIONS = ["fixed", "uniform", "normal", "lognormal", "exponential"]
+
+DEFAULT_RESPONSE_TEMPLATE = "[{model}] Response to prompt {prompt_hash}: {prompt_excerpt}"
+
+
+def is_local_llm_enabled() -> bool:
+    """Whether the local mock provider has been opted into (never on by default)."""
+    return os.getenv("LOCAL_LLM_ENABLED", "false").lower() in ("1", "true", "yes", "on")
+
+
+class LocalConfig:
+    """Configuration class for the local mock LLM provider."""
+
+    def __init__(self):
+        """Initialize local mock configuration from environment variables."""
+        self.enabled = is_local_llm_enabled()
+        self.default_model = os.getenv("LOCAL_LLM_DEFAULT_MODEL", "local-echo")
+        self.response_template = os.getenv("LOCAL_LLM_RESPONSE_TEMPLATE", DEFAULT_RESPONSE_TEMPLATE)
+
+        # Simulated latency in milliseconds
+        self.latency_distribution = os.getenv("LOCAL_LLM_LATENCY_DISTRIBUTION", "fixed").lower()
+        self.latency_ms = float(os.getenv("LOCAL_LLM_LATENCY_MS", "50"))
+        self.latency_stddev_ms = float(os.getenv("LOCAL_LLM_LATENCY_STDDEV_MS", "0"))
+        self.latency_min_ms = float(os.getenv("LOCAL_LLM_LATENCY_MIN_MS", "0"))
+        self.latency_max_ms = float(os.getenv("LOCAL_LLM_LATENCY_MAX_MS", "0"))
+
+        # Simulated failures (fractions of requests, 0.0-1.0)
+        self.error_rate = float(os.getenv("LOCAL_LLM_ERROR_RATE", "0"))
+        self.rate_limit_rate = float(os.getenv("LOCAL_LLM_RATE_LIMIT_RATE", "0"))
+        self.retry_after_seconds = float(os.getenv("LOCAL_LLM_RETRY_AFTER_SECONDS", "1"))
+
+        # Streaming
+        self.stream_chunk_chars = int(os.getenv("LOCAL_LLM_STREAM_CHUNK_CHARS", "16"))
+        self.stream_chunk_delay_ms = float(os.getenv("LOCAL_LLM_STREAM_CHUNK_DELAY_MS", "5"))
+
+        # Time from batch submission until its results are available
+        self.batch_latency_ms = float(os.getenv("LOCAL_LLM_BATCH_LATENCY_MS", "1000"))
+
+        # Seed for the latency/error random stream (empty = nondeterministic)
+        seed = os.getenv("LOCAL_LLM_SEED", "")
+        self.seed = int(seed) if seed else None
+
+        # Shared rate limits for this provider (0 disables a limit)
+        self.requests_per_minute = int(os.getenv("LOCAL_REQUESTS_PER_MINUTE", "0"))
+        self.tokens_per_minute = int(os.getenv("LOCAL_TOKENS_PER_MINUTE", "0"))
+        self.model_rate_limits = self._load_model_rate_limits(os.getenv("LOCAL_MODEL_RATE_LIMITS"))
+
+        # Validate configuration
+        self._validate_config()
+
+        logger.info(f"Local mock LLM configuration initialized with model: {self.default_model}")
+
+    def _validate_config(self) -> None:
+        """Validate the local mock configuration."""
+        if not self.enabled:
+            raise ValueError(
+                "LOCAL_LLM_ENABLED must be true to use the local mock LLM provider"
+            )
+
+        if self.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"Invalid LOCAL_LLM_LATENCY_DISTRIBUTION '{self.latency_distribution}'. "
+                f"Must be one of: {', '.join(LATENCY_DISTRIBUTIONS)}"
+            )
+
+        for name, rate in (("LOCAL_LLM_ERROR_RATE", self.error_rate),
+                           ("LOCAL_LLM_RATE_LIMIT_RATE", self.rate_limit_rate)):
+            if not 0.0 <= rate <= 1.0:
+                raise ValueError(f"{name} must be between 0.0 and 1.0")
+
+        if self.latency_ms < 0 or self.stream_chunk_chars < 1:
+            raise ValueError("LOCAL_LLM_LATENCY_MS must be >= 0 and LOCAL_LLM_STREAM_CHUNK_CHARS >= 1")
+
+    def get_available_models(self) -> List[str]:
+        """Get list of local mock models."""
+        return [
+            "local-echo",
+            "local-large-context",
+        ]
+
+    def get_model_info(self, model: Optional[str] = None) -> Dict[str, Any]:
+        """Get information about a specific model."""
+        model_name = model or self.default_model
+
+        # Model specifications (no cost; context windows mirror common hosted models)
+        model_specs = {
+            "local-echo": {
+                "description": "Deterministic mock model for offline benchmarks and tests",
+                "context_window": 128000,
+                "max_output": 8192,
+                "cost_per_1k_input": 0.0,
+                "cost_per_1k_output": 0.0,
+                "capabilities": ["text_generation", "structured_output", "streaming"],
+                "type": "mock"
+            },
+            "local-large-context": {
+                "description": "Deterministic mock model with a long context window",
+                "context_window": 1048576,
+                "max_output": 8192,
+                "cost_per_1k_input": 0.0,
+                "cost_per_1k_output": 0.0,
+                "capabilities": ["text_generation", "structured_output", "streaming"],
+                "type": "mock"
+            }
+        }
+
+        return model_specs.get(model_name, {
+            "description": f"Local mock model: {model_name}",
+            "context_window": 128000,
+            "max_output": 8192,
+            "cost_per_1k_input": 0.0,
+            "cost_per_1k_output": 0.0,
+            "capabilities": ["text_generation"],
+            "type": "mock"
+        })
+
+    def get_context_window(self, model: Optional[str] = None) -> Optional[int]:
+        """Get the context window (prompt plus output tokens) of a model, or None if unknown."""
+        context_window = self.get_model_info(model).get("context_window")
+        return context_window if isinstance(context_window, int) else None
+
+    def _load_model_rate_limits(self, value: Optional[str]) -> Dict[str, Dict[str, int]]:
+        """Parse per-model rate limit overrides, e.g. {"local-echo": {"requests_per_minute": 100}}."""
+        if not value:
+            return {}
+        try:
+            return {
+                model: {name: int(limit) for name, limit in limits.items()}
+                for model, limits in json.loads(value).items()
+            }
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring invalid LOCAL_MODEL_RATE_LIMITS: {e}")
+            return {}
+
+    def get_rate_limits(self, model: Optional[str] = None) -> Dict[str, int]:
+        """Get the requests and tokens per minute allowed for a model (0 means unlimited)."""
+        limits = {
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute
+        }
+        limits.update(self.model_rate_limits.get(model or self.default_model, {}))
+        return limits
+
+    def get_simulation_settings(self) -> Dict[str, Any]:
+        """Get the latency and failure simulation settings."""
+        return {
+            "latency_distribution": self.latency_distribution,
+            "latency_ms": self.latency_ms,
+            "latency_stddev_ms": self.latency_stddev_ms,
+            "latency_min_ms": self.latency_min_ms,
+            "latency_max_ms": self.latency_max_ms,
+            "error_rate": self.error_rate,
+            "rate_limit_rate": self.rate_limit_rate,
+            "retry_after_seconds": self.retry_after_seconds,
+            "stream_chunk_chars": self.stream_chunk_chars,
+            "stream_chunk_delay_ms": self.stream_chunk_delay_ms,
+            "batch_latency_ms": self.batch_latency_ms,
+            "seed": self.seed
+        }
+
+    def test_connection(self) -> Dict[str, Any]:
+        """
+        Test the local mock provider (always reachable when enabled).
+
+        Returns:
+            Dictionary with connection test results
+        """
+        if not self.enabled:
+            return {
+                "status": "error",
+                "error": "Local mock LLM provider is disabled",
+                "service": "Local",
+                "provider": "Local"
+            }
+
+        return {
+            "status": "success",
+            "service": "Local",
+            "provider": "Local",
+            "model": self.default_model
+        }
+
+
+# Global local mock configuration instance
+local_config = None
+
+
+def get_local_config() -> LocalConfig:
+    """Get the global local mock configuration instance with lazy initialization."""
+    global local_config
+    if local_config is None:
+        local_config = LocalConfig()
+    return local_config
@@ -6,6 +6,7 @@ Provides clean integration with OpenAI services.
 """
 
 import os
+import json
 import logging
 from typing import Optional, Dict, Any, List
 from dotenv import load_dotenv
@@ -15,6 +16,13 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Context windows of available models not covered by get_model_info
+CONTEXT_WINDOWS = {
+    "gpt-4-turbo-preview": 128000,
+    "gpt-4-32k": 32768,
+    "gpt-3.5-turbo-16k": 16385,
+}
+
 
 class OpenAIConfig:
     """Configuration class for OpenAI setup."""
@@ -26,6 +34,11 @@ class OpenAIConfig:
         self.organization = os.getenv("OPENAI_ORGANIZATION")  # Optional
         self.project = os.getenv("OPENAI_PROJECT")  # Optional
         
+        # Shared rate limits for this provider (0 disables a limit)
+        self.requests_per_minute = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500"))
+        self.tokens_per_minute = int(os.getenv("OPENAI_TOKENS_PER_MINUTE", "200000"))
+        self.model_rate_limits = self._load_model_rate_limits(os.getenv("OPENAI_MODEL_RATE_LIMITS"))
+        
         # Validate configuration
         self._validate_config()
         
@@ -121,6 +134,34 @@ class OpenAIConfig:
             "training_data": "Unknown"
         })
     
+    def get_context_window(self, model: Optional[str] = None) -> Optional[int]:
+        """Get the context window (prompt plus output tokens) of a model, or None if unknown."""
+        model_name = model or self.default_model
+        context_window = CONTEXT_WINDOWS.get(model_name) or self.get_model_info(model_name).get("context_window")
+        return context_window if isinstance(context_window, int) else None
+    
+    def _load_model_rate_limits(self, value: Optional[str]) -> Dict[str, Dict[str, int]]:
+        """Parse per-model rate limit overrides, e.g. {"gpt-4o": {"requests_per_minute": 100}}."""
+        if not value:
+            return {}
+        try:
+            return {
+                model: {name: int(limit) for name, limit in limits.items()}
+                for model, limits in json.loads(value).items()
+            }
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring invalid OPENAI_MODEL_RATE_LIMITS: {e}")
+            return {}
+    
+    def get_rate_limits(self, model: Optional[str] = None) -> Dict[str, int]:
+        """Get the requests and tokens per minute allowed for a model (0 means unlimited)."""
+        limits = {
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute
+        }
+        limits.update(self.model_rate_limits.get(model or self.default_model, {}))
+        return limits
+    
     def test_connection(self) -> Dict[str, Any]:
         """
         Test the connection to OpenAI services.
@@ -186,7 +186,7 @@ class DatabaseClient:
             db_logger.log_query("SELECT", "jobs", duration, error=str(e))
             raise
     
-    async def update_job_status(self, job_id: str, status: str, result: Optional[str] = None, error_message: Optional[str] = None, result_format: Optional[str] = None) -> Dict[str, Any]:
+    async def update_job_status(self, job_id: str, status: str, result: Optional[str] = None, error_message: Optional[str] = None, result_format: Optional[str] = None, usage: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Update job status and optionally set result or error.
         
@@ -196,6 +196,7 @@ class DatabaseClient:
             result: Optional result data for completed jobs
             error_message: Optional error message for failed jobs
             result_format: Optional format of the result data
+            usage: Optional LLM token and cost usage of the job
             
         Returns:
             Updated job data
@@ -218,6 +219,9 @@ class DatabaseClient:
         if result_format is not None:
             update_data["result_format"] = result_format
         
+        if usage is not None:
+            update_data["usage"] = usage
+        
         try:
             start_time = time.time()
             response = (
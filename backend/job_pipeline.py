@@ -14,7 +14,7 @@ import json
 import time
 import uuid
 from asyncio import Queue, Task
-from typing import Dict, Any, Optional, List, Callable, Set
+from typing import Dict, Any, Optional, List, Callable, Set, Tuple
 from datetime import datetime, timedelta, timezone
 from enum import Enum
 from dataclasses import dataclass, field
@@ -22,11 +22,26 @@ from dataclasses import dataclass, field
 from models import JobStatus
 from database import get_database_operations
 from agent import BaseAgent, AgentExecutionResult, get_agent_registry
+from config.agent import AgentConfig
 from agent_framework import get_registered_agents, validate_job_data
 from logging_system import get_logger
+from tracing import SpanContext, get_tracer, get_current_span_context
+from metrics import JOB_QUEUE_WAIT, JOB_EXECUTION_DURATION, JOB_CANCELLATION_LATENCY, JOB_TIMEOUTS
+from job_progress import JobProgressRegistry, bind_job_progress
+from services.batch_lane import BatchRequest, get_batch_lane, llm_batch_mode
+from services.rate_limiter import llm_request_priority
+from services.routing import bind_routing_log
+from services.usage import UsageLedger, bind_usage_ledger
 
 logger = get_logger(__name__)
 
+class JobTimeoutError(Exception):
+    """A job's execution exceeded its agent's timeout"""
+    
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
 class JobPriority(int, Enum):
     """Job priority levels"""
     LOW = 0
@@ -48,6 +63,9 @@ class JobTask:
     scheduled_at: Optional[datetime] = None
     tags: Optional[List[str]] = None
     metadata: Optional[Dict[str, Any]] = None
+    queued_at: Optional[datetime] = None
+    trace_parent: Optional[SpanContext] = None
+    usage: Optional[UsageLedger] = None
 
     def __post_init__(self):
         if self.scheduled_at is None:
@@ -63,59 +81,263 @@ class JobTask:
         """Check if job can be retried"""
         return self.retry_count < self.max_retries
 
+class _JobMetricsRecord:
+    """Compact per-job metrics record stored in a ring buffer slot"""
+    
+    __slots__ = (
+        'job_id', 'start_time', 'end_time', 'status', 'success', 'execution_time', 'retries', 'llm_routing', 'llm_usage',
+        'llm_batches'
+    )
+    
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.start_time: float = time.time()
+        self.end_time: Optional[float] = None
+        self.status: JobStatus = JobStatus.running
+        self.success: Optional[bool] = None
+        self.execution_time: Optional[float] = None
+        self.retries: int = 0
+        self.llm_routing: Optional[List[Dict[str, Any]]] = None
+        self.llm_usage: Optional[Dict[str, Any]] = None
+        self.llm_batches: Optional[List[Dict[str, Any]]] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'start_time': datetime.fromtimestamp(self.start_time, timezone.utc),
+            'status': self.status,
+            'retries': self.retries
+        }
+        if self.end_time is not None:
+            data.update({
+                'end_time': datetime.fromtimestamp(self.end_time, timezone.utc),
+                'success': self.success,
+                'execution_time': self.execution_time
+            })
+        if self.llm_routing:
+            data['llm_routing'] = self.llm_routing
+        if self.llm_usage:
+            data['llm_usage'] = self.llm_usage
+        if self.llm_batches:
+            data['llm_batches'] = self.llm_batches
+        return data
+
+class JobMetricsBuffer:
+    """
+    Fixed-capacity ring buffer of per-job metrics.
+    
+    Records are written into pre-allocated slots in arrival order; once full,
+    the oldest record's slot is reused, so memory stays bounded without any
+    periodic sorting. Lookups by job id go through an index of slot positions.
+    Read access is mapping-like and returns dict snapshots of the records.
+    """
+    
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._slots: List[Optional[_JobMetricsRecord]] = [None] * capacity
+        self._index: Dict[str, int] = {}
+        self._next_slot = 0
+    
+    def add(self, job_id: str) -> _JobMetricsRecord:
+        """Start a new record for a job, evicting the oldest if full"""
+        existing = self.get_record(job_id)
+        if existing is not None:
+            # Re-executions (retries) keep their slot and retry count
+            existing.start_time = time.time()
+            existing.end_time = None
+            existing.status = JobStatus.running
+            return existing
+        
+        slot = self._next_slot
+        evicted = self._slots[slot]
+        if evicted is not None:
+            self._index.pop(evicted.job_id, None)
+        
+        record = _JobMetricsRecord(job_id)
+        self._slots[slot] = record
+        self._index[job_id] = slot
+        self._next_slot = (slot + 1) % self.capacity
+        return record
+    
+    def get_record(self, job_id: str) -> Optional[_JobMetricsRecord]:
+        slot = self._index.get(job_id)
+        return self._slots[slot] if slot is not None else None
+    
+    def get(self, job_id: str, default: Any = None) -> Optional[Dict[str, Any]]:
+        record = self.get_record(job_id)
+        return record.to_dict() if record is not None else default
+    
+    def __getitem__(self, job_id: str) -> Dict[str, Any]:
+        record = self.get_record(job_id)
+        if record is None:
+            raise KeyError(job_id)
+        return record.to_dict()
+    
+    def __contains__(self, job_id: object) -> bool:
+        return job_id in self._index
+    
+    def __len__(self) -> int:
+        return len(self._index)
+
+class SlidingWindowCounter:
+    """
+    Per-second event counts over a fixed horizon.
+    
+    Each second maps to a slot in a circular array; a slot is reset lazily
+    the first time it is written in a new second. Window totals sum only the
+    slots whose second falls inside the window.
+    """
+    
+    def __init__(self, horizon_seconds: int = 900, clock: Callable[[], float] = time.monotonic):
+        self.horizon = horizon_seconds
+        self._clock = clock
+        self._seconds: List[int] = [-1] * horizon_seconds
+        self._counts: Dict[str, List[int]] = {}
+    
+    def add(self, event: str, amount: int = 1):
+        now = int(self._clock())
+        slot = now % self.horizon
+        if self._seconds[slot] != now:
+            self._seconds[slot] = now
+            for counts in self._counts.values():
+                counts[slot] = 0
+        counts = self._counts.get(event)
+        if counts is None:
+            counts = self._counts[event] = [0] * self.horizon
+        counts[slot] += amount
+    
+    def total(self, event: str, window_seconds: int) -> int:
+        counts = self._counts.get(event)
+        if counts is None:
+            return 0
+        oldest = int(self._clock()) - min(window_seconds, self.horizon)
+        return sum(
+            count for second, count in zip(self._seconds, counts)
+            if second > oldest and count
+        )
+
+# Sliding windows reported in pipeline metrics
+RATE_WINDOWS = {'1m': 60, '5m': 300, '15m': 900}
+
 class JobExecutionStatus:
     """Track job execution status and metrics"""
     
-    def __init__(self):
+    def __init__(self, metrics_capacity: int = 1000):
         self.active_jobs: Set[str] = set()
         self.completed_jobs: int = 0
         self.failed_jobs: int = 0
         self.retried_jobs: int = 0
+        self.cancelled_jobs: int = 0
+        self.cancellation_latency_total: float = 0.0
+        self.cancellation_latency_max: float = 0.0
+        self.timeouts_by_agent: Dict[str, int] = {}
         self.start_time: datetime = datetime.now(timezone.utc)
-        self.job_metrics: Dict[str, Dict[str, Any]] = {}
+        self.job_metrics = JobMetricsBuffer(metrics_capacity)
+        self.rates = SlidingWindowCounter(max(RATE_WINDOWS.values()))
 
     def start_job(self, job_id: str):
         """Mark job as started"""
         self.active_jobs.add(job_id)
-        self.job_metrics[job_id] = {
-            'start_time': datetime.now(timezone.utc),
-            'status': JobStatus.running
-        }
+        self.job_metrics.add(job_id)
 
     def complete_job(self, job_id: str, success: bool, execution_time: float):
         """Mark job as completed"""
         self.active_jobs.discard(job_id)
         if success:
             self.completed_jobs += 1
+            self.rates.add('completed')
         else:
             self.failed_jobs += 1
+            self.rates.add('failed')
         
-        if job_id in self.job_metrics:
-            self.job_metrics[job_id].update({
-                'end_time': datetime.now(timezone.utc),
-                'success': success,
-                'execution_time': execution_time,
-                'status': JobStatus.completed if success else JobStatus.failed
-            })
+        record = self.job_metrics.get_record(job_id)
+        if record is not None:
+            record.end_time = time.time()
+            record.success = success
+            record.execution_time = execution_time
+            record.status = JobStatus.completed if success else JobStatus.failed
+
+    def cancel_job(self, job_id: str, execution_time: Optional[float], latency: float):
+        """Mark job as cancelled, with the time it took to stop after the request"""
+        self.active_jobs.discard(job_id)
+        self.cancelled_jobs += 1
+        self.cancellation_latency_total += latency
+        self.cancellation_latency_max = max(self.cancellation_latency_max, latency)
+        
+        record = self.job_metrics.get_record(job_id)
+        if record is not None:
+            record.end_time = time.time()
+            record.success = False
+            record.execution_time = execution_time
+            record.status = JobStatus.cancelled
+
+    def record_timeout(self, agent_name: str):
+        """Count a job execution that exceeded its agent's timeout"""
+        self.timeouts_by_agent[agent_name] = self.timeouts_by_agent.get(agent_name, 0) + 1
+
+    def record_routing(self, job_id: str, routing_log: List[Dict[str, Any]]):
+        """Attach the job's LLM routing decisions to its metrics record"""
+        record = self.job_metrics.get_record(job_id)
+        if record is not None:
+            record.llm_routing = routing_log
+
+    def record_batches(self, job_id: str, batches: List[Dict[str, Any]]):
+        """Attach the provider batches the job waited for to its metrics record"""
+        record = self.job_metrics.get_record(job_id)
+        if record is not None:
+            record.llm_batches = batches
+
+    def record_usage(self, job_id: str, usage: Dict[str, Any]):
+        """Attach the job's LLM token and cost usage to its metrics record"""
+        record = self.job_metrics.get_record(job_id)
+        if record is not None:
+            record.llm_usage = usage
 
     def retry_job(self, job_id: str):
         """Mark job as retried"""
         self.retried_jobs += 1
-        if job_id in self.job_metrics:
-            self.job_metrics[job_id]['retries'] = self.job_metrics[job_id].get('retries', 0) + 1
+        self.rates.add('retried')
+        record = self.job_metrics.get_record(job_id)
+        if record is not None:
+            record.retries += 1
+
+    def get_rates(self) -> Dict[str, Dict[str, float]]:
+        """Get throughput and success rates over the 1m/5m/15m sliding windows"""
+        rates = {}
+        for label, window in RATE_WINDOWS.items():
+            completed = self.rates.total('completed', window)
+            failed = self.rates.total('failed', window)
+            processed = completed + failed
+            minutes = window / 60
+            rates[label] = {
+                'jobs_per_minute': processed / minutes,
+                'failures_per_minute': failed / minutes,
+                'retries_per_minute': self.rates.total('retried', window) / minutes,
+                'success_rate': (completed / processed) * 100 if processed else 0.0
+            }
+        return rates
 
     def get_metrics(self) -> Dict[str, Any]:
         """Get current pipeline metrics"""
         uptime = datetime.now(timezone.utc) - self.start_time
+        rates = self.get_rates()
         return {
             'active_jobs': len(self.active_jobs),
             'completed_jobs': self.completed_jobs,
             'failed_jobs': self.failed_jobs,
             'retried_jobs': self.retried_jobs,
+            'cancelled_jobs': self.cancelled_jobs,
+            'cancellation_latency_ms': {
+                'mean': round(self.cancellation_latency_total / self.cancelled_jobs * 1000, 1) if self.cancelled_jobs else 0.0,
+                'max': round(self.cancellation_latency_max * 1000, 1)
+            },
+            'timed_out_jobs': sum(self.timeouts_by_agent.values()),
+            'timeouts_by_agent': dict(self.timeouts_by_agent),
             'total_processed': self.completed_jobs + self.failed_jobs,
             'success_rate': (self.completed_jobs / max(1, self.completed_jobs + self.failed_jobs)) * 100,
             'uptime_seconds': uptime.total_seconds(),
-            'jobs_per_minute': (self.completed_jobs + self.failed_jobs) / max(1, uptime.total_seconds() / 60)
+            'jobs_per_minute': rates['1m']['jobs_per_minute'],
+            'rates': rates,
+            'tracked_jobs': len(self.job_metrics)
         }
 
 class JobPipeline:
@@ -129,6 +351,7 @@ class JobPipeline:
     - Automatic retry mechanism for failed jobs
     - Comprehensive error handling and logging
     - Job scheduling and delayed execution
+    - Jobs waiting for provider batches are parked without holding a worker
     - Performance monitoring and metrics
     """
 
@@ -137,7 +360,10 @@ class JobPipeline:
         max_concurrent_jobs: int = 5,
         max_queue_size: int = 1000,
         cleanup_interval: int = 300,  # 5 minutes
-        retry_delay_base: float = 2.0  # exponential backoff base
+        retry_delay_base: float = 2.0,  # exponential backoff base
+        metrics_capacity: int = 1000,
+        cancel_timeout: float = 10.0,
+        job_timeout: float = 300.0
     ):
         """
         Initialize the job pipeline.
@@ -147,19 +373,31 @@ class JobPipeline:
             max_queue_size: Maximum size of the job queue
             cleanup_interval: Interval in seconds for cleanup operations
             retry_delay_base: Base delay for exponential backoff on retries
+            metrics_capacity: Number of per-job metrics records kept in memory
+            cancel_timeout: Seconds cancel_job waits for a running job to stop
+            job_timeout: Execution timeout for agents without an AgentConfig
         """
         self.max_concurrent_jobs = max_concurrent_jobs
         self.max_queue_size = max_queue_size
         self.cleanup_interval = cleanup_interval
         self.retry_delay_base = retry_delay_base
+        self.cancel_timeout = cancel_timeout
+        self.job_timeout = job_timeout
         
         # Job queue with priority support
         self.job_queue: Queue[JobTask] = Queue(maxsize=max_queue_size)
         self.scheduled_jobs: List[JobTask] = []
+        # Jobs waiting in job_queue; cancelled ones are dropped when dequeued
+        self.queued_jobs: Dict[str, JobTask] = {}
         
         # Active job tracking
         self.active_tasks: Dict[str, Task] = {}
-        self.status_tracker = JobExecutionStatus()
+        # Jobs parked on provider batches: job id -> (provider, request, future) per batched query
+        self.parked_jobs: Dict[str, List[Tuple[str, BatchRequest, asyncio.Future]]] = {}
+        # Cancellation requests still to be completed: job id -> perf_counter time of the request
+        self.cancel_requests: Dict[str, float] = {}
+        self.status_tracker = JobExecutionStatus(metrics_capacity)
+        self.progress = JobProgressRegistry(metrics_capacity)
         
         # Pipeline state
         self.is_running = False
@@ -286,7 +524,8 @@ class JobPipeline:
                 max_retries=max_retries,
                 scheduled_at=scheduled_at,
                 tags=tags,
-                metadata=metadata
+                metadata=metadata,
+                trace_parent=get_current_span_context()
             )
 
             # Check if job should be scheduled for later
@@ -296,7 +535,7 @@ class JobPipeline:
                 logger.info(f"Job {job_id} scheduled for {scheduled_at}")
             else:
                 # Add to immediate execution queue
-                await self.job_queue.put(job_task)
+                await self._enqueue(job_task)
                 logger.info(f"Job {job_id} queued for immediate execution")
 
             return True
@@ -307,6 +546,11 @@ class JobPipeline:
                                         error_message=f"Job submission failed: {str(e)}")
             return False
 
+    async def _enqueue(self, job_task: JobTask):
+        job_task.queued_at = datetime.now(timezone.utc)
+        self.queued_jobs[job_task.job_id] = job_task
+        await self.job_queue.put(job_task)
+
     async def _worker(self, worker_name: str):
         """Job processing worker"""
         logger.info(f"Worker {worker_name} started")
@@ -315,9 +559,33 @@ class JobPipeline:
             try:
                 # Get next job from queue
                 job_task = await asyncio.wait_for(self.job_queue.get(), timeout=1.0)
+                self.queued_jobs.pop(job_task.job_id, None)
+                
+                # Jobs cancelled while queued never take the worker
+                if self.cancel_requests.pop(job_task.job_id, None) is not None:
+                    logger.info(f"Dropped cancelled job {job_task.job_id} from the queue", worker=worker_name)
+                    continue
+                
+                # Execute the job in its own task so cancel_job can stop it
+                parked = asyncio.Event()
+                task = asyncio.create_task(self._execute_job_task(job_task, worker_name, parked))
+                self.active_tasks[job_task.job_id] = task
+                parked_wait = asyncio.create_task(parked.wait())
+                try:
+                    await asyncio.wait({task, parked_wait}, return_when=asyncio.FIRST_COMPLETED)
+                except asyncio.CancelledError:
+                    task.cancel()
+                    raise
+                finally:
+                    parked_wait.cancel()
                 
-                # Execute the job
-                await self._execute_job_task(job_task, worker_name)
+                if not task.done():
+                    # Waiting for a provider batch: the lane's poller resumes the job, the worker moves on
+                    task.add_done_callback(self._parked_job_done)
+                    logger.info(f"Job {job_task.job_id} parked on a provider batch", worker=worker_name)
+                    continue
+                if not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
                 
             except asyncio.TimeoutError:
                 # No jobs in queue, continue polling
@@ -350,7 +618,7 @@ class JobPipeline:
                 # Queue ready jobs
                 for job_task in ready_jobs:
                     try:
-                        await self.job_queue.put(job_task)
+                        await self._enqueue(job_task)
                         logger.info(f"Scheduled job {job_task.job_id} moved to execution queue")
                     except Exception as e:
                         logger.error(f"Failed to queue scheduled job {job_task.job_id}", exception=e)
@@ -364,10 +632,59 @@ class JobPipeline:
 
         logger.info("Job scheduler stopped")
 
-    async def _execute_job_task(self, job_task: JobTask, worker_name: str):
-        """Execute a single job task"""
+    @staticmethod
+    def _parked_job_done(task: Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Parked job failed", exception=task.exception())
+
+    def _park_job(
+        self,
+        job_id: str,
+        parked: Optional[asyncio.Event],
+        provider: str,
+        request: BatchRequest,
+        future: asyncio.Future
+    ):
+        """Track a batched query of a job and release the job's worker"""
+        self.parked_jobs.setdefault(job_id, []).append((provider, request, future))
+        if parked is not None:
+            parked.set()
+
+    async def _execute_job_task(self, job_task: JobTask, worker_name: str, parked: Optional[asyncio.Event] = None):
+        """Execute a single job task inside a tracing span covering queue wait and execution"""
+        tracer = get_tracer()
+        dequeued_ns = time.time_ns()
+        queued_ns = int(job_task.queued_at.timestamp() * 1_000_000_000) if job_task.queued_at else dequeued_ns
+        
+        attributes = {
+            "job.id": job_task.job_id,
+            "agent.name": job_task.agent_name,
+            "job.priority": int(job_task.priority),
+            "job.retry_count": job_task.retry_count,
+            "worker": worker_name
+        }
+        JOB_QUEUE_WAIT.observe(max(dequeued_ns - queued_ns, 0) / 1_000_000_000, agent=job_task.agent_name)
+        
+        with tracer.start_span("job", parent=job_task.trace_parent, start_time_ns=queued_ns, attributes=attributes):
+            tracer.record_span("job.queue_wait", start_time_ns=queued_ns, end_time_ns=dequeued_ns,
+                               attributes={"job.id": job_task.job_id})
+            start_time = time.perf_counter()
+            outcome = await self._run_job_task(job_task, worker_name, parked)
+            JOB_EXECUTION_DURATION.observe(
+                time.perf_counter() - start_time,
+                agent=job_task.agent_name,
+                outcome=outcome
+            )
+
+    async def _run_job_task(self, job_task: JobTask, worker_name: str, parked: Optional[asyncio.Event] = None) -> str:
+        """
+        Execute a single job task, returning its outcome (completed, failed, retried or cancelled)
+        
+        ``parked`` is set when the job starts waiting for a provider batch, which frees its worker.
+        """
         job_id = job_task.job_id
         start_time = time.time()
+        outcome = "failed"
         
         try:
             logger.info(
@@ -398,8 +715,33 @@ class JobPipeline:
             # Execute the job
             logger.info("Starting job execution", job_id=job_task.job_id, agent_name=job_task.agent_name)
             
+            # Token usage accumulates across the job's retries
+            if job_task.usage is None:
+                job_task.usage = UsageLedger(
+                    user_id=job_task.user_id,
+                    agent=job_task.agent_name,
+                    schedule_id=(job_task.metadata or {}).get("schedule_id")
+                )
+            
+            use_batch_lane = self._use_batch_lane(job_task)
             try:
-                result = await agent.execute_job(job_task.job_id, validated_data)
+                # LLM calls queue for provider rate limits in job priority order;
+                # non-urgent jobs' calls wait for discounted provider batches
+                with bind_job_progress(self.progress.create(job_id)), \
+                        llm_request_priority(job_task.priority), \
+                        llm_batch_mode(
+                            use_batch_lane,
+                            on_wait=lambda provider, request, future: self._park_job(job_id, parked, provider, request, future)
+                        ), \
+                        bind_routing_log() as routing_log, \
+                        bind_usage_ledger(job_task.usage):
+                    result = await self._execute_with_timeout(agent, job_task, validated_data, use_batch_lane)
+                
+                if routing_log:
+                    result.metadata["llm_routing"] = routing_log
+                    self.status_tracker.record_routing(job_id, routing_log)
+                if job_task.usage.calls:
+                    self.status_tracker.record_usage(job_id, job_task.usage.to_dict())
                 
                 logger.info("Job execution completed", job_id=job_task.job_id, agent_name=job_task.agent_name)
                 
@@ -424,10 +766,12 @@ class JobPipeline:
                     job_id, 
                     JobStatus.completed, 
                     result=result_text,
-                    result_format=result.result_format
+                    result_format=result.result_format,
+                    usage=self._job_usage(job_task)
                 )
                 
                 self.status_tracker.complete_job(job_id, True, execution_time)
+                outcome = "completed"
                 
                 logger.info(
                     f"Job {job_id} completed successfully",
@@ -440,11 +784,13 @@ class JobPipeline:
                 # Job failed, check if we should retry
                 if job_task.can_retry:
                     await self._retry_job(job_task, result.error_message)
+                    outcome = "retried"
                 else:
                     await self._update_job_status(
                         job_id,
                         JobStatus.failed,
-                        error_message=result.error_message
+                        error_message=result.error_message,
+                        usage=self._job_usage(job_task)
                     )
                     
                     self.status_tracker.complete_job(job_id, False, execution_time)
@@ -456,15 +802,35 @@ class JobPipeline:
                         retry_count=job_task.retry_count
                     )
 
+        except asyncio.CancelledError:
+            requested_at = self.cancel_requests.pop(job_id, None)
+            if requested_at is None:
+                # Pipeline shutdown, not a cancellation request
+                raise
+            
+            outcome = "cancelled"
+            latency = time.perf_counter() - requested_at
+            self.status_tracker.cancel_job(job_id, time.time() - start_time, latency)
+            JOB_CANCELLATION_LATENCY.observe(latency, agent=job_task.agent_name, state="running")
+            logger.info(
+                f"Job {job_id} cancelled",
+                worker=worker_name,
+                agent=job_task.agent_name,
+                cancellation_latency_ms=round(latency * 1000, 1)
+            )
+        
         except Exception as e:
             execution_time = time.time() - start_time
             error_message = f"Job execution error: {str(e)}"
             
             # Check if we should retry
-            if job_task.can_retry:
+            if job_task.can_retry and (not isinstance(e, JobTimeoutError) or e.retryable):
                 await self._retry_job(job_task, error_message)
+                outcome = "retried"
             else:
-                await self._update_job_status(job_id, JobStatus.failed, error_message=error_message)
+                await self._update_job_status(
+                    job_id, JobStatus.failed, error_message=error_message, usage=self._job_usage(job_task)
+                )
                 self.status_tracker.complete_job(job_id, False, execution_time)
                 
                 logger.error(
@@ -477,6 +843,62 @@ class JobPipeline:
         finally:
             # Remove from active tasks
             self.active_tasks.pop(job_id, None)
+            batched = self.parked_jobs.pop(job_id, None)
+            if batched:
+                self.status_tracker.record_batches(job_id, self._batch_info(batched))
+        
+        return outcome
+
+    async def _execute_with_timeout(
+        self,
+        agent: BaseAgent,
+        job_task: JobTask,
+        validated_data: Any,
+        use_batch_lane: bool = False
+    ) -> AgentExecutionResult:
+        """
+        Run the agent under its execution timeout.
+        
+        A timed-out execution is cancelled like a cancelled job (aborting its
+        LLM requests and running BaseAgent.on_job_cancelled) and raised as
+        JobTimeoutError, so it is retried or failed like any other error.
+        A job that timed out while waiting for a provider batch is not retried,
+        since a retry would only submit the same paid batch again.
+        """
+        timeout = self._execution_timeout(agent, use_batch_lane)
+        try:
+            return await asyncio.wait_for(
+                agent.execute_job(job_task.job_id, validated_data, job_task.user_id),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            self.status_tracker.record_timeout(job_task.agent_name)
+            JOB_TIMEOUTS.inc(agent=job_task.agent_name)
+            logger.warning(
+                f"Job {job_task.job_id} timed out",
+                agent=job_task.agent_name,
+                timeout_seconds=timeout,
+                retry_count=job_task.retry_count
+            )
+            # Queries the timeout cancelled were still waiting for their batch
+            waiting_on_batch = any(future.cancelled() for _, _, future in self.parked_jobs.get(job_task.job_id, ()))
+            raise JobTimeoutError(f"Job timed out after {timeout}s", retryable=not waiting_on_batch) from None
+
+    def _execution_timeout(self, agent: BaseAgent, use_batch_lane: bool = False) -> float:
+        """
+        The agent's configured timeout_seconds, or the pipeline default
+        
+        Batch-lane jobs also get the time a provider batch may take to fill and complete.
+        """
+        agent_config = getattr(agent, "agent_config", None)
+        if isinstance(agent_config, AgentConfig):
+            timeout = agent_config.execution.timeout_seconds
+        else:
+            timeout = self.job_timeout
+        if use_batch_lane:
+            lane = get_batch_lane()
+            timeout += lane.max_wait_seconds + lane.timeout_seconds
+        return timeout
 
     async def _retry_job(self, job_task: JobTask, error_message: str):
         """Retry a failed job with exponential backoff"""
@@ -496,17 +918,91 @@ class JobPipeline:
         logger.info(
             f"Job {job_task.job_id} scheduled for retry {job_task.retry_count}",
             retry_delay=delay,
-            retry_time=retry_time,
+            retry_time=retry_time.isoformat(),
             error=error_message
         )
 
+    async def cancel_job(self, job_id: str) -> Dict[str, Any]:
+        """
+        Cancel a scheduled, queued or running job.
+        
+        Scheduled jobs (including those waiting for a retry) are removed from
+        the schedule and queued jobs are dropped without running when dequeued.
+        A running job's task is cancelled: the cancellation reaches the agent
+        (see BaseAgent.on_job_cancelled) and aborts its in-flight LLM requests,
+        freeing the worker. The caller updates the job's status.
+        
+        Args:
+            job_id: ID of the job to cancel
+            
+        Returns:
+            Where the job was (scheduled, queued, running or not_found), whether
+            it has stopped and the cancellation latency in milliseconds
+        """
+        requested_at = time.perf_counter()
+        
+        scheduled = next((job_task for job_task in self.scheduled_jobs if job_task.job_id == job_id), None)
+        task = self.active_tasks.get(job_id)
+        if scheduled is not None:
+            self.scheduled_jobs = [job_task for job_task in self.scheduled_jobs if job_task.job_id != job_id]
+            state, agent_name, stopped = "scheduled", scheduled.agent_name, True
+        elif job_id in self.queued_jobs:
+            self.cancel_requests[job_id] = requested_at
+            state, agent_name, stopped = "queued", self.queued_jobs[job_id].agent_name, True
+        elif task is not None and not task.done():
+            self.cancel_requests[job_id] = requested_at
+            task.cancel()
+            done, _ = await asyncio.wait({task}, timeout=self.cancel_timeout)
+            state, stopped = "running", bool(done)
+            if stopped:
+                # Normally consumed by the job, unless the cancellation landed outside its execution
+                self.cancel_requests.pop(job_id, None)
+            else:
+                logger.warning(f"Job {job_id} did not stop within {self.cancel_timeout}s of cancellation")
+        else:
+            return {"job_id": job_id, "state": "not_found", "stopped": False, "latency_ms": None}
+        
+        latency = time.perf_counter() - requested_at
+        if state != "running":
+            # Running jobs record their latency when the cancellation reaches them
+            self.status_tracker.cancel_job(job_id, None, latency)
+            JOB_CANCELLATION_LATENCY.observe(latency, agent=agent_name, state=state)
+        logger.info(f"Job {job_id} cancelled", state=state, stopped=stopped, cancellation_latency_ms=round(latency * 1000, 1))
+        
+        return {"job_id": job_id, "state": state, "stopped": stopped, "latency_ms": round(latency * 1000, 1)}
+
+    @staticmethod
+    def _batch_info(batched: List[Tuple[str, BatchRequest, asyncio.Future]]) -> List[Dict[str, Any]]:
+        return [
+            {'provider': provider, 'batch_id': request.batch_id, 'request_id': request.custom_id, 'done': future.done()}
+            for provider, request, future in batched
+        ]
+
+    @staticmethod
+    def _use_batch_lane(job_task: JobTask) -> bool:
+        """Whether the job's LLM calls go through provider batch APIs (LOW-priority and scheduled jobs)"""
+        from config.environment import get_settings
+        settings = get_settings()
+        
+        if not settings.llm_batch_enabled:
+            return False
+        if job_task.priority <= JobPriority.LOW:
+            return True
+        return settings.llm_batch_scheduled_jobs and bool((job_task.metadata or {}).get("schedule_id"))
+
+    @staticmethod
+    def _job_usage(job_task: JobTask) -> Optional[Dict[str, Any]]:
+        """LLM token and cost usage of a job, persisted with its final status"""
+        return job_task.usage.to_dict() if job_task.usage is not None and job_task.usage.calls else None
+
     async def _update_job_status(
         self,
         job_id: str,
         status: JobStatus,
         result: Optional[str] = None,
         error_message: Optional[str] = None,
-        result_format: Optional[str] = None
+        result_format: Optional[str] = None,
+        usage: Optional[Dict[str, Any]] = None
     ):
         """Update job status in the database"""
         try:
@@ -515,30 +1011,25 @@ class JobPipeline:
                 status=status.value,
                 result=result,
                 error_message=error_message,
-                result_format=result_format
+                result_format=result_format,
+                usage=usage
             )
         except Exception as e:
             logger.error(f"Failed to update job status for {job_id}", exception=e)
 
     async def _cleanup_worker(self):
-        """Periodic cleanup of old job metrics and completed tasks"""
+        """Periodic cleanup of finished tasks left in active task tracking"""
         logger.info("Cleanup worker started")
         
         while not self.is_shutdown:
             try:
-                # Clean up old job metrics (keep last 1000)
-                if len(self.status_tracker.job_metrics) > 1000:
-                    # Sort by end_time and keep newest 1000
-                    sorted_jobs = sorted(
-                        self.status_tracker.job_metrics.items(),
-                        key=lambda x: x[1].get('end_time', datetime.min),
-                        reverse=True
-                    )
-                    
-                    # Keep only the newest 1000
-                    self.status_tracker.job_metrics = dict(sorted_jobs[:1000])
-                    
-                    logger.debug("Cleaned up old job metrics")
+                # Job metrics are bounded by their ring buffer; only stale task handles need pruning
+                finished = [job_id for job_id, task in self.active_tasks.items() if task.done()]
+                for job_id in finished:
+                    self.active_tasks.pop(job_id, None)
+                
+                if finished:
+                    logger.debug("Cleaned up finished job tasks", count=len(finished))
                 
                 # Sleep until next cleanup
                 await asyncio.sleep(self.cleanup_interval)
@@ -556,14 +1047,28 @@ class JobPipeline:
             'queue_size': self.job_queue.qsize(),
             'scheduled_jobs': len(self.scheduled_jobs),
             'active_jobs': len(self.active_tasks),
+            'parked_jobs': len(self.parked_jobs),
             'max_concurrent_jobs': self.max_concurrent_jobs,
             'worker_count': len(self.worker_tasks),
             'metrics': self.status_tracker.get_metrics()
         }
 
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get job execution metrics including sliding-window rates"""
+        return self.status_tracker.get_metrics()
+
     def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Get status of a specific job"""
-        return self.status_tracker.job_metrics.get(job_id)
+        status = self.status_tracker.job_metrics.get(job_id)
+        batched = self.parked_jobs.get(job_id)
+        if status is not None and batched:
+            status['llm_batches'] = self._batch_info(batched)
+        return status
+
+    def get_job_progress(self, job_id: str, offset: int = 0) -> Optional[Dict[str, Any]]:
+        """Get streamed partial output of a running or recently finished job"""
+        buffer = self.progress.get(job_id)
+        return buffer.read(offset) if buffer else None
 
 # Global pipeline instance
 _job_pipeline: Optional[JobPipeline] = None
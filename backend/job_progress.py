@@ -0,0 +1,106 @@
+"""
+Partial-output progress buffers for running jobs.
+
+This module provides:
+- A bounded per-job text buffer that LLM streams append to while a job runs
+- Offset-based reads so clients can poll for new output incrementally
+- A bounded registry of buffers for recent jobs
+- A context variable binding the current job's buffer for the LLM service
+"""
+
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+
+class JobProgressBuffer:
+    """
+    Append-only text buffer holding the tail of a job's streamed output.
+
+    Offsets are absolute character positions in the full stream, so a client
+    that passes back the returned offset only receives new text. When the
+    buffer overflows, the oldest text is dropped and reads report truncation.
+    """
+
+    def __init__(self, job_id: str, max_chars: int = 65536):
+        self.job_id = job_id
+        self.max_chars = max_chars
+        self._text = ""
+        self._start_offset = 0
+        self.done = False
+        self.updated_at = datetime.now(timezone.utc)
+
+    @property
+    def end_offset(self) -> int:
+        return self._start_offset + len(self._text)
+
+    def append(self, chunk: str):
+        """Append a chunk of streamed output"""
+        if not chunk:
+            return
+        self._text += chunk
+        overflow = len(self._text) - self.max_chars
+        if overflow > 0:
+            self._text = self._text[overflow:]
+            self._start_offset += overflow
+        self.updated_at = datetime.now(timezone.utc)
+
+    def close(self):
+        """Mark the stream as finished"""
+        self.done = True
+        self.updated_at = datetime.now(timezone.utc)
+
+    def read(self, offset: int = 0) -> Dict[str, Any]:
+        """Read output from an absolute offset"""
+        truncated = offset < self._start_offset
+        start = max(offset, self._start_offset) - self._start_offset
+        return {
+            "job_id": self.job_id,
+            "text": self._text[start:],
+            "offset": self.end_offset,
+            "truncated": truncated,
+            "done": self.done,
+            "updated_at": self.updated_at.isoformat()
+        }
+
+class JobProgressRegistry:
+    """Bounded registry of progress buffers, evicting the oldest job first"""
+
+    def __init__(self, capacity: int = 200, max_chars: int = 65536):
+        self.capacity = capacity
+        self.max_chars = max_chars
+        self._buffers: "OrderedDict[str, JobProgressBuffer]" = OrderedDict()
+
+    def create(self, job_id: str) -> JobProgressBuffer:
+        """Create a fresh buffer for a job run, replacing any previous one"""
+        self._buffers.pop(job_id, None)
+        buffer = JobProgressBuffer(job_id, self.max_chars)
+        self._buffers[job_id] = buffer
+        while len(self._buffers) > self.capacity:
+            self._buffers.popitem(last=False)
+        return buffer
+
+    def get(self, job_id: str) -> Optional[JobProgressBuffer]:
+        return self._buffers.get(job_id)
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+_current_progress: contextvars.ContextVar[Optional[JobProgressBuffer]] = contextvars.ContextVar(
+    "job_progress", default=None
+)
+
+def get_job_progress() -> Optional[JobProgressBuffer]:
+    """Get the progress buffer bound to the current job, if any"""
+    return _current_progress.get()
+
+@contextmanager
+def bind_job_progress(buffer: JobProgressBuffer) -> Iterator[JobProgressBuffer]:
+    """Bind a progress buffer for LLM calls made inside the block, closing it on exit"""
+    token = _current_progress.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _current_progress.reset(token)
+        buffer.close()
@@ -5,6 +5,7 @@ This module provides:
 - Structured logging with multiple loggers
 - Security event logging
 - Middleware for request/response logging
+- Per-callsite sampling and rate limiting for high-volume logs
 - Development and production configurations
 """
 
@@ -15,13 +16,15 @@ import logging
 import logging.config
 import os
 import sys
+import threading
 import time
 import traceback
 import uuid
+import weakref
 from datetime import datetime, timezone
 from functools import wraps
 from contextlib import contextmanager
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from fastapi import FastAPI, Request, Response
 from fastapi.responses import JSONResponse
@@ -32,9 +35,9 @@ from config.environment import get_settings
 class StructuredLogger:
     """Structured logger with context management and formatting"""
     
-    def __init__(self, name: str):
+    def __init__(self, name: str, context: Optional[Dict[str, Any]] = None):
         self.logger = logging.getLogger(name)
-        self.context: Dict[str, Any] = {}
+        self.context: Dict[str, Any] = context if context is not None else {}
     
     def set_context(self, **kwargs):
         """Set logging context that will be included in all log messages"""
@@ -57,22 +60,30 @@ class StructuredLogger:
             
         return log_data
     
-    def debug(self, message: str, **kwargs):
+    # Records are attributed to the caller rather than this class, so
+    # per-callsite sampling sees the real call site. Helpers that wrap these
+    # methods pass stacklevel=2 so the record lands on *their* caller.
+
+    def debug(self, message: str, stacklevel: int = 1, **kwargs):
         """Log debug message with structured data"""
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
         log_data = self._format_message(message, kwargs)
-        self.logger.debug(json.dumps(log_data))
+        self.logger.debug(json.dumps(log_data), stacklevel=stacklevel + 1)
     
-    def info(self, message: str, **kwargs):
+    def info(self, message: str, stacklevel: int = 1, **kwargs):
         """Log info message with structured data"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         log_data = self._format_message(message, kwargs)
-        self.logger.info(json.dumps(log_data))
+        self.logger.info(json.dumps(log_data), stacklevel=stacklevel + 1)
     
-    def warning(self, message: str, **kwargs):
+    def warning(self, message: str, stacklevel: int = 1, **kwargs):
         """Log warning message with structured data"""
         log_data = self._format_message(message, kwargs)
-        self.logger.warning(json.dumps(log_data, default=self._json_default))
+        self.logger.warning(json.dumps(log_data, default=self._json_default), stacklevel=stacklevel + 1)
     
-    def error(self, message: str, exception: Optional[Exception] = None, **kwargs):
+    def error(self, message: str, exception: Optional[Exception] = None, stacklevel: int = 1, **kwargs):
         """Log error message with structured data and optional exception"""
         log_data = self._format_message(message, kwargs)
         
@@ -83,9 +94,9 @@ class StructuredLogger:
                 'traceback': traceback.format_exc()
             }
         
-        self.logger.error(json.dumps(log_data, default=self._json_default))
+        self.logger.error(json.dumps(log_data, default=self._json_default), stacklevel=stacklevel + 1)
     
-    def critical(self, message: str, exception: Optional[Exception] = None, **kwargs):
+    def critical(self, message: str, exception: Optional[Exception] = None, stacklevel: int = 1, **kwargs):
         """Log critical message with structured data and optional exception"""
         log_data = self._format_message(message, kwargs)
         
@@ -96,7 +107,7 @@ class StructuredLogger:
                 'traceback': traceback.format_exc()
             }
         
-        self.logger.critical(json.dumps(log_data, default=self._json_default))
+        self.logger.critical(json.dumps(log_data, default=self._json_default), stacklevel=stacklevel + 1)
 
     def _json_default(self, obj):
         """JSON serializer for objects not serializable by default json code"""
@@ -110,6 +121,176 @@ class StructuredLogger:
             return obj.__dict__
         return str(obj)
 
+class TokenBucket:
+    """Token bucket rate limiter (not thread-safe, callers must lock)"""
+
+    def __init__(self, rate_per_second: float, burst: Optional[float] = None):
+        self.rate_per_second = rate_per_second
+        self.capacity = burst if burst is not None else max(1.0, rate_per_second)
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+
+    def consume(self, tokens: float = 1.0) -> bool:
+        """Take tokens from the bucket, returning False if not enough are available"""
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        self.last_refill = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate_per_second)
+
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+class _CallsiteState:
+    """Sampling state for a single logging call site"""
+
+    __slots__ = ('seen', 'emitted', 'suppressed', 'pending', 'bucket')
+
+    def __init__(self, bucket: Optional[TokenBucket]):
+        self.seen = 0
+        self.emitted = 0
+        self.suppressed = 0
+        self.pending = 0  # suppressed since the last emitted record
+        self.bucket = bucket
+
+class SamplingFilter(logging.Filter):
+    """
+    Per-callsite sampling and rate limiting for high-volume log records.
+
+    Rules are keyed by logger name and match the logger and its children
+    (the longest matching name wins). Each rule may contain:
+    - sample_rate: fraction of records to keep (1.0 keeps everything)
+    - rate_per_second: token bucket refill rate per call site
+    - burst: token bucket capacity per call site
+
+    Records at or above always_keep_level are never dropped. When a record is
+    emitted after others from the same call site were dropped, it is annotated
+    with the number of suppressed records (``sampled_count``).
+    """
+
+    def __init__(
+        self,
+        rules: Optional[Dict[str, Dict[str, Any]]] = None,
+        always_keep_level: Union[int, str] = logging.WARNING,
+        enabled: bool = True
+    ):
+        super().__init__()
+        self.rules = rules or {}
+        if isinstance(always_keep_level, str):
+            always_keep_level = logging.getLevelName(always_keep_level.upper())
+        self.always_keep_level = always_keep_level
+        self.enabled = enabled
+        self._callsites: Dict[Tuple[str, str, int], _CallsiteState] = {}
+        self._rule_cache: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        _sampling_filters.add(self)
+
+    def _get_rule(self, logger_name: str) -> Optional[Dict[str, Any]]:
+        """Resolve the sampling rule for a logger name"""
+        if logger_name in self._rule_cache:
+            return self._rule_cache[logger_name]
+
+        rule = None
+        name = logger_name
+        while name:
+            if name in self.rules:
+                rule = self.rules[name]
+                break
+            name = name.rpartition('.')[0]
+
+        self._rule_cache[logger_name] = rule
+        return rule
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.enabled or record.levelno >= self.always_keep_level:
+            return True
+
+        rule = self._get_rule(record.name)
+        if rule is None:
+            return True
+
+        key = (record.name, record.pathname, record.lineno)
+
+        with self._lock:
+            state = self._callsites.get(key)
+            if state is None:
+                rate = rule.get('rate_per_second')
+                bucket = TokenBucket(rate, rule.get('burst')) if rate else None
+                state = _CallsiteState(bucket)
+                self._callsites[key] = state
+
+            state.seen += 1
+
+            # Deterministic 1-in-N sampling: keep the first record, then every Nth
+            sample_rate = rule.get('sample_rate', 1.0)
+            keep = True
+            if sample_rate < 1.0:
+                every = max(1, round(1.0 / sample_rate)) if sample_rate > 0 else 0
+                keep = every > 0 and (state.seen - 1) % every == 0
+
+            if keep and state.bucket is not None:
+                keep = state.bucket.consume()
+
+            if not keep:
+                state.suppressed += 1
+                state.pending += 1
+                return False
+
+            state.emitted += 1
+            sampled_count = state.pending
+            state.pending = 0
+
+        if sampled_count:
+            self._annotate(record, sampled_count)
+        return True
+
+    def _annotate(self, record: logging.LogRecord, sampled_count: int):
+        """Attach the suppressed-record count to an emitted record"""
+        record.sampled_count = sampled_count
+        msg = record.msg
+        if isinstance(msg, str) and not record.args:
+            if msg.startswith('{') and msg.endswith('}'):
+                # Structured JSON message - splice the count in as a field
+                record.msg = f'{msg[:-1]}, "sampled_count": {sampled_count}}}'
+            else:
+                record.msg = f"{msg} [sampled: {sampled_count} similar suppressed]"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-callsite sampling statistics"""
+        with self._lock:
+            callsites = [
+                {
+                    'logger': name,
+                    'callsite': f"{os.path.basename(pathname)}:{lineno}",
+                    'seen': state.seen,
+                    'emitted': state.emitted,
+                    'suppressed': state.suppressed
+                }
+                for (name, pathname, lineno), state in self._callsites.items()
+            ]
+
+        return {
+            'enabled': self.enabled,
+            'rules': self.rules,
+            'total_seen': sum(c['seen'] for c in callsites),
+            'total_suppressed': sum(c['suppressed'] for c in callsites),
+            'callsites': sorted(callsites, key=lambda c: c['suppressed'], reverse=True)
+        }
+
+# Sampling filters created by logging configuration, for metrics reporting
+_sampling_filters: 'weakref.WeakSet[SamplingFilter]' = weakref.WeakSet()
+
+def get_log_sampling_stats() -> Dict[str, Any]:
+    """Get sampling statistics from all configured sampling filters"""
+    stats = [f.get_stats() for f in _sampling_filters]
+    return {
+        'filters': len(stats),
+        'total_seen': sum(s['total_seen'] for s in stats),
+        'total_suppressed': sum(s['total_suppressed'] for s in stats),
+        'callsites': [c for s in stats for c in s['callsites']]
+    }
+
 class RequestLoggingMiddleware(BaseHTTPMiddleware):
     """Middleware for logging HTTP requests and responses"""
     
@@ -224,6 +405,7 @@ class SecurityLogger:
         """Log successful authentication"""
         self.logger.info(
             "Authentication successful",
+            stacklevel=2,
             user_id=user_id,
             auth_method=method,
             event_type="auth_success",
@@ -234,6 +416,7 @@ class SecurityLogger:
         """Log authentication failure"""
         self.logger.warning(
             "Authentication failed",
+            stacklevel=2,
             reason=reason,
             auth_method=method,
             event_type="auth_failure",
@@ -244,6 +427,7 @@ class SecurityLogger:
         """Log authorization failure"""
         self.logger.warning(
             "Authorization denied",
+            stacklevel=2,
             user_id=user_id,
             resource=resource,
             action=action,
@@ -255,6 +439,7 @@ class SecurityLogger:
         """Log suspicious activity"""
         self.logger.warning(
             f"Suspicious activity detected: {activity_type}",
+            stacklevel=2,
             activity_type=activity_type,
             details=details,
             event_type="suspicious_activity",
@@ -265,6 +450,7 @@ class SecurityLogger:
         """Log rate limit exceeded"""
         self.logger.warning(
             "Rate limit exceeded",
+            stacklevel=2,
             identifier=identifier,
             limit=limit,
             event_type="rate_limit_exceeded",
@@ -287,22 +473,53 @@ class DatabaseLogger:
         
         if duration:
             log_data["duration_seconds"] = round(duration, 4)
+            self._record_span(operation, table, duration, context.get("error"))
+            self._record_metric(operation, table, duration, context.get("error"))
             
-        self.logger.debug("Database query executed", **log_data, **context)
+        self.logger.debug("Database query executed", stacklevel=2, **log_data, **context)
         
         # Warn on slow queries
         if duration and duration > 0.5:
             self.logger.warning(
                 "Slow database query",
+                stacklevel=2,
                 **log_data,
                 threshold_seconds=0.5,
                 **context
             )
     
+    def _record_span(self, operation: str, table: str, duration: float, error: Optional[str] = None):
+        """Record the query as a tracing span under the current span, if any"""
+        from tracing import get_current_span, get_tracer
+        
+        if get_current_span() is None:
+            return
+        
+        end_time_ns = time.time_ns()
+        get_tracer().record_span(
+            f"db.{operation.lower()} {table}",
+            start_time_ns=end_time_ns - int(duration * 1_000_000_000),
+            end_time_ns=end_time_ns,
+            attributes={"db.operation": operation, "db.table": table},
+            error=error
+        )
+    
+    def _record_metric(self, operation: str, table: str, duration: float, error: Optional[str] = None):
+        """Record the query time in the database latency histogram"""
+        from metrics import DB_QUERY_DURATION
+        
+        DB_QUERY_DURATION.observe(
+            duration,
+            table=table,
+            operation=operation.upper(),
+            status="error" if error else "success"
+        )
+    
     def log_connection_error(self, error: Exception, **context):
         """Log database connection error"""
         self.logger.error(
             "Database connection error",
+            stacklevel=2,
             exception=error,
             event_type="db_connection_error",
             **context
@@ -313,6 +530,7 @@ class DatabaseLogger:
         if success:
             self.logger.info(
                 "Database migration completed",
+                stacklevel=2,
                 migration=migration_name,
                 duration_seconds=round(duration, 4),
                 event_type="db_migration_success",
@@ -321,6 +539,7 @@ class DatabaseLogger:
         else:
             self.logger.error(
                 "Database migration failed",
+                stacklevel=2,
                 migration=migration_name,
                 duration_seconds=round(duration, 4),
                 event_type="db_migration_failure",
@@ -337,6 +556,7 @@ class AgentLogger:
         """Log job creation"""
         self.logger.info(
             "Agent job created",
+            stacklevel=2,
             job_id=job_id,
             agent_identifier=agent_identifier,
             user_id=user_id,
@@ -348,6 +568,7 @@ class AgentLogger:
         """Log job start"""
         self.logger.info(
             "Agent job started",
+            stacklevel=2,
             job_id=job_id,
             agent_identifier=agent_identifier,
             event_type="job_started",
@@ -358,6 +579,7 @@ class AgentLogger:
         """Log job completion"""
         self.logger.info(
             "Agent job completed",
+            stacklevel=2,
             job_id=job_id,
             duration_seconds=round(duration, 4),
             event_type="job_completed",
@@ -368,6 +590,7 @@ class AgentLogger:
         """Log job failure"""
         self.logger.error(
             "Agent job failed",
+            stacklevel=2,
             job_id=job_id,
             exception=error,
             duration_seconds=round(duration, 4),
@@ -379,24 +602,28 @@ class AgentLogger:
         """Log agent-specific error"""
         self.logger.error(
             "Agent error",
+            stacklevel=2,
             agent_identifier=agent_identifier,
             exception=error,
             event_type="agent_error",
             **context
         )
 
-# Global logger instances
-_main_logger: Optional[StructuredLogger] = None
+# Global logger instances (one per name, sharing a single context)
+_loggers: Dict[str, StructuredLogger] = {}
+_shared_context: Dict[str, Any] = {}
 _security_logger: Optional[SecurityLogger] = None
 _database_logger: Optional[DatabaseLogger] = None
 _agent_logger: Optional[AgentLogger] = None
 
 def get_logger(name: str = __name__) -> StructuredLogger:
-    """Get or create structured logger instance"""
-    global _main_logger
-    if _main_logger is None:
-        _main_logger = StructuredLogger(name)
-    return _main_logger
+    """Get or create structured logger instance for the given name"""
+    logger = _loggers.get(name)
+    if logger is None:
+        # Request context set by the middleware stays visible on every logger
+        logger = StructuredLogger(name, context=_shared_context)
+        _loggers[name] = logger
+    return logger
 
 def get_security_logger() -> SecurityLogger:
     """Get or create security logger instance"""
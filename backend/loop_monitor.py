@@ -0,0 +1,229 @@
+"""
+Event loop lag monitoring for the AI Agent Platform.
+
+This module provides:
+- Continuous event-loop lag measurement via a heartbeat task
+- Blocking-call detection with stack capture from a watchdog thread (debug mode)
+- Lag histograms and stall counters in the Prometheus metrics registry
+- A diagnostics report for /system/diagnostics/loop
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from logging_system import get_logger
+from metrics import get_metrics_registry
+
+logger = get_logger(__name__)
+
+_registry = get_metrics_registry()
+
+LOOP_LAG = _registry.histogram(
+    "event_loop_lag_seconds",
+    "Delay between scheduled and actual event loop heartbeats",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+LOOP_BLOCKED = _registry.counter(
+    "event_loop_blocked_total",
+    "Heartbeats delayed beyond the blocking threshold"
+)
+
+# Maximum number of frames kept per captured stack
+MAX_STACK_FRAMES = 40
+
+class EventLoopMonitor:
+    """
+    Measures event loop lag and captures the stack of blocking code.
+
+    A heartbeat task sleeps for a fixed interval and records how late it
+    wakes up. When stack capture is enabled, a watchdog thread checks the
+    heartbeat deadline and, if the loop is stalled past the threshold,
+    snapshots the loop thread's current frame - i.e. the blocking call.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.5,
+        block_threshold: float = 0.1,
+        capture_stacks: bool = False,
+        history_size: int = 600,
+        max_reports: int = 50,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.capture_stacks = capture_stacks
+        self._clock = clock
+
+        self._lags: Deque[float] = deque(maxlen=history_size)
+        self._reports: Deque[Dict[str, Any]] = deque(maxlen=max_reports)
+        self.blocked_count = 0
+        self.max_lag = 0.0
+
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._loop_thread_id: Optional[int] = None
+        self._next_beat: Optional[float] = None
+        self._pending_report: Optional[Dict[str, Any]] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start monitoring the running event loop"""
+        if self.is_running:
+            return
+
+        self._loop_thread_id = threading.get_ident()
+        self._stop_event.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+
+        if self.capture_stacks:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+        logger.info(
+            "Event loop monitor started",
+            interval=self.interval,
+            block_threshold=self.block_threshold,
+            capture_stacks=self.capture_stacks
+        )
+
+    async def stop(self):
+        """Stop the heartbeat task and watchdog thread"""
+        self._stop_event.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+        logger.info("Event loop monitor stopped")
+
+    async def _heartbeat(self):
+        while True:
+            self._next_beat = self._clock() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record_lag(max(self._clock() - self._next_beat, 0.0))
+
+    def record_lag(self, lag: float):
+        """Record a heartbeat's lag, finalizing any stall report captured meanwhile"""
+        self._lags.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+        LOOP_LAG.observe(lag)
+
+        with self._lock:
+            report, self._pending_report = self._pending_report, None
+
+        if lag < self.block_threshold:
+            return
+
+        self.blocked_count += 1
+        LOOP_BLOCKED.inc()
+
+        if report is None:
+            report = {"detected_at": datetime.now(timezone.utc).isoformat(), "stack": None}
+        report["lag_seconds"] = round(lag, 4)
+        self._reports.append(report)
+
+        logger.warning(
+            "Event loop blocked",
+            lag_seconds=round(lag, 4),
+            threshold_seconds=self.block_threshold,
+            blocking_frame=report["stack"][-1] if report["stack"] else None
+        )
+
+    def _watch(self):
+        """Watchdog thread: snapshot the loop thread's stack while it is stalled"""
+        poll = max(self.block_threshold / 2, 0.01)
+        while not self._stop_event.wait(poll):
+            deadline = self._next_beat
+            if deadline is None or self._clock() - deadline < self.block_threshold:
+                continue
+            with self._lock:
+                if self._pending_report is not None:
+                    continue
+
+            stack = self.capture_loop_stack()
+            with self._lock:
+                self._pending_report = {
+                    "detected_at": datetime.now(timezone.utc).isoformat(),
+                    "stack": stack
+                }
+
+    def capture_loop_stack(self) -> Optional[List[str]]:
+        """Format the event loop thread's current stack, innermost frame last"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        return [
+            f"{entry.filename}:{entry.lineno} in {entry.name}" + (f": {entry.line}" if entry.line else "")
+            for entry in traceback.extract_stack(frame)[-MAX_STACK_FRAMES:]
+        ]
+
+    def get_report(self) -> Dict[str, Any]:
+        """Get lag statistics and recent blocking reports (newest first)"""
+        lags = sorted(self._lags)
+
+        def percentile(p: float) -> float:
+            if not lags:
+                return 0.0
+            return lags[min(int(len(lags) * p), len(lags) - 1)]
+
+        return {
+            "running": self.is_running,
+            "interval_seconds": self.interval,
+            "block_threshold_seconds": self.block_threshold,
+            "capture_stacks": self.capture_stacks,
+            "samples": len(lags),
+            "lag_seconds": {
+                "current": round(self._lags[-1], 4) if self._lags else 0.0,
+                "mean": round(sum(lags) / len(lags), 4) if lags else 0.0,
+                "p50": round(percentile(0.5), 4),
+                "p99": round(percentile(0.99), 4),
+                "max": round(self.max_lag, 4)
+            },
+            "blocked_count": self.blocked_count,
+            "recent_blocks": list(reversed(self._reports))
+        }
+
+# Global monitor instance
+_loop_monitor: Optional[EventLoopMonitor] = None
+
+def get_loop_monitor() -> EventLoopMonitor:
+    """Get or create the global event loop monitor"""
+    global _loop_monitor
+
+    if _loop_monitor is None:
+        from config.environment import get_settings
+        settings = get_settings()
+        _loop_monitor = EventLoopMonitor(
+            interval=settings.loop_monitor_interval_seconds,
+            block_threshold=settings.loop_block_threshold_seconds,
+            capture_stacks=settings.debug
+        )
+
+    return _loop_monitor
+
+async def start_loop_monitor():
+    """Start the global event loop monitor"""
+    get_loop_monitor().start()
+
+async def stop_loop_monitor():
+    """Stop the global event loop monitor"""
+    if _loop_monitor is not None:
+        await _loop_monitor.stop()
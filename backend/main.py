@@ -22,6 +22,9 @@ from logging_system import (
     setup_logging_middleware, get_logger,
     get_security_logger, log_startup_info, log_shutdown_info
 )
+from tracing import setup_tracing_middleware, shutdown_tracing
+from metrics import setup_metrics_middleware
+from loop_monitor import start_loop_monitor, stop_loop_monitor
 from agent import get_agent_registry, AgentError
 from agent_discovery import get_agent_discovery_system
 from agent_framework import register_agent_endpoints, get_registered_agents
@@ -32,6 +35,11 @@ from models import JobCreateRequest, JobResponse, ApiResponse
 from utils.responses import create_error_response
 from static_files import setup_static_file_serving
 from services.scheduler import start_scheduler_service, stop_scheduler_service
+from services.cassette import close_cassette
+from services.http_transport import close_llm_http_transport
+from services.llm_service import get_unified_llm_service
+from services.model_registry import start_model_registry, stop_model_registry
+from services.provider_health import start_provider_health_monitor, stop_provider_health_monitor
 
 # Import all route modules
 from routes import (
@@ -63,6 +71,29 @@ def get_cors_origins() -> List[str]:
 # CORS Configuration
 cors_origins = get_cors_origins()
 
+def _log_http_warmup_result(task: asyncio.Task):
+    """Surface failures of the background provider connection warm-up"""
+    if task.cancelled():
+        return
+    if task.exception() is not None:
+        logger.warning("LLM HTTP connection warm-up failed", error=str(task.exception()))
+
+async def stop_http_warmup(app: FastAPI):
+    """Cancel the provider connection warm-up if it is still running"""
+    task = getattr(app.state, "http_warmup_task", None)
+    if task is None:
+        return
+    if not task.done():
+        task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    except Exception:
+        # Already logged by the done-callback
+        pass
+    app.state.http_warmup_task = None
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
@@ -85,6 +116,9 @@ async def lifespan(app: FastAPI):
         }
     )
     
+    if settings.loop_monitor_enabled:
+        await start_loop_monitor()
+    
     try:
         # Get agent registry
         registry = get_agent_registry()
@@ -126,6 +160,19 @@ async def lifespan(app: FastAPI):
         await start_scheduler_service()
         logger.info("Scheduler service started")
         
+        # Refresh provider model catalogs in the background
+        await start_model_registry()
+        
+        # Keep the aggregate provider health snapshot warm
+        await start_provider_health_monitor()
+        
+        # Open provider connections in the background so startup is not delayed
+        if settings.llm_http_warmup_enabled:
+            app.state.http_warmup_task = asyncio.create_task(
+                get_unified_llm_service().warm_up_http_connections()
+            )
+            app.state.http_warmup_task.add_done_callback(_log_http_warmup_result)
+        
     except Exception as e:
         logger.error("Failed to initialize agent framework", exception=e)
         raise
@@ -151,6 +198,14 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error("Failed to stop scheduler service", exception=e)
     
+    await stop_provider_health_monitor()
+    await stop_model_registry()
+    await stop_http_warmup(app)
+    await close_llm_http_transport()
+    close_cassette()
+    await stop_loop_monitor()
+    shutdown_tracing()
+    
     log_shutdown_info()
     logger.info("Application shutdown completed")
 
@@ -181,6 +236,13 @@ app.add_middleware(
 # Set up comprehensive logging middleware
 setup_logging_middleware(app)
 
+# Set up request tracing (added last so it wraps logging and sees full request time)
+setup_tracing_middleware(app)
+
+# Set up request latency metrics (outermost, pure ASGI for minimal overhead)
+if settings.metrics_enabled:
+    setup_metrics_middleware(app)
+
 # Security
 security = HTTPBearer()
 
@@ -68,6 +68,7 @@ class JobStatus(str, Enum):
     running = "running"
     completed = "completed"
     failed = "failed"
+    cancelled = "cancelled"
 
 # User Models
 class UserInfo(BaseModel):
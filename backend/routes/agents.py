@@ -45,6 +45,7 @@ def log_agent_access(agent_identifier: str, action: str, user_id: Optional[str]
     """Log agent access for monitoring and analytics"""
     logger.info(
         f"Agent access: {action}",
+        stacklevel=2,
         agent_identifier=agent_identifier,
         user_id=user_id,
         action=action,
@@ -39,6 +39,7 @@ def log_agent_access(agent_identifier: str, operation: str, user_id: str = None,
     """Log agent access for monitoring and analytics"""
     logger.info(
         f"Agent access: {operation}",
+        stacklevel=2,
         agent_identifier=agent_identifier,
         user_id=user_id,
         operation=operation,
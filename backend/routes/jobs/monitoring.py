@@ -3,6 +3,7 @@ Job monitoring endpoints for the AI Agent Platform.
 
 Handles:
 - Job logs and execution history
+- Streamed partial output of running jobs
 - Job analytics and metrics
 """
 
@@ -14,6 +15,7 @@ from auth import get_current_user
 from database import get_database_operations
 from models import ApiResponse
 from logging_system import get_logger
+from job_pipeline import get_job_pipeline
 from utils.responses import (
     create_success_response,
     create_error_response,
@@ -27,6 +29,7 @@ router = APIRouter(tags=["job-monitoring"])
 # Job Monitoring Response Types
 JobLogsResponse = Dict[str, Union[str, List[Dict[str, Any]], int]]
 JobAnalyticsResponse = Dict[str, Union[Dict[str, Any], Optional[Dict[str, str]]]]
+JobProgressResponse = Dict[str, Any]
 
 @router.get("/{job_id}/logs", response_model=ApiResponse[JobLogsResponse])
 @api_response_validator(result_type=JobLogsResponse)
@@ -140,6 +143,71 @@ async def get_job_logs(
             }
         )
 
+@router.get("/{job_id}/progress", response_model=ApiResponse[JobProgressResponse])
+@api_response_validator(result_type=JobProgressResponse)
+async def get_job_progress(
+    job_id: str,
+    offset: int = Query(default=0, ge=0, description="Character offset returned by the previous read"),
+    user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Get partial output streamed by a running job.
+    Pass the returned offset back to receive only new output.
+    """
+    try:
+        db_ops = get_database_operations()
+        
+        # Verify job exists and user has access
+        job = await db_ops.get_job(job_id, user_id=user["id"])
+        if not job:
+            return create_error_response(
+                error_message="Job not found or access denied",
+                message="Job not found",
+                metadata={
+                    "error_code": "JOB_NOT_FOUND",
+                    "job_id": job_id,
+                    "user_id": user["id"],
+                    "timestamp": datetime.now(timezone.utc).isoformat()
+                }
+            )
+        
+        progress = get_job_pipeline().get_job_progress(job_id, offset)
+        if progress is None:
+            # Not started yet, or executed by another process
+            progress = {
+                "job_id": job_id,
+                "text": "",
+                "offset": offset,
+                "truncated": False,
+                "done": job.get("status") in ("completed", "failed", "cancelled"),
+                "updated_at": None
+            }
+        progress["status"] = job.get("status")
+        
+        return create_success_response(
+            result=progress,
+            message="Job progress retrieved successfully",
+            metadata={
+                "endpoint": "job_progress",
+                "job_id": job_id,
+                "user_id": user["id"],
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            }
+        )
+        
+    except Exception as e:
+        logger.error("Job progress retrieval failed", exception=e, job_id=job_id, user_id=user["id"])
+        return create_error_response(
+            error_message=str(e),
+            message="Failed to retrieve job progress",
+            metadata={
+                "error_code": "JOB_PROGRESS_ERROR",
+                "job_id": job_id,
+                "user_id": user["id"],
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            }
+        )
+
 @router.get("/analytics/summary", response_model=ApiResponse[JobAnalyticsResponse])
 @api_response_validator(result_type=JobAnalyticsResponse)
 async def get_jobs_analytics_summary(
@@ -15,7 +15,7 @@ from datetime import datetime, timezone
 from auth import get_current_user
 from database import get_database_operations
 from job_pipeline import get_job_pipeline
-from models import ApiResponse
+from models import ApiResponse, JobStatus
 from logging_system import get_logger
 from utils.responses import (
     create_success_response,
@@ -30,7 +30,7 @@ router = APIRouter(tags=["job-operations"])
 # Job Operations Response Types
 JobRetryResponse = Dict[str, Union[str, bool]]
 JobRerunResponse = Dict[str, Union[str, bool, Dict[str, Any]]]
-JobCancelResponse = Dict[str, str]
+JobCancelResponse = Dict[str, Any]
 JobPriorityResponse = Dict[str, Union[str, int]]
 
 @router.post("/{job_id}/retry", response_model=ApiResponse[JobRetryResponse])
@@ -344,37 +344,36 @@ async def cancel_job(
                 }
             )
         
-        # Update job status to cancelled
-        await db_ops.update_job_status(job_id, "cancelled", {
-            "cancelled_at": datetime.now(timezone.utc).isoformat(),
-            "cancelled_by": user["id"],
-            "cancellation_reason": "User requested cancellation"
-        })
+        # Stop the job in the pipeline first: drop it from the queue or
+        # schedule, or cancel its running task, so it cannot overwrite the status
+        cancellation = None
+        try:
+            pipeline = get_job_pipeline()
+            cancellation = await pipeline.cancel_job(job_id)
+        except Exception as e:
+            logger.warning(
+                "Failed to signal job cancellation to pipeline",
+                exception=e,
+                job_id=job_id
+            )
+            # Don't fail the request if we can't signal the pipeline
         
-        # If job is running, try to signal the job pipeline to stop it
-        if job["status"] == "running":
-            try:
-                pipeline = get_job_pipeline()
-                await pipeline.cancel_job(job_id)
-            except Exception as e:
-                logger.warning(
-                    "Failed to signal job cancellation to pipeline",
-                    exception=e,
-                    job_id=job_id
-                )
-                # Don't fail the request if we can't signal the pipeline
+        # Update job status to cancelled
+        await db_ops.update_job_status(job_id, JobStatus.cancelled.value)
         
         logger.info(
             "Job cancelled successfully",
             job_id=job_id,
             user_id=user["id"],
-            previous_status=job["status"]
+            previous_status=job["status"],
+            cancellation=cancellation
         )
         
         result_data = {
             "job_id": job_id,
             "previous_status": job["status"],
-            "new_status": "cancelled"
+            "new_status": "cancelled",
+            "cancellation": cancellation
         }
         
         return create_success_response(
@@ -8,9 +8,10 @@ Contains endpoints for:
 - Anthropic validation, models, and connection testing
 - DeepSeek validation, models, and connection testing
 - Llama validation, models, and connection testing
+- Aggregate health of all providers, checked concurrently
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from typing import Dict, Any, List
 from datetime import datetime, timezone
 
@@ -30,6 +31,43 @@ router = APIRouter(tags=["llm-providers"])
 ProviderValidationResponse = Dict[str, Any]
 ProviderModelsResponse = Dict[str, Any]
 ConnectionTestResponse = Dict[str, Any]
+ProvidersHealthResponse = Dict[str, Any]
+
+# All providers
+@router.get("/providers/health", response_model=ApiResponse[ProvidersHealthResponse])
+@api_response_validator(result_type=ProvidersHealthResponse)
+async def get_providers_health(
+    refresh: bool = Query(False, description="Check again instead of serving the cached snapshot")
+):
+    """Get validation, models and connection status of all providers - public endpoint"""
+    logger.info("All providers health requested", refresh=refresh)
+    
+    try:
+        from services.provider_health import get_provider_health_monitor
+        
+        health = await get_provider_health_monitor().get_health(refresh=refresh)
+        
+        return create_success_response(
+            result=health,
+            message="Provider health retrieved",
+            metadata={
+                "endpoint": "providers-health",
+                "healthy_providers": health["summary"]["healthy"],
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            }
+        )
+        
+    except Exception as e:
+        logger.error("Provider health retrieval failed", exception=e)
+        return create_error_response(
+            error_message=str(e),
+            message="Failed to get provider health",
+            metadata={
+                "error_code": "PROVIDERS_HEALTH_ERROR",
+                "endpoint": "providers-health",
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            }
+        )
 
 # Google AI endpoints
 @router.get("/google-ai/validate", response_model=ApiResponse[ProviderValidationResponse])
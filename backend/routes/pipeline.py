@@ -4,16 +4,18 @@ Pipeline routes for the AI Agent Platform.
 Contains endpoints for:
 - Pipeline status monitoring
 - Pipeline metrics and performance data
+- LLM token and cost usage rollups
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Dict, Any, Optional
 from datetime import datetime, timezone
 
 from auth import get_current_user
 from job_pipeline import get_job_pipeline
 from logging_system import get_logger
 from models import ApiResponse
+from services.usage import get_usage_accounting
 from utils.responses import (
     create_success_response,
     create_error_response,
@@ -27,6 +29,7 @@ router = APIRouter(prefix="/pipeline", tags=["pipeline"])
 # Pipeline Response Types
 PipelineStatusResponse = Dict[str, Any]
 PipelineMetricsResponse = Dict[str, Any]
+PipelineUsageResponse = Dict[str, Any]
 
 @router.get("/status", response_model=ApiResponse[PipelineStatusResponse])
 @api_response_validator(result_type=PipelineStatusResponse)
@@ -136,4 +139,40 @@ async def get_pipeline_metrics(user: Dict[str, Any] = Depends(get_current_user))
                 "user_id": user["id"],
                 "timestamp": datetime.now(timezone.utc).isoformat()
             }
-        ) 
\ No newline at end of file
+        ) 
+
+@router.get("/usage", response_model=ApiResponse[PipelineUsageResponse])
+@api_response_validator(result_type=PipelineUsageResponse)
+async def get_pipeline_usage(
+    group_by: str = Query("day", description="Comma-separated dimensions: day, agent, schedule, provider"),
+    days: Optional[int] = Query(None, ge=1, description="Only include the most recent days"),
+    user: Dict[str, Any] = Depends(get_current_user)
+):
+    """Get the current user's LLM token and cost usage rolled up by the given dimensions, most expensive first"""
+    logger.info("Pipeline usage requested", user_id=user["id"], group_by=group_by)
+    
+    try:
+        dimensions = [dimension.strip() for dimension in group_by.split(",") if dimension.strip()]
+        rollups = get_usage_accounting().get_rollups(group_by=dimensions, days=days, user_id=user["id"])
+        
+        return create_success_response(
+            result={"group_by": dimensions, "days": days, "rollups": rollups},
+            message="Pipeline usage retrieved",
+            metadata={
+                "endpoint": "pipeline_usage",
+                "user_id": user["id"],
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            }
+        )
+        
+    except Exception as e:
+        logger.error("Pipeline usage retrieval failed", exception=e, user_id=user["id"])
+        return create_error_response(
+            error_message=str(e),
+            message="Failed to get pipeline usage",
+            metadata={
+                "error_code": "PIPELINE_USAGE_ERROR",
+                "user_id": user["id"],
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            }
+        )
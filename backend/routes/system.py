@@ -7,17 +7,24 @@ Contains endpoints for:
 - CORS configuration information
 - System configuration
 - Logging metrics (development only)
+- Job trace waterfalls
+- Prometheus metrics exposition
+- Event loop diagnostics
 """
 
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import PlainTextResponse
 from typing import Dict, Any, Union
 from datetime import datetime, timezone
 
 from auth import get_current_user
 from database import check_database_health, get_database_operations
 from config.environment import get_settings
-from logging_system import get_logger
+from logging_system import get_logger, get_log_sampling_stats
 from static_files import get_static_file_info
+from tracing import get_tracer
+from metrics import get_metrics_registry, CONTENT_TYPE_LATEST
+from loop_monitor import get_loop_monitor
 from models import ApiResponse
 from utils.responses import (
     create_success_response, 
@@ -81,6 +88,14 @@ async def health_check():
         }
     )
 
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus metrics in text exposition format - public"""
+    if not get_settings().metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    
+    return PlainTextResponse(get_metrics_registry().render(), media_type=CONTENT_TYPE_LATEST)
+
 @router.get("/stats", response_model=ApiResponse[SystemStatsResponse])
 @api_response_validator(result_type=SystemStatsResponse)
 async def get_public_stats():
@@ -212,7 +227,7 @@ async def get_logging_metrics():
     logger.info("Logging metrics requested")
     
     metrics_data = {
-        "message": "Performance metrics removed - basic logging only",
+        "sampling": get_log_sampling_stats(),
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
     
@@ -252,4 +267,82 @@ async def get_static_file_info_endpoint(user: Dict[str, Any] = Depends(get_curre
                 "user_id": user["id"],
                 "timestamp": datetime.now(timezone.utc).isoformat()
             }
-        ) 
\ No newline at end of file
+        ) 
+
+@router.get("/system/traces/{job_id}", response_model=ApiResponse[Dict[str, Any]])
+@api_response_validator(result_type=Dict[str, Any])
+async def get_job_trace(job_id: str, user: Dict[str, Any] = Depends(get_current_user)):
+    """Get the tracing waterfall for a job (queue wait, database, agent and LLM spans)"""
+    logger.info("Job trace requested", job_id=job_id, user_id=user["id"])
+    
+    try:
+        db_ops = get_database_operations()
+        
+        # Verify job exists and user has access
+        job = await db_ops.get_job(job_id, user_id=user["id"])
+        if not job:
+            return create_error_response(
+                error_message="Job not found or access denied",
+                message="Job not found",
+                metadata={
+                    "error_code": "JOB_NOT_FOUND",
+                    "job_id": job_id,
+                    "user_id": user["id"],
+                    "timestamp": datetime.now(timezone.utc).isoformat()
+                }
+            )
+        
+        waterfall = get_tracer().get_job_waterfall(job_id)
+        
+        return create_success_response(
+            result=waterfall,
+            message="Job trace retrieved" if waterfall["span_count"] else "No trace data buffered for job",
+            metadata={
+                "endpoint": "job_trace",
+                "job_id": job_id,
+                "user_id": user["id"],
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            }
+        )
+    except Exception as e:
+        logger.error("Job trace retrieval failed", exception=e, job_id=job_id, user_id=user["id"])
+        return create_error_response(
+            error_message=str(e),
+            message="Failed to retrieve job trace",
+            metadata={
+                "error_code": "JOB_TRACE_ERROR",
+                "job_id": job_id,
+                "user_id": user["id"],
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            }
+        )
+
+@router.get("/system/diagnostics/loop", response_model=ApiResponse[Dict[str, Any]])
+@api_response_validator(result_type=Dict[str, Any])
+async def get_loop_diagnostics(user: Dict[str, Any] = Depends(get_current_user)):
+    """Get event loop lag statistics and recent blocking-call reports"""
+    logger.info("Event loop diagnostics requested", user_id=user["id"])
+    
+    try:
+        report = get_loop_monitor().get_report()
+        
+        return create_success_response(
+            result=report,
+            message="Event loop diagnostics retrieved",
+            metadata={
+                "endpoint": "loop_diagnostics",
+                "user_id": user["id"],
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            }
+        )
+    except Exception as e:
+        logger.error("Event loop diagnostics retrieval failed", exception=e, user_id=user["id"])
+        return create_error_response(
+            error_message=str(e),
+            message="Failed to retrieve event loop diagnostics",
+            metadata={
+                "error_code": "LOOP_DIAGNOSTICS_ERROR",
+                "user_id": user["id"],
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            }
+        )
@@ -7,13 +7,14 @@ Follows the same interface pattern as other LLM services for consistency.
 
 import json
 import asyncio
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
 import anthropic
 from config.anthropic import get_anthropic_config
 from logging_system import get_logger
 from .llm_utils import (
     parse_json_response, 
     create_json_prompt,
+    native_json_mode_enabled,
     get_sentiment_analysis_schema,
     get_keyword_extraction_schema,
     get_summarization_schema,
@@ -22,8 +23,14 @@ from .llm_utils import (
     handle_structured_query_retry_error,
     safe_model_selection,
     monitor_connection_health,
+    instrument_llm_call,
+    instrument_llm_stream,
     get_health_tracker
 )
+from .batch_lane import BatchRequest, BatchResult
+from .model_registry import get_model_registry
+from .rate_limiter import rate_limited
+from .usage import record_response_usage, usage_from_anthropic
 
 logger = get_logger(__name__)
 
@@ -33,10 +40,13 @@ class AnthropicService:
     def __init__(self):
         self._anthropic_config = get_anthropic_config()
         self._client = anthropic.AsyncAnthropic(api_key=self._anthropic_config.api_key)
+        get_model_registry().register("anthropic", self._anthropic_config.get_available_models, self.list_models)
         logger.info("Anthropic service initialized")
     
     # Core LLM Operations
     
+    @rate_limited("anthropic", "_anthropic_config")
+    @instrument_llm_call("Anthropic")
     @monitor_connection_health("Anthropic")
     async def query(
         self, 
@@ -56,43 +66,136 @@ class AnthropicService:
             system_instruction: Optional system instruction
             max_tokens: Optional max tokens override
             temperature: Optional temperature override
-            **kwargs: Additional generation parameters
+            **kwargs: Additional generation parameters (prefill: text the
+                reply starts with, included in the returned response;
+                cache_prefix: cache the system instruction as a prompt prefix)
             
         Returns:
             LLM response as string
         """
         try:
-            model_name = safe_model_selection(
-                service_name="Anthropic",
-                requested_model=model,
-                available_models=self._anthropic_config.get_available_models(),
-                default_model=self._anthropic_config.default_model,
-                strict_validation=False
+            generation_config = self._prepare_generation_config(
+                prompt, model, system_instruction, max_tokens, temperature, **kwargs
             )
             
-            # Prepare messages
-            messages = [{"role": "user", "content": prompt}]
-            
-            # Prepare generation config
-            generation_config = {
-                "model": model_name,
-                "messages": messages,
-                "max_tokens": max_tokens or 4096
-            }
-            
-            if system_instruction:
-                generation_config["system"] = system_instruction
-            if temperature is not None:
-                generation_config['temperature'] = temperature
-            
-            # Add any additional kwargs to generation config
-            generation_config.update(kwargs)
-            
             # Execute the query
             response = await self._client.messages.create(**generation_config)
+            record_response_usage("anthropic", generation_config["model"], usage_from_anthropic(getattr(response, "usage", None)))
             
             # Extract text from response
-            return response.content[0].text
+            return self._with_prefill(response.content[0].text, kwargs.get("prefill"))
+            
+        except Exception as e:
+            raise handle_llm_query_error("Anthropic", e)
+    
+    def _prepare_generation_config(
+        self,
+        prompt: str,
+        model: Optional[str],
+        system_instruction: Optional[str],
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Build request parameters shared by query and query_stream"""
+        model_name = safe_model_selection(
+            service_name="Anthropic",
+            requested_model=model,
+            available_models=get_model_registry().get_catalog("anthropic"),
+            default_model=self._anthropic_config.default_model,
+            strict_validation=False
+        )
+        
+        # Prepare messages; a prefill starts the assistant's reply for it to continue
+        prefill = kwargs.pop("prefill", None)
+        cache_prefix = kwargs.pop("cache_prefix", False)
+        messages = [{"role": "user", "content": prompt}]
+        if prefill:
+            messages.append({"role": "assistant", "content": prefill})
+        
+        # Prepare generation config
+        generation_config = {
+            "model": model_name,
+            "messages": messages,
+            "max_tokens": max_tokens or 4096
+        }
+        
+        if system_instruction and cache_prefix:
+            # Cache the system prompt as a prefix (see services/prefix_cache.py)
+            generation_config["system"] = [
+                {"type": "text", "text": system_instruction, "cache_control": {"type": "ephemeral"}}
+            ]
+        elif system_instruction:
+            generation_config["system"] = system_instruction
+        if temperature is not None:
+            generation_config['temperature'] = temperature
+        
+        # Add any additional kwargs to generation config
+        generation_config.update(kwargs)
+        
+        return generation_config
+    
+    @staticmethod
+    def _with_prefill(text: str, prefill: Optional[str]) -> str:
+        """Prepend the prefilled start of the reply, unless the model repeated it"""
+        if not prefill or text.lstrip().startswith(prefill):
+            return text
+        return prefill + text
+    
+    def _json_mode_kwargs(self, model: Optional[str], output_schema: Any) -> Dict[str, Any]:
+        """Request parameters for native JSON output in structured queries"""
+        # Anthropic has no JSON mode; prefilling "{" makes the reply start as an object
+        if not native_json_mode_enabled() or not isinstance(output_schema, dict):
+            return {}
+        return {"prefill": "{"}
+    
+    @rate_limited("anthropic", "_anthropic_config")
+    @instrument_llm_stream("Anthropic")
+    async def query_stream(
+        self, 
+        prompt: str, 
+        model: Optional[str] = None,
+        system_instruction: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream an LLM response from the Anthropic API as it is generated
+        
+        Args:
+            prompt: The prompt to send to the LLM
+            model: Optional model override
+            system_instruction: Optional system instruction
+            max_tokens: Optional max tokens override
+            temperature: Optional temperature override
+            **kwargs: Additional generation parameters
+            
+        Yields:
+            Response text chunks
+        """
+        try:
+            generation_config = self._prepare_generation_config(
+                prompt, model, system_instruction, max_tokens, temperature, **kwargs
+            )
+            
+            stream = await self._client.messages.create(**generation_config, stream=True)
+            prefill = kwargs.get("prefill")
+            # Input usage arrives with message_start, the output count with message_delta
+            input_usage, output_tokens = None, None
+            async for event in stream:
+                if event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                    yield self._with_prefill(event.delta.text, prefill)
+                    prefill = None
+                elif event.type == "message_start":
+                    input_usage = getattr(event.message, "usage", None)
+                elif event.type == "message_delta":
+                    output_tokens = getattr(event.usage, "output_tokens", None)
+            record_response_usage(
+                "anthropic",
+                generation_config["model"],
+                usage_from_anthropic(input_usage, output_tokens if isinstance(output_tokens, int) else None)
+            )
             
         except Exception as e:
             raise handle_llm_query_error("Anthropic", e)
@@ -118,13 +221,14 @@ class AnthropicService:
         Returns:
             Parsed JSON response
         """
+        query_kwargs = {**self._json_mode_kwargs(model, output_schema), **kwargs}
         for attempt in range(max_retries + 1):
             try:
                 # Create appropriate prompt for this attempt
                 is_retry = attempt > 0
                 schema_prompt = create_json_prompt(prompt, output_schema, strict=is_retry)
                 
-                response_text = await self.query(schema_prompt, model=model, **kwargs)
+                response_text = await self.query(schema_prompt, model=model, **query_kwargs)
                 
                 # Use the common JSON parsing utility
                 result = parse_json_response(response_text, output_schema)
@@ -137,9 +241,8 @@ class AnthropicService:
                 if attempt >= max_retries:
                     return result
                 
-                # Log warning and continue to retry
+                # Malformed output is not transient: retry at once with the stricter prompt
                 logger.warning(f"JSON parsing failed on attempt {attempt + 1}, retrying...")
-                await asyncio.sleep(1)  # Brief delay before retry
                         
             except Exception as e:
                 # Use common error handling utility
@@ -181,6 +284,63 @@ class AnthropicService:
             logger.error(f"Anthropic batch execution failed: {e}")
             return create_batch_error_response(e, len(prompts))
     
+    # Batch API (see services/batch_lane.py)
+    
+    async def submit_batch(self, requests: List[BatchRequest], model: Optional[str] = None) -> str:
+        """
+        Submit requests as one Message Batch (discounted, completed within 24 hours)
+        
+        Args:
+            requests: Queries in the batch
+            model: Optional model override
+            
+        Returns:
+            The batch id
+        """
+        batch = await self._client.messages.batches.create(requests=[
+            {
+                "custom_id": request.custom_id,
+                "params": self._prepare_generation_config(
+                    request.prompt, model, request.system_instruction, request.max_tokens,
+                    request.temperature, **request.params
+                )
+            }
+            for request in requests
+        ])
+        return batch.id
+    
+    async def get_batch_results(self, batch_id: str) -> Optional[List[BatchResult]]:
+        """
+        Get the results of a Message Batch
+        
+        Returns:
+            None while the batch is in progress, then a result per request
+        """
+        batch = await self._client.messages.batches.retrieve(batch_id)
+        if batch.processing_status != "ended":
+            return None
+        
+        results = []
+        async for entry in await self._client.messages.batches.results(batch_id):
+            result = entry.result
+            if result.type != "succeeded":
+                # Errored requests carry an error; canceled and expired ones only their type
+                error = getattr(getattr(result, "error", None), "error", None)
+                results.append(BatchResult(custom_id=entry.custom_id, error=getattr(error, "message", None) or result.type))
+                continue
+            message = result.message
+            results.append(BatchResult(
+                custom_id=entry.custom_id,
+                text=message.content[0].text,
+                model=message.model,
+                usage=usage_from_anthropic(message.usage)
+            ))
+        return results
+    
+    async def cancel_batch(self, batch_id: str) -> None:
+        """Cancel a Message Batch nobody is waiting for any more"""
+        await self._client.messages.batches.cancel(batch_id)
+    
     # Convenience Methods for Common Tasks
     
     async def analyze_sentiment(self, text: str, **kwargs) -> Dict[str, Any]:
@@ -200,6 +360,10 @@ class AnthropicService:
     
     # Service Information and Management
     
+    async def list_models(self) -> List[str]:
+        """List the models available to the API key (merged into the model catalog)"""
+        return [model.id async for model in self._client.models.list()]
+    
     def get_info(self) -> Dict[str, Any]:
         """Get information about the Anthropic service configuration"""
         return {
@@ -207,7 +371,7 @@ class AnthropicService:
             "service_name": "Anthropic Service",
             "provider": "Anthropic",
             "default_model": self._anthropic_config.default_model,
-            "available_models": self._anthropic_config.get_available_models(),
+            "available_models": list(get_model_registry().get_catalog("anthropic")),
             "authentication_method": "API Key"
         }
     
@@ -0,0 +1,290 @@
+"""
+Provider batch-API lane for non-urgent LLM requests
+
+LOW-priority and scheduled jobs do not need interactive latency. While such
+a job runs (see JobPipeline), its LLM queries are collected per provider and
+model and sent as one provider batch (OpenAI Batch API, Anthropic Message
+Batches, or the local mock), which is billed at a discount and counts
+against separate, far higher limits. A batch is submitted once it reaches
+the size limit or its oldest request has waited the accumulation window;
+the lane then polls it and resolves each waiting request with its own
+result, so every job completes and updates its row as usual.
+
+A job waiting for a batch does not hold a pipeline worker: the pipeline
+binds an ``on_wait`` callback with llm_batch_mode, parks the job when one
+of its queries joins a batch and lets the worker take the next job. The
+lane's poller resumes the job by resolving its request. Once every caller
+waiting on a submitted batch has gone (cancelled or timed out), the
+provider batch is cancelled.
+
+Providers opt in by implementing ``submit_batch(requests, model)``, which
+returns a batch id, and ``get_batch_results(batch_id)``, which returns None
+until the batch has ended and then a BatchResult per request. They may
+implement ``cancel_batch(batch_id)`` to stop abandoned batches.
+"""
+
+import asyncio
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from logging_system import get_logger
+from metrics import get_metrics_registry
+from .usage import record_response_usage
+
+logger = get_logger(__name__)
+
+BATCHES = get_metrics_registry().counter(
+    "llm_batches_total",
+    "Provider batches by outcome (completed, failed, timed_out, cancelled)",
+    ("provider", "outcome")
+)
+
+BATCH_REQUESTS = get_metrics_registry().counter(
+    "llm_batch_requests_total",
+    "LLM requests answered through provider batch APIs by outcome (succeeded, failed)",
+    ("provider", "outcome")
+)
+
+class BatchError(RuntimeError):
+    """A request could not be answered through the provider's batch API"""
+
+@dataclass
+class BatchRequest:
+    """One query in a provider batch"""
+    custom_id: str
+    prompt: str
+    system_instruction: Optional[str] = None
+    max_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    params: Dict[str, Any] = field(default_factory=dict)
+    batch_id: Optional[str] = None  # set once the request's batch is submitted
+
+@dataclass
+class BatchResult:
+    """The answer (or error) for one request of a provider batch"""
+    custom_id: str
+    text: Optional[str] = None
+    error: Optional[str] = None
+    model: Optional[str] = None
+    usage: Optional[Dict[str, int]] = None
+
+def supports_batches(service: Any) -> bool:
+    """Whether a provider service implements the batch API methods"""
+    return callable(getattr(service, "submit_batch", None)) and callable(getattr(service, "get_batch_results", None))
+
+class _PendingBatch:
+    """Requests accumulating for the next batch of one provider/model"""
+
+    __slots__ = ("service", "entries", "timer")
+
+    def __init__(self, service: Any):
+        self.service = service
+        self.entries: List[Tuple[BatchRequest, asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+class BatchLane:
+    """
+    Accumulates requests per provider/model and runs them as provider batches.
+
+    Callers await their own request; a caller that is cancelled before its
+    batch is submitted is left out of it, and a submitted batch whose
+    callers have all been cancelled is cancelled at the provider.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = 100,
+        max_wait_seconds: float = 30.0,
+        poll_interval_seconds: float = 30.0,
+        timeout_seconds: float = 86400.0
+    ):
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait_seconds = max_wait_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self._pending: Dict[Tuple[str, Optional[str]], _PendingBatch] = {}
+        self._running: Set[asyncio.Task] = set()
+        self._request_ids = itertools.count(1)
+
+    async def query(
+        self,
+        provider: str,
+        service: Any,
+        model: Optional[str],
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> str:
+        """
+        Answer a query through the provider's next batch
+
+        Raises:
+            BatchError: If the batch or this request failed
+        """
+        request = BatchRequest(
+            custom_id=f"request-{next(self._request_ids)}",
+            prompt=prompt,
+            system_instruction=system_instruction,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            params=kwargs
+        )
+        future = self._enqueue(provider, service, model, request)
+        on_wait = _batch_wait_callback.get()
+        if on_wait is not None:
+            on_wait(provider, request, future)
+        result = await future
+
+        # Recorded here rather than in the batch task, so usage lands on the caller's job
+        record_response_usage(provider, result.model or model, result.usage, batch=True)
+        if result.error is not None:
+            BATCH_REQUESTS.inc(provider=provider, outcome="failed")
+            raise BatchError(f"{provider} batch request failed: {result.error}")
+        BATCH_REQUESTS.inc(provider=provider, outcome="succeeded")
+        return result.text or ""
+
+    def _enqueue(self, provider: str, service: Any, model: Optional[str], request: BatchRequest) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        key = (provider, model)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _PendingBatch(service)
+            pending.timer = loop.call_later(self.max_wait_seconds, self._flush, key)
+
+        future = loop.create_future()
+        pending.entries.append((request, future))
+        if len(pending.entries) >= self.max_batch_size:
+            self._flush(key)
+        return future
+
+    def _flush(self, key: Tuple[str, Optional[str]]):
+        """Submit the pending batch of a provider/model"""
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+        if pending.timer is not None:
+            pending.timer.cancel()
+
+        entries = [(request, future) for request, future in pending.entries if not future.done()]
+        if not entries:
+            return
+        task = asyncio.create_task(self._run_batch(key[0], key[1], pending.service, entries))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run_batch(
+        self,
+        provider: str,
+        model: Optional[str],
+        service: Any,
+        entries: List[Tuple[BatchRequest, asyncio.Future]]
+    ):
+        futures = {request.custom_id: future for request, future in entries}
+        try:
+            batch_id = await service.submit_batch([request for request, _ in entries], model)
+            for request, _ in entries:
+                request.batch_id = batch_id
+            logger.info(f"Submitted {provider} batch {batch_id} with {len(entries)} requests")
+
+            deadline = time.monotonic() + self.timeout_seconds
+            while True:
+                if all(future.done() for future in futures.values()):
+                    # Nobody is waiting for the results any more
+                    await self._cancel_batch(provider, service, batch_id)
+                    return
+                await asyncio.sleep(self.poll_interval_seconds)
+                results = await service.get_batch_results(batch_id)
+                if results is not None:
+                    break
+                if time.monotonic() >= deadline:
+                    BATCHES.inc(provider=provider, outcome="timed_out")
+                    raise BatchError(f"{provider} batch {batch_id} did not complete within {self.timeout_seconds}s")
+        except Exception as e:
+            error = e
+            if not isinstance(e, BatchError):
+                BATCHES.inc(provider=provider, outcome="failed")
+                error = BatchError(f"{provider} batch failed: {e}")
+            logger.error(str(error))
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        BATCHES.inc(provider=provider, outcome="completed")
+        for result in results:
+            future = futures.pop(result.custom_id, None)
+            if future is not None and not future.done():
+                future.set_result(result)
+        for custom_id, future in futures.items():
+            if not future.done():
+                future.set_result(BatchResult(custom_id=custom_id, error="missing from the batch results"))
+
+    async def _cancel_batch(self, provider: str, service: Any, batch_id: str):
+        BATCHES.inc(provider=provider, outcome="cancelled")
+        cancel_batch = getattr(service, "cancel_batch", None)
+        if not callable(cancel_batch):
+            logger.info(f"Abandoned {provider} batch {batch_id}; the provider cannot cancel batches")
+            return
+        try:
+            await cancel_batch(batch_id)
+            logger.info(f"Cancelled {provider} batch {batch_id}: all of its callers are gone")
+        except Exception as e:
+            logger.warning(f"Failed to cancel {provider} batch {batch_id}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "pending_requests": sum(len(pending.entries) for pending in self._pending.values()),
+            "running_batches": len(self._running)
+        }
+
+# Called with (provider, request, future) when a query starts waiting for a batch
+BatchWaitCallback = Callable[[str, BatchRequest, asyncio.Future], None]
+
+# Whether LLM queries in the current context go through the batch lane (bound per job by the pipeline)
+_batch_mode: ContextVar[bool] = ContextVar("llm_batch_mode", default=False)
+_batch_wait_callback: ContextVar[Optional[BatchWaitCallback]] = ContextVar("llm_batch_wait_callback", default=None)
+
+def batch_mode_enabled() -> bool:
+    return _batch_mode.get()
+
+@contextmanager
+def llm_batch_mode(enabled: bool = True, on_wait: Optional[BatchWaitCallback] = None) -> Iterator[bool]:
+    """
+    Send LLM queries made inside the block through provider batch APIs, where supported
+
+    Args:
+        enabled: Whether to use the batch lane
+        on_wait: Called whenever a query starts waiting for its batch
+    """
+    token = _batch_mode.set(enabled)
+    callback_token = _batch_wait_callback.set(on_wait)
+    try:
+        yield enabled
+    finally:
+        _batch_wait_callback.reset(callback_token)
+        _batch_mode.reset(token)
+
+# Global batch lane
+_batch_lane: Optional[BatchLane] = None
+
+def get_batch_lane() -> BatchLane:
+    """Get the process-wide batch lane, configured from settings"""
+    global _batch_lane
+
+    if _batch_lane is None:
+        from config.environment import get_settings
+        settings = get_settings()
+        _batch_lane = BatchLane(
+            max_batch_size=settings.llm_batch_max_size,
+            max_wait_seconds=settings.llm_batch_max_wait_seconds,
+            poll_interval_seconds=settings.llm_batch_poll_interval_seconds,
+            timeout_seconds=settings.llm_batch_timeout_seconds
+        )
+
+    return _batch_lane
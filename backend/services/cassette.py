@@ -0,0 +1,341 @@
+"""
+LLM traffic cassettes (record/replay)
+
+In record mode UnifiedLLMService appends every request/response pair, with
+its latency (and chunk timing for streams), to a cassette: gzip-compressed
+NDJSON, one entry per line. In replay mode requests are served from the
+cassette instead of a provider, after the recorded latency multiplied by a
+scale factor (0 replays instantly), so pipeline performance changes can be
+compared against a realistic, reproducible workload without network access.
+
+Entries are keyed like response cache entries (kind, requested provider and
+model, prompt and parameters). Repeated requests replay the recorded entries
+for that key in order, cycling when exhausted; recorded failures are
+replayed as failures. Only the outermost call is recorded: calls a recorded
+call makes itself (the chunks of an oversized prompt) are replayed with it.
+
+Entries are buffered and written by a single background thread, so
+recording does no compression or file I/O on the event loop.
+"""
+
+import asyncio
+import functools
+import gzip
+import inspect
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from logging_system import get_logger
+from .llm_cache import LLMResponseCache
+from .rate_limiter import is_rate_limit_error
+
+logger = get_logger(__name__)
+
+OFF = "off"
+RECORD = "record"
+REPLAY = "replay"
+
+CASSETTE_MODES = (OFF, RECORD, REPLAY)
+
+# Entries buffered before they are handed to the writer thread
+FLUSH_EVERY = 100
+
+# Arguments that select how a request is served rather than what is asked
+NON_IDENTITY_ARGUMENTS = (
+    "self", "provider", "model", "prompt", "prompts", "kwargs",
+    "hedge", "hedge_provider", "hedge_model", "routing", "max_concurrent", "cache_prefix"
+)
+
+# Set while a recorded call runs, so calls it makes itself are not recorded again
+_recording: ContextVar[bool] = ContextVar("llm_cassette_recording", default=False)
+
+class CassetteMissError(RuntimeError):
+    """Raised in replay mode when the cassette has no entry for a request"""
+
+class ReplayedError(RuntimeError):
+    """A recorded provider failure, replayed (status_code 429 for rate limits)"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+class Cassette:
+    """Records LLM traffic to, or replays it from, one cassette file"""
+
+    def __init__(self, path: str, mode: str = RECORD, latency_scale: float = 1.0):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}. Use '{RECORD}' or '{REPLAY}'")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        self._entries: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._cursors: Dict[str, int] = defaultdict(int)
+        self._file = None
+        self._lock = threading.Lock()
+        self._buffer: List[str] = []
+        self._writer: Optional[ThreadPoolExecutor] = None
+
+        if mode == REPLAY:
+            self._load()
+
+    def _load(self):
+        count = 0
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]].append(entry)
+                    count += 1
+        logger.info("LLM cassette loaded for replay", path=self.path, entries=count, keys=len(self._entries))
+
+    @staticmethod
+    def make_key(kind: str, provider: Optional[str], model: Optional[str], prompt: Any, **params: Any) -> str:
+        return LLMResponseCache.make_key(kind, provider, model, prompt, **params)
+
+    # Recording
+
+    def _write(self, entry: Dict[str, Any]):
+        self._buffer.append(json.dumps(entry, separators=(",", ":"), default=str) + "\n")
+        self.recorded += 1
+        if len(self._buffer) >= FLUSH_EVERY:
+            self._flush_buffer()
+
+    def _flush_buffer(self):
+        lines, self._buffer = self._buffer, []
+        if not lines:
+            return
+        # One writer thread keeps entries in recorded order
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-cassette")
+        self._writer.submit(self._write_lines, lines).add_done_callback(self._log_write_error)
+
+    @staticmethod
+    def _log_write_error(future: Future):
+        if future.exception() is not None:
+            logger.error(f"Failed to write LLM cassette entries: {future.exception()}")
+
+    def _write_lines(self, lines: List[str]):
+        with self._lock:
+            if self._file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                # Appending adds a gzip member; readers treat members as one stream
+                self._file = gzip.open(self.path, "at", encoding="utf-8")
+            self._file.writelines(lines)
+            self._file.flush()
+
+    def _entry(self, kind, provider, model, prompt, params, started_at) -> Dict[str, Any]:
+        return {
+            "key": self.make_key(kind, provider, model, prompt, **params),
+            "kind": kind,
+            "provider": provider,
+            "model": model,
+            "prompt": prompt,
+            "params": params,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "latency_seconds": round(time.perf_counter() - started_at, 6)
+        }
+
+    def _record_error(self, entry: Dict[str, Any], error: Exception):
+        entry["error"] = str(error)
+        entry["rate_limited"] = is_rate_limit_error(error)
+        self._write(entry)
+
+    async def record_call(self, kind, provider, model, prompt, call: Callable, **params) -> Any:
+        started_at = time.perf_counter()
+        token = _recording.set(True)
+        try:
+            response = await call()
+        except Exception as e:
+            self._record_error(self._entry(kind, provider, model, prompt, params, started_at), e)
+            raise
+        finally:
+            _recording.reset(token)
+        entry = self._entry(kind, provider, model, prompt, params, started_at)
+        entry["response"] = response
+        self._write(entry)
+        return response
+
+    async def record_stream(self, kind, provider, model, prompt, stream: Callable, **params) -> AsyncIterator[str]:
+        started_at = time.perf_counter()
+        chunks: List[List[Any]] = []
+        iterator = stream().__aiter__()
+        try:
+            while True:
+                # Only while the stream produces its next chunk, not while the caller consumes it
+                token = _recording.set(True)
+                try:
+                    chunk = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    _recording.reset(token)
+                chunks.append([round(time.perf_counter() - started_at, 6), chunk])
+                yield chunk
+        except Exception as e:
+            self._record_error(self._entry(kind, provider, model, prompt, params, started_at), e)
+            raise
+        entry = self._entry(kind, provider, model, prompt, params, started_at)
+        entry["response"] = "".join(chunk for _, chunk in chunks)
+        entry["chunks"] = chunks
+        self._write(entry)
+
+    # Replay
+
+    def _next_entry(self, kind, provider, model, prompt, params) -> Dict[str, Any]:
+        key = self.make_key(kind, provider, model, prompt, **params)
+        entries = self._entries.get(key)
+        if not entries:
+            self.misses += 1
+            raise CassetteMissError(f"No recorded {kind} for {provider} ({model or 'default model'}) in {self.path}")
+        index = self._cursors[key]
+        self._cursors[key] = index + 1
+        self.replayed += 1
+        return entries[index % len(entries)]
+
+    def _raise_recorded_error(self, entry: Dict[str, Any]):
+        if "error" in entry:
+            raise ReplayedError(entry["error"], status_code=429 if entry.get("rate_limited") else None)
+
+    async def replay_call(self, kind, provider, model, prompt, **params) -> Any:
+        entry = self._next_entry(kind, provider, model, prompt, params)
+        await asyncio.sleep(entry.get("latency_seconds", 0.0) * self.latency_scale)
+        self._raise_recorded_error(entry)
+        return entry.get("response")
+
+    async def replay_stream(self, kind, provider, model, prompt, **params) -> AsyncIterator[str]:
+        entry = self._next_entry(kind, provider, model, prompt, params)
+        chunks = entry.get("chunks")
+        if chunks is None:
+            # Recorded from a non-streaming call: one chunk after the full latency
+            chunks = [[entry.get("latency_seconds", 0.0), entry.get("response")]] if "error" not in entry else []
+
+        elapsed = 0.0
+        for offset, chunk in chunks:
+            await asyncio.sleep(max(offset - elapsed, 0.0) * self.latency_scale)
+            elapsed = offset
+            yield chunk
+
+        if "error" in entry:
+            await asyncio.sleep(max(entry.get("latency_seconds", 0.0) - elapsed, 0.0) * self.latency_scale)
+            self._raise_recorded_error(entry)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "path": self.path,
+            "latency_scale": self.latency_scale,
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "misses": self.misses,
+            "keys": len(self._entries)
+        }
+
+    def close(self):
+        """Write the buffered entries and close the file"""
+        self._flush_buffer()
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+def cassette_recorded(kind: str):
+    """
+    Decorator for UnifiedLLMService request methods: records the call to, or
+    replays it from, the active cassette. Replay short-circuits before any
+    provider is resolved, so it works with no providers configured.
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        def _identity(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+            # Key on the provider the caller asked for, before routing
+            provider = arguments.get("provider") or getattr(arguments["self"], "_default_provider", None)
+            prompt = arguments.get("prompt", arguments.get("prompts"))
+            params = {name: value for name, value in arguments.items() if name not in NON_IDENTITY_ARGUMENTS}
+            params.update(arguments.get("kwargs", {}))
+            return provider, arguments.get("model"), prompt, params
+
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def stream_wrapper(*args, **kwargs):
+                tape = get_cassette()
+                if tape is None or (tape.mode == RECORD and _recording.get()):
+                    async for chunk in func(*args, **kwargs):
+                        yield chunk
+                    return
+
+                provider, model, prompt, params = _identity(args, kwargs)
+                if tape.mode == REPLAY:
+                    stream = tape.replay_stream(kind, provider, model, prompt, **params)
+                else:
+                    stream = tape.record_stream(kind, provider, model, prompt, lambda: func(*args, **kwargs), **params)
+                async for chunk in stream:
+                    yield chunk
+
+            return stream_wrapper
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            tape = get_cassette()
+            if tape is None or (tape.mode == RECORD and _recording.get()):
+                return await func(*args, **kwargs)
+
+            provider, model, prompt, params = _identity(args, kwargs)
+            if tape.mode == REPLAY:
+                return await tape.replay_call(kind, provider, model, prompt, **params)
+            return await tape.record_call(kind, provider, model, prompt, lambda: func(*args, **kwargs), **params)
+
+        return wrapper
+    return decorator
+
+# Global cassette (None when the mode is "off")
+_cassette: Optional[Cassette] = None
+_cassette_loaded = False
+
+def get_cassette() -> Optional[Cassette]:
+    """Get the process-wide cassette configured from settings, or None when disabled"""
+    global _cassette, _cassette_loaded
+
+    if not _cassette_loaded:
+        from config.environment import get_settings
+        settings = get_settings()
+        if settings.llm_cassette_mode != OFF:
+            _cassette = Cassette(
+                settings.llm_cassette_path,
+                mode=settings.llm_cassette_mode,
+                latency_scale=settings.llm_cassette_latency_scale
+            )
+            logger.info("LLM cassette enabled", mode=_cassette.mode, path=_cassette.path)
+        _cassette_loaded = True
+
+    return _cassette
+
+def set_cassette(cassette: Optional[Cassette]) -> Optional[Cassette]:
+    """Install a cassette (or None) in place of the configured one; returns the previous cassette"""
+    global _cassette, _cassette_loaded
+    previous = _cassette
+    _cassette, _cassette_loaded = cassette, True
+    return previous
+
+def close_cassette():
+    """Flush and close the cassette being recorded (called on application shutdown)"""
+    if _cassette is not None:
+        _cassette.close()
@@ -0,0 +1,282 @@
+"""
+Circuit breakers for LLM providers
+
+Each provider/model pair gets a closed/open/half-open breaker driven by a
+ConnectionHealthTracker. A breaker opens after a run of consecutive errors,
+or when the recent error rate or slow-call rate crosses its threshold. While
+open, UnifiedLLMService routes requests to its fallback providers instead of
+waiting for the failing one to time out. After a cool-down a limited number
+of probe requests are let through (half-open); a successful probe closes the
+breaker, a failed one re-opens it with a longer cool-down.
+
+Only errors that say something about the provider count as failures:
+transport errors, timeouts, 5xx and 429 responses. Caller errors (such as
+an invalid model) and waits in our own rate limiter leave the breaker alone.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from logging_system import get_logger
+from metrics import get_metrics_registry
+from .llm_utils import ConnectionHealthTracker, canonical_model_name, metric_model_label
+from .rate_limiter import RateLimitTimeout, _error_chain, is_rate_limit_error
+
+logger = get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+CIRCUIT_STATE_CHANGES = get_metrics_registry().counter(
+    "llm_circuit_breaker_transitions_total",
+    "LLM circuit breaker state transitions",
+    ("provider", "model", "state")
+)
+
+# Provider SDK and HTTP client errors (matched by class name, including base
+# classes) that mean the provider could not be reached or did not answer
+PROVIDER_FAILURE_ERRORS = frozenset({
+    "TransportError", "TimeoutException",            # httpx
+    "ClientConnectionError", "ServerTimeoutError",   # aiohttp
+    "APIConnectionError", "APITimeoutError", "InternalServerError",  # openai, anthropic
+    "ServerError", "DeadlineExceeded", "ServiceUnavailable"          # google api_core
+})
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a request is rejected because the provider's breaker is open"""
+
+def is_provider_failure(error: BaseException) -> bool:
+    """
+    Whether an error (or the provider error it wraps) should count against the
+    provider's breaker: a transport error, timeout, 5xx or 429 response
+    """
+    for candidate in _error_chain(error):
+        if isinstance(candidate, RateLimitTimeout):
+            # Backlog in our own limiter, not the provider
+            return False
+        if isinstance(candidate, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+            return True
+        status = getattr(candidate, "status_code", None)
+        if not isinstance(status, int):
+            status = getattr(candidate, "code", None)
+        if isinstance(status, int) and not isinstance(status, bool) and status >= 500:
+            return True
+        if any(cls.__name__ in PROVIDER_FAILURE_ERRORS for cls in type(candidate).__mro__):
+            return True
+    return is_rate_limit_error(error)
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker for one provider and model"""
+
+    def __init__(
+        self,
+        provider: str,
+        model: Optional[str] = None,
+        failure_rate_threshold: float = 0.5,
+        consecutive_failure_threshold: int = 5,
+        minimum_requests: int = 10,
+        slow_call_seconds: float = 60.0,
+        slow_call_rate_threshold: float = 0.8,
+        window_seconds: float = 60.0,
+        open_seconds: float = 30.0,
+        max_open_seconds: float = 300.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.provider = provider
+        self.model = model or "default"
+        self._model_label = metric_model_label(provider, model)
+        self.failure_rate_threshold = failure_rate_threshold
+        self.consecutive_failure_threshold = consecutive_failure_threshold
+        self.minimum_requests = minimum_requests
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+
+        self.tracker = ConnectionHealthTracker(f"{provider}:{self.model}", window_seconds, clock=clock)
+        self.state = CLOSED
+        self.opened_count = 0
+        self.rejected_count = 0
+        self.last_trip_reason: Optional[str] = None
+        self._opened_at = 0.0
+        self._current_open_seconds = open_seconds
+        self._half_open_in_flight = 0
+        self._state_changed_at = datetime.now(timezone.utc)
+
+    def _transition(self, state: str, reason: Optional[str] = None):
+        previous, self.state = self.state, state
+        self._state_changed_at = datetime.now(timezone.utc)
+        CIRCUIT_STATE_CHANGES.inc(provider=self.provider, model=self._model_label, state=state)
+        log = logger.warning if state == OPEN else logger.info
+        log(
+            "LLM circuit breaker state changed",
+            provider=self.provider,
+            model=self.model,
+            previous_state=previous,
+            state=state,
+            reason=reason
+        )
+
+    def _cooled_down(self) -> bool:
+        return self._clock() - self._opened_at >= self._current_open_seconds
+
+    def is_available(self) -> bool:
+        """Whether a request would currently be allowed (without reserving a probe)"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return self._cooled_down()
+        return self._half_open_in_flight < self.half_open_max_calls
+
+    def allow_request(self) -> bool:
+        """Reserve permission for a request; call record_success/record_failure afterwards"""
+        if self.state == OPEN and self._cooled_down():
+            self._half_open_in_flight = 0
+            self._transition(HALF_OPEN, "cool-down elapsed")
+
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+            self._half_open_in_flight += 1
+            return True
+
+        self.rejected_count += 1
+        return False
+
+    def record_success(self, response_time: Optional[float] = None):
+        """Record a successful call"""
+        self.tracker.record_request(success=True, response_time=response_time)
+        if self.state == HALF_OPEN:
+            self._half_open_in_flight = max(self._half_open_in_flight - 1, 0)
+            self.tracker.reset_window()
+            self._current_open_seconds = self.open_seconds
+            self._transition(CLOSED, "probe succeeded")
+        elif self.state == CLOSED:
+            self._evaluate()
+
+    def record_failure(self, error_type: Optional[str] = None, response_time: Optional[float] = None):
+        """Record a failed call"""
+        self.tracker.record_request(success=False, error_type=error_type, response_time=response_time)
+        if self.state == HALF_OPEN:
+            self._half_open_in_flight = max(self._half_open_in_flight - 1, 0)
+            # Back off further while the provider keeps failing
+            self._current_open_seconds = min(self._current_open_seconds * 2, self.max_open_seconds)
+            self._trip(f"probe failed ({error_type})")
+        elif self.state == CLOSED:
+            self._evaluate()
+
+    def release(self):
+        """Release a reserved probe without recording an outcome (e.g. the call was cancelled)"""
+        if self.state == HALF_OPEN:
+            self._half_open_in_flight = max(self._half_open_in_flight - 1, 0)
+
+    def _evaluate(self):
+        """Trip the breaker if recent errors or latency cross a threshold"""
+        if self.tracker.consecutive_errors >= self.consecutive_failure_threshold:
+            self._trip(f"{self.tracker.consecutive_errors} consecutive errors")
+            return
+
+        window = self.tracker.get_window_stats(self.slow_call_seconds)
+        if window["requests"] < self.minimum_requests:
+            return
+        if window["error_rate"] >= self.failure_rate_threshold:
+            self._trip(f"error rate {window['error_rate']:.0%} over {window['requests']} requests")
+        elif window["slow_call_rate"] >= self.slow_call_rate_threshold:
+            self._trip(f"{window['slow_call_rate']:.0%} of calls slower than {self.slow_call_seconds}s")
+
+    def _trip(self, reason: str):
+        self._opened_at = self._clock()
+        self.opened_count += 1
+        self.last_trip_reason = reason
+        self._transition(OPEN, reason)
+
+    def get_state(self) -> Dict[str, Any]:
+        """Get breaker state and the window statistics driving it"""
+        retry_in = None
+        if self.state == OPEN:
+            retry_in = round(max(self._current_open_seconds - (self._clock() - self._opened_at), 0.0), 2)
+
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "state": self.state,
+            "since": self._state_changed_at.isoformat(),
+            "retry_in_seconds": retry_in,
+            "opened_count": self.opened_count,
+            "rejected_count": self.rejected_count,
+            "last_trip_reason": self.last_trip_reason,
+            "consecutive_errors": self.tracker.consecutive_errors,
+            "window": self.tracker.get_window_stats(self.slow_call_seconds)
+        }
+
+class CircuitBreakerRegistry:
+    """
+    Breakers keyed by provider and canonical model name (see
+    llm_utils.canonical_model_name), created on first use with shared settings
+    """
+
+    def __init__(self, enabled: bool = True, **breaker_settings):
+        self.enabled = enabled
+        self.breaker_settings = breaker_settings
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, provider: str, model: Optional[str] = None) -> CircuitBreaker:
+        model = canonical_model_name(provider, model)
+        key = f"{provider}:{model or 'default'}"
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(provider, model, **self.breaker_settings)
+            self._breakers[key] = breaker
+        return breaker
+
+    def find(self, provider: str, model: Optional[str] = None) -> Optional[CircuitBreaker]:
+        """Get an existing breaker without creating one"""
+        return self._breakers.get(f"{provider}:{canonical_model_name(provider, model) or 'default'}")
+    
+    def is_available(self, provider: str, model: Optional[str] = None) -> bool:
+        """Whether requests may be sent to a provider/model"""
+        if not self.enabled:
+            return True
+        breaker = self.find(provider, model)
+        return breaker is None or breaker.is_available()
+
+    def get_provider_states(self, provider: str) -> Dict[str, Dict[str, Any]]:
+        """Get breaker states for all models of a provider"""
+        return {
+            breaker.model: breaker.get_state()
+            for breaker in self._breakers.values()
+            if breaker.provider == provider
+        }
+
+    def get_all_states(self) -> Dict[str, Dict[str, Any]]:
+        return {key: breaker.get_state() for key, breaker in self._breakers.items()}
+
+    def reset(self):
+        self._breakers.clear()
+
+# Global breaker registry
+_circuit_breakers: Optional[CircuitBreakerRegistry] = None
+
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    """Get the global circuit breaker registry, configured from settings"""
+    global _circuit_breakers
+
+    if _circuit_breakers is None:
+        from config.environment import get_settings
+        settings = get_settings()
+        _circuit_breakers = CircuitBreakerRegistry(
+            enabled=settings.llm_circuit_breaker_enabled,
+            failure_rate_threshold=settings.llm_circuit_breaker_failure_rate,
+            consecutive_failure_threshold=settings.llm_circuit_breaker_consecutive_failures,
+            minimum_requests=settings.llm_circuit_breaker_minimum_requests,
+            slow_call_seconds=settings.llm_circuit_breaker_slow_call_seconds,
+            open_seconds=settings.llm_circuit_breaker_open_seconds
+        )
+
+    return _circuit_breakers
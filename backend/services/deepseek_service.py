@@ -7,13 +7,14 @@ Follows the same interface pattern as other LLM services for consistency.
 
 import json
 import asyncio
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
 import openai
 from config.deepseek import get_deepseek_config
 from logging_system import get_logger
 from .llm_utils import (
     parse_json_response, 
     create_json_prompt,
+    native_json_mode_enabled,
     get_sentiment_analysis_schema,
     get_keyword_extraction_schema,
     get_summarization_schema,
@@ -22,25 +23,38 @@ from .llm_utils import (
     handle_structured_query_retry_error,
     safe_model_selection,
     monitor_connection_health,
+    instrument_llm_call,
+    instrument_llm_stream,
     get_health_tracker
 )
+from .http_transport import get_llm_http_client
+from .model_registry import get_model_registry
+from .rate_limiter import rate_limited
+from .usage import record_response_usage, usage_from_openai
 
 logger = get_logger(__name__)
 
 class DeepSeekService:
     """Service providing DeepSeek functionality for agents via composition"""
     
+    # Models without JSON output support
+    JSON_MODE_UNSUPPORTED_MODELS = ("deepseek-reasoner",)
+    
     def __init__(self):
         self._deepseek_config = get_deepseek_config()
         # DeepSeek uses OpenAI-compatible API with custom base URL
         self._client = openai.AsyncOpenAI(
             api_key=self._deepseek_config.api_key,
-            base_url=self._deepseek_config.base_url
+            base_url=self._deepseek_config.base_url,
+            http_client=get_llm_http_client()
         )
+        get_model_registry().register("deepseek", self._deepseek_config.get_available_models, self.list_models)
         logger.info("DeepSeek service initialized")
     
     # Core LLM Operations
     
+    @rate_limited("deepseek", "_deepseek_config")
+    @instrument_llm_call("DeepSeek")
     @monitor_connection_health("DeepSeek")
     async def query(
         self, 
@@ -66,36 +80,13 @@ class DeepSeekService:
             LLM response as string
         """
         try:
-            model_name = safe_model_selection(
-                service_name="DeepSeek",
-                requested_model=model,
-                available_models=self._deepseek_config.get_available_models(),
-                default_model=self._deepseek_config.default_model,
-                strict_validation=False
+            generation_config = self._prepare_generation_config(
+                prompt, model, system_instruction, max_tokens, temperature, **kwargs
             )
             
-            # Prepare messages
-            messages = []
-            if system_instruction:
-                messages.append({"role": "system", "content": system_instruction})
-            messages.append({"role": "user", "content": prompt})
-            
-            # Prepare generation config
-            generation_config = {
-                "model": model_name,
-                "messages": messages
-            }
-            
-            if max_tokens:
-                generation_config['max_tokens'] = max_tokens
-            if temperature is not None:
-                generation_config['temperature'] = temperature
-            
-            # Add any additional kwargs to generation config
-            generation_config.update(kwargs)
-            
             # Execute the query
             response = await self._client.chat.completions.create(**generation_config)
+            record_response_usage("deepseek", generation_config["model"], usage_from_openai(getattr(response, "usage", None)))
             
             # Extract text from response
             return response.choices[0].message.content
@@ -103,6 +94,96 @@ class DeepSeekService:
         except Exception as e:
             raise handle_llm_query_error("DeepSeek", e)
     
+    def _prepare_generation_config(
+        self,
+        prompt: str,
+        model: Optional[str],
+        system_instruction: Optional[str],
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Build request parameters shared by query and query_stream"""
+        model_name = safe_model_selection(
+            service_name="DeepSeek",
+            requested_model=model,
+            available_models=get_model_registry().get_catalog("deepseek"),
+            default_model=self._deepseek_config.default_model,
+            strict_validation=False
+        )
+        
+        # Prepare messages
+        messages = []
+        if system_instruction:
+            messages.append({"role": "system", "content": system_instruction})
+        messages.append({"role": "user", "content": prompt})
+        
+        # Prepare generation config
+        generation_config = {
+            "model": model_name,
+            "messages": messages
+        }
+        
+        if max_tokens:
+            generation_config['max_tokens'] = max_tokens
+        if temperature is not None:
+            generation_config['temperature'] = temperature
+        
+        # Add any additional kwargs to generation config
+        generation_config.update(kwargs)
+        
+        return generation_config
+    
+    def _json_mode_kwargs(self, model: Optional[str], output_schema: Any) -> Dict[str, Any]:
+        """Request parameters for native JSON output in structured queries"""
+        # JSON mode only produces a top-level object
+        if not native_json_mode_enabled() or not isinstance(output_schema, dict):
+            return {}
+        if (model or self._deepseek_config.default_model).startswith(self.JSON_MODE_UNSUPPORTED_MODELS):
+            return {}
+        return {"response_format": {"type": "json_object"}}
+    
+    @rate_limited("deepseek", "_deepseek_config")
+    @instrument_llm_stream("DeepSeek")
+    async def query_stream(
+        self, 
+        prompt: str, 
+        model: Optional[str] = None,
+        system_instruction: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream an LLM response from the DeepSeek API as it is generated
+        
+        Args:
+            prompt: The prompt to send to the LLM
+            model: Optional model override
+            system_instruction: Optional system instruction
+            max_tokens: Optional max tokens override
+            temperature: Optional temperature override
+            **kwargs: Additional generation parameters
+            
+        Yields:
+            Response text chunks
+        """
+        try:
+            generation_config = self._prepare_generation_config(
+                prompt, model, system_instruction, max_tokens, temperature, **kwargs
+            )
+            
+            # Usage arrives in a final chunk without choices
+            generation_config.setdefault("stream_options", {"include_usage": True})
+            stream = await self._client.chat.completions.create(**generation_config, stream=True)
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                record_response_usage("deepseek", generation_config["model"], usage_from_openai(getattr(chunk, "usage", None)))
+            
+        except Exception as e:
+            raise handle_llm_query_error("DeepSeek", e)
+    
     async def query_structured(
         self,
         prompt: str,
@@ -124,13 +205,14 @@ class DeepSeekService:
         Returns:
             Parsed JSON response
         """
+        query_kwargs = {**self._json_mode_kwargs(model, output_schema), **kwargs}
         for attempt in range(max_retries + 1):
             try:
                 # Create appropriate prompt for this attempt
                 is_retry = attempt > 0
                 schema_prompt = create_json_prompt(prompt, output_schema, strict=is_retry)
                 
-                response_text = await self.query(schema_prompt, model=model, **kwargs)
+                response_text = await self.query(schema_prompt, model=model, **query_kwargs)
                 
                 # Use the common JSON parsing utility
                 result = parse_json_response(response_text, output_schema)
@@ -143,9 +225,8 @@ class DeepSeekService:
                 if attempt >= max_retries:
                     return result
                 
-                # Log warning and continue to retry
+                # Malformed output is not transient: retry at once with the stricter prompt
                 logger.warning(f"JSON parsing failed on attempt {attempt + 1}, retrying...")
-                await asyncio.sleep(1)  # Brief delay before retry
                         
             except Exception as e:
                 # Use common error handling utility
@@ -206,6 +287,10 @@ class DeepSeekService:
     
     # Service Information and Management
     
+    async def list_models(self) -> List[str]:
+        """List the models available to the API key (merged into the model catalog)"""
+        return [model.id async for model in self._client.models.list()]
+    
     def get_info(self) -> Dict[str, Any]:
         """Get information about the DeepSeek service configuration"""
         return {
@@ -213,7 +298,7 @@ class DeepSeekService:
             "service_name": "DeepSeek Service",
             "provider": "DeepSeek",
             "default_model": self._deepseek_config.default_model,
-            "available_models": self._deepseek_config.get_available_models(),
+            "available_models": list(get_model_registry().get_catalog("deepseek")),
             "authentication_method": "API Key",
             "base_url": self._deepseek_config.base_url
         }
@@ -5,35 +5,152 @@ Provides simple Google AI integration using direct google.generativeai for maxim
 Focused on essential LLM query methods without framework constraints.
 """
 
-import json
 import asyncio
-from typing import Dict, Any, Optional, List
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
 import google.generativeai as genai
-from config.google_ai import get_google_ai_config, get_generative_model
+from google.generativeai import caching
+from config.google_ai import get_google_ai_config
 from logging_system import get_logger
+from .llm_utils import (
+    parse_json_response,
+    create_json_prompt,
+    native_json_mode_enabled,
+    monitor_connection_health,
+    instrument_llm_call,
+    instrument_llm_stream
+)
+from .model_registry import get_model_registry
+from .rate_limiter import rate_limited
+from .usage import record_response_usage, usage_from_gemini
 
 logger = get_logger(__name__)
 
 class GoogleAIService:
     """Service providing Google AI functionality for agents via composition"""
     
+    # GenerativeModel instances kept per (model, system instruction)
+    MODEL_CACHE_SIZE = 64
+    
+    # Models without native system instruction support get it inlined in the prompt
+    INLINE_SYSTEM_INSTRUCTION_MODELS = ("gemini-1.0",)
+    
+    # Models without response_mime_type support
+    JSON_MODE_UNSUPPORTED_MODELS = ("gemini-1.0",)
+    
     def __init__(self):
         
         self._google_ai_config = get_google_ai_config()
-        self._model_cache = {}
+        self._model_cache: "OrderedDict[Tuple[str, Optional[str]], genai.GenerativeModel]" = OrderedDict()
+        # Models backed by cached system instructions: (model, instruction) -> (model or None, refresh time)
+        self._context_caches: "OrderedDict[Tuple[str, str], Tuple[Optional[genai.GenerativeModel], float]]" = OrderedDict()
+        # Cache creations in flight, so concurrent callers with the same key share one
+        self._context_cache_creations: Dict[Tuple[str, str], asyncio.Task] = {}
+        get_model_registry().register("google", self._google_ai_config.get_available_models)
         logger.info("Google AI service initialized")
     
-    def _get_model(self, model: Optional[str] = None) -> genai.GenerativeModel:
-        """Get or cache a GenerativeModel instance"""
+    def _get_model(
+        self,
+        model: Optional[str] = None,
+        system_instruction: Optional[str] = None
+    ) -> genai.GenerativeModel:
+        """Get or cache a GenerativeModel instance for a model and system instruction"""
+        model_name = model or self._google_ai_config.default_model
+        if not self._supports_system_instruction(model_name):
+            system_instruction = None
+        cache_key = (model_name, system_instruction or None)
+        
+        llm_model = self._model_cache.get(cache_key)
+        if llm_model is None:
+            llm_model = self._google_ai_config.get_generative_model(model_name, system_instruction=system_instruction)
+            self._model_cache[cache_key] = llm_model
+            if len(self._model_cache) > self.MODEL_CACHE_SIZE:
+                self._model_cache.popitem(last=False)
+        else:
+            self._model_cache.move_to_end(cache_key)
+        
+        return llm_model
+    
+    async def _get_request_model(
+        self,
+        model: Optional[str],
+        system_instruction: Optional[str],
+        cache_prefix: bool = False
+    ) -> genai.GenerativeModel:
+        """Get the model for a request, backed by cached content when the system instruction is a cacheable prefix"""
+        if cache_prefix and system_instruction:
+            llm_model = await self._get_context_cached_model(model, system_instruction)
+            if llm_model is not None:
+                return llm_model
+        return self._get_model(model, system_instruction)
+    
+    async def _get_context_cached_model(self, model: Optional[str], system_instruction: str) -> Optional[genai.GenerativeModel]:
+        """
+        Get a model whose system instruction is stored as Gemini cached content
+        (see services/prefix_cache.py), creating the cache when missing or
+        about to expire. Returns None if the model cannot use a cache.
+        """
+        from config.environment import get_settings
+        
         model_name = model or self._google_ai_config.default_model
+        if not self._supports_system_instruction(model_name):
+            return None
+        cache_key = (model_name, system_instruction)
         
-        if model_name not in self._model_cache:
-            self._model_cache[model_name] = get_generative_model(model_name)
+        entry = self._context_caches.get(cache_key)
+        if entry is not None and entry[1] > time.monotonic():
+            self._context_caches.move_to_end(cache_key)
+            return entry[0]
+        
+        # Only callers waiting for the same cache share its creation; others are not blocked
+        creation = self._context_cache_creations.get(cache_key)
+        if creation is None:
+            creation = asyncio.create_task(
+                self._create_context_cache(cache_key, get_settings().llm_prefix_cache_ttl_seconds)
+            )
+            self._context_cache_creations[cache_key] = creation
+            creation.add_done_callback(lambda _: self._context_cache_creations.pop(cache_key, None))
+        # A cancelled caller does not cancel the creation for the others
+        return await asyncio.shield(creation)
+    
+    async def _create_context_cache(self, cache_key: Tuple[str, str], ttl_seconds: int) -> Optional[genai.GenerativeModel]:
+        model_name, system_instruction = cache_key
+        try:
+            cached_content = await asyncio.to_thread(
+                caching.CachedContent.create,
+                model=f"models/{model_name}",
+                system_instruction=system_instruction,
+                ttl=timedelta(seconds=ttl_seconds)
+            )
+            llm_model = genai.GenerativeModel.from_cached_content(cached_content=cached_content)
+        except Exception as e:
+            # Too short or unsupported model; retried after the TTL
+            logger.warning(f"Gemini context cache unavailable for {model_name}: {e}")
+            llm_model = None
         
-        return self._model_cache[model_name]
+        # Recreate slightly before the provider expires it
+        self._context_caches[cache_key] = (llm_model, time.monotonic() + ttl_seconds * 0.9)
+        if len(self._context_caches) > self.MODEL_CACHE_SIZE:
+            self._context_caches.popitem(last=False)
+        return llm_model
+    
+    def _supports_system_instruction(self, model_name: str) -> bool:
+        return not model_name.startswith(self.INLINE_SYSTEM_INSTRUCTION_MODELS)
+    
+    def _prepare_prompt(self, prompt: str, model: Optional[str], system_instruction: Optional[str]) -> str:
+        """Inline the system instruction for models that cannot take it natively"""
+        model_name = model or self._google_ai_config.default_model
+        if system_instruction and not self._supports_system_instruction(model_name):
+            return f"System: {system_instruction}\n\nUser: {prompt}"
+        return prompt
     
     # Core LLM Operations
     
+    @rate_limited("google", "_google_ai_config")
+    @instrument_llm_call("Google AI")
+    @monitor_connection_health("Google AI")
     async def query(
         self, 
         prompt: str, 
@@ -52,36 +169,27 @@ class GoogleAIService:
             system_instruction: Optional system instruction
             max_tokens: Optional max tokens override
             temperature: Optional temperature override
-            **kwargs: Additional generation parameters
+            **kwargs: Additional generation parameters (cache_prefix: serve the
+                system instruction from Gemini cached content)
             
         Returns:
             LLM response as string
         """
         try:
             # Get the model
-            llm_model = self._get_model(model)
-            
-            # Prepare the full prompt
-            full_prompt = prompt
-            if system_instruction:
-                full_prompt = f"System: {system_instruction}\n\nUser: {prompt}"
-            
-            # Prepare generation config
-            generation_config = {}
-            if max_tokens:
-                generation_config['max_output_tokens'] = max_tokens
-            if temperature is not None:
-                generation_config['temperature'] = temperature
-            
-            # Add any additional kwargs to generation config
-            generation_config.update(kwargs)
+            llm_model = await self._get_request_model(model, system_instruction, kwargs.pop("cache_prefix", False))
+            generation_config = self._prepare_generation_config(max_tokens, temperature, **kwargs)
             
-            # Execute the query
-            response = await asyncio.to_thread(
-                llm_model.generate_content,
-                full_prompt,
+            # Execute the query on the SDK's async client (no executor thread per request)
+            response = await llm_model.generate_content_async(
+                self._prepare_prompt(prompt, model, system_instruction),
                 generation_config=generation_config if generation_config else None
             )
+            record_response_usage(
+                "google",
+                model or self._google_ai_config.default_model,
+                usage_from_gemini(getattr(response, "usage_metadata", None))
+            )
             
             # Extract text from response
             if hasattr(response, 'text'):
@@ -95,6 +203,72 @@ class GoogleAIService:
             logger.error(f"Google AI query failed: {e}")
             raise RuntimeError(f"LLM query failed: {str(e)}")
     
+    def _prepare_generation_config(
+        self,
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Build the generation config shared by query and query_stream"""
+        # Prepare generation config
+        generation_config = {}
+        if max_tokens:
+            generation_config['max_output_tokens'] = max_tokens
+        if temperature is not None:
+            generation_config['temperature'] = temperature
+        
+        # Add any additional kwargs to generation config
+        generation_config.update(kwargs)
+        
+        return generation_config
+    
+    @rate_limited("google", "_google_ai_config")
+    @instrument_llm_stream("Google AI")
+    async def query_stream(
+        self, 
+        prompt: str, 
+        model: Optional[str] = None,
+        system_instruction: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream an LLM response from Google AI as it is generated
+        
+        Args:
+            prompt: The prompt to send to the LLM
+            model: Optional model override
+            system_instruction: Optional system instruction
+            max_tokens: Optional max tokens override
+            temperature: Optional temperature override
+            **kwargs: Additional generation parameters
+            
+        Yields:
+            Response text chunks
+        """
+        try:
+            llm_model = await self._get_request_model(model, system_instruction, kwargs.pop("cache_prefix", False))
+            generation_config = self._prepare_generation_config(max_tokens, temperature, **kwargs)
+            
+            response = await llm_model.generate_content_async(
+                self._prepare_prompt(prompt, model, system_instruction),
+                generation_config=generation_config if generation_config else None,
+                stream=True
+            )
+            # Each chunk carries the cumulative usage; the last one is final
+            usage = None
+            async for chunk in response:
+                text = getattr(chunk, 'text', None)
+                if text:
+                    yield text
+                usage = usage_from_gemini(getattr(chunk, "usage_metadata", None)) or usage
+            record_response_usage("google", model or self._google_ai_config.default_model, usage)
+            
+        except Exception as e:
+            logger.error(f"Google AI streaming query failed: {e}")
+            raise RuntimeError(f"LLM query failed: {str(e)}")
+    
     async def query_structured(
         self,
         prompt: str,
@@ -116,42 +290,29 @@ class GoogleAIService:
         Returns:
             Parsed JSON response
         """
-        schema_prompt = f"""{prompt}
-
-Please provide your response as valid JSON matching this schema:
-{json.dumps(output_schema, indent=2)}
-
-Ensure your response is properly formatted JSON that can be parsed."""
-        
+        query_kwargs = {**self._json_mode_kwargs(model, output_schema), **kwargs}
         for attempt in range(max_retries + 1):
             try:
-                response_text = await self.query(schema_prompt, model=model, **kwargs)
+                # Create appropriate prompt for this attempt
+                is_retry = attempt > 0
+                schema_prompt = create_json_prompt(prompt, output_schema, strict=is_retry)
                 
-                # Try to parse as JSON
-                return json.loads(response_text)
+                response_text = await self.query(schema_prompt, model=model, **query_kwargs)
+                
+                # Use the common JSON parsing utility
+                result = parse_json_response(response_text, output_schema)
+                
+                # Check if parsing was successful (no error key means success)
+                if "error" not in result:
+                    return result
+                
+                # If this was the last attempt, return the error
+                if attempt >= max_retries:
+                    return result
+                
+                # Malformed output is not transient: retry at once with the stricter prompt
+                logger.warning(f"JSON parsing failed on attempt {attempt + 1}, retrying...")
                 
-            except json.JSONDecodeError as e:
-                logger.warning(f"JSON parse failed (attempt {attempt + 1}): {e}")
-                if attempt < max_retries:
-                    # Retry with more explicit instructions
-                    schema_prompt = f"""{prompt}
-
-CRITICAL: You must respond with ONLY valid JSON. Do not include any text before or after the JSON.
-
-Schema to follow:
-{json.dumps(output_schema, indent=2)}
-
-Respond with valid JSON only:"""
-                    continue
-                else:
-                    # Final attempt failed, return error response
-                    logger.error(f"Failed to get valid JSON after {max_retries + 1} attempts")
-                    return {
-                        "error": "Failed to parse response as JSON",
-                        "raw_response": response_text,
-                        "schema_requested": output_schema,
-                        "attempts": max_retries + 1
-                    }
             except Exception as e:
                 logger.error(f"Structured query failed: {e}")
                 return {
@@ -159,6 +320,13 @@ Respond with valid JSON only:"""
                     "schema_requested": output_schema
                 }
     
+    def _json_mode_kwargs(self, model: Optional[str], output_schema: Any) -> Dict[str, Any]:
+        """Generation parameters for native JSON output in structured queries"""
+        model_name = model or self._google_ai_config.default_model
+        if not native_json_mode_enabled() or model_name.startswith(self.JSON_MODE_UNSUPPORTED_MODELS):
+            return {}
+        return {"response_mime_type": "application/json"}
+    
     async def batch_query(
         self,
         prompts: List[str],
@@ -240,7 +408,7 @@ Respond with valid JSON only:"""
             "service_name": "Google AI Service",
             "default_model": self._google_ai_config.default_model,
             "available_models": self._google_ai_config.get_available_models(),
-            "cached_models": list(self._model_cache.keys()),
+            "cached_models": sorted({model_name for model_name, _ in self._model_cache}),
             "authentication_method": "Vertex AI" if self._google_ai_config.use_vertex_ai else "Google AI Studio"
         }
     
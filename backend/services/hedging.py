@@ -0,0 +1,141 @@
+"""
+Hedged LLM requests
+
+A hedged request sends a duplicate to a secondary provider or model when the
+primary has not answered within its tracked p95 latency. The first
+successful response wins and the other request is cancelled. A budget caps
+hedges to a fraction of primary requests, so stragglers are cut without
+multiplying provider cost.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from logging_system import get_logger
+from metrics import get_metrics_registry
+
+logger = get_logger(__name__)
+
+HEDGED_REQUESTS = get_metrics_registry().counter(
+    "llm_hedged_requests_total",
+    "Hedge-eligible LLM requests by result (primary_fast, budget_exhausted, primary_won, hedge_won, both_failed)",
+    ("provider", "result")
+)
+
+class HedgeBudget:
+    """
+    Caps hedges to a fraction of primary requests.
+
+    Every primary request deposits ``ratio`` tokens and every hedge withdraws
+    one, so over time hedges stay below ``ratio`` of traffic. The balance is
+    capped so a long quiet period cannot fund a burst of hedges.
+    """
+
+    def __init__(self, ratio: float = 0.05, max_balance: float = 10.0, initial_balance: float = 1.0):
+        self.ratio = ratio
+        self.max_balance = max_balance
+        self._balance = min(initial_balance, max_balance)
+        self.primary_requests = 0
+        self.hedged_requests = 0
+        self.rejected_hedges = 0
+
+    def record_primary(self):
+        self.primary_requests += 1
+        self._balance = min(self._balance + self.ratio, self.max_balance)
+
+    def try_acquire(self) -> bool:
+        """Withdraw one hedge from the budget if available"""
+        if self._balance >= 1.0:
+            self._balance -= 1.0
+            self.hedged_requests += 1
+            return True
+        self.rejected_hedges += 1
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "budget_percent": round(self.ratio * 100, 2),
+            "primary_requests": self.primary_requests,
+            "hedged_requests": self.hedged_requests,
+            "rejected_hedges": self.rejected_hedges,
+            "hedge_rate_percent": (
+                round(self.hedged_requests / self.primary_requests * 100, 2) if self.primary_requests else 0.0
+            ),
+            "balance": round(self._balance, 3)
+        }
+
+def hedge_delay(
+    window_stats: Dict[str, Any],
+    min_samples: int = 20,
+    default_delay: float = 10.0,
+    min_delay: float = 0.5
+) -> float:
+    """Delay before hedging: the tracked p95 latency, or a default until enough samples exist"""
+    if window_stats.get("requests", 0) < min_samples:
+        return default_delay
+    return max(window_stats.get("p95_response_time_seconds") or default_delay, min_delay)
+
+async def _cancel(task: "asyncio.Task"):
+    task.cancel()
+    try:
+        await task
+    except BaseException:
+        pass
+
+async def race_with_hedge(
+    primary: Callable[[], Awaitable[Any]],
+    hedge: Callable[[], Awaitable[Any]],
+    delay: float,
+    budget: HedgeBudget,
+    provider: str = "unknown"
+) -> Any:
+    """
+    Run the primary call, starting the hedge if it has not finished after ``delay``.
+
+    Returns the first successful result and cancels the other call. If both
+    calls fail, the primary's exception is raised.
+    """
+    budget.record_primary()
+    primary_task = asyncio.ensure_future(primary())
+    hedge_task: Optional[asyncio.Task] = None
+
+    try:
+        done, _ = await asyncio.wait({primary_task}, timeout=delay)
+        if done:
+            HEDGED_REQUESTS.inc(provider=provider, result="primary_fast")
+            return primary_task.result()
+
+        if not budget.try_acquire():
+            HEDGED_REQUESTS.inc(provider=provider, result="budget_exhausted")
+            return await primary_task
+
+        logger.debug("Hedging slow LLM request", provider=provider, delay_seconds=round(delay, 3))
+        hedge_task = asyncio.ensure_future(hedge())
+        pending = {primary_task, hedge_task}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    winner = "primary_won" if task is primary_task else "hedge_won"
+                    HEDGED_REQUESTS.inc(provider=provider, result=winner)
+                    return task.result()
+
+        HEDGED_REQUESTS.inc(provider=provider, result="both_failed")
+        return primary_task.result()
+    finally:
+        for task in (primary_task, hedge_task):
+            if task is not None and not task.done():
+                await _cancel(task)
+
+# Global hedge budget
+_hedge_budget: Optional[HedgeBudget] = None
+
+def get_hedge_budget() -> HedgeBudget:
+    """Get the process-wide hedge budget, configured from settings"""
+    global _hedge_budget
+
+    if _hedge_budget is None:
+        from config.environment import get_settings
+        _hedge_budget = HedgeBudget(ratio=get_settings().llm_hedge_budget_percent / 100)
+
+    return _hedge_budget
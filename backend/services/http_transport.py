@@ -0,0 +1,262 @@
+"""
+Shared HTTP transport for OpenAI-compatible LLM providers
+
+OpenAI, Grok, DeepSeek and Meta Llama all talk to OpenAI-style REST APIs
+through ``openai.AsyncOpenAI``. Instead of each client opening its own
+default-sized connection pool, they share one ``httpx.AsyncClient`` whose
+pool size, keep-alive, HTTP/2 and per-host concurrency are configured from
+settings. The transport records, per host, how many requests reused a
+pooled connection versus opening a new one (and paying for a TLS
+handshake), and can pre-open connections at startup so the first job does
+not wait on connection setup.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from logging_system import get_logger
+
+logger = get_logger(__name__)
+
+class HostStats:
+    """Request and connection counters for one host"""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.queued_for_slot = 0
+        self.total_slot_wait_seconds = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        reused = max(self.requests - self.new_connections, 0)
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": reused,
+            "reuse_rate_percent": round(reused / self.requests * 100, 2) if self.requests else 0.0,
+            "tls_handshakes": self.tls_handshakes,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "queued_for_slot": self.queued_for_slot,
+            "total_slot_wait_seconds": round(self.total_slot_wait_seconds, 3)
+        }
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport wrapper adding per-host concurrency limits and
+    connection reuse statistics (from httpcore trace events)
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_connections_per_host: int = 0):
+        self._transport = transport
+        self.max_connections_per_host = max_connections_per_host
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, HostStats] = {}
+
+    def _slot(self, host: str) -> Optional[asyncio.Semaphore]:
+        if self.max_connections_per_host <= 0:
+            return None
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = asyncio.Semaphore(self.max_connections_per_host)
+            self._host_slots[host] = slot
+        return slot
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        stats = self._stats.setdefault(host, HostStats())
+        previous_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: Dict[str, Any]):
+            if event_name == "connection.connect_tcp.complete":
+                stats.new_connections += 1
+            elif event_name == "connection.start_tls.complete":
+                stats.tls_handshakes += 1
+            if previous_trace is not None:
+                await previous_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+
+        slot = self._slot(host)
+        if slot is not None:
+            if slot.locked():
+                stats.queued_for_slot += 1
+            start = time.perf_counter()
+            await slot.acquire()
+            stats.total_slot_wait_seconds += time.perf_counter() - start
+
+        stats.requests += 1
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            stats.errors += 1
+            stats.in_flight -= 1
+            if slot is not None:
+                slot.release()
+            raise
+
+        # Hold the host slot until the (possibly streamed) body is closed
+        response.stream = _ReleasingStream(response.stream, stats, slot)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {host: stats.to_dict() for host, stats in self._stats.items()}
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response stream that frees the request's host slot once closed"""
+
+    def __init__(self, stream, stats: HostStats, slot: Optional[asyncio.Semaphore]):
+        self._stream = stream
+        self._stats = stats
+        self._slot = slot
+        self._released = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._stats.in_flight -= 1
+                if self._slot is not None:
+                    self._slot.release()
+
+class LLMHttpTransport:
+    """Owns the shared httpx client used by OpenAI-compatible provider clients"""
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        max_connections_per_host: int = 0,
+        http2: bool = True,
+        timeout: float = 600.0,
+        connect_timeout: float = 10.0
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and _http2_available()
+        if http2 and not self.http2:
+            logger.warning("HTTP/2 requested for LLM providers but the 'h2' package is not installed; using HTTP/1.1")
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+
+        self.transport = PooledTransport(
+            httpx.AsyncHTTPTransport(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_keepalive_connections,
+                    keepalive_expiry=keepalive_expiry
+                )
+            ),
+            max_connections_per_host=max_connections_per_host
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self.warmed_up_hosts: Dict[str, bool] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared client (recreated if it has been closed)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                transport=self.transport,
+                timeout=self.timeout,
+                follow_redirects=True
+            )
+        return self._client
+
+    async def warm_up(self, base_urls: Iterable[str], timeout: float = 5.0) -> Dict[str, bool]:
+        """
+        Open pooled connections to each host ahead of the first real request.
+
+        Any HTTP response (even 401/404) leaves a TLS connection in the pool;
+        only network errors count as failures.
+        """
+        async def open_connection(url: str) -> bool:
+            try:
+                await self.client.head(url, timeout=timeout)
+                return True
+            except httpx.HTTPError as e:
+                logger.debug(f"LLM connection warm-up failed for {url}: {e}")
+                return False
+
+        urls = sorted({str(url) for url in base_urls if url})
+        results = await asyncio.gather(*(open_connection(url) for url in urls))
+        for url, ok in zip(urls, results):
+            self.warmed_up_hosts[urlsplit(url).hostname or url] = ok
+
+        logger.info("LLM HTTP connections warmed up", hosts=len(urls), succeeded=sum(results))
+        return dict(self.warmed_up_hosts)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+            "keepalive_expiry_seconds": self.keepalive_expiry,
+            "max_connections_per_host": self.transport.max_connections_per_host,
+            "warmed_up_hosts": dict(self.warmed_up_hosts),
+            "hosts": self.transport.get_stats()
+        }
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+# Global transport
+_llm_http_transport: Optional[LLMHttpTransport] = None
+
+def get_llm_http_transport() -> LLMHttpTransport:
+    """Get the process-wide LLM HTTP transport, configured from settings"""
+    global _llm_http_transport
+
+    if _llm_http_transport is None:
+        from config.environment import get_settings
+        settings = get_settings()
+        _llm_http_transport = LLMHttpTransport(
+            max_connections=settings.llm_http_max_connections,
+            max_keepalive_connections=settings.llm_http_max_keepalive_connections,
+            keepalive_expiry=settings.llm_http_keepalive_expiry_seconds,
+            max_connections_per_host=settings.llm_http_max_connections_per_host,
+            http2=settings.llm_http2_enabled,
+            timeout=settings.llm_http_timeout_seconds,
+            connect_timeout=settings.llm_http_connect_timeout_seconds
+        )
+
+    return _llm_http_transport
+
+def get_llm_http_client() -> httpx.AsyncClient:
+    """Get the shared httpx client for OpenAI-compatible provider clients"""
+    return get_llm_http_transport().client
+
+async def close_llm_http_transport():
+    """Close pooled connections (called on application shutdown)"""
+    if _llm_http_transport is not None:
+        await _llm_http_transport.aclose()
@@ -0,0 +1,439 @@
+"""
+LLM Response Cache
+
+Two-tier cache for LLM responses used by UnifiedLLMService:
+- In-memory LRU tier for hot entries
+- Optional on-disk SQLite tier that survives restarts
+- TTL and size-based eviction on both tiers
+- Bypass for non-deterministic (high or unset temperature) requests
+- Opt-in near-duplicate lookup via SimHash fingerprints and an LSH index
+- Hit-rate metrics
+
+Caching is opt-in per call context: agents enable it from their
+AgentExecutionConfig (enable_caching, cache_ttl_seconds) while executing a job.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from logging_system import get_logger
+from metrics import get_metrics_registry
+
+logger = get_logger(__name__)
+
+LLM_CACHE_REQUESTS = get_metrics_registry().counter(
+    "llm_cache_requests_total",
+    "LLM response cache lookups by result (memory_hit, disk_hit, similar_hit, miss, bypass)",
+    ("result",)
+)
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Caching policy for LLM calls made in the current context"""
+    enabled: bool = True
+    ttl_seconds: int = 3600
+    similarity_threshold: Optional[float] = None
+
+_cache_policy: ContextVar[Optional[CachePolicy]] = ContextVar("llm_cache_policy", default=None)
+
+def get_cache_policy() -> Optional[CachePolicy]:
+    """Get the caching policy of the current context (None = caching not requested)"""
+    return _cache_policy.get()
+
+@contextmanager
+def llm_cache_policy(enabled: bool = True, ttl_seconds: int = 3600, similarity_threshold: Optional[float] = None):
+    """
+    Enable or disable response caching for LLM calls made inside the block.
+    
+    A similarity_threshold (0-1) additionally serves near-duplicate prompts,
+    e.g. 0.95 allows fingerprints to differ in up to 3 of 64 bits.
+    """
+    token = _cache_policy.set(CachePolicy(
+        enabled=enabled,
+        ttl_seconds=ttl_seconds,
+        similarity_threshold=similarity_threshold
+    ))
+    try:
+        yield
+    finally:
+        _cache_policy.reset(token)
+
+# Volatile fragments that should not make otherwise identical prompts differ
+_VOLATILE_PATTERNS = [
+    re.compile(r"\d{4}-\d{2}-\d{2}[t ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(z|[+-]\d{2}:?\d{2})?"),
+    re.compile(r"\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{2,4}"),
+    re.compile(r"\d{1,2}:\d{2}(:\d{2})?(\s?[ap]m)?"),
+    re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"),
+]
+_WHITESPACE = re.compile(r"\s+")
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+FINGERPRINT_BITS = 64
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercase, mask timestamps/dates/UUIDs and collapse whitespace"""
+    text = prompt.lower()
+    for pattern in _VOLATILE_PATTERNS:
+        text = pattern.sub("#", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+def simhash(text: str) -> int:
+    """64-bit SimHash of a normalized prompt over token bigrams"""
+    tokens = _TOKEN.findall(normalize_prompt(text))
+    features: Dict[str, int] = {}
+    for i in range(max(len(tokens) - 1, 1)):
+        feature = " ".join(tokens[i:i + 2])
+        features[feature] = features.get(feature, 0) + 1
+
+    weights = [0] * FINGERPRINT_BITS
+    for feature, weight in features.items():
+        digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += weight if digest >> bit & 1 else -weight
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+class SimilarityIndex:
+    """
+    Bounded LSH index over SimHash fingerprints.
+
+    Fingerprints are split into bands; two fingerprints within k differing
+    bits share at least one identical band whenever k < number of bands,
+    so candidates are found by exact band lookups and then verified by
+    Hamming distance. Entries are evicted least recently used.
+    """
+
+    def __init__(self, max_entries: int = 1000, bands: int = 8):
+        self.max_entries = max_entries
+        self.bands = bands
+        self.band_bits = FINGERPRINT_BITS // bands
+        self._entries: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, int], Set[str]] = {}
+
+    @property
+    def max_distance(self) -> int:
+        return self.bands - 1
+
+    def distance_for(self, threshold: float) -> int:
+        """Convert a 0-1 similarity threshold into a Hamming distance the index can serve"""
+        return min(int((1 - threshold) * FINGERPRINT_BITS), self.max_distance)
+
+    def _band_keys(self, scope: str, fingerprint: int) -> List[Tuple[str, int, int]]:
+        mask = (1 << self.band_bits) - 1
+        return [(scope, band, fingerprint >> (band * self.band_bits) & mask) for band in range(self.bands)]
+
+    def add(self, cache_key: str, scope: str, fingerprint: int):
+        if cache_key in self._entries:
+            self._entries.move_to_end(cache_key)
+            return
+        self._entries[cache_key] = (scope, fingerprint)
+        for band_key in self._band_keys(scope, fingerprint):
+            self._buckets.setdefault(band_key, set()).add(cache_key)
+        while len(self._entries) > self.max_entries:
+            self.remove(next(iter(self._entries)))
+
+    def remove(self, cache_key: str):
+        entry = self._entries.pop(cache_key, None)
+        if entry is None:
+            return
+        for band_key in self._band_keys(*entry):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(cache_key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def find(self, scope: str, fingerprint: int, max_distance: int) -> List[Tuple[int, str]]:
+        """Return (distance, cache_key) of near-duplicates, closest first"""
+        candidates: Set[str] = set()
+        for band_key in self._band_keys(scope, fingerprint):
+            candidates.update(self._buckets.get(band_key, ()))
+
+        matches = []
+        for cache_key in candidates:
+            distance = bin(self._entries[cache_key][1] ^ fingerprint).count("1")
+            if distance <= max_distance:
+                matches.append((distance, cache_key))
+        matches.sort()
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class _DiskTier:
+    """SQLite-backed cache tier with TTL and total-size eviction"""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+            "size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0], row[1]
+
+    def set(self, key: str, value: str, expires_at: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, size, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, expires_at, len(value), now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until under the size budget
+        excess = total - self.max_bytes
+        freed = 0
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM llm_cache ORDER BY accessed_at"):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", doomed)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+        return {"path": self.path, "entries": entries, "size_bytes": size, "max_bytes": self.max_bytes}
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class LLMResponseCache:
+    """
+    Two-tier LLM response cache.
+
+    Lookups check the in-memory LRU first, then the disk tier (promoting hits
+    back into memory). Disk access runs in a worker thread so SQLite I/O never
+    blocks the event loop.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        disk_path: Optional[str] = None,
+        disk_max_bytes: int = 100 * 1024 * 1024,
+        max_temperature: float = 0.3,
+        enabled: bool = True,
+        similarity_max_entries: int = 1000
+    ):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.max_temperature = max_temperature
+        self._memory: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._disk = _DiskTier(disk_path, disk_max_bytes) if disk_path else None
+        self._similar = SimilarityIndex(similarity_max_entries)
+        self._stats = {"memory_hit": 0, "disk_hit": 0, "similar_hit": 0, "miss": 0, "bypass": 0}
+
+    @staticmethod
+    def make_key(kind: str, provider: str, model: Optional[str], prompt: str, **params: Any) -> str:
+        """Build a cache key from the request identity and sampling parameters"""
+        payload = json.dumps(
+            {"kind": kind, "provider": provider, "model": model, "prompt": prompt, "params": params},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def resolve_policy(self, temperature: Optional[float]) -> Optional[CachePolicy]:
+        """Return the active policy if this request may be cached, recording bypasses"""
+        policy = get_cache_policy()
+        if not self.enabled or policy is None or not policy.enabled or policy.ttl_seconds <= 0:
+            return None
+        # Without a temperature the provider default applies (e.g. 1.0), which is not deterministic
+        if temperature is None or temperature > self.max_temperature:
+            self._record("bypass")
+            return None
+        return policy
+
+    async def get(self, key: str, record_miss: bool = True) -> Optional[Any]:
+        """
+        Look up a cached response, or None on miss.
+
+        Callers that fall back to get_similar pass record_miss=False and call
+        record_miss() once both lookups fail, so a near-duplicate hit is not
+        also counted as a miss.
+        """
+        value, tier = await self._lookup(key)
+        if tier is not None or record_miss:
+            self._record(tier or "miss")
+        return value
+
+    def record_miss(self):
+        """Count a lookup that missed both the exact and similarity caches"""
+        self._record("miss")
+
+    async def get_similar(self, scope: str, prompt: str, threshold: float) -> Optional[Any]:
+        """
+        Look up a response cached for a near-duplicate prompt in the same scope.
+
+        The scope identifies everything but the prompt (provider, model,
+        system instruction, sampling parameters), which must match exactly.
+        """
+        fingerprint = simhash(prompt)
+        for _, cache_key in self._similar.find(scope, fingerprint, self._similar.distance_for(threshold)):
+            value, _ = await self._lookup(cache_key)
+            if value is not None:
+                self._record("similar_hit")
+                return value
+            # Expired or evicted from both tiers
+            self._similar.remove(cache_key)
+        return None
+
+    async def _lookup(self, key: str) -> Tuple[Optional[Any], Optional[str]]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > time.time():
+                self._memory.move_to_end(key)
+                # Structured responses are mutable; never hand out the cached object
+                return (value if isinstance(value, str) else copy.deepcopy(value)), "memory_hit"
+            del self._memory[key]
+
+        if self._disk is not None:
+            try:
+                row = await asyncio.to_thread(self._disk.get, key)
+            except Exception as e:
+                logger.warning("LLM cache disk read failed", error=str(e))
+                row = None
+            if row is not None:
+                value = json.loads(row[0])
+                self._store_memory(key, value, row[1])
+                return value, "disk_hit"
+
+        return None, None
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl_seconds: int,
+        similarity_scope: Optional[str] = None,
+        prompt: Optional[str] = None
+    ):
+        """Store a response in both tiers, indexing its prompt fingerprint if a scope is given"""
+        if similarity_scope is not None and prompt is not None:
+            self._similar.add(key, similarity_scope, simhash(prompt))
+        
+        expires_at = time.time() + ttl_seconds
+        self._store_memory(key, value if isinstance(value, str) else copy.deepcopy(value), expires_at)
+
+        if self._disk is not None:
+            try:
+                await asyncio.to_thread(self._disk.set, key, json.dumps(value, default=str), expires_at)
+            except Exception as e:
+                logger.warning("LLM cache disk write failed", error=str(e))
+
+    def _store_memory(self, key: str, value: Any, expires_at: float):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _record(self, result: str):
+        self._stats[result] += 1
+        LLM_CACHE_REQUESTS.inc(result=result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counts, hit rate and tier sizes"""
+        hits = self._stats["memory_hit"] + self._stats["disk_hit"] + self._stats["similar_hit"]
+        lookups = hits + self._stats["miss"]
+        stats = {
+            **self._stats,
+            "enabled": self.enabled,
+            "hit_rate_percent": round(hits / lookups * 100, 2) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "max_temperature": self.max_temperature,
+            "similarity_entries": len(self._similar),
+            "disk": None
+        }
+        if self._disk is not None:
+            try:
+                stats["disk"] = self._disk.stats()
+            except Exception as e:
+                stats["disk"] = {"error": str(e)}
+        return stats
+
+    def clear(self):
+        """Remove all cached responses"""
+        self._memory.clear()
+        self._similar = SimilarityIndex(self._similar.max_entries, self._similar.bands)
+        if self._disk is not None:
+            self._disk.clear()
+
+# Global cache instance
+_llm_response_cache: Optional[LLMResponseCache] = None
+
+def get_llm_response_cache() -> LLMResponseCache:
+    """Get or create the global LLM response cache"""
+    global _llm_response_cache
+
+    if _llm_response_cache is None:
+        from config.environment import get_settings
+        settings = get_settings()
+        _llm_response_cache = LLMResponseCache(
+            max_entries=settings.llm_cache_max_entries,
+            disk_path=settings.llm_cache_disk_path,
+            disk_max_bytes=settings.llm_cache_disk_max_mb * 1024 * 1024,
+            max_temperature=settings.llm_cache_max_temperature,
+            enabled=settings.llm_cache_enabled,
+            similarity_max_entries=settings.llm_cache_similarity_max_entries
+        )
+
+    return _llm_response_cache
@@ -6,16 +6,55 @@ Allows agents to use different providers seamlessly through a single interface.
 """
 
 import asyncio
-from typing import Dict, Any, Optional, List, Literal
+import importlib
+import time
+from typing import Dict, Any, Optional, List, Literal, AsyncIterator
 from logging_system import get_logger
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from .llm_utils import get_all_health_status, get_health_tracker
+from .llm_utils import canonical_model_name, get_all_health_status, get_health_tracker
+from .llm_cache import get_llm_response_cache
+from .batch_lane import batch_mode_enabled, get_batch_lane, supports_batches
+from .cassette import cassette_recorded, get_cassette
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, get_circuit_breakers, is_provider_failure
+from .hedging import get_hedge_budget, hedge_delay, race_with_hedge
+from .http_transport import get_llm_http_transport
+from .model_registry import get_model_registry
+from .prefix_cache import cacheable_prefix, get_prefix_cache_stats
+from .rate_limiter import estimate_request_tokens, get_rate_limiters
+from .token_budget import CHUNK, TRIM, budget_prompt, get_context_window
+from .routing import (
+    PINNED, PREFERRED, NoRouteError, RouteCandidate,
+    get_provider_router, record_routing_decision
+)
+from job_progress import get_job_progress
 
 logger = get_logger(__name__)
 
 # Type definition for supported providers
-LLMProvider = Literal["google", "openai", "grok", "anthropic", "deepseek", "llama"]
+LLMProvider = Literal["google", "openai", "grok", "anthropic", "deepseek", "llama", "local"]
+
+# Health tracker and metrics names used by each provider's service
+SERVICE_NAMES: Dict[str, str] = {
+    "google": "Google AI",
+    "openai": "OpenAI",
+    "grok": "Grok",
+    "anthropic": "Anthropic",
+    "deepseek": "DeepSeek",
+    "llama": "Meta Llama",
+    "local": "Local"
+}
+
+# Configuration module and accessor for each provider
+PROVIDER_CONFIGS: Dict[str, tuple] = {
+    "google": ("config.google_ai", "get_google_ai_config"),
+    "openai": ("config.openai", "get_openai_config"),
+    "grok": ("config.grok", "get_grok_config"),
+    "anthropic": ("config.anthropic", "get_anthropic_config"),
+    "deepseek": ("config.deepseek", "get_deepseek_config"),
+    "llama": ("config.llama", "get_llama_config"),
+    "local": ("config.local", "get_local_config")
+}
 
 @dataclass
 class ServiceFailureInfo:
@@ -39,6 +78,7 @@ class UnifiedLLMService:
         self._anthropic_service = None
         self._deepseek_service = None
         self._llama_service = None
+        self._local_service = None
         
         # Track service failures for retry logic
         self._service_failures: Dict[str, ServiceFailureInfo] = {}
@@ -47,6 +87,10 @@ class UnifiedLLMService:
         from config.environment import get_settings
         settings = get_settings()
         self._default_provider = settings.default_llm_provider
+        self._routing_policy = settings.llm_routing_policy
+        self._model_info_cache: Dict[str, Dict[str, Any]] = {}
+        self._context_overflow = settings.llm_context_overflow
+        self._context_window_cache: Dict[str, Optional[int]] = {}
         logger.info(f"Unified LLM service initialized with default provider: {self._default_provider}")
     
     def _record_service_failure(self, service_name: str, error: str):
@@ -186,6 +230,27 @@ class UnifiedLLMService:
             self._record_service_failure("llama", str(e))
             return None
     
+    def _get_local_service(self):
+        """Lazy load the local mock LLM service (only when LOCAL_LLM_ENABLED is set)"""
+        if self._local_service is not None:
+            return self._local_service
+        
+        # Disabled is the normal state outside benchmarks, not a failure
+        from config.local import is_local_llm_enabled
+        if not is_local_llm_enabled() or not self._should_retry_service("local"):
+            return None
+        
+        try:
+            from services.local_service import get_local_service
+            self._local_service = get_local_service()
+            # Clear any previous failure record on success
+            if "local" in self._service_failures:
+                del self._service_failures["local"]
+            return self._local_service
+        except Exception as e:
+            self._record_service_failure("local", str(e))
+            return None
+    
     def _get_service_for_provider(self, provider: LLMProvider):
         """Get the service instance for a specific provider"""
         if provider == "google":
@@ -200,9 +265,166 @@ class UnifiedLLMService:
             return self._get_deepseek_service()
         elif provider == "llama":
             return self._get_llama_service()
+        elif provider == "local":
+            return self._get_local_service()
         else:
             raise ValueError(f"Unknown provider: {provider}")
     
+    def _resolve_service(
+        self,
+        provider: Optional[LLMProvider],
+        model: Optional[str] = None,
+        routing: Optional[str] = None,
+        required_tokens: Optional[int] = None
+    ):
+        """
+        Resolve the provider, service and model for a request under a routing
+        policy (see services.routing). Under the default "preferred" policy the
+        requested provider is used unless it cannot be loaded or its circuit
+        breaker is open, in which case the fastest healthy provider takes over.
+        
+        Returns:
+            (provider, service, model) - the model is dropped when routing to
+            another provider, since model names are provider-specific
+        """
+        # Determine provider
+        if provider is None:
+            provider = self._default_provider
+        policy = routing or self._routing_policy
+        
+        candidates = [self._route_candidate(provider, model)]
+        if policy not in (PREFERRED, PINNED) or not candidates[0].available:
+            candidates.extend(
+                self._route_candidate(candidate)
+                for candidate in self.get_available_providers()
+                if candidate != provider
+            )
+        
+        decision = get_provider_router().choose(policy, provider, model, candidates, required_tokens)
+        record_routing_decision(decision)
+        
+        service = self._get_service_for_provider(decision.provider)
+        if service is None:
+            raise NoRouteError("No LLM services available")
+        
+        return decision.provider, service, decision.model
+    
+    def _route_candidate(self, provider: LLMProvider, model: Optional[str] = None) -> RouteCandidate:
+        """Build a routing candidate from the provider's health, breaker state and model info"""
+        service = self._get_service_for_provider(provider)
+        breakers = get_circuit_breakers()
+        
+        # Per-model outcomes come from the breaker; fall back to the provider-wide tracker
+        breaker = breakers.find(provider, model)
+        if breaker is not None and breaker.tracker.total_requests:
+            tracker = breaker.tracker
+        else:
+            tracker = get_health_tracker(SERVICE_NAMES[provider])
+        
+        model_info = self._get_model_info(provider, model)
+        cost_input = model_info.get("cost_per_1k_input")
+        cost_output = model_info.get("cost_per_1k_output")
+        
+        return RouteCandidate(
+            provider=provider,
+            model=model,
+            available=service is not None and breakers.is_available(provider, model),
+            latency_seconds=tracker.ewma_response_time,
+            error_rate=tracker.ewma_error_rate,
+            cost_per_1k_tokens=(
+                cost_input + cost_output
+                if isinstance(cost_input, (int, float)) and isinstance(cost_output, (int, float)) else None
+            ),
+            context_window=self._get_context_window(provider, model)
+        )
+    
+    def _get_model_info(self, provider: LLMProvider, model: Optional[str] = None) -> Dict[str, Any]:
+        """Get cached model specs (cost, context window) from the provider's configuration"""
+        model = canonical_model_name(provider, model)
+        cache_key = f"{provider}:{model or 'default'}"
+        if cache_key not in self._model_info_cache:
+            info: Dict[str, Any] = {}
+            try:
+                module_name, getter = PROVIDER_CONFIGS[provider]
+                config = getattr(importlib.import_module(module_name), getter)()
+                info = config.get_model_info(model) if hasattr(config, "get_model_info") else {}
+            except Exception as e:
+                logger.debug(f"Model info unavailable for {provider}: {e}")
+            self._model_info_cache[cache_key] = info if isinstance(info, dict) else {}
+        return self._model_info_cache[cache_key]
+    
+    def _get_context_window(self, provider: LLMProvider, model: Optional[str] = None) -> Optional[int]:
+        """Get the cached context window of a model from the provider's configuration"""
+        model = canonical_model_name(provider, model)
+        cache_key = f"{provider}:{model or 'default'}"
+        if cache_key not in self._context_window_cache:
+            self._context_window_cache[cache_key] = get_context_window(provider, model)
+        return self._context_window_cache[cache_key]
+    
+    def _budget_prompt(
+        self,
+        provider: LLMProvider,
+        model: Optional[str],
+        prompt: str,
+        system_instruction: Optional[str],
+        max_tokens: Optional[int],
+        context_overflow: Optional[str],
+        allow_chunks: bool = True
+    ) -> List[str]:
+        """
+        Fit a prompt to the model's context window (see services.token_budget);
+        callers that cannot combine several answers trim instead of chunking
+        """
+        policy = context_overflow or self._context_overflow
+        if policy == CHUNK and not allow_chunks:
+            policy = TRIM
+        return budget_prompt(
+            prompt,
+            self._get_context_window(provider, model),
+            policy,
+            provider=provider,
+            model=model,
+            system_instruction=system_instruction,
+            max_tokens=max_tokens
+        )
+    
+    def _acquire_breaker(self, provider: LLMProvider, model: Optional[str]) -> Optional[CircuitBreaker]:
+        """Reserve a call on the provider/model circuit breaker, if breakers are enabled"""
+        breakers = get_circuit_breakers()
+        if not breakers.enabled:
+            return None
+        
+        breaker = breakers.get(provider, model)
+        if not breaker.allow_request():
+            raise CircuitOpenError(f"Circuit breaker open for {provider} ({breaker.model})")
+        return breaker
+    
+    async def _guarded_call(self, provider: LLMProvider, model: Optional[str], call):
+        """
+        Run a provider call, recording its outcome and latency on the circuit
+        breaker; errors that are not provider failures only release the breaker
+        """
+        breaker = self._acquire_breaker(provider, model)
+        if breaker is None:
+            return await call()
+        
+        start_time = time.perf_counter()
+        try:
+            result = await call()
+        except Exception as e:
+            if is_provider_failure(e):
+                breaker.record_failure(type(e).__name__, time.perf_counter() - start_time)
+            else:
+                breaker.release()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        
+        breaker.record_success(time.perf_counter() - start_time)
+        return result
+    
+    @cassette_recorded("query")
     async def query(
         self, 
         prompt: str,
@@ -211,11 +433,21 @@ class UnifiedLLMService:
         system_instruction: Optional[str] = None,
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
+        hedge: bool = False,
+        hedge_provider: Optional[LLMProvider] = None,
+        hedge_model: Optional[str] = None,
+        routing: Optional[str] = None,
+        context_overflow: Optional[str] = None,
+        cache_prefix: Optional[bool] = None,
         **kwargs
     ) -> str:
         """
         Query an LLM with automatic provider selection
         
+        With LLM_BATCH_ENABLED, queries made by LOW-priority and scheduled jobs go
+        through the provider's batch API where supported (see services/batch_lane.py),
+        unless hedged.
+        
         Args:
             prompt: The prompt to send to the LLM
             provider: LLM provider to use ("google", "openai", "grok", or "anthropic"). If None, uses default.
@@ -223,50 +455,269 @@ class UnifiedLLMService:
             system_instruction: Optional system instruction
             max_tokens: Optional max tokens override
             temperature: Optional temperature override
+            hedge: Send a duplicate request if the primary is slower than its p95 latency
+            hedge_provider: Provider for the duplicate request (defaults to LLM_HEDGE_PROVIDER, then the primary)
+            hedge_model: Model for the duplicate request (defaults to LLM_HEDGE_MODEL)
+            routing: Routing policy ("preferred", "pinned", "fastest" or "cheapest"; defaults to LLM_ROUTING_POLICY)
+            context_overflow: What to do if the request exceeds the model's context window
+                ("trim", "chunk", "error" or "off"; defaults to LLM_CONTEXT_OVERFLOW). Chunked
+                prompts are answered piece by piece and the answers joined.
+            cache_prefix: Mark a long system instruction as a cacheable prompt prefix
+                (defaults to LLM_PREFIX_CACHE_ENABLED; see services/prefix_cache.py)
             **kwargs: Additional provider-specific parameters
             
         Returns:
             LLM response as string
+            
+        Raises:
+            ContextWindowExceededError: If the request cannot fit the model's context window
         """
-        # Determine provider
-        if provider is None:
-            provider = self._default_provider
+        provider, service, model = self._resolve_service(
+            provider, model, routing,
+            estimate_request_tokens(prompt, system_instruction, max_tokens, provider or self._default_provider, model)
+        )
         
-        # Get service
-        service = self._get_service_for_provider(provider)
-        if service is None:
-            # Fallback to other providers if primary is unavailable
-            available_providers = self.get_available_providers()
-            if provider in available_providers:
-                available_providers.remove(provider)
+        prompts = self._budget_prompt(provider, model, prompt, system_instruction, max_tokens, context_overflow)
+        if len(prompts) > 1:
+            def chunk_query(chunk):
+                return self.query(
+                    chunk, provider=provider, model=model, system_instruction=system_instruction,
+                    max_tokens=max_tokens, temperature=temperature, routing=PINNED,
+                    context_overflow=TRIM, cache_prefix=cache_prefix, **kwargs
+                )
+
+            progress = get_job_progress()
+            if progress is None:
+                responses = await asyncio.gather(*(chunk_query(chunk) for chunk in prompts))
+                return "\n\n".join(responses)
+
+            # Inside a job each chunk streams into its progress buffer, so answer
+            # them in turn to keep the progress text readable
+            responses = []
+            for index, chunk in enumerate(prompts):
+                if index:
+                    progress.append("\n\n")
+                responses.append(await chunk_query(chunk))
+            return "\n\n".join(responses)
+        prompt = prompts[0]
+        
+        def provider_call(call_provider, call_service, call_model, stream_progress: bool = True):
+            async def call():
+                logger.debug(f"Making LLM query with {call_provider} provider")
+                progress = get_job_progress() if stream_progress else None
+                with cacheable_prefix(call_provider, call_model, system_instruction, cache_prefix) as prefix_kwargs:
+                    if progress is not None and hasattr(call_service, "query_stream"):
+                        # Stream into the running job's progress buffer
+                        chunks = []
+                        async for chunk in call_service.query_stream(
+                            prompt=prompt,
+                            model=call_model,
+                            system_instruction=system_instruction,
+                            max_tokens=max_tokens,
+                            temperature=temperature,
+                            **kwargs,
+                            **prefix_kwargs
+                        ):
+                            progress.append(chunk)
+                            chunks.append(chunk)
+                        return "".join(chunks)
+                    
+                    return await call_service.query(
+                        prompt=prompt,
+                        model=call_model,
+                        system_instruction=system_instruction,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        **kwargs,
+                        **prefix_kwargs
+                    )
             
-            if available_providers:
-                fallback_provider = available_providers[0]
-                logger.warning(f"{provider} service unavailable, trying {fallback_provider}")
-                service = self._get_service_for_provider(fallback_provider)
-                
-                if service is None:
-                    raise RuntimeError("No LLM services available")
-                
-                provider = fallback_provider
-            else:
-                raise RuntimeError("No LLM services available")
+            return lambda: self._guarded_call(call_provider, call_model, call)
+        
+        if hedge:
+            request = self._hedged_request(provider, service, model, hedge_provider, hedge_model, provider_call)
+        elif batch_mode_enabled() and supports_batches(service):
+            # Non-urgent jobs wait for a discounted provider batch instead of an interactive call
+            async def request():
+                with cacheable_prefix(provider, model, system_instruction, cache_prefix) as prefix_kwargs:
+                    return await get_batch_lane().query(
+                        provider, service, model, prompt,
+                        system_instruction=system_instruction,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        **kwargs,
+                        **prefix_kwargs
+                    )
+        else:
+            request = provider_call(provider, service, model)
         
         # Make the query
         try:
-            logger.debug(f"Making LLM query with {provider} provider")
-            return await service.query(
-                prompt=prompt,
-                model=model,
+            return await self._cached_call(
+                "query", provider, model, prompt, temperature, request,
                 system_instruction=system_instruction,
                 max_tokens=max_tokens,
-                temperature=temperature,
                 **kwargs
             )
         except Exception as e:
             logger.error(f"LLM query failed with {provider}: {e}")
             raise
     
+    def _hedged_request(
+        self,
+        provider: LLMProvider,
+        service,
+        model: Optional[str],
+        hedge_provider: Optional[LLMProvider],
+        hedge_model: Optional[str],
+        provider_call
+    ):
+        """
+        Build a request that races the primary against a duplicate sent after
+        the primary's tracked p95 latency. Hedged requests do not stream into
+        job progress, since two responses would interleave in the buffer.
+        """
+        from config.environment import get_settings
+        settings = get_settings()
+        
+        if hedge_provider is None and hedge_model is None:
+            hedge_provider, hedge_model = settings.llm_hedge_provider, settings.llm_hedge_model
+        hedge_provider = hedge_provider or provider
+        if hedge_provider == provider and hedge_model is None:
+            hedge_model = model
+        
+        breakers = get_circuit_breakers()
+        hedge_service = self._get_service_for_provider(hedge_provider)
+        if hedge_service is None or not breakers.is_available(hedge_provider, hedge_model):
+            logger.debug(f"Hedge target {hedge_provider} unavailable, sending unhedged request")
+            return provider_call(provider, service, model)
+        
+        delay = hedge_delay(
+            breakers.get(provider, model).tracker.get_window_stats(),
+            min_samples=settings.llm_hedge_min_samples,
+            default_delay=settings.llm_hedge_default_delay_seconds,
+            min_delay=settings.llm_hedge_min_delay_seconds
+        )
+        primary = provider_call(provider, service, model, stream_progress=False)
+        secondary = provider_call(hedge_provider, hedge_service, hedge_model, stream_progress=False)
+        
+        return lambda: race_with_hedge(primary, secondary, delay, get_hedge_budget(), provider=provider)
+    
+    @cassette_recorded("query")
+    async def query_stream(
+        self,
+        prompt: str,
+        provider: Optional[LLMProvider] = None,
+        model: Optional[str] = None,
+        system_instruction: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        routing: Optional[str] = None,
+        context_overflow: Optional[str] = None,
+        cache_prefix: Optional[bool] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream an LLM response with automatic provider selection
+        
+        Cached responses (under the current agent's cache policy) are yielded
+        as a single chunk; streamed responses are cached once complete.
+        Providers without streaming support yield their full response.
+        
+        Args:
+            prompt: The prompt to send to the LLM
+            provider: LLM provider to use. If None, uses default.
+            model: Model name to use (provider-specific)
+            system_instruction: Optional system instruction
+            max_tokens: Optional max tokens override
+            temperature: Optional temperature override
+            routing: Routing policy (defaults to LLM_ROUTING_POLICY)
+            context_overflow: What to do if the request exceeds the model's context window
+                (defaults to LLM_CONTEXT_OVERFLOW); chunked prompts stream their answers in turn
+            cache_prefix: Mark a long system instruction as a cacheable prompt prefix
+                (defaults to LLM_PREFIX_CACHE_ENABLED)
+            **kwargs: Additional provider-specific parameters
+            
+        Yields:
+            Response text chunks
+        """
+        provider, service, model = self._resolve_service(
+            provider, model, routing,
+            estimate_request_tokens(prompt, system_instruction, max_tokens, provider or self._default_provider, model)
+        )
+        
+        prompts = self._budget_prompt(provider, model, prompt, system_instruction, max_tokens, context_overflow)
+        if len(prompts) > 1:
+            for index, chunk_prompt in enumerate(prompts):
+                if index:
+                    yield "\n\n"
+                async for chunk in self.query_stream(
+                    chunk_prompt, provider=provider, model=model, system_instruction=system_instruction,
+                    max_tokens=max_tokens, temperature=temperature, routing=PINNED,
+                    context_overflow=TRIM, cache_prefix=cache_prefix, **kwargs
+                ):
+                    yield chunk
+            return
+        prompt = prompts[0]
+        
+        cache = get_llm_response_cache()
+        policy = cache.resolve_policy(temperature)
+        key = None
+        if policy is not None:
+            key = cache.make_key(
+                "query", provider, model, prompt, temperature=temperature,
+                system_instruction=system_instruction, max_tokens=max_tokens, **kwargs
+            )
+            cached = await cache.get(key)
+            if cached is not None:
+                logger.debug(f"LLM stream served from cache for {provider} provider")
+                yield cached
+                return
+        
+        params = dict(
+            prompt=prompt,
+            model=model,
+            system_instruction=system_instruction,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **kwargs
+        )
+        chunks = []
+        breaker = self._acquire_breaker(provider, model)
+        start_time = time.perf_counter()
+        try:
+            logger.debug(f"Making streaming LLM query with {provider} provider")
+            with cacheable_prefix(provider, model, system_instruction, cache_prefix) as prefix_kwargs:
+                params.update(prefix_kwargs)
+                if hasattr(service, "query_stream"):
+                    async for chunk in service.query_stream(**params):
+                        chunks.append(chunk)
+                        yield chunk
+                else:
+                    response = await service.query(**params)
+                    chunks.append(response)
+                    yield response
+        except Exception as e:
+            if breaker is not None:
+                if is_provider_failure(e):
+                    breaker.record_failure(type(e).__name__, time.perf_counter() - start_time)
+                else:
+                    breaker.release()
+            logger.error(f"LLM streaming query failed with {provider}: {e}")
+            raise
+        except BaseException:
+            # Consumer stopped early or the task was cancelled
+            if breaker is not None:
+                breaker.release()
+            raise
+        
+        if breaker is not None:
+            breaker.record_success(time.perf_counter() - start_time)
+        
+        if key is not None:
+            await cache.set(key, "".join(chunks), policy.ttl_seconds)
+    
+    @cassette_recorded("query_structured")
     async def query_structured(
         self,
         prompt: str,
@@ -274,6 +725,9 @@ class UnifiedLLMService:
         provider: Optional[LLMProvider] = None,
         model: Optional[str] = None,
         max_retries: int = 2,
+        routing: Optional[str] = None,
+        context_overflow: Optional[str] = None,
+        cache_prefix: Optional[bool] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
@@ -285,55 +739,101 @@ class UnifiedLLMService:
             provider: LLM provider to use
             model: Optional model override
             max_retries: Number of retries for malformed JSON
+            routing: Routing policy (defaults to LLM_ROUTING_POLICY)
+            context_overflow: What to do if the request exceeds the model's context window
+                (defaults to LLM_CONTEXT_OVERFLOW; "chunk" trims, since answers cannot be merged)
+            cache_prefix: Mark a long system instruction as a cacheable prompt prefix
+                (defaults to LLM_PREFIX_CACHE_ENABLED)
             **kwargs: Additional parameters
             
         Returns:
             Parsed JSON response
         """
-        # Determine provider
-        if provider is None:
-            provider = self._default_provider
+        provider, service, model = self._resolve_service(
+            provider, model, routing,
+            estimate_request_tokens(
+                prompt, kwargs.get("system_instruction"), kwargs.get("max_tokens"),
+                provider or self._default_provider, model
+            )
+        )
+        prompt = self._budget_prompt(
+            provider, model, prompt, kwargs.get("system_instruction"), kwargs.get("max_tokens"),
+            context_overflow, allow_chunks=False
+        )[0]
         
-        # Get service
-        service = self._get_service_for_provider(provider)
-        if service is None:
-            # Fallback to other providers if primary is unavailable
-            available_providers = self.get_available_providers()
-            if provider in available_providers:
-                available_providers.remove(provider)
-            
-            if available_providers:
-                fallback_provider = available_providers[0]
-                logger.warning(f"{provider} service unavailable, trying {fallback_provider}")
-                service = self._get_service_for_provider(fallback_provider)
-                
-                if service is None:
-                    raise RuntimeError("No LLM services available")
-                
-                provider = fallback_provider
-            else:
-                raise RuntimeError("No LLM services available")
+        async def call():
+            logger.debug(f"Making structured LLM query with {provider} provider")
+            with cacheable_prefix(provider, model, kwargs.get("system_instruction"), cache_prefix) as prefix_kwargs:
+                return await service.query_structured(
+                    prompt=prompt,
+                    output_schema=output_schema,
+                    model=model,
+                    max_retries=max_retries,
+                    **kwargs,
+                    **prefix_kwargs
+                )
         
         # Make the structured query
         try:
-            logger.debug(f"Making structured LLM query with {provider} provider")
-            return await service.query_structured(
-                prompt=prompt,
+            params = {key: value for key, value in kwargs.items() if key != "temperature"}
+            return await self._cached_call(
+                "query_structured", provider, model, prompt, kwargs.get("temperature"),
+                lambda: self._guarded_call(provider, model, call),
                 output_schema=output_schema,
-                model=model,
-                max_retries=max_retries,
-                **kwargs
+                **params
             )
         except Exception as e:
             logger.error(f"Structured LLM query failed with {provider}: {e}")
             raise
     
+    async def _cached_call(
+        self,
+        kind: str,
+        provider: LLMProvider,
+        model: Optional[str],
+        prompt: str,
+        temperature: Optional[float],
+        call,
+        **params
+    ):
+        """
+        Run a provider call through the response cache when the current
+        agent's cache policy allows it (exact match first, then near-duplicates)
+        """
+        cache = get_llm_response_cache()
+        policy = cache.resolve_policy(temperature)
+        if policy is None:
+            return await call()
+        
+        key = cache.make_key(kind, provider, model, prompt, temperature=temperature, **params)
+        cached = await cache.get(key, record_miss=not policy.similarity_threshold)
+        
+        scope = None
+        if cached is None and policy.similarity_threshold:
+            scope = cache.make_key(kind, provider, model, None, temperature=temperature, **params)
+            cached = await cache.get_similar(scope, prompt, policy.similarity_threshold)
+            if cached is None:
+                cache.record_miss()
+        
+        if cached is not None:
+            logger.debug(f"LLM {kind} served from cache for {provider} provider")
+            return cached
+        
+        response = await call()
+        # Failed structured queries come back as {"error": ...}; don't replay a transient failure
+        if not (isinstance(response, dict) and "error" in response):
+            await cache.set(key, response, policy.ttl_seconds, similarity_scope=scope, prompt=prompt)
+        return response
+    
+    @cassette_recorded("batch_query")
     async def batch_query(
         self,
         prompts: List[str],
         provider: Optional[LLMProvider] = None,
         model: Optional[str] = None,
         max_concurrent: int = 3,
+        routing: Optional[str] = None,
+        context_overflow: Optional[str] = None,
         **kwargs
     ) -> List[str]:
         """
@@ -344,44 +844,41 @@ class UnifiedLLMService:
             provider: LLM provider to use
             model: Optional model override
             max_concurrent: Maximum concurrent executions
+            routing: Routing policy for the whole batch (defaults to LLM_ROUTING_POLICY)
+            context_overflow: What to do with prompts exceeding the model's context window
+                (defaults to LLM_CONTEXT_OVERFLOW; "chunk" trims, since each prompt needs one answer)
             **kwargs: Additional parameters for each query
             
         Returns:
             List of responses in the same order as prompts
         """
-        # Determine provider
-        if provider is None:
-            provider = self._default_provider
-        
-        # Get service
-        service = self._get_service_for_provider(provider)
-        if service is None:
-            # Fallback to other providers if primary is unavailable
-            available_providers = self.get_available_providers()
-            if provider in available_providers:
-                available_providers.remove(provider)
-            
-            if available_providers:
-                fallback_provider = available_providers[0]
-                logger.warning(f"{provider} service unavailable, trying {fallback_provider}")
-                service = self._get_service_for_provider(fallback_provider)
-                
-                if service is None:
-                    raise RuntimeError("No LLM services available")
-                
-                provider = fallback_provider
-            else:
-                raise RuntimeError("No LLM services available")
+        provider, service, model = self._resolve_service(
+            provider, model, routing,
+            max(
+                (estimate_request_tokens(
+                    prompt, kwargs.get("system_instruction"), kwargs.get("max_tokens"),
+                    provider or self._default_provider, model
+                ) for prompt in prompts),
+                default=None
+            )
+        )
+        prompts = [
+            self._budget_prompt(
+                provider, model, prompt, kwargs.get("system_instruction"), kwargs.get("max_tokens"),
+                context_overflow, allow_chunks=False
+            )[0]
+            for prompt in prompts
+        ]
         
         # Make the batch query
         try:
             logger.debug(f"Making batch LLM query with {provider} provider")
-            return await service.batch_query(
+            return await self._guarded_call(provider, model, lambda: service.batch_query(
                 prompts=prompts,
                 model=model,
                 max_concurrent=max_concurrent,
                 **kwargs
-            )
+            ))
         except Exception as e:
             logger.error(f"Batch LLM query failed with {provider}: {e}")
             raise
@@ -443,6 +940,19 @@ class UnifiedLLMService:
     
     # Service information and management
     
+    async def warm_up_http_connections(self) -> Dict[str, bool]:
+        """Pre-open pooled connections to the OpenAI-compatible providers that load successfully"""
+        base_urls = []
+        for provider in ("openai", "grok", "deepseek", "llama"):
+            service = self._get_service_for_provider(provider)
+            client = getattr(service, "_client", None)
+            if client is not None and getattr(client, "base_url", None):
+                base_urls.append(str(client.base_url))
+        
+        if not base_urls:
+            return {}
+        return await get_llm_http_transport().warm_up(base_urls)
+    
     def get_service_health(self) -> Dict[str, Any]:
         """Get health information for all services including failure tracking"""
         health_info = {
@@ -451,7 +961,7 @@ class UnifiedLLMService:
             "service_details": {}
         }
         
-        all_providers = ["google", "openai", "grok", "anthropic", "deepseek", "llama"]
+        all_providers = ["google", "openai", "grok", "anthropic", "deepseek", "llama", "local"]
         
         for provider in all_providers:
             service = self._get_service_for_provider(provider)
@@ -496,6 +1006,8 @@ class UnifiedLLMService:
             providers.append("deepseek")
         if self._get_llama_service() is not None:
             providers.append("llama")
+        if self._get_local_service() is not None:
+            providers.append("local")
         return providers
     
     def get_provider_info(self, provider: LLMProvider) -> Dict[str, Any]:
@@ -522,9 +1034,10 @@ class UnifiedLLMService:
                 }
         
         try:
-            info = service.get_info()
+            info = get_model_registry().get_info(provider, service.get_info)
             info["provider"] = provider
             info["status"] = "available"
+            info["circuit_breakers"] = get_circuit_breakers().get_provider_states(provider)
             return info
         except Exception as e:
             return {
@@ -536,7 +1049,7 @@ class UnifiedLLMService:
     def get_all_providers_info(self) -> Dict[str, Any]:
         """Get information about all providers"""
         available_providers = self.get_available_providers()
-        all_providers = ["google", "openai", "grok", "anthropic", "deepseek", "llama"]
+        all_providers = ["google", "openai", "grok", "anthropic", "deepseek", "llama", "local"]
         
         providers_info = {}
         for provider in all_providers:
@@ -563,12 +1076,20 @@ class UnifiedLLMService:
         # Combine both types of health information
         combined_health = {
             "overall_status": "healthy",
-            "total_services": 6,
+            "total_services": len(SERVICE_NAMES),
             "loaded_services": len(service_health["healthy_services"]),
             "failed_services": len(service_health["failed_services"]),
             "services": {}
         }
         
+        # Response cache effectiveness
+        combined_health["response_cache"] = get_llm_response_cache().get_stats()
+        combined_health["hedging"] = get_hedge_budget().get_stats()
+        combined_health["http_transport"] = get_llm_http_transport().get_stats()
+        cassette = get_cassette()
+        combined_health["cassette"] = cassette.get_stats() if cassette is not None else {"mode": "off"}
+        prefix_cache = get_prefix_cache_stats()
+        
         # Determine overall health
         if len(service_health["failed_services"]) > 3:
             combined_health["overall_status"] = "critical"
@@ -576,18 +1097,16 @@ class UnifiedLLMService:
             combined_health["overall_status"] = "degraded"
         
         # Process each service
-        all_providers = ["google", "openai", "grok", "anthropic", "deepseek", "llama"]
-        service_name_mapping = {
-            "google": "Google AI",
-            "openai": "OpenAI", 
-            "grok": "Grok",
-            "anthropic": "Anthropic",
-            "deepseek": "DeepSeek",
-            "llama": "Meta Llama"
-        }
+        all_providers = ["google", "openai", "grok", "anthropic", "deepseek", "llama", "local"]
+        
+        breakers = get_circuit_breakers()
+        rate_limiters = get_rate_limiters()
+        open_circuits = 0
         
         for provider in all_providers:
-            service_name = service_name_mapping[provider]
+            service_name = SERVICE_NAMES[provider]
+            circuit_breakers = breakers.get_provider_states(provider)
+            open_circuits += sum(1 for state in circuit_breakers.values() if state["state"] != "closed")
             service_info = service_health["service_details"].get(provider, {})
             health_metrics = all_health_status.get(service_name, {})
             
@@ -607,9 +1126,16 @@ class UnifiedLLMService:
                 "timestamps": {
                     "last_success": health_metrics.get("last_success_time"),
                     "last_error": health_metrics.get("last_error_time")
-                }
+                },
+                "circuit_breakers": circuit_breakers,
+                "rate_limits": rate_limiters.get_provider_stats(provider),
+                "prefix_cache": prefix_cache.get_stats(provider)
             }
         
+        combined_health["open_circuits"] = open_circuits
+        if open_circuits and combined_health["overall_status"] == "healthy":
+            combined_health["overall_status"] = "degraded"
+        
         return combined_health
 
     def get_individual_service_health(self, provider: LLMProvider) -> Dict[str, Any]:
@@ -642,7 +1168,7 @@ class UnifiedLLMService:
     
     def set_default_provider(self, provider: LLMProvider) -> None:
         """Set the default LLM provider"""
-        if provider not in ["google", "openai", "grok", "anthropic", "deepseek", "llama"]:
+        if provider not in ["google", "openai", "grok", "anthropic", "deepseek", "llama", "local"]:
             raise ValueError(f"Invalid provider: {provider}")
         
         self._default_provider = provider
@@ -662,7 +1188,7 @@ class UnifiedLLMService:
             ValueError: If provider is invalid
             RuntimeError: If provider service is not available
         """
-        if provider not in ["google", "openai", "grok", "anthropic", "deepseek", "llama"]:
+        if provider not in ["google", "openai", "grok", "anthropic", "deepseek", "llama", "local"]:
             raise ValueError(f"Invalid provider: {provider}")
         
         service = self._get_service_for_provider(provider)
@@ -670,6 +1196,9 @@ class UnifiedLLMService:
             raise RuntimeError(f"{provider} service is not available")
         
         try:
+            registry = get_model_registry()
+            if registry.is_registered(provider):
+                return list(registry.get_catalog(provider))
             # Get the service's info which includes available models
             info = service.get_info()
             return info.get("available_models", [])
@@ -677,6 +1206,34 @@ class UnifiedLLMService:
             logger.error(f"Failed to get available models for {provider}: {e}")
             raise RuntimeError(f"Failed to retrieve {provider} models: {str(e)}")
     
+    async def test_connection(self, provider: LLMProvider) -> Dict[str, Any]:
+        """
+        Test the connection to a single provider
+
+        Args:
+            provider: The LLM provider to test
+
+        Returns:
+            Dictionary with success, response_time (seconds), error and the
+            service's own test result
+        """
+        start_time = time.perf_counter()
+        try:
+            service = self._get_service_for_provider(provider)
+            if service is None:
+                return {"success": False, "error": f"{provider} service is not available", "response_time": None}
+            # Service checks may build clients or models synchronously
+            result = await asyncio.to_thread(service.test_connection)
+        except Exception as e:
+            return {"success": False, "error": str(e), "response_time": round(time.perf_counter() - start_time, 3)}
+
+        return {
+            "success": result.get("status") == "success",
+            "error": result.get("error"),
+            "response_time": round(time.perf_counter() - start_time, 3),
+            "details": result
+        }
+
     def test_all_connections(self) -> Dict[str, Any]:
         """Test connections to all available providers"""
         results = {}
@@ -741,6 +1298,16 @@ class UnifiedLLMService:
         else:
             results["llama"] = {"status": "unavailable"}
         
+        # Test local mock provider
+        local_service = self._get_local_service()
+        if local_service:
+            try:
+                results["local"] = local_service.test_connection()
+            except Exception as e:
+                results["local"] = {"status": "error", "error": str(e)}
+        else:
+            results["local"] = {"status": "unavailable"}
+        
         return {
             "default_provider": self._default_provider,
             "connection_tests": results,
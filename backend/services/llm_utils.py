@@ -7,9 +7,14 @@ Common utilities and helpers for LLM services to eliminate code duplication.
 import json
 import asyncio
 import functools
+import importlib
+import re
+import time
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, Any, Callable, Union, List, Optional
+from typing import Dict, Any, Callable, Deque, Union, List, Optional, Sequence, Tuple
 from logging_system import get_logger
+from .model_registry import as_model_catalog, get_model_registry
 
 logger = get_logger(__name__)
 
@@ -49,74 +54,186 @@ def get_summarization_schema() -> Dict[str, Any]:
     """Get the standardized schema for text summarization"""
     return SUMMARIZATION_SCHEMA.copy()
 
-def parse_json_response(response_text: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+# Structural characters the JSON scanner stops at; everything else is skipped
+_JSON_TOKEN = re.compile(r'[{}\[\]"\\]')
+_JSON_CLOSERS = {"{": "}", "[": "]"}
+
+def extract_json(text: str, expected_type: Optional[type] = None) -> Any:
     """
-    Parse JSON response from LLM with fallback strategies for common formatting issues.
+    Locate and parse the first balanced JSON object or array in LLM output.
     
-    This handles the common case where LLMs wrap JSON in markdown code blocks
-    or include extra text around the JSON.
+    Handles bare JSON, JSON in markdown code fences and JSON surrounded by
+    prose. The text is scanned once, stopping only at brackets, quotes and
+    backslashes, and only the balanced candidate is handed to the decoder;
+    brackets inside strings are ignored. A candidate that fails to decode is
+    skipped as a whole, so fragments nested inside it are never returned.
     
     Args:
-        response_text: Raw response text from LLM
-        schema: Expected schema for error reporting
+        text: Raw response text from LLM
+        expected_type: dict or list to only consider objects or arrays
         
     Returns:
-        Parsed JSON dict or error dict with structured error information
+        The parsed JSON value
+        
+    Raises:
+        ValueError: If the text contains no parseable JSON object or array
     """
-    # First, try direct JSON parsing
+    if expected_type is dict:
+        openers = "{"
+    elif expected_type is list:
+        openers = "["
+    else:
+        openers = "{["
+    
+    # Fast path: the first candidate usually decodes as-is (bare or fenced JSON)
+    first = min((i for i in (text.find(c) for c in openers) if i != -1), default=-1)
+    if first == -1:
+        raise ValueError("No JSON object or array found in response")
     try:
-        return json.loads(response_text)
+        return json.JSONDecoder().raw_decode(text, first)[0]
     except json.JSONDecodeError:
         pass
     
-    # Try to extract JSON from markdown code blocks
-    if "```json" in response_text:
-        try:
-            json_start = response_text.find("```json") + 7
-            json_end = response_text.find("```", json_start)
-            if json_end > json_start:
-                json_str = response_text[json_start:json_end].strip()
-                return json.loads(json_str)
-        except json.JSONDecodeError:
-            pass
+    start = None
+    expected_closers: List[str] = []
+    in_string = False
+    escaped_at = -1
+    for match in _JSON_TOKEN.finditer(text, first):
+        pos = match.start()
+        char = match.group()
+        if start is None:
+            if char in openers:
+                start, expected_closers, in_string = pos, [_JSON_CLOSERS[char]], False
+            continue
+        if pos == escaped_at:
+            continue
+        if in_string:
+            if char == "\\":
+                escaped_at = pos + 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in _JSON_CLOSERS:
+            expected_closers.append(_JSON_CLOSERS[char])
+        elif char == expected_closers[-1]:
+            expected_closers.pop()
+            if not expected_closers:
+                try:
+                    return json.loads(text[start:pos + 1])
+                except json.JSONDecodeError:
+                    start = None
+        elif char != "\\":
+            # Mismatched closing bracket: not JSON, look for the next candidate
+            start = None
     
-    # Try to extract JSON from any code block (```...```)
-    if "```" in response_text:
-        try:
-            # Find the first code block
-            first_triple = response_text.find("```")
-            if first_triple != -1:
-                # Skip the opening ```
-                start_pos = first_triple + 3
-                # Skip language identifier if present (e.g., "json\n")
-                if '\n' in response_text[start_pos:start_pos + 10]:
-                    start_pos = response_text.find('\n', start_pos) + 1
-                
-                # Find closing ```
-                end_pos = response_text.find("```", start_pos)
-                if end_pos > start_pos:
-                    json_str = response_text[start_pos:end_pos].strip()
-                    return json.loads(json_str)
-        except json.JSONDecodeError:
-            pass
+    raise ValueError("No complete JSON object or array found in response")
+
+def _json_type_name(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    return "array" if isinstance(value, list) else "object"
+
+def validate_json_schema(value: Any, schema: Any) -> List[str]:
+    """
+    Validate parsed JSON against a structured query schema.
+    
+    Schemas are usually descriptions by example, e.g. {"confidence": "number
+    between 0 and 1", "emotions": ["list of detected emotions"]}: every top-level
+    key must be present, objects and arrays must have the right container type
+    and descriptions starting with "number"/"integer" or "bool" must have that
+    type. Nested objects are only type-checked, as their keys are often
+    placeholders ({"keyword": "category mappings"}). JSON Schema style schemas
+    ({"type": "object", "properties": ..., "required": [...]}) check the
+    required properties. Null is accepted for any field.
     
-    # Try to find JSON-like content between braces
+    Args:
+        value: Parsed JSON value
+        schema: Expected output schema
+        
+    Returns:
+        List of validation errors (empty if the value matches)
+    """
+    if isinstance(schema, list):
+        return [] if isinstance(value, list) else [f"expected array, got {_json_type_name(value)}"]
+    if not isinstance(schema, dict):
+        return []
+    if not isinstance(value, dict):
+        return [f"expected object, got {_json_type_name(value)}"]
+    
+    if schema.get("type") == "object" and isinstance(schema.get("properties"), dict):
+        return [f"missing required field '{key}'" for key in schema.get("required", []) if key not in value]
+    
+    errors = []
+    for key, expected in schema.items():
+        if key not in value:
+            errors.append(f"missing required field '{key}'")
+            continue
+        actual = value[key]
+        if actual is None:
+            continue
+        if isinstance(expected, dict) and not isinstance(actual, dict):
+            errors.append(f"field '{key}': expected object, got {_json_type_name(actual)}")
+        elif isinstance(expected, list) and not isinstance(actual, list):
+            errors.append(f"field '{key}': expected array, got {_json_type_name(actual)}")
+        elif isinstance(expected, str):
+            description = expected.lower()
+            if description.startswith(("number", "integer")) and _json_type_name(actual) != "number":
+                errors.append(f"field '{key}': expected number, got {_json_type_name(actual)}")
+            elif description.startswith("bool") and not isinstance(actual, bool):
+                errors.append(f"field '{key}': expected boolean, got {_json_type_name(actual)}")
+    return errors
+
+def parse_json_response(response_text: str, schema: Dict[str, Any], validate: bool = True) -> Dict[str, Any]:
+    """
+    Parse and validate a JSON response from an LLM.
+    
+    The first balanced JSON value of the schema's type is extracted in one
+    pass (see extract_json), so markdown code blocks and extra text around the
+    JSON are tolerated, and then checked against the schema.
+    
+    Args:
+        response_text: Raw response text from LLM
+        schema: Expected schema for validation and error reporting
+        validate: Whether to validate the parsed value against the schema
+        
+    Returns:
+        Parsed JSON dict or error dict with structured error information
+    """
+    expected_type = list if isinstance(schema, list) else dict
     try:
-        first_brace = response_text.find('{')
-        last_brace = response_text.rfind('}')
-        if first_brace != -1 and last_brace > first_brace:
-            json_str = response_text[first_brace:last_brace + 1]
-            return json.loads(json_str)
-    except json.JSONDecodeError:
-        pass
+        result = extract_json(response_text or "", expected_type)
+    except ValueError:
+        logger.warning(f"Failed to parse JSON from response: {(response_text or '')[:200]}...")
+        return {
+            "error": "Failed to parse JSON response",
+            "raw_response": response_text,
+            "schema": schema
+        }
     
-    # All parsing attempts failed
-    logger.warning(f"Failed to parse JSON from response: {response_text[:200]}...")
-    return {
-        "error": "Failed to parse JSON response",
-        "raw_response": response_text,
-        "schema": schema
-    }
+    if validate:
+        validation_errors = validate_json_schema(result, schema)
+        if validation_errors:
+            logger.warning(f"JSON response does not match the requested schema: {'; '.join(validation_errors)}")
+            return {
+                "error": "JSON response does not match the requested schema",
+                "validation_errors": validation_errors,
+                "raw_response": response_text,
+                "schema": schema
+            }
+    
+    return result
+
+def native_json_mode_enabled() -> bool:
+    """Whether structured queries should use providers' native JSON output modes"""
+    from config.environment import get_settings
+    return get_settings().llm_native_json_mode
 
 def create_json_prompt(original_prompt: str, schema: Dict[str, Any], strict: bool = False) -> str:
     """
@@ -227,7 +344,7 @@ def handle_structured_query_retry_error(
 def validate_model_name(
     service_name: str,
     model_name: str,
-    available_models: List[str],
+    available_models: Sequence[str],
     default_model: str,
     allow_fallback: bool = True
 ) -> str:
@@ -237,7 +354,7 @@ def validate_model_name(
     Args:
         service_name: Name of the service for error messages
         model_name: The model name to validate  
-        available_models: List of available model names
+        available_models: Available model names (a ModelCatalog validates in constant time)
         default_model: Default model to fall back to
         allow_fallback: Whether to fall back to default if model not found
         
@@ -250,13 +367,10 @@ def validate_model_name(
     if not model_name:
         return default_model
         
-    # Check if model is available (case-insensitive)
-    model_lower = model_name.lower()
-    available_lower = [m.lower() for m in available_models]
-    
-    if model_lower in available_lower:
-        # Return the properly cased model name
-        return available_models[available_lower.index(model_lower)]
+    # Check if model is available (case-insensitive) and return the properly cased name
+    resolved = as_model_catalog(available_models).resolve(model_name)
+    if resolved is not None:
+        return resolved
     
     # Model not found - handle based on fallback setting
     if allow_fallback:
@@ -275,7 +389,7 @@ def validate_model_name(
 def safe_model_selection(
     service_name: str,
     requested_model: Optional[str],
-    available_models: List[str],
+    available_models: Sequence[str],
     default_model: str,
     strict_validation: bool = False
 ) -> str:
@@ -285,7 +399,7 @@ def safe_model_selection(
     Args:
         service_name: Name of the service for error messages
         requested_model: User-requested model (can be None)
-        available_models: List of available models
+        available_models: Available models (a ModelCatalog validates in constant time)
         default_model: Default model to use
         strict_validation: If True, raise error for invalid models instead of fallback
         
@@ -308,63 +422,138 @@ def safe_model_selection(
         allow_fallback=not strict_validation
     )
 
-def get_model_info(model_name: str, available_models: List[str]) -> Dict[str, Any]:
+def get_model_info(model_name: str, available_models: Sequence[str]) -> Dict[str, Any]:
     """
     Get information about a model's availability
     
     Args:
         model_name: The model name to check
-        available_models: List of available models
+        available_models: Available models (a ModelCatalog validates in constant time)
         
     Returns:
         Dictionary with model information
     """
-    model_lower = model_name.lower() if model_name else ""
-    available_lower = [m.lower() for m in available_models]
-    
-    is_available = model_lower in available_lower
-    suggested_models = []
-    
-    if not is_available and model_name:
-        # Find similar model names for suggestions
-        for model in available_models:
-            if model_name.lower() in model.lower() or model.lower() in model_name.lower():
-                suggested_models.append(model)
+    catalog = as_model_catalog(available_models)
+    exact_match = catalog.resolve(model_name)
     
     return {
         "model_name": model_name,
-        "is_available": is_available,
-        "exact_match": available_models[available_lower.index(model_lower)] if is_available else None,
-        "suggested_models": suggested_models[:5],  # Limit to 5 suggestions
+        "is_available": exact_match is not None,
+        "exact_match": exact_match,
+        # Similar model names, limited to 5 suggestions
+        "suggested_models": catalog.suggest(model_name) if exact_match is None and model_name else [],
         "available_models": available_models
     }
 
 # Connection health monitoring utilities
 
 class ConnectionHealthTracker:
-    """Track basic connection health for LLM services"""
+    """
+    Track connection health for LLM services: totals, a sliding window of
+    recent outcomes, and exponentially weighted moving averages (EWMA) of
+    latency and error rate used for routing
+    """
     
-    def __init__(self, service_name: str):
+    def __init__(
+        self,
+        service_name: str,
+        window_seconds: float = 60.0,
+        max_samples: int = 1000,
+        clock: Callable[[], float] = time.monotonic,
+        ewma_alpha: float = 0.2
+    ):
         self.service_name = service_name
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self.ewma_alpha = ewma_alpha
+        self.ewma_response_time: Optional[float] = None
+        self.ewma_error_rate = 0.0
+        self.total_requests = 0
         self.total_errors = 0
         self.consecutive_errors = 0
+        self.total_response_time = 0.0
         self.last_error_time: Optional[datetime] = None
+        self.last_success_time: Optional[datetime] = None
+        # (monotonic time, success, response time) of recent requests
+        self._recent: Deque[Tuple[float, bool, Optional[float]]] = deque(maxlen=max_samples)
         
-    def record_request(self, success: bool, error_type: Optional[str] = None):
+    def record_request(self, success: bool, error_type: Optional[str] = None, response_time: Optional[float] = None):
         """Record a request outcome"""
+        self.total_requests += 1
+        if response_time is not None:
+            self.total_response_time += response_time
+        self._recent.append((self._clock(), success, response_time))
+        
+        # Failed calls often end in timeouts, so only successes feed the latency average
+        self.ewma_error_rate += self.ewma_alpha * ((0.0 if success else 1.0) - self.ewma_error_rate)
+        if success and response_time is not None:
+            if self.ewma_response_time is None:
+                self.ewma_response_time = response_time
+            else:
+                self.ewma_response_time += self.ewma_alpha * (response_time - self.ewma_response_time)
+        
         if success:
             self.consecutive_errors = 0
+            self.last_success_time = datetime.now()
         else:
             self.total_errors += 1
             self.consecutive_errors += 1
             self.last_error_time = datetime.now()
     
+    def get_window_stats(self, slow_call_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """Get request, error and latency statistics over the sliding window"""
+        cutoff = self._clock() - self.window_seconds
+        while self._recent and self._recent[0][0] < cutoff:
+            self._recent.popleft()
+        
+        requests = len(self._recent)
+        errors = sum(1 for _, success, _ in self._recent if not success)
+        latencies = sorted(latency for _, _, latency in self._recent if latency is not None)
+        slow_calls = (
+            sum(1 for latency in latencies if latency >= slow_call_seconds)
+            if slow_call_seconds is not None else 0
+        )
+        
+        return {
+            "requests": requests,
+            "errors": errors,
+            "error_rate": errors / requests if requests else 0.0,
+            "slow_calls": slow_calls,
+            "slow_call_rate": slow_calls / len(latencies) if latencies else 0.0,
+            "p95_response_time_seconds": latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] if latencies else 0.0
+        }
+    
+    def reset_window(self):
+        """Forget recent outcomes (e.g. after a circuit breaker recovers)"""
+        self._recent.clear()
+        self.consecutive_errors = 0
+    
     def get_health_status(self) -> Dict[str, Any]:
-        """Get basic health status"""
+        """Get health status with lifetime totals and recent error rate"""
+        window = self.get_window_stats()
+        if self.consecutive_errors >= 5 or (window["requests"] >= 5 and window["error_rate"] >= 0.5):
+            health_status = "unhealthy"
+        elif self.consecutive_errors > 0 or window["error_rate"] > 0:
+            health_status = "degraded"
+        else:
+            health_status = "healthy"
+        
         return {
             "service_name": self.service_name,
+            "health_status": health_status,
+            "total_requests": self.total_requests,
             "total_errors": self.total_errors,
+            "error_rate_percent": round(self.total_errors / self.total_requests * 100, 2) if self.total_requests else 0,
+            "recent_error_rate_percent": round(window["error_rate"] * 100, 2),
+            "average_response_time_seconds": (
+                round(self.total_response_time / self.total_requests, 4) if self.total_requests else 0
+            ),
+            "ewma_response_time_seconds": (
+                round(self.ewma_response_time, 4) if self.ewma_response_time is not None else None
+            ),
+            "ewma_error_rate_percent": round(self.ewma_error_rate * 100, 2),
             "consecutive_errors": self.consecutive_errors,
+            "last_success_time": self.last_success_time.isoformat() if self.last_success_time else None,
             "last_error_time": self.last_error_time.isoformat() if self.last_error_time else None
         }
 
@@ -383,20 +572,204 @@ def monitor_connection_health(service_name: str):
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
             tracker = get_health_tracker(service_name)
+            start_time = time.perf_counter()
             
             try:
                 result = await func(*args, **kwargs)
-                tracker.record_request(success=True)
+                tracker.record_request(success=True, response_time=time.perf_counter() - start_time)
                 return result
                 
             except Exception as e:
                 error_type = type(e).__name__
-                tracker.record_request(success=False, error_type=error_type)
+                tracker.record_request(
+                    success=False,
+                    error_type=error_type,
+                    response_time=time.perf_counter() - start_time
+                )
                 raise
                 
         return wrapper
     return decorator
 
+def metric_model_label(service_name: str, model: Optional[str]) -> str:
+    """
+    The model label for LLM metrics: the catalog name of the model, or "other"
+    for names outside the provider's catalog, so that callers passing arbitrary
+    model names cannot create unbounded metric series. Accepts the provider's
+    service name ("OpenAI") or its provider key ("openai").
+    """
+    if not model:
+        return "default"
+    from .llm_service import SERVICE_NAMES
+    
+    if service_name in SERVICE_NAMES:
+        provider = service_name
+    else:
+        provider = next((key for key, name in SERVICE_NAMES.items() if name == service_name), None)
+    registry = get_model_registry()
+    if provider is None or not registry.is_registered(provider):
+        return "other"
+    try:
+        return registry.get_catalog(provider).resolve(model) or "other"
+    except Exception as e:
+        # Labelling must never fail the call being measured
+        logger.debug(f"Model catalog unavailable for {service_name} metrics: {e}")
+        return "other"
+
+def get_default_model(provider: str) -> Optional[str]:
+    """The default model from a provider's configuration, or None if unavailable"""
+    from .llm_service import PROVIDER_CONFIGS
+    
+    try:
+        module_name, getter = PROVIDER_CONFIGS[provider]
+        default_model = getattr(importlib.import_module(module_name), getter)().default_model
+    except Exception as e:
+        logger.debug(f"Default model unavailable for {provider}: {e}")
+        return None
+    return default_model if isinstance(default_model, str) else None
+
+def canonical_model_name(provider: str, model: Optional[str], default_model: Optional[str] = None) -> Optional[str]:
+    """
+    The name per-model state (breakers, rate limiters, model info) is keyed
+    under: the catalog name of the model, or the provider's default model when
+    no model or a name outside the catalog is given, since services fall back
+    to it. Names are kept as given until the provider's catalog is registered.
+    
+    Args:
+        default_model: The provider's default model, if the caller already has it
+    """
+    registry = get_model_registry()
+    if model and not registry.is_registered(provider):
+        return model
+    if model:
+        try:
+            resolved = registry.get_catalog(provider).resolve(model)
+        except Exception as e:
+            logger.debug(f"Model catalog unavailable for {provider}: {e}")
+            return model
+        if resolved is not None:
+            return resolved
+    return default_model or get_default_model(provider)
+
+def instrument_llm_call(service_name: str):
+    """Decorator to record LLM service query calls as tracing spans and latency metrics"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            from tracing import get_tracer
+            from metrics import LLM_REQUEST_DURATION
+            from .usage import collect_call_usage, usage_span_attributes
+            
+            # Methods are called as query(self, prompt, model=None, ...)
+            prompt = kwargs.get("prompt", args[1] if len(args) > 1 else None)
+            model = kwargs.get("model", args[2] if len(args) > 2 else None)
+            
+            attributes = {
+                "llm.service": service_name,
+                "llm.model": model,
+                "llm.prompt_chars": len(prompt) if isinstance(prompt, str) else None,
+                "llm.temperature": kwargs.get("temperature")
+            }
+            start_time = time.perf_counter()
+            status = "error"
+            try:
+                with get_tracer().start_span("llm.query", attributes=attributes) as span:
+                    with collect_call_usage() as usage:
+                        try:
+                            result = await func(*args, **kwargs)
+                        finally:
+                            span.set_attributes(usage_span_attributes(usage))
+                    if isinstance(result, str):
+                        span.set_attribute("llm.response_chars", len(result))
+                    status = "success"
+                    return result
+            finally:
+                LLM_REQUEST_DURATION.observe(
+                    time.perf_counter() - start_time,
+                    provider=service_name,
+                    model=metric_model_label(service_name, model),
+                    status=status
+                )
+                
+        return wrapper
+    return decorator
+
+def instrument_llm_stream(service_name: str):
+    """
+    Decorator for query_stream async generators: records connection health,
+    latency and time-to-first-chunk metrics, and a tracing span for the stream
+    with the token counts the provider reported
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            from tracing import get_tracer, get_current_span_context
+            from metrics import LLM_REQUEST_DURATION, LLM_TIME_TO_FIRST_CHUNK
+            from .usage import UsageTotals, collect_call_usage, usage_span_attributes
+            
+            prompt = kwargs.get("prompt", args[1] if len(args) > 1 else None)
+            model = kwargs.get("model", args[2] if len(args) > 2 else None)
+            model_label = metric_model_label(service_name, model)
+            tracker = get_health_tracker(service_name)
+            parent = get_current_span_context()
+            
+            start_ns = time.time_ns()
+            start_time = time.perf_counter()
+            response_chars = 0
+            first_chunk = True
+            error = None
+            usage = UsageTotals()
+            try:
+                stream = func(*args, **kwargs)
+                while True:
+                    with collect_call_usage(usage):
+                        try:
+                            chunk = await stream.__anext__()
+                        except StopAsyncIteration:
+                            break
+                    if first_chunk:
+                        first_chunk = False
+                        LLM_TIME_TO_FIRST_CHUNK.observe(
+                            time.perf_counter() - start_time,
+                            provider=service_name,
+                            model=model_label
+                        )
+                    response_chars += len(chunk)
+                    yield chunk
+                tracker.record_request(success=True, response_time=time.perf_counter() - start_time)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                tracker.record_request(
+                    success=False,
+                    error_type=type(e).__name__,
+                    response_time=time.perf_counter() - start_time
+                )
+                raise
+            finally:
+                LLM_REQUEST_DURATION.observe(
+                    time.perf_counter() - start_time,
+                    provider=service_name,
+                    model=model_label,
+                    status="error" if error else "success"
+                )
+                get_tracer().record_span(
+                    "llm.stream",
+                    start_time_ns=start_ns,
+                    parent=parent,
+                    attributes={
+                        "llm.service": service_name,
+                        "llm.model": model,
+                        "llm.prompt_chars": len(prompt) if isinstance(prompt, str) else None,
+                        "llm.temperature": kwargs.get("temperature"),
+                        "llm.response_chars": response_chars,
+                        **usage_span_attributes(usage)
+                    },
+                    error=error
+                )
+                
+        return wrapper
+    return decorator
+
 def get_all_health_status() -> Dict[str, Dict[str, Any]]:
     """Get health status for all tracked services"""
     return {
@@ -408,8 +781,3 @@ def reset_health_tracker(service_name: str):
     """Reset health tracking for a specific service"""
     if service_name in _health_trackers:
         del _health_trackers[service_name]
-
-def should_circuit_break(service_name: str, threshold: int = 5) -> bool:
-    """Check if service should be circuit broken based on consecutive errors"""
-    tracker = get_health_tracker(service_name)
-    return tracker.consecutive_errors >= threshold 
\ No newline at end of file
@@ -0,0 +1,462 @@
+"""
+Local Mock LLM Service
+
+Provides an offline, deterministic LLM provider for benchmarking the job
+pipeline, scheduler and HTTP API end-to-end without network access.
+Follows the same interface pattern as other LLM services for consistency.
+
+Responses are rendered from a template keyed on a hash of the request, so the
+same prompt always produces the same text. Latency, provider errors, 429 rate
+limit responses and streaming are simulated from the local configuration.
+"""
+
+import json
+import math
+import time
+import random
+import asyncio
+import hashlib
+from typing import Dict, Any, Optional, List, AsyncIterator, Set, Tuple
+from config.local import get_local_config
+from logging_system import get_logger
+from .llm_utils import (
+    parse_json_response,
+    create_json_prompt,
+    get_sentiment_analysis_schema,
+    get_keyword_extraction_schema,
+    get_summarization_schema,
+    handle_llm_query_error,
+    create_batch_error_response,
+    safe_model_selection,
+    monitor_connection_health,
+    instrument_llm_call,
+    instrument_llm_stream,
+    get_health_tracker
+)
+from .batch_lane import BatchRequest, BatchResult
+from .model_registry import get_model_registry
+from .rate_limiter import rate_limited
+from .token_budget import get_token_estimator
+from .usage import record_llm_usage
+
+logger = get_logger(__name__)
+
+# Rough characters per token, used to honour max_tokens
+CHARS_PER_TOKEN = 4
+
+class _SimulatedResponse:
+    """Minimal stand-in for an HTTP response carrying headers"""
+
+    def __init__(self, status_code: int, headers: Dict[str, str]):
+        self.status_code = status_code
+        self.headers = headers
+
+class LocalProviderError(Exception):
+    """Simulated provider-side failure (HTTP 500)"""
+
+    def __init__(self, message: str, status_code: int = 500, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = _SimulatedResponse(status_code, headers or {})
+
+class LocalRateLimitError(LocalProviderError):
+    """Simulated 429 response with a retry-after header"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(
+            "Rate limit exceeded (simulated)",
+            status_code=429,
+            headers={"retry-after": str(retry_after)}
+        )
+
+class _TemplateValues(dict):
+    """Leaves unknown template placeholders untouched"""
+
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+class LocalLLMService:
+    """Service providing a local mock LLM for agents via composition"""
+
+    def __init__(self):
+        self._local_config = get_local_config()
+        self._random = random.Random(self._local_config.seed)
+        # Simulated batches: batch id -> (monotonic time results are ready, results)
+        self._batches: Dict[str, Tuple[float, List[BatchResult]]] = {}
+        self._batch_ids = 0
+        # System instructions seen with cache_prefix, served as cached tokens next time
+        self._cached_prefixes: Set[Tuple[str, str]] = set()
+        get_model_registry().register("local", self._local_config.get_available_models)
+        logger.info("Local mock LLM service initialized")
+
+    # Simulation helpers
+
+    def _sample_latency(self) -> float:
+        """Sample a response latency in seconds from the configured distribution"""
+        config = self._local_config
+        mean = config.latency_ms
+        stddev = config.latency_stddev_ms
+        distribution = config.latency_distribution
+
+        if distribution == "uniform":
+            low = config.latency_min_ms
+            high = config.latency_max_ms or mean * 2 - low
+            latency = self._random.uniform(low, max(high, low))
+        elif distribution == "normal":
+            latency = self._random.gauss(mean, stddev)
+        elif distribution == "lognormal" and mean > 0:
+            # Parameterised so the samples have the configured mean and standard deviation
+            sigma = math.sqrt(math.log(1 + (stddev / mean) ** 2))
+            latency = self._random.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+        elif distribution == "exponential" and mean > 0:
+            latency = self._random.expovariate(1 / mean)
+        else:
+            latency = mean
+
+        latency = max(latency, config.latency_min_ms, 0.0)
+        if config.latency_max_ms:
+            latency = min(latency, config.latency_max_ms)
+        return latency / 1000
+
+    def _maybe_fail(self) -> None:
+        """Raise a simulated 429 or provider error at the configured rates"""
+        config = self._local_config
+        roll = self._random.random()
+        if roll < config.rate_limit_rate:
+            raise LocalRateLimitError(config.retry_after_seconds)
+        if roll < config.rate_limit_rate + config.error_rate:
+            raise LocalProviderError("Internal server error (simulated)")
+
+    def _select_model(self, model: Optional[str]) -> str:
+        return safe_model_selection(
+            service_name="Local",
+            requested_model=model,
+            available_models=get_model_registry().get_catalog("local"),
+            default_model=self._local_config.default_model,
+            strict_validation=False
+        )
+
+    def _render_response(
+        self,
+        prompt: str,
+        model_name: str,
+        system_instruction: Optional[str],
+        max_tokens: Optional[int]
+    ) -> str:
+        """Render the deterministic response text for a request"""
+        digest = hashlib.sha256(
+            f"{model_name}\x00{system_instruction or ''}\x00{prompt}".encode("utf-8")
+        ).hexdigest()
+        excerpt = " ".join(prompt.split())[:80]
+        text = self._local_config.response_template.format_map(_TemplateValues(
+            prompt=prompt,
+            prompt_excerpt=excerpt,
+            prompt_hash=digest[:12],
+            prompt_chars=len(prompt),
+            model=model_name,
+            system_instruction=system_instruction or ""
+        ))
+        if max_tokens:
+            text = text[:max_tokens * CHARS_PER_TOKEN]
+        return text
+
+    def _render_structured(self, schema: Any, seed: str) -> Any:
+        """Build a deterministic value shaped like a schema description"""
+        if isinstance(schema, dict):
+            return {key: self._render_structured(value, f"{seed}.{key}") for key, value in schema.items()}
+        if isinstance(schema, list):
+            return [self._render_structured(item, f"{seed}[{i}]") for i, item in enumerate(schema)]
+        if isinstance(schema, bool):
+            return schema
+        if isinstance(schema, (int, float)):
+            return schema
+
+        description = str(schema).lower()
+        fraction = int(hashlib.sha256(seed.encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+        if "number" in description or "score" in description or "integer" in description:
+            return round(fraction, 2)
+        if "bool" in description:
+            return fraction >= 0.5
+        return f"{seed.rsplit('.', 1)[-1]}-{int(fraction * 10000):04d}"
+
+    def _estimate_usage(
+        self, model_name: str, prompt: str, system_instruction: Optional[str], response: str
+    ) -> Dict[str, int]:
+        estimator = get_token_estimator()
+        return {
+            "prompt_tokens": (
+                estimator.estimate(prompt, "local", model_name)
+                + estimator.estimate(system_instruction, "local", model_name)
+            ),
+            "completion_tokens": estimator.estimate(response, "local", model_name)
+        }
+
+    def _record_usage(
+        self,
+        model_name: str,
+        prompt: str,
+        system_instruction: Optional[str],
+        response: str,
+        cache_prefix: bool = False
+    ):
+        """Report estimated token counts, as real providers report measured ones"""
+        usage = self._estimate_usage(model_name, prompt, system_instruction, response)
+        if cache_prefix and system_instruction:
+            # Simulated prefix cache: a repeated system instruction is read from cache
+            prefix_key = (model_name, hashlib.sha256(system_instruction.encode("utf-8")).hexdigest())
+            if prefix_key in self._cached_prefixes:
+                usage["cached_tokens"] = get_token_estimator().estimate(system_instruction, "local", model_name)
+            self._cached_prefixes.add(prefix_key)
+        record_llm_usage("local", model_name, **usage)
+
+    # Core LLM Operations
+
+    @rate_limited("local", "_local_config")
+    @instrument_llm_call("Local")
+    @monitor_connection_health("Local")
+    async def query(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system_instruction: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> str:
+        """
+        Simulated LLM query
+
+        Args:
+            prompt: The prompt to send to the LLM
+            model: Optional model override
+            system_instruction: Optional system instruction
+            max_tokens: Optional max tokens override (truncates the response)
+            temperature: Ignored; responses are deterministic
+            **kwargs: response_schema renders a JSON object shaped like the
+                schema instead of the response template; cache_prefix
+                simulates prefix caching of the system instruction
+
+        Returns:
+            LLM response as string
+        """
+        try:
+            model_name = self._select_model(model)
+            await asyncio.sleep(self._sample_latency())
+            self._maybe_fail()
+
+            response_schema = kwargs.get("response_schema")
+            if response_schema is not None:
+                response = json.dumps(self._render_structured(response_schema, "value"))
+            else:
+                response = self._render_response(prompt, model_name, system_instruction, max_tokens)
+            self._record_usage(model_name, prompt, system_instruction, response, kwargs.get("cache_prefix", False))
+            return response
+
+        except Exception as e:
+            raise handle_llm_query_error("Local", e)
+
+    @rate_limited("local", "_local_config")
+    @instrument_llm_stream("Local")
+    async def query_stream(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system_instruction: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream a simulated response; the sampled latency is the time to first
+        chunk, then chunks follow at the configured interval
+
+        Args:
+            prompt: The prompt to send to the LLM
+            model: Optional model override
+            system_instruction: Optional system instruction
+            max_tokens: Optional max tokens override (truncates the response)
+            temperature: Ignored; responses are deterministic
+            **kwargs: Additional generation parameters
+
+        Yields:
+            Response text chunks
+        """
+        try:
+            model_name = self._select_model(model)
+            await asyncio.sleep(self._sample_latency())
+            self._maybe_fail()
+
+            text = self._render_response(prompt, model_name, system_instruction, max_tokens)
+            chunk_chars = self._local_config.stream_chunk_chars
+            chunk_delay = self._local_config.stream_chunk_delay_ms / 1000
+            for start in range(0, len(text), chunk_chars):
+                if start:
+                    await asyncio.sleep(chunk_delay)
+                yield text[start:start + chunk_chars]
+            self._record_usage(model_name, prompt, system_instruction, text, kwargs.get("cache_prefix", False))
+
+        except Exception as e:
+            raise handle_llm_query_error("Local", e)
+
+    async def query_structured(
+        self,
+        prompt: str,
+        output_schema: Dict[str, Any],
+        model: Optional[str] = None,
+        max_retries: int = 2,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Query with structured JSON output; the mock always returns an object
+        shaped like the schema, so no parsing retries are needed
+
+        Args:
+            prompt: The prompt to send
+            output_schema: Expected output schema description
+            model: Optional model override
+            max_retries: Unused; kept for interface compatibility
+            **kwargs: Additional parameters
+
+        Returns:
+            Parsed JSON response
+        """
+        schema_prompt = create_json_prompt(prompt, output_schema)
+        response_text = await self.query(schema_prompt, model=model, response_schema=output_schema, **kwargs)
+        return parse_json_response(response_text, output_schema)
+
+    async def batch_query(
+        self,
+        prompts: List[str],
+        model: Optional[str] = None,
+        max_concurrent: int = 3,
+        **kwargs
+    ) -> List[str]:
+        """
+        Execute multiple prompts in parallel
+
+        Args:
+            prompts: List of prompts to process
+            model: Optional model override
+            max_concurrent: Maximum concurrent executions
+            **kwargs: Additional parameters for each query
+
+        Returns:
+            List of responses in the same order as prompts
+        """
+        semaphore = asyncio.Semaphore(max_concurrent)
+
+        async def execute_single(prompt: str) -> str:
+            async with semaphore:
+                return await self.query(prompt, model=model, **kwargs)
+
+        try:
+            tasks = [execute_single(prompt) for prompt in prompts]
+            return await asyncio.gather(*tasks)
+
+        except Exception as e:
+            logger.error(f"Local batch execution failed: {e}")
+            return create_batch_error_response(e, len(prompts))
+
+    # Batch API (see services/batch_lane.py)
+
+    async def submit_batch(self, requests: List[BatchRequest], model: Optional[str] = None) -> str:
+        """
+        Submit a simulated batch; its results become available after the
+        configured batch latency, with simulated errors per request
+
+        Args:
+            requests: Queries in the batch
+            model: Optional model override
+
+        Returns:
+            The batch id
+        """
+        model_name = self._select_model(model)
+        results = []
+        for request in requests:
+            try:
+                self._maybe_fail()
+            except LocalProviderError as e:
+                results.append(BatchResult(custom_id=request.custom_id, error=str(e), model=model_name))
+                continue
+            text = self._render_response(request.prompt, model_name, request.system_instruction, request.max_tokens)
+            results.append(BatchResult(
+                custom_id=request.custom_id,
+                text=text,
+                model=model_name,
+                usage=self._estimate_usage(model_name, request.prompt, request.system_instruction, text)
+            ))
+
+        self._batch_ids += 1
+        batch_id = f"local-batch-{self._batch_ids}"
+        self._batches[batch_id] = (time.monotonic() + self._local_config.batch_latency_ms / 1000, results)
+        return batch_id
+
+    async def get_batch_results(self, batch_id: str) -> Optional[List[BatchResult]]:
+        """
+        Get the results of a simulated batch
+
+        Returns:
+            None while the batch is in progress, then a result per request
+        """
+        if batch_id not in self._batches:
+            raise LocalProviderError(f"Unknown batch {batch_id}", status_code=404)
+        ready_at, results = self._batches[batch_id]
+        if time.monotonic() < ready_at:
+            return None
+        del self._batches[batch_id]
+        return results
+
+    async def cancel_batch(self, batch_id: str) -> None:
+        """Drop a simulated batch"""
+        self._batches.pop(batch_id, None)
+
+    # Convenience Methods for Common Tasks
+
+    async def analyze_sentiment(self, text: str, **kwargs) -> Dict[str, Any]:
+        """Convenience method for sentiment analysis"""
+        prompt = f'Analyze the sentiment of this text: "{text}"'
+        return await self.query_structured(prompt, get_sentiment_analysis_schema(), **kwargs)
+
+    async def extract_keywords(self, text: str, max_keywords: int = 10, **kwargs) -> Dict[str, Any]:
+        """Convenience method for keyword extraction"""
+        prompt = f'Extract the top {max_keywords} keywords from: "{text}"'
+        return await self.query_structured(prompt, get_keyword_extraction_schema(), **kwargs)
+
+    async def summarize(self, text: str, max_sentences: int = 3, **kwargs) -> Dict[str, Any]:
+        """Convenience method for text summarization"""
+        prompt = f'Summarize this text in {max_sentences} sentences or less: "{text}"'
+        return await self.query_structured(prompt, get_summarization_schema(), **kwargs)
+
+    # Service Information and Management
+
+    def get_info(self) -> Dict[str, Any]:
+        """Get information about the local mock service configuration"""
+        return {
+            "service": "Local",
+            "service_name": "Local Mock LLM Service",
+            "provider": "Local",
+            "default_model": self._local_config.default_model,
+            "available_models": list(get_model_registry().get_catalog("local")),
+            "authentication_method": "None",
+            "simulation": self._local_config.get_simulation_settings()
+        }
+
+    def get_health_status(self) -> Dict[str, Any]:
+        """Get connection health status for the local mock service"""
+        tracker = get_health_tracker("Local")
+        return tracker.get_health_status()
+
+    def test_connection(self) -> Dict[str, Any]:
+        """Test the local mock service"""
+        return self._local_config.test_connection()
+
+# Global service instance for easy access
+_local_service = None
+
+def get_local_service() -> LocalLLMService:
+    """Get the global local mock LLM service instance"""
+    global _local_service
+    if _local_service is None:
+        _local_service = LocalLLMService()
+    return _local_service
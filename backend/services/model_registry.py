@@ -0,0 +1,272 @@
+"""
+TTL-cached model catalogs for the LLM providers
+
+Provider services used to rebuild their model list (and a lowercased copy
+of it) on every query to validate the requested model. Each service now
+registers its catalog source once; the registry keeps an immutable
+ModelCatalog per provider with a precomputed case-insensitive index, so
+validating a model is a dictionary lookup.
+
+Catalogs are built from the provider configuration and, for providers that
+implement ``list_models()``, merged with the models their API reports.
+They are refreshed in the background once they are older than
+LLM_MODEL_CATALOG_TTL_SECONDS; until a refresh completes, the previous
+catalog keeps being served. Provider info (``get_info()``) is cached for
+the same TTL.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+from logging_system import get_logger
+from metrics import get_metrics_registry
+
+logger = get_logger(__name__)
+
+MODEL_CATALOG_REFRESHES = get_metrics_registry().counter(
+    "llm_model_catalog_refreshes_total",
+    "Model catalog refreshes by source (config, provider) and outcome (succeeded, failed)",
+    ("provider", "source", "outcome")
+)
+
+class ModelCatalog(Sequence[str]):
+    """Immutable list of a provider's models with a case-insensitive index"""
+
+    __slots__ = ("_models", "_index", "source", "loaded_at")
+
+    def __init__(self, models: Iterable[str], source: str = "config", loaded_at: Optional[float] = None):
+        index: Dict[str, str] = {}
+        for model in models:
+            index.setdefault(model.lower(), model)
+        self._models = tuple(index.values())
+        self._index = index
+        self.source = source
+        self.loaded_at = time.monotonic() if loaded_at is None else loaded_at
+
+    def resolve(self, model: Optional[str]) -> Optional[str]:
+        """The properly cased name of a model, or None if it is not in the catalog"""
+        return self._index.get(model.lower()) if model else None
+
+    def suggest(self, model: str, limit: int = 5) -> List[str]:
+        """Models whose names contain, or are contained in, the given name"""
+        model_lower = model.lower()
+        return [
+            name for lower, name in self._index.items()
+            if model_lower in lower or lower in model_lower
+        ][:limit]
+
+    def __contains__(self, model: object) -> bool:
+        return isinstance(model, str) and model.lower() in self._index
+
+    def __getitem__(self, index):
+        return self._models[index]
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._models)
+
+    def __repr__(self) -> str:
+        return f"ModelCatalog({list(self._models)!r}, source={self.source!r})"
+
+def as_model_catalog(models: Iterable[str]) -> ModelCatalog:
+    """Use a catalog as is, or index a plain model list"""
+    return models if isinstance(models, ModelCatalog) else ModelCatalog(models)
+
+class _ProviderSource:
+    """Where a provider's catalog comes from"""
+
+    __slots__ = ("load_models", "list_remote_models", "catalog", "info", "info_loaded_at", "refreshing")
+
+    def __init__(
+        self,
+        load_models: Callable[[], Iterable[str]],
+        list_remote_models: Optional[Callable[[], Awaitable[Iterable[str]]]]
+    ):
+        self.load_models = load_models
+        self.list_remote_models = list_remote_models
+        self.catalog: Optional[ModelCatalog] = None
+        self.info: Optional[Dict[str, Any]] = None
+        self.info_loaded_at = 0.0
+        self.refreshing: Optional[asyncio.Task] = None
+
+class ModelRegistry:
+    """Model catalogs and provider info per provider, refreshed after a TTL"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = 3600.0,
+        remote_refresh: bool = True,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.remote_refresh = remote_refresh
+        self._clock = clock
+        self._sources: Dict[str, _ProviderSource] = {}
+        self._refresher: Optional[asyncio.Task] = None
+        self._background: Set[asyncio.Task] = set()
+
+    def register(
+        self,
+        provider: str,
+        load_models: Callable[[], Iterable[str]],
+        list_remote_models: Optional[Callable[[], Awaitable[Iterable[str]]]] = None
+    ):
+        """
+        Register (or replace) a provider's catalog source
+
+        Args:
+            load_models: Returns the configured models
+            list_remote_models: Lists the models the provider API reports, if supported
+        """
+        source = self._sources[provider] = _ProviderSource(load_models, list_remote_models)
+        if self.is_running and self.remote_refresh and list_remote_models is not None:
+            self._schedule_refresh(provider, source)
+
+    def is_registered(self, provider: str) -> bool:
+        return provider in self._sources
+
+    def get_catalog(self, provider: str) -> ModelCatalog:
+        """
+        Get a provider's model catalog without waiting for a refresh
+
+        Raises:
+            KeyError: If the provider has not been registered
+        """
+        source = self._sources[provider]
+        catalog = source.catalog
+        if catalog is None:
+            catalog = source.catalog = self._load_configured(provider, source)
+        elif self._clock() - catalog.loaded_at >= self.ttl_seconds:
+            catalog = self._refresh_stale(provider, source)
+        return catalog
+
+    def get_info(self, provider: str, build_info: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Get a provider's info, cached for the TTL, with its current model catalog"""
+        source = self._sources.get(provider)
+        if source is None:
+            return build_info()
+        if source.info is None or self._clock() - source.info_loaded_at >= self.ttl_seconds:
+            source.info = build_info()
+            source.info_loaded_at = self._clock()
+        info = dict(source.info)
+        info["available_models"] = list(self.get_catalog(provider))
+        return info
+
+    def _load_configured(self, provider: str, source: _ProviderSource, remote: Iterable[str] = ()) -> ModelCatalog:
+        configured = list(source.load_models())
+        remote = list(remote)
+        catalog = ModelCatalog(configured + remote, source="provider" if remote else "config", loaded_at=self._clock())
+        MODEL_CATALOG_REFRESHES.inc(provider=provider, source=catalog.source, outcome="succeeded")
+        return catalog
+
+    def _refresh_stale(self, provider: str, source: _ProviderSource) -> ModelCatalog:
+        """Serve the stale catalog while a background refresh runs, or reload it in place"""
+        if self.remote_refresh and source.list_remote_models is not None and self._schedule_refresh(provider, source):
+            return source.catalog
+
+        source.catalog = self._load_configured(provider, source)
+        return source.catalog
+
+    def _schedule_refresh(self, provider: str, source: _ProviderSource) -> bool:
+        """Start a background refresh unless one is running; False outside an event loop"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        if source.refreshing is None or source.refreshing.done():
+            source.refreshing = loop.create_task(self.refresh(provider))
+            self._background.add(source.refreshing)
+            source.refreshing.add_done_callback(self._background.discard)
+        return True
+
+    async def refresh(self, provider: str) -> ModelCatalog:
+        """Rebuild a provider's catalog from its configuration and API"""
+        source = self._sources[provider]
+        remote: Iterable[str] = ()
+        if self.remote_refresh and source.list_remote_models is not None:
+            try:
+                remote = await source.list_remote_models()
+            except Exception as e:
+                # Keep the configured models; the next attempt waits for the TTL
+                MODEL_CATALOG_REFRESHES.inc(provider=provider, source="provider", outcome="failed")
+                logger.warning(f"Failed to list {provider} models: {e}")
+        try:
+            source.catalog = self._load_configured(provider, source, remote)
+        except Exception as e:
+            MODEL_CATALOG_REFRESHES.inc(provider=provider, source="config", outcome="failed")
+            logger.error(f"Failed to load {provider} model catalog: {e}")
+            if source.catalog is None:
+                raise
+        return source.catalog
+
+    async def refresh_all(self):
+        """Refresh every registered provider's catalog concurrently"""
+        providers = list(self._sources)
+        await asyncio.gather(*(self.refresh(provider) for provider in providers), return_exceptions=True)
+
+    @property
+    def is_running(self) -> bool:
+        return self._refresher is not None and not self._refresher.done()
+
+    def start(self):
+        """Refresh all catalogs every TTL in the background"""
+        if self.is_running:
+            return
+        self._refresher = asyncio.get_running_loop().create_task(self._refresh_periodically())
+        logger.info("Model catalog refresher started", ttl_seconds=self.ttl_seconds)
+
+    async def stop(self):
+        if self._refresher:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+        for task in list(self._background):
+            task.cancel()
+
+    async def _refresh_periodically(self):
+        while True:
+            await self.refresh_all()
+            await asyncio.sleep(self.ttl_seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = self._clock()
+        return {
+            provider: {
+                "models": len(source.catalog) if source.catalog is not None else None,
+                "source": source.catalog.source if source.catalog is not None else None,
+                "age_seconds": round(now - source.catalog.loaded_at, 1) if source.catalog is not None else None
+            }
+            for provider, source in self._sources.items()
+        }
+
+# Global model registry
+_model_registry: Optional[ModelRegistry] = None
+
+def get_model_registry() -> ModelRegistry:
+    """Get the process-wide model registry, configured from settings"""
+    global _model_registry
+
+    if _model_registry is None:
+        from config.environment import get_settings
+        settings = get_settings()
+        _model_registry = ModelRegistry(
+            ttl_seconds=settings.llm_model_catalog_ttl_seconds,
+            remote_refresh=settings.llm_model_catalog_remote_refresh
+        )
+
+    return _model_registry
+
+async def start_model_registry():
+    """Start refreshing model catalogs in the background"""
+    get_model_registry().start()
+
+async def stop_model_registry():
+    """Stop the model catalog refresher"""
+    if _model_registry is not None:
+        await _model_registry.stop()
@@ -7,13 +7,14 @@ Follows the same interface pattern as GoogleAIService for consistency.
 
 import json
 import asyncio
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
 import openai
 from config.openai import get_openai_config
 from logging_system import get_logger
 from .llm_utils import (
     parse_json_response, 
     create_json_prompt,
+    native_json_mode_enabled,
     get_sentiment_analysis_schema,
     get_keyword_extraction_schema,
     get_summarization_schema,
@@ -22,21 +23,44 @@ from .llm_utils import (
     handle_structured_query_retry_error,
     safe_model_selection,
     monitor_connection_health,
+    instrument_llm_call,
+    instrument_llm_stream,
     get_health_tracker
 )
+from .batch_lane import BatchRequest, BatchResult
+from .http_transport import get_llm_http_client
+from .model_registry import get_model_registry
+from .rate_limiter import rate_limited
+from .usage import record_response_usage, usage_from_openai
 
 logger = get_logger(__name__)
 
 class OpenAIService:
     """Service providing OpenAI functionality for agents via composition"""
     
+    # Reasoning models that reject response_format
+    JSON_MODE_UNSUPPORTED_MODELS = ("o1-preview", "o1-mini")
+    
+    # Models listed by the API that can serve chat completions
+    CHAT_MODEL_PREFIXES = ("gpt-", "chatgpt-", "o1", "o3", "o4")
+    NON_CHAT_MODEL_MARKERS = ("audio", "realtime", "transcribe", "tts", "image", "search")
+    
+    # Batch statuses before results are available
+    BATCH_PENDING_STATUSES = ("validating", "in_progress", "finalizing", "cancelling")
+    
     def __init__(self):
         self._openai_config = get_openai_config()
-        self._client = openai.AsyncOpenAI(api_key=self._openai_config.api_key)
+        self._client = openai.AsyncOpenAI(
+            api_key=self._openai_config.api_key,
+            http_client=get_llm_http_client()
+        )
+        get_model_registry().register("openai", self._openai_config.get_available_models, self.list_models)
         logger.info("OpenAI service initialized")
     
     # Core LLM Operations
     
+    @rate_limited("openai", "_openai_config")
+    @instrument_llm_call("OpenAI")
     @monitor_connection_health("OpenAI")
     async def query(
         self, 
@@ -62,36 +86,13 @@ class OpenAIService:
             LLM response as string
         """
         try:
-            model_name = safe_model_selection(
-                service_name="OpenAI",
-                requested_model=model,
-                available_models=self._openai_config.get_available_models(),
-                default_model=self._openai_config.default_model,
-                strict_validation=False
+            generation_config = self._prepare_generation_config(
+                prompt, model, system_instruction, max_tokens, temperature, **kwargs
             )
             
-            # Prepare messages
-            messages = []
-            if system_instruction:
-                messages.append({"role": "system", "content": system_instruction})
-            messages.append({"role": "user", "content": prompt})
-            
-            # Prepare generation config
-            generation_config = {
-                "model": model_name,
-                "messages": messages
-            }
-            
-            if max_tokens:
-                generation_config['max_tokens'] = max_tokens
-            if temperature is not None:
-                generation_config['temperature'] = temperature
-            
-            # Add any additional kwargs to generation config
-            generation_config.update(kwargs)
-            
             # Execute the query
             response = await self._client.chat.completions.create(**generation_config)
+            record_response_usage("openai", generation_config["model"], usage_from_openai(getattr(response, "usage", None)))
             
             # Extract text from response
             return response.choices[0].message.content
@@ -99,6 +100,96 @@ class OpenAIService:
         except Exception as e:
             raise handle_llm_query_error("OpenAI", e)
     
+    def _prepare_generation_config(
+        self,
+        prompt: str,
+        model: Optional[str],
+        system_instruction: Optional[str],
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Build request parameters shared by query and query_stream"""
+        model_name = safe_model_selection(
+            service_name="OpenAI",
+            requested_model=model,
+            available_models=get_model_registry().get_catalog("openai"),
+            default_model=self._openai_config.default_model,
+            strict_validation=False
+        )
+        
+        # Prepare messages
+        messages = []
+        if system_instruction:
+            messages.append({"role": "system", "content": system_instruction})
+        messages.append({"role": "user", "content": prompt})
+        
+        # Prepare generation config
+        generation_config = {
+            "model": model_name,
+            "messages": messages
+        }
+        
+        if max_tokens:
+            generation_config['max_tokens'] = max_tokens
+        if temperature is not None:
+            generation_config['temperature'] = temperature
+        
+        # Add any additional kwargs to generation config
+        generation_config.update(kwargs)
+        
+        return generation_config
+    
+    def _json_mode_kwargs(self, model: Optional[str], output_schema: Any) -> Dict[str, Any]:
+        """Request parameters for native JSON output in structured queries"""
+        # JSON mode only produces a top-level object
+        if not native_json_mode_enabled() or not isinstance(output_schema, dict):
+            return {}
+        if (model or self._openai_config.default_model).startswith(self.JSON_MODE_UNSUPPORTED_MODELS):
+            return {}
+        return {"response_format": {"type": "json_object"}}
+    
+    @rate_limited("openai", "_openai_config")
+    @instrument_llm_stream("OpenAI")
+    async def query_stream(
+        self, 
+        prompt: str, 
+        model: Optional[str] = None,
+        system_instruction: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream an LLM response from the OpenAI API as it is generated
+        
+        Args:
+            prompt: The prompt to send to the LLM
+            model: Optional model override
+            system_instruction: Optional system instruction
+            max_tokens: Optional max tokens override
+            temperature: Optional temperature override
+            **kwargs: Additional generation parameters
+            
+        Yields:
+            Response text chunks
+        """
+        try:
+            generation_config = self._prepare_generation_config(
+                prompt, model, system_instruction, max_tokens, temperature, **kwargs
+            )
+            
+            # Usage arrives in a final chunk without choices
+            generation_config.setdefault("stream_options", {"include_usage": True})
+            stream = await self._client.chat.completions.create(**generation_config, stream=True)
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                record_response_usage("openai", generation_config["model"], usage_from_openai(getattr(chunk, "usage", None)))
+            
+        except Exception as e:
+            raise handle_llm_query_error("OpenAI", e)
+    
     async def query_structured(
         self,
         prompt: str,
@@ -120,13 +211,14 @@ class OpenAIService:
         Returns:
             Parsed JSON response
         """
+        query_kwargs = {**self._json_mode_kwargs(model, output_schema), **kwargs}
         for attempt in range(max_retries + 1):
             try:
                 # Create appropriate prompt for this attempt
                 is_retry = attempt > 0
                 schema_prompt = create_json_prompt(prompt, output_schema, strict=is_retry)
                 
-                response_text = await self.query(schema_prompt, model=model, **kwargs)
+                response_text = await self.query(schema_prompt, model=model, **query_kwargs)
                 
                 # Use the common JSON parsing utility
                 result = parse_json_response(response_text, output_schema)
@@ -139,9 +231,8 @@ class OpenAIService:
                 if attempt >= max_retries:
                     return result
                 
-                # Log warning and continue to retry
+                # Malformed output is not transient: retry at once with the stricter prompt
                 logger.warning(f"JSON parsing failed on attempt {attempt + 1}, retrying...")
-                await asyncio.sleep(1)  # Brief delay before retry
                         
             except Exception as e:
                 # Use common error handling utility
@@ -183,6 +274,95 @@ class OpenAIService:
             logger.error(f"OpenAI batch execution failed: {e}")
             return create_batch_error_response(e, len(prompts))
     
+    # Batch API (see services/batch_lane.py)
+    
+    async def submit_batch(self, requests: List[BatchRequest], model: Optional[str] = None) -> str:
+        """
+        Submit requests as one Batch API job (discounted, completed within 24 hours)
+        
+        Args:
+            requests: Queries in the batch
+            model: Optional model override
+            
+        Returns:
+            The batch id
+        """
+        lines = []
+        model_name = None
+        for request in requests:
+            body = self._prepare_generation_config(
+                request.prompt, model, request.system_instruction, request.max_tokens,
+                request.temperature, **request.params
+            )
+            lines.append(json.dumps({
+                "custom_id": request.custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body
+            }))
+            model_name = body["model"]
+        
+        input_file = await self._client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch"
+        )
+        # Results name dated model versions; usage is priced by the requested model,
+        # kept on the batch itself so cancelled or abandoned batches leave nothing behind
+        batch = await self._client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+            metadata={"model": model_name} if model_name else None
+        )
+        return batch.id
+    
+    async def get_batch_results(self, batch_id: str) -> Optional[List[BatchResult]]:
+        """
+        Get the results of a Batch API job
+        
+        Returns:
+            None while the batch is in progress, then a result per request
+        """
+        batch = await self._client.batches.retrieve(batch_id)
+        if batch.status in self.BATCH_PENDING_STATUSES:
+            return None
+        
+        results = []
+        # Successful requests are in the output file, failed ones in the error file
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                content = await self._client.files.content(file_id)
+                results.extend(
+                    self._batch_result(json.loads(line)) for line in content.text.splitlines() if line.strip()
+                )
+        metadata = batch.metadata if isinstance(batch.metadata, dict) else {}
+        model_name = metadata.get("model")
+        if not results and batch.status != "completed":
+            raise RuntimeError(f"OpenAI batch {batch_id} ended with status {batch.status}")
+        for result in results:
+            result.model = model_name or result.model
+        return results
+    
+    async def cancel_batch(self, batch_id: str) -> None:
+        """Cancel a Batch API job nobody is waiting for any more"""
+        await self._client.batches.cancel(batch_id)
+    
+    @staticmethod
+    def _batch_result(entry: Dict[str, Any]) -> BatchResult:
+        """Convert a line of a Batch API output or error file"""
+        response = entry.get("response") or {}
+        body = response.get("body") or {}
+        error = entry.get("error") or body.get("error")
+        if error or response.get("status_code", 200) >= 400:
+            message = error.get("message") if isinstance(error, dict) else error
+            return BatchResult(custom_id=entry.get("custom_id"), error=str(message or f"HTTP {response.get('status_code')}"))
+        return BatchResult(
+            custom_id=entry.get("custom_id"),
+            text=body["choices"][0]["message"]["content"],
+            model=body.get("model"),
+            usage=usage_from_openai(body.get("usage"))
+        )
+    
     # Convenience Methods for Common Tasks
     
     async def analyze_sentiment(self, text: str, **kwargs) -> Dict[str, Any]:
@@ -202,13 +382,21 @@ class OpenAIService:
     
     # Service Information and Management
     
+    async def list_models(self) -> List[str]:
+        """List the chat models available to the API key (merged into the model catalog)"""
+        return [
+            model.id async for model in self._client.models.list()
+            if model.id.startswith(self.CHAT_MODEL_PREFIXES)
+            and not any(marker in model.id for marker in self.NON_CHAT_MODEL_MARKERS)
+        ]
+    
     def get_info(self) -> Dict[str, Any]:
         """Get information about the OpenAI service configuration"""
         return {
             "service": "OpenAI",
             "service_name": "OpenAI Service",
             "default_model": self._openai_config.default_model,
-            "available_models": self._openai_config.get_available_models(),
+            "available_models": list(get_model_registry().get_catalog("openai")),
             "authentication_method": "API Key"
         }
     
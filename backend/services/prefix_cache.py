@@ -0,0 +1,156 @@
+"""
+Prompt-prefix caching for repeated system instructions
+
+Agents send the same long system instruction with every call. UnifiedLLMService
+marks it as a cacheable prefix when it is long enough to be worth caching,
+and each provider maps the mark onto its own mechanism:
+
+- anthropic: the system block carries ``cache_control`` (ephemeral, ~5 minutes)
+- google: the instruction is stored as Gemini cached content, reused until its TTL
+- openai, deepseek, grok: prefixes are cached automatically; nothing is sent
+- local: the mock simulates a cache of previously seen instructions
+
+Hits are read from the cached token counts the providers report (see
+services/usage.py) for marked requests, so hit rates reflect what the
+providers actually served from cache.
+"""
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from logging_system import get_logger
+from metrics import get_metrics_registry
+from .token_budget import get_token_estimator
+
+logger = get_logger(__name__)
+
+PREFIX_CACHE_REQUESTS = get_metrics_registry().counter(
+    "llm_prefix_cache_requests_total",
+    "LLM requests with a cacheable prompt prefix by result (hit, miss)",
+    ("provider", "result")
+)
+
+# How each provider caches prefixes; "explicit" providers need the request marked
+PREFIX_CACHE_MECHANISMS = {
+    "anthropic": "cache_control",
+    "google": "cached_content",
+    "openai": "automatic",
+    "deepseek": "automatic",
+    "grok": "automatic",
+    "local": "simulated"
+}
+EXPLICIT_MECHANISMS = ("cache_control", "cached_content", "simulated")
+
+# Shortest prefix each provider will cache, in tokens
+PROVIDER_MIN_PREFIX_TOKENS = {
+    "anthropic": 1024,
+    "google": 4096,
+    "openai": 1024,
+    "deepseek": 64,
+    "grok": 1024
+}
+
+class PrefixCacheStats:
+    """Prefix cache requests, hits and cached tokens per provider"""
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"requests": 0, "hits": 0, "prompt_tokens": 0, "cached_tokens": 0}
+        )
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, prompt_tokens: int, cached_tokens: int):
+        hit = cached_tokens > 0
+        with self._lock:
+            stats = self._stats[provider]
+            stats["requests"] += 1
+            stats["hits"] += int(hit)
+            stats["prompt_tokens"] += prompt_tokens
+            stats["cached_tokens"] += cached_tokens
+        PREFIX_CACHE_REQUESTS.inc(provider=provider, result="hit" if hit else "miss")
+
+    def get_stats(self, provider: str) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats.get(provider) or {"requests": 0, "hits": 0, "prompt_tokens": 0, "cached_tokens": 0})
+        requests, prompt_tokens = stats["requests"], stats["prompt_tokens"]
+        return {
+            "mechanism": PREFIX_CACHE_MECHANISMS.get(provider, "unsupported"),
+            "requests": requests,
+            "hits": stats["hits"],
+            "hit_rate_percent": round(stats["hits"] / requests * 100, 2) if requests else 0.0,
+            "cached_tokens": stats["cached_tokens"],
+            "cached_token_percent": round(stats["cached_tokens"] / prompt_tokens * 100, 2) if prompt_tokens else 0.0
+        }
+
+    def get_all_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            providers = list(self._stats)
+        return {provider: self.get_stats(provider) for provider in providers}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+# Provider whose request in the current context carries a marked prefix
+_marked_provider: ContextVar[Optional[str]] = ContextVar("llm_prefix_cache_provider", default=None)
+
+def record_prefix_cache_usage(provider: str, prompt_tokens: int, cached_tokens: int):
+    """Count a response towards prefix cache hit rates if its request was marked"""
+    if _marked_provider.get() == provider:
+        get_prefix_cache_stats().record(provider, prompt_tokens, cached_tokens)
+
+def is_cacheable_prefix(provider: str, model: Optional[str], prefix: Optional[str]) -> bool:
+    """Whether a prefix is long enough for the provider to cache it"""
+    if not prefix or provider not in PREFIX_CACHE_MECHANISMS:
+        return False
+    from config.environment import get_settings
+    min_tokens = max(get_settings().llm_prefix_cache_min_tokens, PROVIDER_MIN_PREFIX_TOKENS.get(provider, 0))
+    return get_token_estimator().estimate(prefix, provider, model) >= min_tokens
+
+@contextmanager
+def cacheable_prefix(
+    provider: str,
+    model: Optional[str],
+    system_instruction: Optional[str],
+    enabled: Optional[bool] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Mark the system instruction of a request made inside the block as a cacheable prefix.
+
+    Args:
+        enabled: Whether to mark it (defaults to LLM_PREFIX_CACHE_ENABLED)
+
+    Yields:
+        Keyword arguments for the provider service's request
+    """
+    if enabled is None:
+        from config.environment import get_settings
+        enabled = get_settings().llm_prefix_cache_enabled
+    if not enabled or not is_cacheable_prefix(provider, model, system_instruction):
+        yield {}
+        return
+
+    token = _marked_provider.set(provider)
+    try:
+        yield {"cache_prefix": True} if PREFIX_CACHE_MECHANISMS[provider] in EXPLICIT_MECHANISMS else {}
+    finally:
+        try:
+            _marked_provider.reset(token)
+        except ValueError:
+            # An abandoned stream was closed from another context
+            pass
+
+# Global prefix cache statistics
+_prefix_cache_stats: Optional[PrefixCacheStats] = None
+
+def get_prefix_cache_stats() -> PrefixCacheStats:
+    """Get the process-wide prefix cache statistics"""
+    global _prefix_cache_stats
+
+    if _prefix_cache_stats is None:
+        _prefix_cache_stats = PrefixCacheStats()
+
+    return _prefix_cache_stats
@@ -0,0 +1,215 @@
+"""
+Aggregate health of all LLM providers
+
+The /<provider>/validate, /models and /connection-test routes check one
+provider and one aspect at a time, so a dashboard showing everything made
+18 sequential requests. ProviderHealthMonitor checks every provider
+concurrently: each check (configuration validation, model catalog and
+connection test) runs with its own timeout, so a slow or hanging provider
+only marks its own check as timed out and the rest are still reported.
+
+The last snapshot is cached for LLM_PROVIDER_HEALTH_CACHE_SECONDS, and a
+background refresher started with the app rebuilds it every
+LLM_PROVIDER_HEALTH_REFRESH_SECONDS so reads are served from memory.
+"""
+
+import asyncio
+import importlib
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from logging_system import get_logger
+from metrics import get_metrics_registry
+
+logger = get_logger(__name__)
+
+PROVIDER_HEALTH_CHECKS = get_metrics_registry().counter(
+    "llm_provider_health_checks_total",
+    "Provider health checks by check (validation, models, connection) and outcome (ok, failed, timed_out)",
+    ("provider", "check", "outcome")
+)
+
+# Provider -> (config module, validation function); the local mock has no configuration to validate
+PROVIDER_VALIDATORS: Dict[str, Optional[Tuple[str, str]]] = {
+    "google": ("config.google_ai", "validate_google_ai_environment"),
+    "openai": ("config.openai", "validate_openai_environment"),
+    "grok": ("config.grok", "validate_grok_environment"),
+    "anthropic": ("config.anthropic", "validate_anthropic_environment"),
+    "deepseek": ("config.deepseek", "validate_deepseek_environment"),
+    "llama": ("config.llama", "validate_llama_environment"),
+    "local": None
+}
+
+class ProviderHealthMonitor:
+    """Concurrent, cached health checks across all providers"""
+
+    def __init__(
+        self,
+        timeout_seconds: float = 5.0,
+        cache_seconds: float = 30.0,
+        refresh_interval_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.timeout_seconds = timeout_seconds
+        self.cache_seconds = cache_seconds
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self._clock = clock
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._snapshot_at = 0.0
+        self._in_flight: Optional[asyncio.Task] = None
+        self._refresher: Optional[asyncio.Task] = None
+
+    async def get_health(self, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Get the health of all providers
+
+        Args:
+            refresh: Check again even if the cached snapshot is fresh
+        """
+        if not refresh and self._snapshot is not None and self._clock() - self._snapshot_at < self.cache_seconds:
+            return self._with_age(self._snapshot)
+
+        # Concurrent readers share one round of checks
+        if self._in_flight is None or self._in_flight.done():
+            self._in_flight = asyncio.create_task(self.check_all())
+        return self._with_age(await asyncio.shield(self._in_flight))
+
+    def _with_age(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        return {**snapshot, "age_seconds": round(max(self._clock() - self._snapshot_at, 0.0), 3)}
+
+    async def check_all(self) -> Dict[str, Any]:
+        """Check every provider concurrently and cache the snapshot"""
+        started = time.perf_counter()
+        providers = list(PROVIDER_VALIDATORS)
+        results = await asyncio.gather(*(self.check_provider(provider) for provider in providers))
+
+        statuses = [result["status"] for result in results]
+        snapshot = {
+            "providers": dict(zip(providers, results)),
+            "summary": {
+                "total_providers": len(results),
+                "healthy": statuses.count("healthy"),
+                "degraded": statuses.count("degraded"),
+                "unhealthy": statuses.count("unhealthy")
+            },
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+        self._snapshot, self._snapshot_at = snapshot, self._clock()
+        return snapshot
+
+    async def check_provider(self, provider: str) -> Dict[str, Any]:
+        """Run a provider's validation, model and connection checks concurrently"""
+        from .llm_service import get_unified_llm_service
+        llm_service = get_unified_llm_service()
+
+        validation, models, connection = await asyncio.gather(
+            self._run_check(provider, "validation", lambda: self._validate(provider)),
+            self._run_check(provider, "models", lambda: llm_service.get_available_models(provider)),
+            self._run_check(provider, "connection", lambda: llm_service.test_connection(provider))
+        )
+        if connection.get("ok") and not connection["result"].get("success", False):
+            connection["ok"] = False
+            connection["error"] = connection["result"].get("error")
+        if validation.get("ok") and validation["result"] is not None and not validation["result"].get("valid", False):
+            validation["ok"] = False
+            validation["error"] = "; ".join(validation["result"].get("errors", [])) or "invalid configuration"
+
+        checks = {"validation": validation, "models": models, "connection": connection}
+        passed = sum(1 for check in checks.values() if check["ok"])
+        if passed == len(checks):
+            status = "healthy"
+        elif connection["ok"]:
+            status = "degraded"
+        else:
+            status = "unhealthy"
+
+        return {"provider": provider, "status": status, "checks": checks}
+
+    def _validate(self, provider: str) -> Awaitable[Optional[Dict[str, Any]]]:
+        validator = PROVIDER_VALIDATORS[provider]
+        if validator is None:
+            return asyncio.sleep(0, result=None)
+        module_name, function_name = validator
+        validate = getattr(importlib.import_module(module_name), function_name)
+        # Validators build provider configs and clients synchronously
+        return asyncio.to_thread(validate)
+
+    async def _run_check(
+        self,
+        provider: str,
+        check: str,
+        run: Callable[[], Awaitable[Any]]
+    ) -> Dict[str, Any]:
+        """Run one check under the per-provider timeout"""
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(run(), timeout=self.timeout_seconds)
+            outcome = {"ok": True, "result": result}
+        except asyncio.TimeoutError:
+            outcome = {"ok": False, "timed_out": True, "error": f"timed out after {self.timeout_seconds}s"}
+        except Exception as e:
+            outcome = {"ok": False, "error": str(e)}
+        outcome["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+        if outcome.get("timed_out"):
+            PROVIDER_HEALTH_CHECKS.inc(provider=provider, check=check, outcome="timed_out")
+        else:
+            PROVIDER_HEALTH_CHECKS.inc(provider=provider, check=check, outcome="ok" if outcome["ok"] else "failed")
+        return outcome
+
+    @property
+    def is_running(self) -> bool:
+        return self._refresher is not None and not self._refresher.done()
+
+    def start(self):
+        """Keep the cached snapshot warm in the background"""
+        if self.is_running or self.refresh_interval_seconds <= 0:
+            return
+        self._refresher = asyncio.get_running_loop().create_task(self._refresh_periodically())
+        logger.info("Provider health refresher started", interval_seconds=self.refresh_interval_seconds)
+
+    async def stop(self):
+        if self._refresher:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+
+    async def _refresh_periodically(self):
+        while True:
+            try:
+                await self.get_health(refresh=True)
+            except Exception as e:
+                logger.error(f"Provider health refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval_seconds)
+
+# Global provider health monitor
+_provider_health_monitor: Optional[ProviderHealthMonitor] = None
+
+def get_provider_health_monitor() -> ProviderHealthMonitor:
+    """Get the process-wide provider health monitor, configured from settings"""
+    global _provider_health_monitor
+
+    if _provider_health_monitor is None:
+        from config.environment import get_settings
+        settings = get_settings()
+        _provider_health_monitor = ProviderHealthMonitor(
+            timeout_seconds=settings.llm_provider_health_timeout_seconds,
+            cache_seconds=settings.llm_provider_health_cache_seconds,
+            refresh_interval_seconds=settings.llm_provider_health_refresh_seconds
+        )
+
+    return _provider_health_monitor
+
+async def start_provider_health_monitor():
+    """Start refreshing provider health in the background"""
+    get_provider_health_monitor().start()
+
+async def stop_provider_health_monitor():
+    """Stop the provider health refresher"""
+    if _provider_health_monitor is not None:
+        await _provider_health_monitor.stop()
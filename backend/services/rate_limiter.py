@@ -0,0 +1,437 @@
+"""
+Shared rate limiting for LLM providers
+
+Each provider/model pair gets a process-wide limiter with two token buckets:
+one for requests per minute and one for estimated tokens per minute. Every
+request path (direct service calls, batch_query, UnifiedLLMService) draws
+from the same buckets, so concurrent jobs no longer push a provider into a
+burst of 429 responses. Waiting requests are served in priority order, so a
+CRITICAL job's calls go ahead of queued LOW-priority work. A 429 from the
+provider pauses the limiter for the advertised retry-after period.
+
+Limits come from the provider configuration modules (config/<provider>.py,
+``get_rate_limits``); a limit of 0 disables that bucket.
+"""
+
+import asyncio
+import contextvars
+import functools
+import heapq
+import inspect
+import itertools
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from logging_system import get_logger
+from metrics import DEFAULT_LATENCY_BUCKETS, get_metrics_registry
+from .llm_utils import canonical_model_name, metric_model_label
+from .token_budget import DEFAULT_OUTPUT_TOKENS, get_token_estimator
+
+logger = get_logger(__name__)
+
+# Matches JobPriority.NORMAL; requests outside a job use it
+DEFAULT_PRIORITY = 5
+
+# Pause applied after a 429 that carries no retry-after header
+DEFAULT_RETRY_AFTER_SECONDS = 5.0
+
+RATE_LIMIT_WAIT = get_metrics_registry().histogram(
+    "llm_rate_limit_wait_seconds",
+    "Time LLM requests wait for the shared provider rate limiter",
+    ("provider", "model"),
+    buckets=DEFAULT_LATENCY_BUCKETS
+)
+
+RATE_LIMITED_RESPONSES = get_metrics_registry().counter(
+    "llm_rate_limited_responses_total",
+    "429 responses received from LLM providers",
+    ("provider", "model")
+)
+
+class RateLimitTimeout(RuntimeError):
+    """Raised when a request waits longer than allowed for rate limit capacity"""
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``refill_per_second`` up to ``capacity``"""
+
+    def __init__(self, capacity: float, refill_per_second: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._clock = clock
+        self._tokens = capacity
+        self._updated_at = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.refill_per_second)
+        self._updated_at = now
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def try_consume(self, amount: float) -> bool:
+        self._refill()
+        if self._tokens >= amount:
+            self._tokens -= amount
+            return True
+        return False
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until ``amount`` tokens are available"""
+        self._refill()
+        missing = amount - self._tokens
+        if missing <= 0:
+            return 0.0
+        return missing / self.refill_per_second
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limiter for one provider and model.
+
+    Requests that cannot be served immediately queue in priority order (then
+    arrival order); only the head of the queue draws from the buckets, so a
+    large low-priority request cannot be starved by a stream of small ones
+    and a high-priority request never waits behind lower-priority work.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        model: Optional[str] = None,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.provider = provider
+        self.model = model or "default"
+        self._model_label = metric_model_label(provider, model)
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._clock = clock
+
+        self._request_bucket = (
+            TokenBucket(requests_per_minute, requests_per_minute / 60.0, clock) if requests_per_minute > 0 else None
+        )
+        self._token_bucket = (
+            TokenBucket(tokens_per_minute, tokens_per_minute / 60.0, clock) if tokens_per_minute > 0 else None
+        )
+        self._waiters: List[list] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._paused_until = 0.0
+
+        self.total_requests = 0
+        self.throttled_requests = 0
+        self.total_wait_seconds = 0.0
+        self.rate_limited_responses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._request_bucket is not None or self._token_bucket is not None
+
+    def _cost(self, tokens: int) -> int:
+        # A request larger than the whole bucket could never be served
+        if self._token_bucket is not None:
+            return min(tokens, self.tokens_per_minute)
+        return tokens
+
+    def _try_consume(self, tokens: int) -> bool:
+        if self._clock() < self._paused_until:
+            return False
+        if self._request_bucket is not None and self._request_bucket.available < 1:
+            return False
+        if self._token_bucket is not None and self._token_bucket.available < tokens:
+            return False
+        if self._request_bucket is not None:
+            self._request_bucket.try_consume(1)
+        if self._token_bucket is not None:
+            self._token_bucket.try_consume(tokens)
+        return True
+
+    def _time_until(self, tokens: int) -> float:
+        delays = [self._paused_until - self._clock()]
+        if self._request_bucket is not None:
+            delays.append(self._request_bucket.time_until(1))
+        if self._token_bucket is not None:
+            delays.append(self._token_bucket.time_until(tokens))
+        return max(max(delays), 0.0)
+
+    def _wake(self):
+        """Grant capacity to queued requests in priority order"""
+        self._timer = None
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._try_consume(tokens):
+                delay = self._time_until(tokens)
+                self._timer = asyncio.get_running_loop().call_later(max(delay, 0.001), self._wake)
+                return
+            heapq.heappop(self._waiters)
+            future.set_result(True)
+
+    async def acquire(self, tokens: int = 0, priority: Optional[int] = None, timeout: Optional[float] = None) -> float:
+        """
+        Wait for capacity to send one request of ``tokens`` estimated tokens.
+
+        Args:
+            tokens: Estimated prompt plus output tokens
+            priority: Higher values are served first (defaults to the bound request priority)
+            timeout: Maximum seconds to wait before raising RateLimitTimeout
+
+        Returns:
+            Seconds spent waiting
+        """
+        self.total_requests += 1
+        if not self.enabled:
+            return 0.0
+
+        tokens = self._cost(tokens)
+        if not self._waiters and self._try_consume(tokens):
+            RATE_LIMIT_WAIT.observe(0.0, provider=self.provider, model=self._model_label)
+            return 0.0
+
+        if priority is None:
+            priority = get_request_priority()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [-priority, next(self._sequence), tokens, future])
+        self.throttled_requests += 1
+        start = time.perf_counter()
+
+        if self._timer is not None:
+            self._timer.cancel()
+        self._wake()
+
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise RateLimitTimeout(
+                f"Timed out after {timeout}s waiting for {self.provider} rate limit capacity"
+            ) from None
+        finally:
+            waited = time.perf_counter() - start
+            self.total_wait_seconds += waited
+            RATE_LIMIT_WAIT.observe(waited, provider=self.provider, model=self._model_label)
+            # A cancelled head of the queue must not block the requests behind it
+            if not future.done() or future.cancelled():
+                if self._timer is not None:
+                    self._timer.cancel()
+                self._wake()
+
+        return waited
+
+    def penalize(self, retry_after: Optional[float] = None):
+        """Pause the limiter after the provider answered 429"""
+        retry_after = retry_after if retry_after and retry_after > 0 else DEFAULT_RETRY_AFTER_SECONDS
+        self.rate_limited_responses += 1
+        self._paused_until = max(self._paused_until, self._clock() + retry_after)
+        RATE_LIMITED_RESPONSES.inc(provider=self.provider, model=self._model_label)
+        logger.warning(
+            "LLM provider rate limited requests, pausing",
+            provider=self.provider,
+            model=self.model,
+            retry_after_seconds=retry_after
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "available_requests": (
+                int(self._request_bucket.available) if self._request_bucket is not None else None
+            ),
+            "available_tokens": int(self._token_bucket.available) if self._token_bucket is not None else None,
+            "waiting": sum(1 for waiter in self._waiters if not waiter[3].done()),
+            "total_requests": self.total_requests,
+            "throttled_requests": self.throttled_requests,
+            "total_wait_seconds": round(self.total_wait_seconds, 3),
+            "rate_limited_responses": self.rate_limited_responses,
+            "paused_for_seconds": round(max(self._paused_until - self._clock(), 0.0), 2)
+        }
+
+class RateLimiterRegistry:
+    """Limiters keyed by provider and canonical model name, created on first use"""
+
+    def __init__(self, enabled: bool = True, max_wait_seconds: Optional[float] = None):
+        self.enabled = enabled
+        self.max_wait_seconds = max_wait_seconds
+        self._limiters: Dict[str, RateLimiter] = {}
+
+    def get(self, provider: str, model: Optional[str] = None, limits: Optional[Dict[str, Any]] = None) -> RateLimiter:
+        key = f"{provider}:{model or 'default'}"
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limits = limits if self.enabled and isinstance(limits, dict) else {}
+            limiter = RateLimiter(
+                provider,
+                model,
+                requests_per_minute=_coerce_limit(limits.get("requests_per_minute")),
+                tokens_per_minute=_coerce_limit(limits.get("tokens_per_minute"))
+            )
+            self._limiters[key] = limiter
+        return limiter
+
+    def get_provider_stats(self, provider: str) -> Dict[str, Dict[str, Any]]:
+        """Get limiter stats for all models of a provider"""
+        return {
+            limiter.model: limiter.get_stats()
+            for limiter in self._limiters.values()
+            if limiter.provider == provider and limiter.enabled
+        }
+
+    def get_all_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {key: limiter.get_stats() for key, limiter in self._limiters.items()}
+
+    def reset(self):
+        self._limiters.clear()
+
+def _coerce_limit(value: Any) -> int:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return 0
+    return max(int(value), 0)
+
+# Priority of LLM requests made in the current context (bound per job by the pipeline)
+_request_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "llm_request_priority", default=DEFAULT_PRIORITY
+)
+
+def get_request_priority() -> int:
+    return _request_priority.get()
+
+@contextmanager
+def llm_request_priority(priority: int) -> Iterator[int]:
+    """Serve LLM requests made inside the block with the given priority"""
+    token = _request_priority.set(int(priority))
+    try:
+        yield int(priority)
+    finally:
+        _request_priority.reset(token)
+
+def estimate_request_tokens(
+    prompt: Any,
+    system_instruction: Any = None,
+    max_tokens: Any = None,
+    provider: Optional[str] = None,
+    model: Optional[str] = None
+) -> int:
+    """
+    Token estimate for rate limiting and routing: the provider's estimate
+    (see services.token_budget), or ~4 characters per token when the provider
+    is unknown, plus the output allowance
+    """
+    if provider is not None:
+        return get_token_estimator().estimate_request(prompt, system_instruction, max_tokens, provider, model)
+    chars = sum(len(text) for text in (prompt, system_instruction) if isinstance(text, str))
+    output_tokens = max_tokens if isinstance(max_tokens, int) and max_tokens > 0 else DEFAULT_OUTPUT_TOKENS
+    return chars // 4 + 1 + output_tokens
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether an error (or the provider error it wraps) is a 429 response"""
+    for candidate in _error_chain(error):
+        if getattr(candidate, "status_code", None) == 429 or getattr(candidate, "code", None) == 429:
+            return True
+        if type(candidate).__name__ in ("RateLimitError", "ResourceExhausted", "TooManyRequests"):
+            return True
+    return False
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Read the retry-after header from a provider error, if present"""
+    for candidate in _error_chain(error):
+        headers = getattr(getattr(candidate, "response", None), "headers", None)
+        if headers is None:
+            continue
+        try:
+            value = headers.get("retry-after")
+            return float(value) if value is not None else None
+        except (TypeError, ValueError, AttributeError):
+            return None
+    return None
+
+def _error_chain(error: BaseException) -> List[BaseException]:
+    # Services re-raise provider errors as RuntimeError inside their except blocks
+    chain = []
+    while error is not None and error not in chain and len(chain) < 5:
+        chain.append(error)
+        error = error.__cause__ or error.__context__
+    return chain
+
+def rate_limited(provider: str, config_attr: str):
+    """
+    Decorator for service query/query_stream methods: waits for the shared
+    provider/model limiter before calling, and pauses it on a 429 response
+    """
+    def decorator(func: Callable) -> Callable:
+        def _limiter_for(self, args, kwargs):
+            config = getattr(self, config_attr, None)
+            # Methods are called as query(self, prompt, model=None, ...)
+            prompt = kwargs.get("prompt", args[0] if args else None)
+            model = kwargs.get("model", args[1] if len(args) > 1 else None)
+            default_model = getattr(config, "default_model", None)
+            # Share one limiter across spellings of a model before the service validates it
+            model = canonical_model_name(
+                provider,
+                model if isinstance(model, str) else None,
+                default_model if isinstance(default_model, str) else None
+            )
+            get_limits = getattr(config, "get_rate_limits", None)
+            limits = get_limits(model) if callable(get_limits) else None
+            registry = get_rate_limiters()
+            limiter = registry.get(provider, model, limits)
+            tokens = estimate_request_tokens(
+                prompt, kwargs.get("system_instruction"), kwargs.get("max_tokens"), provider, model
+            )
+            return limiter, tokens, registry.max_wait_seconds
+
+        def _on_error(limiter: RateLimiter, error: BaseException):
+            if is_rate_limit_error(error):
+                limiter.penalize(retry_after_seconds(error))
+
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def stream_wrapper(self, *args, **kwargs):
+                limiter, tokens, max_wait = _limiter_for(self, args, kwargs)
+                await limiter.acquire(tokens, timeout=max_wait)
+                try:
+                    async for chunk in func(self, *args, **kwargs):
+                        yield chunk
+                except Exception as e:
+                    _on_error(limiter, e)
+                    raise
+
+            return stream_wrapper
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            limiter, tokens, max_wait = _limiter_for(self, args, kwargs)
+            await limiter.acquire(tokens, timeout=max_wait)
+            try:
+                return await func(self, *args, **kwargs)
+            except Exception as e:
+                _on_error(limiter, e)
+                raise
+
+        return wrapper
+    return decorator
+
+# Global limiter registry
+_rate_limiters: Optional[RateLimiterRegistry] = None
+
+def get_rate_limiters() -> RateLimiterRegistry:
+    """Get the process-wide rate limiter registry, configured from settings"""
+    global _rate_limiters
+
+    if _rate_limiters is None:
+        from config.environment import get_settings
+        settings = get_settings()
+        _rate_limiters = RateLimiterRegistry(
+            enabled=settings.llm_rate_limit_enabled,
+            max_wait_seconds=settings.llm_rate_limit_max_wait_seconds or None
+        )
+
+    return _rate_limiters
@@ -0,0 +1,227 @@
+"""
+Health- and latency-aware LLM provider routing
+
+UnifiedLLMService asks the router which provider/model should serve a
+request. Candidates carry the EWMA latency and error rate tracked by
+ConnectionHealthTracker, the circuit breaker state, and the model's cost and
+context window from the provider configuration. Policies:
+
+- preferred: use the requested provider; if it is unavailable, fall back to
+  the fastest healthy alternative (the default)
+- pinned: use the requested provider and model only, never fall back
+- fastest: lowest expected latency among healthy candidates
+- cheapest: lowest cost per token among healthy candidates, then fastest
+
+Each decision is recorded in the routing log bound for the current job, so
+the pipeline can attach it to the job's metadata.
+"""
+
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from logging_system import get_logger
+from metrics import get_metrics_registry
+
+logger = get_logger(__name__)
+
+PREFERRED = "preferred"
+PINNED = "pinned"
+FASTEST = "fastest"
+CHEAPEST = "cheapest"
+
+ROUTING_POLICIES = (PREFERRED, PINNED, FASTEST, CHEAPEST)
+
+# Decisions kept per job; long-running agents can make many calls
+MAX_LOGGED_DECISIONS = 50
+
+ROUTING_DECISIONS = get_metrics_registry().counter(
+    "llm_routing_decisions_total",
+    "LLM routing decisions by policy, chosen provider and whether the requested provider was replaced",
+    ("policy", "provider", "rerouted")
+)
+
+class NoRouteError(RuntimeError):
+    """Raised when no provider can serve a request under the routing policy"""
+
+@dataclass
+class RouteCandidate:
+    """A provider/model that could serve a request, with the signals used to rank it"""
+    provider: str
+    model: Optional[str] = None
+    available: bool = True
+    latency_seconds: Optional[float] = None
+    error_rate: float = 0.0
+    cost_per_1k_tokens: Optional[float] = None
+    context_window: Optional[int] = None
+
+    def expected_latency(self) -> Optional[float]:
+        """EWMA latency scaled by the expected number of attempts until a success"""
+        if self.latency_seconds is None:
+            return None
+        return self.latency_seconds / max(1.0 - self.error_rate, 0.05)
+
+    def fits(self, required_tokens: Optional[int]) -> bool:
+        return not required_tokens or self.context_window is None or self.context_window >= required_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "available": self.available,
+            "latency_seconds": round(self.latency_seconds, 4) if self.latency_seconds is not None else None,
+            "error_rate": round(self.error_rate, 4),
+            "cost_per_1k_tokens": self.cost_per_1k_tokens,
+            "context_window": self.context_window
+        }
+
+@dataclass
+class RoutingDecision:
+    """The provider/model chosen for a request and why"""
+    policy: str
+    requested_provider: str
+    requested_model: Optional[str]
+    provider: str
+    model: Optional[str]
+    reason: str
+    candidates: List[RouteCandidate] = field(default_factory=list)
+    timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    @property
+    def rerouted(self) -> bool:
+        return self.provider != self.requested_provider
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "requested_provider": self.requested_provider,
+            "requested_model": self.requested_model,
+            "provider": self.provider,
+            "model": self.model,
+            "rerouted": self.rerouted,
+            "reason": self.reason,
+            "candidates": [candidate.to_dict() for candidate in self.candidates],
+            "timestamp": self.timestamp.isoformat()
+        }
+
+class ProviderRouter:
+    """Ranks route candidates under a routing policy"""
+
+    def __init__(self, max_error_rate: float = 0.5):
+        self.max_error_rate = max_error_rate
+
+    def is_healthy(self, candidate: RouteCandidate) -> bool:
+        return candidate.available and candidate.error_rate < self.max_error_rate
+
+    def _latency_key(self, candidate: RouteCandidate, requested_provider: str):
+        latency = candidate.expected_latency()
+        # Candidates without latency samples rank after measured ones; ties keep the requested provider
+        return (latency is None, latency or 0.0, candidate.provider != requested_provider)
+
+    def _cost_key(self, candidate: RouteCandidate, requested_provider: str):
+        cost = candidate.cost_per_1k_tokens
+        return (cost is None, cost or 0.0) + self._latency_key(candidate, requested_provider)
+
+    def choose(
+        self,
+        policy: str,
+        requested_provider: str,
+        requested_model: Optional[str],
+        candidates: List[RouteCandidate],
+        required_tokens: Optional[int] = None
+    ) -> RoutingDecision:
+        """
+        Choose a candidate for a request.
+
+        Args:
+            policy: One of ROUTING_POLICIES
+            requested_provider: Provider the caller asked for (or the default)
+            requested_model: Model the caller asked for
+            candidates: Loaded providers; the requested provider first
+            required_tokens: Estimated prompt plus output tokens the model's context must hold
+
+        Raises:
+            NoRouteError: If no candidate can serve the request
+        """
+        if policy not in ROUTING_POLICIES:
+            raise ValueError(f"Unknown routing policy: {policy}. Use one of: {', '.join(ROUTING_POLICIES)}")
+
+        requested = next((c for c in candidates if c.provider == requested_provider), None)
+
+        def decide(candidate: RouteCandidate, reason: str) -> RoutingDecision:
+            decision = RoutingDecision(
+                policy=policy,
+                requested_provider=requested_provider,
+                requested_model=requested_model,
+                provider=candidate.provider,
+                model=candidate.model,
+                reason=reason,
+                candidates=candidates
+            )
+            ROUTING_DECISIONS.inc(policy=policy, provider=candidate.provider, rerouted=str(decision.rerouted).lower())
+            return decision
+
+        if policy in (PREFERRED, PINNED) and requested is not None and requested.available:
+            return decide(requested, "requested provider available")
+        if policy == PINNED:
+            raise NoRouteError(f"Pinned provider {requested_provider} is unavailable")
+
+        eligible = [c for c in candidates if c.available and c.fits(required_tokens)]
+        if not eligible:
+            raise NoRouteError("No LLM services available")
+        healthy = [c for c in eligible if self.is_healthy(c)] or eligible
+
+        if policy == CHEAPEST:
+            best = min(healthy, key=lambda c: self._cost_key(c, requested_provider))
+            reason = "lowest cost per token"
+        else:
+            best = min(healthy, key=lambda c: self._latency_key(c, requested_provider))
+            reason = "lowest expected latency"
+        if policy == PREFERRED:
+            reason = f"requested provider unavailable; {reason}"
+
+        return decide(best, reason)
+
+# Routing decisions made for the current job (bound by the job pipeline)
+_routing_log: contextvars.ContextVar[Optional[List[Dict[str, Any]]]] = contextvars.ContextVar(
+    "llm_routing_log", default=None
+)
+
+def record_routing_decision(decision: RoutingDecision):
+    """Log a decision and add it to the current job's routing log, if one is bound"""
+    if decision.rerouted:
+        logger.warning(
+            "LLM request rerouted",
+            policy=decision.policy,
+            requested_provider=decision.requested_provider,
+            provider=decision.provider,
+            reason=decision.reason
+        )
+    routing_log = _routing_log.get()
+    if routing_log is not None and len(routing_log) < MAX_LOGGED_DECISIONS:
+        routing_log.append(decision.to_dict())
+
+@contextmanager
+def bind_routing_log() -> Iterator[List[Dict[str, Any]]]:
+    """Collect routing decisions for LLM calls made inside the block"""
+    routing_log: List[Dict[str, Any]] = []
+    token = _routing_log.set(routing_log)
+    try:
+        yield routing_log
+    finally:
+        _routing_log.reset(token)
+
+# Global router
+_provider_router: Optional[ProviderRouter] = None
+
+def get_provider_router() -> ProviderRouter:
+    """Get the process-wide provider router, configured from settings"""
+    global _provider_router
+
+    if _provider_router is None:
+        from config.environment import get_settings
+        _provider_router = ProviderRouter(max_error_rate=get_settings().llm_routing_max_error_rate)
+
+    return _provider_router
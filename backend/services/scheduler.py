@@ -319,7 +319,8 @@ class SchedulerService:
                 agent_name=agent_name,
                 job_data=job_data,
                 priority=job_record["priority"],
-                tags=job_record["tags"]
+                tags=job_record["tags"],
+                metadata={"schedule_id": schedule_id}
             )
             
             if not pipeline_submitted:
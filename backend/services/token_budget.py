@@ -0,0 +1,350 @@
+"""
+Token estimation and context-window budgeting
+
+Estimates prompt tokens with fast per-family heuristics (characters per
+token, with non-ASCII text counted at close to one token per character), or
+with a registered tokenizer plug-in where one is available. UnifiedLLMService
+uses the estimates to check requests against the model's context window from
+the provider configuration before sending them, and depending on the
+overflow policy:
+
+- trim: cut the middle of the prompt (keeping the instructions at the start
+  and the question at the end) so the request fits (the default)
+- chunk: split the prompt into pieces that fit and query each in turn
+- error: raise ContextWindowExceededError without calling the provider
+- off: send the request unchanged
+
+Requests to models whose context window is unknown (no specs in the provider
+configuration) are sent unchanged under every policy.
+"""
+
+import importlib
+import math
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+from logging_system import get_logger
+from metrics import get_metrics_registry
+
+logger = get_logger(__name__)
+
+TRIM = "trim"
+CHUNK = "chunk"
+ERROR = "error"
+OFF = "off"
+
+OVERFLOW_POLICIES = (TRIM, CHUNK, ERROR, OFF)
+
+# Tokenizer family of each provider
+PROVIDER_FAMILIES: Dict[str, str] = {
+    "openai": "openai",
+    "grok": "openai",
+    "deepseek": "openai",
+    "local": "openai",
+    "anthropic": "anthropic",
+    "google": "gemini",
+    "llama": "llama"
+}
+
+# Average characters per token for English text, by tokenizer family
+CHARS_PER_TOKEN: Dict[str, float] = {
+    "openai": 4.0,
+    "anthropic": 3.5,
+    "gemini": 4.0,
+    "llama": 3.6
+}
+DEFAULT_CHARS_PER_TOKEN = 3.5
+
+# Non-ASCII characters (CJK, emoji, accented text) rarely share tokens
+NON_ASCII_TOKENS_PER_CHAR = 1.0
+
+# Chat formatting tokens added per message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Output allowance when the request does not set max_tokens
+DEFAULT_OUTPUT_TOKENS = 512
+
+# Smallest prompt budget worth trimming or chunking to
+MIN_PROMPT_TOKENS = 64
+
+TRIM_MARKER = "\n\n[... content trimmed to fit the model's context window ...]\n\n"
+
+# Preferred split points, strongest first
+_BOUNDARIES = [re.compile(pattern) for pattern in (r"\n\s*\n", r"\n", r"(?<=[.!?])\s+", r"\s+")]
+
+CONTEXT_BUDGET_ACTIONS = get_metrics_registry().counter(
+    "llm_context_budget_actions_total",
+    "LLM requests exceeding the model context window by provider and action taken (trim, chunk, error)",
+    ("provider", "action")
+)
+
+class ContextWindowExceededError(ValueError):
+    """Raised when a request cannot fit the model's context window"""
+
+    def __init__(self, message: str, required_tokens: int, context_window: int):
+        super().__init__(message)
+        self.required_tokens = required_tokens
+        self.context_window = context_window
+
+TokenCounter = Callable[[str, Optional[str]], int]
+
+class TokenEstimator:
+    """Estimates token counts per provider, using tokenizer plug-ins where registered"""
+
+    def __init__(self):
+        self._tokenizers: Dict[str, TokenCounter] = {}
+
+    def register_tokenizer(self, name: str, counter: TokenCounter):
+        """
+        Register an exact token counter for a provider or tokenizer family.
+
+        The counter is called as counter(text, model) and takes precedence
+        over the heuristic; a provider registration beats a family one.
+        """
+        self._tokenizers[name] = counter
+
+    def unregister_tokenizer(self, name: str):
+        self._tokenizers.pop(name, None)
+
+    def _counter_for(self, provider: Optional[str]) -> Optional[TokenCounter]:
+        if provider is None:
+            return None
+        return self._tokenizers.get(provider) or self._tokenizers.get(PROVIDER_FAMILIES.get(provider, ""))
+
+    def estimate(self, text: Any, provider: Optional[str] = None, model: Optional[str] = None) -> int:
+        """Estimate the tokens in a text for a provider's tokenizer"""
+        if not isinstance(text, str) or not text:
+            return 0
+
+        counter = self._counter_for(provider)
+        if counter is not None:
+            try:
+                return counter(text, model)
+            except Exception as e:
+                logger.debug(f"Tokenizer plug-in failed for {provider}, using heuristic: {e}")
+
+        chars_per_token = CHARS_PER_TOKEN.get(PROVIDER_FAMILIES.get(provider or "", ""), DEFAULT_CHARS_PER_TOKEN)
+        if text.isascii():
+            return math.ceil(len(text) / chars_per_token)
+        ascii_chars = len(text.encode("ascii", "ignore"))
+        non_ascii = len(text) - ascii_chars
+        return math.ceil(ascii_chars / chars_per_token + non_ascii * NON_ASCII_TOKENS_PER_CHAR)
+
+    def estimate_request(
+        self,
+        prompt: Any,
+        system_instruction: Any = None,
+        max_tokens: Any = None,
+        provider: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> int:
+        """Estimate the context a request needs: prompt, system instruction, formatting and output"""
+        output_tokens = max_tokens if isinstance(max_tokens, int) and max_tokens > 0 else DEFAULT_OUTPUT_TOKENS
+        messages = 2 if system_instruction else 1
+        return (
+            self.estimate(prompt, provider, model)
+            + self.estimate(system_instruction, provider, model)
+            + messages * MESSAGE_OVERHEAD_TOKENS
+            + output_tokens
+        )
+
+    def _chars_within(
+        self,
+        text: str,
+        budget_tokens: int,
+        provider: Optional[str],
+        model: Optional[str],
+        from_end: bool = False
+    ) -> int:
+        """Longest prefix (or suffix) length in characters estimated to fit the budget"""
+        def fits(length: int) -> bool:
+            piece = text[len(text) - length:] if from_end else text[:length]
+            return self.estimate(piece, provider, model) <= budget_tokens
+
+        # Start from the proportional guess, then binary search
+        total = self.estimate(text, provider, model)
+        guess = min(len(text), int(len(text) * budget_tokens / max(total, 1)))
+        low, high = (guess, len(text)) if fits(guess) else (0, guess - 1)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if fits(mid):
+                low = mid
+            else:
+                high = mid - 1
+        return low
+
+    def truncate(
+        self,
+        text: str,
+        budget_tokens: int,
+        provider: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> str:
+        """Keep the start of a text, ending on a paragraph or sentence boundary where possible"""
+        if self.estimate(text, provider, model) <= budget_tokens:
+            return text
+        end = _boundary_before(text, self._chars_within(text, max(budget_tokens, 0), provider, model))
+        return text[:end].rstrip()
+
+    def trim_middle(
+        self,
+        text: str,
+        budget_tokens: int,
+        provider: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> str:
+        """Cut the middle of a text so it fits the budget, keeping its start and end"""
+        if self.estimate(text, provider, model) <= budget_tokens:
+            return text
+        # Leave room for rounding when the pieces are estimated together
+        available = max(budget_tokens - self.estimate(TRIM_MARKER, provider, model) - 2, 0)
+        head_budget = (available * 2) // 3
+        head = self.truncate(text, head_budget, provider, model)
+
+        tail_budget = available - self.estimate(head, provider, model)
+        tail_chars = self._chars_within(text, tail_budget, provider, model, from_end=True)
+        tail = text[len(text) - tail_chars:] if tail_chars else ""
+        start = _boundary_after(tail, 0)
+        return head + TRIM_MARKER + tail[start:].lstrip()
+
+    def split(
+        self,
+        text: str,
+        budget_tokens: int,
+        provider: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> List[str]:
+        """Split a text into consecutive chunks that each fit the budget, on natural boundaries"""
+        chunks = []
+        remaining = text
+        while remaining:
+            if self.estimate(remaining, provider, model) <= budget_tokens:
+                chunks.append(remaining)
+                break
+            end = _boundary_before(remaining, self._chars_within(remaining, budget_tokens, provider, model))
+            if end <= 0:
+                end = max(self._chars_within(remaining, budget_tokens, provider, model), 1)
+            chunks.append(remaining[:end].strip())
+            remaining = remaining[end:].lstrip()
+        return [chunk for chunk in chunks if chunk]
+
+def _boundary_before(text: str, limit: int) -> int:
+    """The strongest boundary within the last quarter before limit, or limit itself"""
+    if limit >= len(text):
+        return len(text)
+    window_start = limit - limit // 4
+    for pattern in _BOUNDARIES:
+        ends = [match.end() for match in pattern.finditer(text, window_start, limit)]
+        if ends:
+            return ends[-1]
+    return limit
+
+def _boundary_after(text: str, start: int) -> int:
+    """The first boundary in the first quarter of text, or start itself"""
+    window_end = start + max(len(text) // 4, 1)
+    for pattern in _BOUNDARIES:
+        match = pattern.search(text, start, window_end)
+        if match:
+            return match.end()
+    return start
+
+def get_context_window(provider: str, model: Optional[str] = None) -> Optional[int]:
+    """The model's context window from the provider configuration, or None if unknown"""
+    from .llm_service import PROVIDER_CONFIGS
+
+    try:
+        module_name, getter = PROVIDER_CONFIGS[provider]
+        config = getattr(importlib.import_module(module_name), getter)()
+        context_window = config.get_context_window(model)
+    except Exception as e:
+        logger.debug(f"Context window unavailable for {provider}: {e}")
+        return None
+    return context_window if isinstance(context_window, int) and context_window > 0 else None
+
+def budget_prompt(
+    prompt: str,
+    context_window: Optional[int],
+    policy: str,
+    provider: Optional[str] = None,
+    model: Optional[str] = None,
+    system_instruction: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    estimator: Optional["TokenEstimator"] = None
+) -> List[str]:
+    """
+    Fit a prompt to a model's context window under an overflow policy.
+
+    Returns:
+        The prompts to send: the prompt itself when it fits (or budgeting is
+        off), a trimmed prompt, or the chunks of the prompt
+
+    Raises:
+        ContextWindowExceededError: Under the error policy, or when not even
+            a minimal prompt fits beside the system instruction and output
+    """
+    if policy not in OVERFLOW_POLICIES:
+        raise ValueError(f"Unknown context overflow policy: {policy}. Use one of: {', '.join(OVERFLOW_POLICIES)}")
+    if policy == OFF or not context_window:
+        return [prompt]
+
+    estimator = estimator or get_token_estimator()
+    required = estimator.estimate_request(prompt, system_instruction, max_tokens, provider, model)
+    if required <= context_window:
+        return [prompt]
+
+    prompt_budget = context_window - (required - estimator.estimate(prompt, provider, model))
+    message = (
+        f"Request needs ~{required} tokens but {provider} ({model or 'default model'}) "
+        f"has a {context_window} token context window"
+    )
+    if policy == ERROR or prompt_budget < MIN_PROMPT_TOKENS:
+        CONTEXT_BUDGET_ACTIONS.inc(provider=provider or "unknown", action=ERROR)
+        raise ContextWindowExceededError(message, required, context_window)
+
+    CONTEXT_BUDGET_ACTIONS.inc(provider=provider or "unknown", action=policy)
+    if policy == CHUNK:
+        chunks = estimator.split(prompt, prompt_budget, provider, model)
+        logger.warning(f"{message}; splitting the prompt into {len(chunks)} chunks")
+        return chunks
+
+    logger.warning(f"{message}; trimming the prompt")
+    return [estimator.trim_middle(prompt, prompt_budget, provider, model)]
+
+def _tiktoken_counter() -> Optional[TokenCounter]:
+    """Exact counter for OpenAI-family models, if the optional tiktoken package is installed"""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+
+    encodings: Dict[str, Any] = {}
+
+    def count(text: str, model: Optional[str]) -> int:
+        key = model or ""
+        if key not in encodings:
+            try:
+                encodings[key] = tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("o200k_base")
+            except KeyError:
+                encodings[key] = tiktoken.get_encoding("o200k_base")
+        return len(encodings[key].encode(text, disallowed_special=()))
+
+    return count
+
+# Global estimator
+_token_estimator: Optional[TokenEstimator] = None
+
+def get_token_estimator() -> TokenEstimator:
+    """Get the process-wide token estimator, with tokenizer plug-ins enabled in settings"""
+    global _token_estimator
+
+    if _token_estimator is None:
+        from config.environment import get_settings
+        _token_estimator = TokenEstimator()
+        if get_settings().llm_tiktoken_enabled:
+            counter = _tiktoken_counter()
+            if counter is not None:
+                _token_estimator.register_tokenizer("openai", counter)
+            else:
+                logger.warning("LLM_TIKTOKEN_ENABLED is set but the 'tiktoken' package is not installed; using heuristics")
+
+    return _token_estimator
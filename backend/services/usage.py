@@ -0,0 +1,433 @@
+"""
+LLM token and cost accounting
+
+Provider services report the prompt, completion and cached token counts of
+every response with record_llm_usage. Each call is priced from the model's
+costs in the provider configuration, counted in Prometheus metrics, added to
+the usage ledger bound to the current job (if any) and to process-wide daily
+rollups by user, agent, schedule and provider.
+
+Token counts follow one convention across providers: prompt_tokens includes
+cached prompt tokens and prompt tokens written to the cache. cached_tokens
+(a subset) are priced at the provider's discounted cache-read rate, and
+cache_write_tokens (another subset) at its cache-write rate.
+"""
+
+import importlib
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from logging_system import get_logger
+from metrics import get_metrics_registry
+from .llm_utils import metric_model_label
+from .prefix_cache import record_prefix_cache_usage
+
+logger = get_logger(__name__)
+
+LLM_TOKENS = get_metrics_registry().counter(
+    "llm_tokens_total",
+    "LLM tokens by provider, model and kind (prompt, completion, cached, cache_write)",
+    ("provider", "model", "kind")
+)
+
+LLM_COST = get_metrics_registry().counter(
+    "llm_cost_usd_total",
+    "Estimated LLM cost in US dollars by provider and model",
+    ("provider", "model")
+)
+
+# Price of a cached prompt token relative to an uncached one
+CACHED_INPUT_PRICE_RATIO = {
+    "openai": 0.5,
+    "anthropic": 0.1,
+    "google": 0.25,
+    "deepseek": 0.1
+}
+
+# Price of a prompt token written to the provider's cache relative to an uncached one
+CACHE_WRITE_PRICE_RATIO = {
+    "anthropic": 1.25
+}
+
+# Price of a token sent through a provider batch API relative to an interactive one
+BATCH_PRICE_RATIO = {
+    "openai": 0.5,
+    "anthropic": 0.5
+}
+
+# Dimensions usage rollups can be grouped by
+ROLLUP_DIMENSIONS = ("day", "user", "agent", "schedule", "provider")
+
+@dataclass
+class UsageTotals:
+    """Token counts and cost of a number of LLM calls"""
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cache_write_tokens: int = 0
+    cost_usd: float = 0.0
+    unpriced_calls: int = 0
+
+    def add(self, prompt_tokens: int, completion_tokens: int, cached_tokens: int, cost_usd: Optional[float],
+            calls: int = 1, cache_write_tokens: int = 0):
+        self.calls += calls
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cached_tokens += cached_tokens
+        self.cache_write_tokens += cache_write_tokens
+        if cost_usd is None:
+            self.unpriced_calls += calls
+        else:
+            self.cost_usd += cost_usd
+
+    def merge(self, other: "UsageTotals"):
+        self.calls += other.calls
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cached_tokens += other.cached_tokens
+        self.cache_write_tokens += other.cache_write_tokens
+        self.cost_usd += other.cost_usd
+        self.unpriced_calls += other.unpriced_calls
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "unpriced_calls": self.unpriced_calls
+        }
+
+class UsageLedger:
+    """Usage of the LLM calls made for one job (across its retries), by provider and model"""
+
+    def __init__(self, user_id: Optional[str] = None, agent: Optional[str] = None, schedule_id: Optional[str] = None):
+        self.user_id = user_id
+        self.agent = agent
+        self.schedule_id = schedule_id
+        self.total = UsageTotals()
+        self.by_model: Dict[Tuple[str, str], UsageTotals] = defaultdict(UsageTotals)
+        self._lock = threading.Lock()
+
+    @property
+    def calls(self) -> int:
+        return self.total.calls
+
+    def record(self, provider: str, model: str, prompt_tokens: int, completion_tokens: int,
+               cached_tokens: int, cost_usd: Optional[float], cache_write_tokens: int = 0):
+        with self._lock:
+            self.total.add(prompt_tokens, completion_tokens, cached_tokens, cost_usd,
+                           cache_write_tokens=cache_write_tokens)
+            self.by_model[(provider, model)].add(prompt_tokens, completion_tokens, cached_tokens, cost_usd,
+                                                 cache_write_tokens=cache_write_tokens)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            by_provider: Dict[str, UsageTotals] = defaultdict(UsageTotals)
+            models: Dict[str, Dict[str, Any]] = defaultdict(dict)
+            for (provider, model), totals in self.by_model.items():
+                by_provider[provider].merge(totals)
+                models[provider][model] = totals.to_dict()
+            data = self.total.to_dict()
+            data["by_provider"] = {
+                provider: {**totals.to_dict(), "models": models[provider]}
+                for provider, totals in by_provider.items()
+            }
+        return data
+
+class UsageAccounting:
+    """
+    Daily usage rollups keyed by (day, user, agent, schedule, provider).
+
+    Rows older than the retention period are dropped as new days start, so
+    memory is bounded by the number of distinct keys per day. Persisted job
+    usage (jobs.usage) covers longer periods.
+    """
+
+    def __init__(self, retention_days: int = 31, clock=lambda: datetime.now(timezone.utc)):
+        self.retention_days = retention_days
+        self._clock = clock
+        self._rows: Dict[Tuple[str, Optional[str], Optional[str], Optional[str], str], UsageTotals] = defaultdict(UsageTotals)
+        self._current_day: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _prune(self, day: str):
+        cutoff = (datetime.fromisoformat(day) - timedelta(days=self.retention_days - 1)).date().isoformat()
+        for key in [key for key in self._rows if key[0] < cutoff]:
+            del self._rows[key]
+
+    def record(self, provider: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int,
+               cost_usd: Optional[float], user_id: Optional[str] = None, agent: Optional[str] = None,
+               schedule_id: Optional[str] = None, cache_write_tokens: int = 0):
+        day = self._clock().date().isoformat()
+        with self._lock:
+            if day != self._current_day:
+                self._current_day = day
+                self._prune(day)
+            self._rows[(day, user_id, agent, schedule_id, provider)].add(
+                prompt_tokens, completion_tokens, cached_tokens, cost_usd, cache_write_tokens=cache_write_tokens
+            )
+
+    def get_rollups(self, group_by: Sequence[str] = ("day",), days: Optional[int] = None,
+                    user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Aggregate usage over the given dimensions, most expensive first.
+
+        Args:
+            group_by: Dimensions from ROLLUP_DIMENSIONS
+            days: Only include the most recent days (None = whole retention period)
+            user_id: Only include usage of this user
+
+        Raises:
+            ValueError: If a dimension is unknown
+        """
+        unknown = [dimension for dimension in group_by if dimension not in ROLLUP_DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown usage dimension(s): {', '.join(unknown)}. Use: {', '.join(ROLLUP_DIMENSIONS)}")
+        indexes = [ROLLUP_DIMENSIONS.index(dimension) for dimension in group_by]
+        cutoff = (self._clock() - timedelta(days=days - 1)).date().isoformat() if days else None
+
+        groups: Dict[Tuple, UsageTotals] = defaultdict(UsageTotals)
+        with self._lock:
+            for key, totals in self._rows.items():
+                if (cutoff and key[0] < cutoff) or (user_id is not None and key[1] != user_id):
+                    continue
+                groups[tuple(key[i] for i in indexes)].merge(totals)
+
+        rollups = [{**dict(zip(group_by, group)), **totals.to_dict()} for group, totals in groups.items()]
+        rollups.sort(key=lambda row: row["cost_usd"], reverse=True)
+        return rollups
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+
+# Model costs per 1K (input, output) tokens, from the provider configurations
+_model_costs: Dict[str, Optional[Tuple[float, float]]] = {}
+
+def _cost_per_1k(info: Dict[str, Any], kind: str) -> Optional[float]:
+    per_1k = info.get(f"cost_per_1k_{kind}")
+    if isinstance(per_1k, (int, float)):
+        return float(per_1k)
+    per_1m = info.get(f"cost_per_1m_{kind}")
+    if isinstance(per_1m, (int, float)):
+        return per_1m / 1000
+    return None
+
+def get_model_costs(provider: str, model: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Cost per 1K input and output tokens of a model, or None if unknown"""
+    cache_key = f"{provider}:{model or 'default'}"
+    if cache_key not in _model_costs:
+        from .llm_service import PROVIDER_CONFIGS
+
+        costs = None
+        try:
+            module_name, getter = PROVIDER_CONFIGS[provider]
+            config = getattr(importlib.import_module(module_name), getter)()
+            info = config.get_model_info(model)
+            input_cost, output_cost = _cost_per_1k(info, "input"), _cost_per_1k(info, "output")
+            if input_cost is not None and output_cost is not None:
+                costs = (input_cost, output_cost)
+        except Exception as e:
+            logger.debug(f"Model costs unavailable for {provider}: {e}")
+        _model_costs[cache_key] = costs
+    return _model_costs[cache_key]
+
+def estimate_cost(provider: str, model: Optional[str], prompt_tokens: int, completion_tokens: int,
+                  cached_tokens: int = 0, batch: bool = False, cache_write_tokens: int = 0) -> Optional[float]:
+    """Estimated cost in US dollars of one call, or None if the model's prices are unknown"""
+    costs = get_model_costs(provider, model)
+    if costs is None:
+        return None
+    input_cost, output_cost = costs
+    cached_ratio = CACHED_INPUT_PRICE_RATIO.get(provider, 1.0)
+    write_ratio = CACHE_WRITE_PRICE_RATIO.get(provider, 1.0)
+    uncached = max(prompt_tokens - cached_tokens - cache_write_tokens, 0)
+    cost = (
+        uncached * input_cost
+        + cached_tokens * input_cost * cached_ratio
+        + cache_write_tokens * input_cost * write_ratio
+        + completion_tokens * output_cost
+    ) / 1000
+    return cost * BATCH_PRICE_RATIO.get(provider, 1.0) if batch else cost
+
+# Usage ledger of the current job (bound by the job pipeline or the executing agent)
+_usage_ledger: ContextVar[Optional[UsageLedger]] = ContextVar("llm_usage_ledger", default=None)
+
+def get_usage_ledger() -> Optional[UsageLedger]:
+    """Get the usage ledger bound to the current context, if any"""
+    return _usage_ledger.get()
+
+@contextmanager
+def bind_usage_ledger(ledger: Optional[UsageLedger] = None, **attributes: Any) -> Iterator[UsageLedger]:
+    """
+    Collect the usage of LLM calls made inside the block.
+
+    An already bound ledger is reused, so nested bindings (the pipeline around
+    an agent's own binding) account every call once.
+    """
+    current = _usage_ledger.get()
+    if current is not None and ledger is None:
+        yield current
+        return
+    ledger = ledger or UsageLedger(**attributes)
+    token = _usage_ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _usage_ledger.reset(token)
+
+# Usage of the provider call in progress, for its tracing span
+_call_usage: ContextVar[Optional[UsageTotals]] = ContextVar("llm_call_usage", default=None)
+
+@contextmanager
+def collect_call_usage(totals: Optional[UsageTotals] = None) -> Iterator[UsageTotals]:
+    """
+    Add the usage recorded inside the block to ``totals`` (a new one by default).
+
+    Streams re-enter the block around each chunk they await, so the usage of
+    whoever consumes the chunks is not collected with theirs.
+    """
+    totals = totals if totals is not None else UsageTotals()
+    token = _call_usage.set(totals)
+    try:
+        yield totals
+    finally:
+        _call_usage.reset(token)
+
+def usage_span_attributes(totals: UsageTotals) -> Dict[str, int]:
+    """Token counts of a provider call as tracing span attributes (none if it reported no usage)"""
+    if not totals.calls:
+        return {}
+    return {
+        "llm.prompt_tokens": totals.prompt_tokens,
+        "llm.completion_tokens": totals.completion_tokens,
+        "llm.cached_tokens": totals.cached_tokens
+    }
+
+def record_llm_usage(
+    provider: str,
+    model: Optional[str],
+    prompt_tokens: int,
+    completion_tokens: int = 0,
+    cached_tokens: int = 0,
+    batch: bool = False,
+    cache_write_tokens: int = 0
+) -> Optional[float]:
+    """
+    Account for one LLM response: metrics, the current job's ledger, daily
+    rollups and the tracing span of the provider call.
+
+    Args:
+        cached_tokens: Prompt tokens read from the provider's cache
+        batch: Whether the call went through a provider batch API (discounted)
+        cache_write_tokens: Prompt tokens written to the provider's cache
+
+    Returns:
+        The call's estimated cost in US dollars, or None if unknown
+    """
+    # Metrics use the bounded catalog label; the ledger keeps the name as given
+    model_label = metric_model_label(provider, model)
+    model = model or "default"
+    cost = estimate_cost(provider, model, prompt_tokens, completion_tokens, cached_tokens, batch, cache_write_tokens)
+
+    LLM_TOKENS.inc(prompt_tokens, provider=provider, model=model_label, kind="prompt")
+    LLM_TOKENS.inc(completion_tokens, provider=provider, model=model_label, kind="completion")
+    if cached_tokens:
+        LLM_TOKENS.inc(cached_tokens, provider=provider, model=model_label, kind="cached")
+    if cache_write_tokens:
+        LLM_TOKENS.inc(cache_write_tokens, provider=provider, model=model_label, kind="cache_write")
+    if cost:
+        LLM_COST.inc(cost, provider=provider, model=model_label)
+    record_prefix_cache_usage(provider, prompt_tokens, cached_tokens)
+
+    call_usage = _call_usage.get()
+    if call_usage is not None:
+        call_usage.add(prompt_tokens, completion_tokens, cached_tokens, cost, cache_write_tokens=cache_write_tokens)
+
+    ledger = _usage_ledger.get()
+    if ledger is not None:
+        ledger.record(provider, model, prompt_tokens, completion_tokens, cached_tokens, cost, cache_write_tokens)
+    get_usage_accounting().record(
+        provider, prompt_tokens, completion_tokens, cached_tokens, cost,
+        user_id=ledger.user_id if ledger else None,
+        agent=ledger.agent if ledger else None,
+        schedule_id=ledger.schedule_id if ledger else None,
+        cache_write_tokens=cache_write_tokens
+    )
+    return cost
+
+# Token counts from provider SDK responses, or the same objects decoded from
+# batch result files as dicts (missing or non-numeric fields count as 0)
+
+def _field(obj: Any, name: str) -> Any:
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None) if obj is not None else None
+
+def _count(obj: Any, name: str) -> int:
+    value = _field(obj, name)
+    return value if isinstance(value, int) and not isinstance(value, bool) else 0
+
+def usage_from_openai(usage: Any) -> Optional[Dict[str, int]]:
+    """Token counts from an OpenAI-compatible `usage` object (also Grok, DeepSeek, Llama hosts)"""
+    if usage is None or not isinstance(_field(usage, "prompt_tokens"), int):
+        return None
+    cached = _count(_field(usage, "prompt_tokens_details"), "cached_tokens")
+    # DeepSeek reports cache hits separately
+    cached = cached or _count(usage, "prompt_cache_hit_tokens")
+    return {
+        "prompt_tokens": _count(usage, "prompt_tokens"),
+        "completion_tokens": _count(usage, "completion_tokens"),
+        "cached_tokens": cached
+    }
+
+def usage_from_anthropic(usage: Any, output_tokens: Optional[int] = None) -> Optional[Dict[str, int]]:
+    """Token counts from an Anthropic `usage` object (input excludes cache reads and writes)"""
+    if usage is None or not isinstance(_field(usage, "input_tokens"), int):
+        return None
+    cache_read = _count(usage, "cache_read_input_tokens")
+    cache_write = _count(usage, "cache_creation_input_tokens")
+    return {
+        "prompt_tokens": _count(usage, "input_tokens") + cache_read + cache_write,
+        "completion_tokens": output_tokens if output_tokens is not None else _count(usage, "output_tokens"),
+        "cached_tokens": cache_read,
+        "cache_write_tokens": cache_write
+    }
+
+def usage_from_gemini(usage_metadata: Any) -> Optional[Dict[str, int]]:
+    """Token counts from a Gemini response's `usage_metadata`"""
+    if usage_metadata is None or not isinstance(_field(usage_metadata, "prompt_token_count"), int):
+        return None
+    return {
+        "prompt_tokens": _count(usage_metadata, "prompt_token_count"),
+        "completion_tokens": _count(usage_metadata, "candidates_token_count"),
+        "cached_tokens": _count(usage_metadata, "cached_content_token_count")
+    }
+
+# Global accounting
+_usage_accounting: Optional[UsageAccounting] = None
+
+def get_usage_accounting() -> UsageAccounting:
+    """Get the process-wide usage rollups, configured from settings"""
+    global _usage_accounting
+
+    if _usage_accounting is None:
+        from config.environment import get_settings
+        _usage_accounting = UsageAccounting(retention_days=get_settings().llm_usage_retention_days)
+
+    return _usage_accounting
+
+def record_response_usage(provider: str, model: Optional[str], usage: Optional[Dict[str, int]], batch: bool = False):
+    """Record the usage extracted from a provider response, if it reported any"""
+    if usage:
+        record_llm_usage(provider, model, batch=batch, **usage)
@@ -17,6 +17,16 @@ from unittest.mock import Mock, AsyncMock
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy import text
 
+class FakeClock:
+    """Manually advanced monotonic clock for components that take a ``clock`` callable."""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
 # Mock database session for testing
 class MockAsyncSession:
     """Mock AsyncSession for testing without real database."""
@@ -286,4 +296,25 @@ def event_loop():
     """Create an instance of the default event loop for the test session."""
     loop = asyncio.get_event_loop_policy().new_event_loop()
     yield loop
-    loop.close() 
\ No newline at end of file
+    loop.close() 
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breakers():
+    """Keep provider failures in one test from opening circuit breakers in the next."""
+    from services.circuit_breaker import get_circuit_breakers
+    get_circuit_breakers().reset()
+    yield
+
+@pytest.fixture(autouse=True)
+def reset_health_trackers():
+    """Keep latency and errors recorded in one test from steering routing in the next."""
+    from services.llm_utils import _health_trackers
+    _health_trackers.clear()
+    yield
+
+@pytest.fixture(autouse=True)
+def reset_rate_limiters():
+    """Keep rate limit buckets drained in one test from throttling the next."""
+    from services.rate_limiter import get_rate_limiters
+    get_rate_limiters().reset()
+    yield
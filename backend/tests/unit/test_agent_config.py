@@ -268,7 +268,10 @@ class TestAgentConfigManager:
         """Test configuration validation with invalid config"""
         config = AgentConfig(
             name="",  # Invalid: empty name
-            execution=AgentExecutionConfig(timeout_seconds=-10, max_retries=-1),  # Invalid: negative values
+            execution=AgentExecutionConfig(
+                timeout_seconds=-10, max_retries=-1,  # Invalid: negative values
+                memory_limit_mb=0, cpu_limit_percent=150.0  # Invalid: out of range
+            ),
             model=AgentModelConfig(temperature=3.0, max_tokens=-100),  # Invalid: out of range
             security=AgentSecurityConfig(
                 max_input_size_bytes=-1,  # Invalid: negative
@@ -282,6 +285,8 @@ class TestAgentConfigManager:
         assert any("name is required" in error for error in errors)
         assert any("timeout must be positive" in error for error in errors)
         assert any("retries cannot be negative" in error for error in errors)
+        assert any("Memory limit must be positive" in error for error in errors)
+        assert any("CPU limit must be between 0 and 100" in error for error in errors)
         assert any("temperature must be between 0 and 2" in error for error in errors)
         assert any("input size must be positive" in error for error in errors)
         # Remove the problematic rate limit assertion - the actual error message may be different
@@ -94,6 +94,7 @@ class TestEndpointDecorator:
         assert info['methods'] == ["GET"]
         assert info['auth_required'] is False
         assert info['public'] is True
+        assert info['streaming'] is False
 
 
 class TestAgentMeta:
@@ -421,6 +422,48 @@ class TestEndpointWrapper:
         assert result.metadata is not None
         assert "status_code" in result.metadata
         assert result.metadata["status_code"] == 400
+    
+    @pytest.mark.asyncio
+    async def test_create_endpoint_wrapper_streaming(self):
+        """Test that streaming endpoints are served as Server-Sent Events"""
+        
+        async def stream_method(self, request_data, user):
+            async def chunks():
+                yield "Hello"
+                yield " world"
+            return chunks()
+        
+        endpoint_info = {'path': '/stream', 'methods': ['POST'], 'auth_required': True,
+                         'public': False, 'streaming': True}
+        wrapper = create_endpoint_wrapper(self.mock_agent, stream_method, endpoint_info)
+        
+        response = await wrapper(self.mock_request, {}, self.mock_user)
+        body = "".join([chunk async for chunk in response.body_iterator])
+        
+        assert response.media_type == "text/event-stream"
+        assert 'event: chunk\ndata: {"text": "Hello"}' in body
+        assert body.rstrip().split("\n")[-2] == "event: done"
+    
+    @pytest.mark.asyncio
+    async def test_create_endpoint_wrapper_streaming_error_event(self):
+        """Test that failures mid-stream are sent as an error event"""
+        
+        async def failing_stream(self, request_data, user):
+            async def chunks():
+                yield "Partial"
+                raise RuntimeError("Provider disconnected")
+            return chunks()
+        
+        endpoint_info = {'path': '/stream', 'methods': ['POST'], 'auth_required': True,
+                         'public': False, 'streaming': True}
+        wrapper = create_endpoint_wrapper(self.mock_agent, failing_stream, endpoint_info)
+        
+        response = await wrapper(self.mock_request, {}, self.mock_user)
+        body = "".join([chunk async for chunk in response.body_iterator])
+        
+        assert "event: error" in body
+        assert "Provider disconnected" in body
+        assert "event: done" not in body
 
 
 class TestUtilityFunctions:
@@ -307,6 +307,27 @@ class TestAnthropicService:
         with pytest.raises(RuntimeError):
             await self.service.query("Test prompt")
 
+    @pytest.mark.asyncio
+    async def test_query_stream_success(self):
+        """Test streaming query yields text deltas only"""
+        async def stream():
+            start = Mock(type="message_start")
+            yield start
+            for text in ["Hello", " world"]:
+                event = Mock(type="content_block_delta")
+                event.delta.text = text
+                yield event
+            yield Mock(type="message_stop")
+        
+        self.service._client.messages.create = AsyncMock(return_value=stream())
+        self.service._anthropic_config.get_available_models.return_value = ['claude-3-sonnet-20240229']
+        self.service._anthropic_config.default_model = 'claude-3-sonnet-20240229'
+        
+        chunks = [chunk async for chunk in self.service.query_stream("Test prompt")]
+        
+        assert chunks == ["Hello", " world"]
+        assert self.service._client.messages.create.call_args[1]['stream'] is True
+
     @pytest.mark.asyncio
     async def test_query_structured_success(self):
         """Test successful structured query"""
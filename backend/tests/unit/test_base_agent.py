@@ -12,6 +12,7 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
 
 import uuid
+import asyncio
 from datetime import datetime
 from unittest.mock import Mock, patch, AsyncMock, MagicMock
 from typing import Dict, Any, List
@@ -241,6 +242,29 @@ class TestBaseAgentJobExecution:
         assert result.success == False
         assert "Unexpected error during job execution" in result.error_message
         assert result.execution_time is not None
+    
+    @pytest.mark.asyncio
+    async def test_execute_job_cancellation(self, mock_job_data):
+        """Test that a cancelled job runs the cancellation hook and stays cancelled"""
+        class SlowAgent(BaseAgent):
+            def _get_system_instruction(self) -> str:
+                return "Slow agent"
+            
+            async def _execute_job_logic(self, job_data: JobDataBase) -> AgentExecutionResult:
+                await asyncio.sleep(10)
+                return AgentExecutionResult(success=True, result="Too late")
+        
+        agent = SlowAgent(name="slow_test", description="Test")
+        agent.is_initialized = True
+        agent.on_job_cancelled = AsyncMock()
+        
+        task = asyncio.create_task(agent.execute_job("test_job", mock_job_data))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        agent.on_job_cancelled.assert_awaited_once_with("test_job")
 
 
 class TestBaseAgentInfo:
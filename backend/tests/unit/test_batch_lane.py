@@ -0,0 +1,307 @@
+"""
+Unit tests for the provider batch-API lane
+
+Tests accumulating requests per provider and model into one batch, fanning
+results and usage back out to each caller, failures and timeouts,
+cancelling abandoned batches, routing from UnifiedLLMService, which jobs
+the pipeline sends through the lane, and parking those jobs off the workers.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from config.local import LocalConfig
+from agent import AgentExecutionResult
+from job_pipeline import JobPipeline, JobPriority, JobTask
+from services.batch_lane import (
+    BatchError, BatchLane, BatchResult, batch_mode_enabled, llm_batch_mode, supports_batches
+)
+from services.llm_service import UnifiedLLMService
+from services.local_service import LocalLLMService
+from services.rate_limiter import RateLimiterRegistry
+from services.usage import bind_usage_ledger
+
+
+@pytest.fixture
+def local_service(monkeypatch):
+    """Local mock provider whose batches complete after 20ms"""
+    monkeypatch.setenv("LOCAL_LLM_ENABLED", "true")
+    monkeypatch.setenv("LOCAL_LLM_LATENCY_MS", "0")
+    monkeypatch.setenv("LOCAL_LLM_BATCH_LATENCY_MS", "20")
+    monkeypatch.setattr("services.rate_limiter.get_rate_limiters", lambda: RateLimiterRegistry())
+    with patch("services.local_service.get_local_config", return_value=LocalConfig()):
+        return LocalLLMService()
+
+
+def make_lane(**overrides) -> BatchLane:
+    settings = dict(max_batch_size=10, max_wait_seconds=0.01, poll_interval_seconds=0.01, timeout_seconds=1.0)
+    settings.update(overrides)
+    return BatchLane(**settings)
+
+
+class TestBatchLane:
+    """Test batching against the local mock provider"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_share_one_batch(self, local_service):
+        """Test that each caller gets its own answer from a single provider batch"""
+        lane = make_lane()
+        local_service.submit_batch = AsyncMock(wraps=local_service.submit_batch)
+        prompts = [f"Prompt {i}" for i in range(3)]
+
+        answers = await asyncio.gather(*(lane.query("local", local_service, None, prompt) for prompt in prompts))
+
+        assert local_service.submit_batch.call_count == 1
+        assert answers == [
+            local_service._render_response(prompt, "local-echo", None, None) for prompt in prompts
+        ]
+
+    @pytest.mark.asyncio
+    async def test_full_batch_is_submitted_without_waiting(self, local_service):
+        lane = make_lane(max_batch_size=2, max_wait_seconds=60)
+        local_service.submit_batch = AsyncMock(wraps=local_service.submit_batch)
+
+        await asyncio.wait_for(
+            asyncio.gather(*(lane.query("local", local_service, None, f"Prompt {i}") for i in range(4))),
+            timeout=1.0
+        )
+
+        assert local_service.submit_batch.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_models_are_batched_separately(self, local_service):
+        lane = make_lane()
+        local_service.submit_batch = AsyncMock(wraps=local_service.submit_batch)
+
+        await asyncio.gather(
+            lane.query("local", local_service, "local-echo", "A"),
+            lane.query("local", local_service, "local-large-context", "B")
+        )
+
+        assert sorted(call.args[1] for call in local_service.submit_batch.call_args_list) == [
+            "local-echo", "local-large-context"
+        ]
+
+    @pytest.mark.asyncio
+    async def test_usage_is_recorded_on_each_callers_ledger(self, local_service):
+        """Test that usage lands on the job that made the request, not the batch task"""
+        lane = make_lane()
+
+        async def job_query(prompt):
+            with bind_usage_ledger() as ledger:
+                await lane.query("local", local_service, None, prompt)
+            return ledger
+
+        ledgers = await asyncio.gather(job_query("Short"), job_query("A much longer prompt " * 20))
+
+        assert [ledger.calls for ledger in ledgers] == [1, 1]
+        assert ledgers[0].total.prompt_tokens < ledgers[1].total.prompt_tokens
+
+    @pytest.mark.asyncio
+    async def test_request_errors_fail_only_their_caller(self):
+        service = Mock()
+        service.submit_batch = AsyncMock(return_value="batch-1")
+        service.get_batch_results = AsyncMock(return_value=[
+            BatchResult(custom_id="request-1", text="ok"),
+            BatchResult(custom_id="request-2", error="invalid_request")
+        ])
+        lane = make_lane()
+
+        results = await asyncio.gather(
+            lane.query("openai", service, "gpt-4o-mini", "A"),
+            lane.query("openai", service, "gpt-4o-mini", "B"),
+            return_exceptions=True
+        )
+
+        assert results[0] == "ok"
+        assert isinstance(results[1], BatchError)
+
+    @pytest.mark.asyncio
+    async def test_submit_failure_fails_all_callers(self):
+        service = Mock()
+        service.submit_batch = AsyncMock(side_effect=RuntimeError("quota exceeded"))
+        lane = make_lane()
+
+        results = await asyncio.gather(
+            lane.query("openai", service, None, "A"),
+            lane.query("openai", service, None, "B"),
+            return_exceptions=True
+        )
+
+        assert all(isinstance(result, BatchError) and "quota exceeded" in str(result) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_batch_timeout(self):
+        service = Mock()
+        service.submit_batch = AsyncMock(return_value="batch-1")
+        service.get_batch_results = AsyncMock(return_value=None)
+        lane = make_lane(timeout_seconds=0.03)
+
+        with pytest.raises(BatchError, match="did not complete"):
+            await lane.query("openai", service, None, "A")
+
+    @pytest.mark.asyncio
+    async def test_abandoned_batch_is_cancelled(self):
+        """Test that the provider batch is cancelled once all of its callers are gone"""
+        service = Mock()
+        service.submit_batch = AsyncMock(return_value="batch-1")
+        service.get_batch_results = AsyncMock(return_value=None)
+        service.cancel_batch = AsyncMock()
+        lane = make_lane()
+
+        callers = [asyncio.create_task(lane.query("openai", service, None, prompt)) for prompt in ("A", "B")]
+        while service.get_batch_results.await_count == 0:
+            await asyncio.sleep(0.01)
+        callers[0].cancel()
+        await asyncio.sleep(0.03)
+        service.cancel_batch.assert_not_called()
+
+        callers[1].cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0.03)
+
+        service.cancel_batch.assert_awaited_once_with("batch-1")
+        assert lane.get_stats()["running_batches"] == 0
+
+    @pytest.mark.asyncio
+    async def test_local_batch_results_wait_for_batch_latency(self, local_service):
+        batch_id = await local_service.submit_batch([], None)
+
+        assert await local_service.get_batch_results(batch_id) is None
+        await asyncio.sleep(0.03)
+        assert await local_service.get_batch_results(batch_id) == []
+
+
+class TestProviderBatchResults:
+    """Test converting provider batch results"""
+
+    def test_openai_output_and_error_lines(self):
+        from services.openai_service import OpenAIService
+
+        succeeded = OpenAIService._batch_result({
+            "custom_id": "request-1",
+            "response": {"status_code": 200, "body": {
+                "model": "gpt-4o-mini-2024-07-18",
+                "choices": [{"message": {"content": "Hello"}}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 2, "prompt_tokens_details": {"cached_tokens": 0}}
+            }},
+            "error": None
+        })
+        failed = OpenAIService._batch_result({
+            "custom_id": "request-2",
+            "response": {"status_code": 400, "body": {"error": {"message": "Invalid model"}}},
+            "error": None
+        })
+
+        assert (succeeded.text, succeeded.usage["prompt_tokens"]) == ("Hello", 10)
+        assert failed.error == "Invalid model"
+
+
+class TestBatchRouting:
+    """Test which requests go through the batch lane"""
+
+    @pytest.mark.asyncio
+    async def test_unified_query_uses_lane_in_batch_mode(self):
+        service = Mock(spec=["query", "submit_batch", "get_batch_results"])
+        service.query = AsyncMock(return_value="interactive")
+        lane = Mock()
+        lane.query = AsyncMock(return_value="batched")
+        unified = UnifiedLLMService()
+
+        with patch.object(unified, "_get_openai_service", return_value=service), \
+             patch("services.llm_service.get_batch_lane", return_value=lane):
+            with llm_batch_mode():
+                assert await unified.query("Hi", provider="openai") == "batched"
+            assert await unified.query("Hi", provider="openai") == "interactive"
+
+    @pytest.mark.asyncio
+    async def test_providers_without_batch_api_stay_interactive(self):
+        service = Mock(spec=["query"])
+        service.query = AsyncMock(return_value="interactive")
+        unified = UnifiedLLMService()
+
+        with patch.object(unified, "_get_grok_service", return_value=service):
+            with llm_batch_mode():
+                assert await unified.query("Hi", provider="grok") == "interactive"
+        assert not supports_batches(service)
+        assert not batch_mode_enabled()
+
+    def test_pipeline_batches_low_priority_and_scheduled_jobs(self):
+        def task(priority, metadata=None):
+            return JobTask(job_id="job", user_id="user", agent_name="agent", job_data={},
+                           priority=priority, metadata=metadata)
+
+        settings = Mock(llm_batch_enabled=True, llm_batch_scheduled_jobs=True)
+        with patch("config.environment.get_settings", return_value=settings):
+            assert JobPipeline._use_batch_lane(task(JobPriority.LOW))
+            assert JobPipeline._use_batch_lane(task(JobPriority.NORMAL, {"schedule_id": "s-1"}))
+            assert not JobPipeline._use_batch_lane(task(JobPriority.NORMAL))
+
+            settings.llm_batch_scheduled_jobs = False
+            assert not JobPipeline._use_batch_lane(task(JobPriority.NORMAL, {"schedule_id": "s-1"}))
+
+            settings.llm_batch_enabled = False
+            assert not JobPipeline._use_batch_lane(task(JobPriority.LOW))
+
+
+class TestParkedJobs:
+    """Test that jobs waiting for a batch do not hold a pipeline worker"""
+
+    @pytest.mark.asyncio
+    async def test_batch_job_frees_its_worker(self):
+        batch_ready = asyncio.Event()
+        service = Mock()
+        service.submit_batch = AsyncMock(return_value="batch-1")
+
+        async def get_batch_results(batch_id):
+            return [BatchResult(custom_id="request-1", text="batched")] if batch_ready.is_set() else None
+
+        service.get_batch_results = get_batch_results
+        lane = make_lane()
+
+        async def execute_job(job_id, job_data, user_id=None):
+            text = await lane.query("openai", service, None, "Prompt") if job_id == "low" else "interactive"
+            return AgentExecutionResult(success=True, result=text, execution_time=0.01)
+
+        agent = Mock()
+        agent.get_models.return_value = {"JobData": Mock}
+        agent.execute_job = execute_job
+        db_ops = AsyncMock()
+
+        with patch("job_pipeline.get_database_operations", return_value=db_ops), \
+             patch("job_pipeline.get_agent_registry", return_value=Mock()), \
+             patch("job_pipeline.get_registered_agents", return_value={"agent": agent}), \
+             patch("job_pipeline.validate_job_data", return_value={}), \
+             patch.object(JobPipeline, "_use_batch_lane", staticmethod(lambda job_task: job_task.priority <= JobPriority.LOW)):
+            pipeline = JobPipeline(max_concurrent_jobs=1)
+            await pipeline.start()
+            try:
+                await pipeline.submit_job("low", "user", "agent", {}, priority=JobPriority.LOW)
+                await pipeline.submit_job("high", "user", "agent", {}, priority=JobPriority.HIGH)
+
+                # The only worker runs the HIGH job while the LOW job waits for its batch
+                for _ in range(100):
+                    if pipeline.status_tracker.completed_jobs == 1 and service.submit_batch.await_count:
+                        break
+                    await asyncio.sleep(0.01)
+                assert pipeline.status_tracker.completed_jobs == 1
+                assert list(pipeline.parked_jobs) == ["low"]
+                assert pipeline.get_job_status("low")["llm_batches"][0]["batch_id"] == "batch-1"
+
+                batch_ready.set()
+                for _ in range(100):
+                    if pipeline.status_tracker.completed_jobs == 2:
+                        break
+                    await asyncio.sleep(0.01)
+            finally:
+                await pipeline.stop(timeout=2.0)
+
+        assert pipeline.status_tracker.completed_jobs == 2
+        assert pipeline.parked_jobs == {}
+        assert pipeline.get_job_status("low")["llm_batches"] == [
+            {"provider": "openai", "batch_id": "batch-1", "request_id": "request-1", "done": True}
+        ]
+        results = {call.kwargs["job_id"]: call.kwargs["result"] for call in db_ops.update_job_status.call_args_list
+                   if call.kwargs["status"] == "completed"}
+        assert results == {"high": "interactive", "low": "batched"}
@@ -0,0 +1,267 @@
+"""
+Unit tests for LLM provider circuit breakers
+
+Tests breaker state transitions, half-open probing, windowed error rates
+from ConnectionHealthTracker, and routing in UnifiedLLMService.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from services.circuit_breaker import (
+    CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError, CLOSED, OPEN, HALF_OPEN,
+    is_provider_failure
+)
+from services.llm_utils import ConnectionHealthTracker
+from services.llm_service import UnifiedLLMService
+from services.model_registry import ModelRegistry
+from services.rate_limiter import RateLimitTimeout
+from tests.conftest import FakeClock
+
+
+class TestHealthTrackerWindow:
+    """Test the sliding window statistics that drive breakers"""
+
+    def test_window_drops_old_outcomes(self):
+        """Test that outcomes older than the window are not counted"""
+        clock = FakeClock()
+        tracker = ConnectionHealthTracker("test", window_seconds=60, clock=clock)
+        tracker.record_request(success=False, response_time=1.0)
+        clock.now += 120
+        tracker.record_request(success=True, response_time=2.0)
+
+        window = tracker.get_window_stats(slow_call_seconds=1.5)
+        assert window["requests"] == 1
+        assert window["error_rate"] == 0.0
+        assert window["slow_calls"] == 1
+        assert tracker.get_health_status()["total_requests"] == 2
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions"""
+
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(
+            "openai", "gpt-4o", consecutive_failure_threshold=3, minimum_requests=4,
+            failure_rate_threshold=0.5, open_seconds=30, clock=self.clock
+        )
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that a run of errors opens the breaker and rejects calls"""
+        for _ in range(3):
+            assert self.breaker.allow_request()
+            self.breaker.record_failure("TimeoutError", 10.0)
+
+        assert self.breaker.state == OPEN
+        assert not self.breaker.allow_request()
+        assert self.breaker.get_state()["rejected_count"] == 1
+
+    def test_opens_on_error_rate(self):
+        """Test that interleaved failures trip on the windowed error rate"""
+        for success in (True, False, True, False):
+            self.breaker.allow_request()
+            if success:
+                self.breaker.record_success(0.5)
+            else:
+                self.breaker.record_failure("APIError", 0.5)
+
+        assert self.breaker.state == OPEN
+        assert "error rate" in self.breaker.last_trip_reason
+
+    def test_opens_on_slow_calls(self):
+        """Test that mostly slow successful calls also trip the breaker"""
+        breaker = CircuitBreaker("openai", minimum_requests=4, slow_call_seconds=5.0, clock=self.clock)
+        for _ in range(4):
+            breaker.record_success(20.0)
+
+        assert breaker.state == OPEN
+
+    def test_half_open_probe_closes(self):
+        """Test that after the cool-down one probe is allowed and success closes the breaker"""
+        for _ in range(3):
+            self.breaker.record_failure("TimeoutError")
+        self.clock.now += 31
+
+        assert self.breaker.is_available()
+        assert self.breaker.allow_request()
+        assert self.breaker.state == HALF_OPEN
+        assert not self.breaker.allow_request()
+
+        self.breaker.record_success(0.2)
+        assert self.breaker.state == CLOSED
+        assert self.breaker.allow_request()
+
+    def test_failed_probe_reopens_with_backoff(self):
+        """Test that a failed probe re-opens the breaker for longer"""
+        for _ in range(3):
+            self.breaker.record_failure("TimeoutError")
+        self.clock.now += 31
+        self.breaker.allow_request()
+        self.breaker.record_failure("TimeoutError")
+
+        assert self.breaker.state == OPEN
+        self.clock.now += 31
+        assert not self.breaker.is_available()
+        self.clock.now += 30
+        assert self.breaker.is_available()
+
+
+class TestCircuitBreakerRegistry:
+    """Test how breakers are keyed"""
+
+    def setup_method(self):
+        self.breakers = CircuitBreakerRegistry()
+        self.models = ModelRegistry(remote_refresh=False)
+        self.models.register("openai", lambda: ["gpt-4o", "gpt-4o-mini"])
+
+    def patched(self):
+        return (
+            patch('services.llm_utils.get_model_registry', return_value=self.models),
+            patch('services.llm_utils.get_default_model', return_value="gpt-4o-mini"),
+        )
+
+    def test_breakers_keyed_by_canonical_model(self):
+        """Test that the default model, its explicit name and other casings share a breaker"""
+        p1, p2 = self.patched()
+        with p1, p2:
+            breaker = self.breakers.get("openai", None)
+            assert self.breakers.get("openai", "gpt-4o-mini") is breaker
+            assert self.breakers.get("openai", "GPT-4o-Mini") is breaker
+            assert self.breakers.get("openai", "gpt-4o") is not breaker
+            assert self.breakers.find("openai", "GPT-4O") is self.breakers.get("openai", "gpt-4o")
+
+        assert breaker.model == "gpt-4o-mini"
+
+    def test_unknown_models_share_default_breaker(self):
+        """Test that misspelled models do not create new breakers (services fall back to the default)"""
+        p1, p2 = self.patched()
+        with p1, p2:
+            for model in ("gpt-4o-mni", "gtp-4o", "made-up"):
+                self.breakers.get("openai", model)
+
+        assert list(self.breakers.get_provider_states("openai")) == ["gpt-4o-mini"]
+
+
+class TestProviderFailures:
+    """Test which errors count against a breaker"""
+
+    @staticmethod
+    def wrapped(error):
+        # Services re-raise provider errors as RuntimeError inside their except blocks
+        try:
+            raise error
+        except Exception:
+            try:
+                raise RuntimeError("LLM query failed")
+            except RuntimeError as wrapper:
+                return wrapper
+
+    def test_provider_errors_count(self):
+        """Test that transport errors, timeouts, 5xx and 429 responses are failures"""
+        server_error = Exception("Bad gateway")
+        server_error.status_code = 502
+        rate_limited = Exception("Too many requests")
+        rate_limited.status_code = 429
+
+        for error in (ConnectionError("reset"), TimeoutError(), server_error, rate_limited):
+            assert is_provider_failure(self.wrapped(error))
+
+    def test_caller_errors_do_not_count(self):
+        """Test that our own limiter and bad requests are not provider failures"""
+        bad_request = Exception("Bad request")
+        bad_request.status_code = 400
+
+        for error in (RateLimitTimeout("wait exceeded"), ValueError("Invalid model"), bad_request):
+            assert not is_provider_failure(self.wrapped(error))
+
+
+class TestUnifiedServiceRouting:
+    """Test circuit breaker routing in UnifiedLLMService"""
+
+    def setup_method(self):
+        self.service = UnifiedLLMService()
+        self.breakers = CircuitBreakerRegistry(consecutive_failure_threshold=2)
+        self.failing = AsyncMock()
+        self.failing.query.side_effect = ConnectionError("Service unavailable")
+        self.fallback = AsyncMock()
+        self.fallback.query.return_value = "Fallback response"
+
+    def patched(self):
+        return (
+            patch.object(self.service, '_get_openai_service', return_value=self.failing),
+            patch.object(self.service, 'get_available_providers', return_value=["openai", "google"]),
+            patch.object(self.service, '_get_google_service', return_value=self.fallback),
+            patch('services.llm_service.get_circuit_breakers', return_value=self.breakers),
+        )
+
+    @pytest.mark.asyncio
+    async def test_open_breaker_routes_to_fallback(self):
+        """Test that once a provider trips, requests skip it without waiting"""
+        p1, p2, p3, p4 = self.patched()
+        with p1, p2, p3, p4:
+            for _ in range(2):
+                with pytest.raises(Exception):
+                    await self.service.query("Prompt", provider="openai", model="gpt-4o")
+
+            result = await self.service.query("Prompt", provider="openai", model="gpt-4o")
+
+        assert result == "Fallback response"
+        assert self.failing.query.call_count == 2
+        assert self.fallback.query.call_args[1]["model"] is None
+        assert self.breakers.get("openai", "gpt-4o").state == OPEN
+
+    @pytest.mark.asyncio
+    async def test_breakers_scoped_per_model(self):
+        """Test that a tripped model does not block other models of the provider"""
+        p1, p2, p3, p4 = self.patched()
+        with p1, p2, p3, p4:
+            for _ in range(2):
+                with pytest.raises(Exception):
+                    await self.service.query("Prompt", provider="openai", model="gpt-4o")
+            with pytest.raises(Exception):
+                await self.service.query("Prompt", provider="openai", model="gpt-4o-mini")
+
+        assert self.failing.query.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_caller_errors_do_not_trip(self):
+        """Test that limiter waits and invalid requests release the breaker without a failure"""
+        self.failing.query.side_effect = RateLimitTimeout("Rate limiter wait exceeded")
+        p1, p2, p3, p4 = self.patched()
+        with p1, p2, p3, p4:
+            for _ in range(3):
+                with pytest.raises(RateLimitTimeout):
+                    await self.service.query("Prompt", provider="openai", model="gpt-4o")
+            self.failing.query.side_effect = ValueError("Invalid model")
+            with pytest.raises(ValueError):
+                await self.service.query("Prompt", provider="openai", model="gpt-4o")
+
+        breaker = self.breakers.get("openai", "gpt-4o")
+        assert breaker.state == CLOSED
+        assert breaker.tracker.consecutive_errors == 0
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_probe_in_flight(self):
+        """Test that a half-open breaker with its probe taken raises CircuitOpenError"""
+        breaker = self.breakers.get("openai", None)
+        breaker._transition(HALF_OPEN)
+        breaker._half_open_in_flight = breaker.half_open_max_calls
+
+        with patch('services.llm_service.get_circuit_breakers', return_value=self.breakers):
+            with pytest.raises(CircuitOpenError):
+                await self.service._guarded_call("openai", None, AsyncMock())
+
+    def test_breaker_state_in_health_status(self):
+        """Test that breaker state is exposed per provider"""
+        self.breakers.get("openai", "gpt-4o")._trip("test")
+
+        with patch('services.llm_service.get_circuit_breakers', return_value=self.breakers), \
+             patch.object(self.service, 'get_service_health', return_value={
+                 "healthy_services": [], "failed_services": [], "service_details": {}
+             }):
+            health = self.service.get_connection_health_status()
+
+        assert health["services"]["openai"]["circuit_breakers"]["gpt-4o"]["state"] == OPEN
+        assert health["open_circuits"] == 1
+        assert health["overall_status"] == "degraded"
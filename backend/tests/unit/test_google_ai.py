@@ -4,7 +4,10 @@ Tests the Google AI configuration module functionality including authentication
 model management, and environment validation.
 """
 
+import asyncio
 import unittest
+import pytest
+from types import SimpleNamespace
 from unittest.mock import Mock, patch, MagicMock
 import os
 from typing import Dict, Any, Optional
@@ -17,6 +20,8 @@ from config.google_ai import (
     get_generative_model,
     get_environment_info
 )
+from services.google_ai_service import GoogleAIService
+from services.llm_utils import ConnectionHealthTracker
 
 class TestGoogleAIConfig(unittest.TestCase):
     """Test cases for GoogleAIConfig class functionality"""
@@ -322,5 +327,88 @@ class TestGoogleAIEnvironmentValidation(unittest.TestCase):
         self.assertFalse(result['valid'])
         self.assertIn('Google AI configuration validation failed', result['errors'][0])
 
+class StubGenerativeModel:
+    """Local stand-in for a Gemini model that answers after a fixed latency"""
+    
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.prompts = []
+    
+    async def generate_content_async(self, contents, generation_config=None, stream=False):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        self.prompts.append(contents)
+        return SimpleNamespace(text=f"echo: {contents}")
+    
+    def generate_content(self, *args, **kwargs):
+        raise AssertionError("query must not use the blocking generate_content")
+
+
+class TestGoogleAIServiceAsync:
+    """Test native async Gemini calls and GenerativeModel caching"""
+    
+    def make_service(self, stub: StubGenerativeModel):
+        config = Mock(default_model='gemini-2.0-flash')
+        config.get_generative_model.return_value = stub
+        with patch('services.google_ai_service.get_google_ai_config', return_value=config):
+            return GoogleAIService(), config
+    
+    @pytest.mark.asyncio
+    async def test_models_cached_per_model_and_system_instruction(self):
+        """Test that GenerativeModel instances are reused per model and system instruction"""
+        service, config = self.make_service(StubGenerativeModel(latency=0))
+        
+        await service.query('Hi', system_instruction='Be brief')
+        await service.query('Hello', system_instruction='Be brief')
+        await service.query('Hi', system_instruction='Be verbose')
+        await service.query('Hi', model='gemini-1.5-pro')
+        
+        assert config.get_generative_model.call_count == 3
+        config.get_generative_model.assert_any_call('gemini-2.0-flash', system_instruction='Be brief')
+        assert service.get_info()['cached_models'] == ['gemini-1.5-pro', 'gemini-2.0-flash']
+    
+    @pytest.mark.asyncio
+    async def test_system_instruction_inlined_for_legacy_models(self):
+        """Test that models without system instruction support get it in the prompt"""
+        stub = StubGenerativeModel(latency=0)
+        service, config = self.make_service(stub)
+        
+        await service.query('Hi', model='gemini-1.0-pro', system_instruction='Be brief')
+        
+        config.get_generative_model.assert_called_once_with('gemini-1.0-pro', system_instruction=None)
+        assert stub.prompts == ['System: Be brief\n\nUser: Hi']
+    
+    @pytest.mark.asyncio
+    async def test_query_feeds_provider_health_tracker(self):
+        """Test that non-streamed queries record latency on the Google AI health tracker"""
+        service, _ = self.make_service(StubGenerativeModel(latency=0))
+        tracker = ConnectionHealthTracker("Google AI")
+        
+        with patch('services.llm_utils.get_health_tracker', return_value=tracker):
+            await service.query('Hi')
+        
+        assert tracker.total_requests == 1
+        assert tracker.ewma_response_time is not None
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_benchmark(self):
+        """Test concurrent queries against a local stub: none should wait for an executor thread"""
+        requests, latency = 200, 0.05
+        stub = StubGenerativeModel(latency=latency)
+        service, _ = self.make_service(stub)
+        
+        responses = await asyncio.gather(*(service.query(f'prompt {i}') for i in range(requests)))
+        
+        assert len(responses) == requests
+        # Thread offloading capped in-flight calls at the default executor size (min(32, cpus + 4))
+        assert stub.peak_in_flight == requests
+
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Unit tests for hedged LLM requests
+
+Tests the hedge budget, delay selection, the primary/hedge race, and
+hedging in UnifiedLLMService.query.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from services.hedging import HedgeBudget, hedge_delay, race_with_hedge, HEDGED_REQUESTS
+from services.llm_service import UnifiedLLMService
+
+
+def delayed(value, seconds, error=None):
+    """Build a call that answers (or fails) after a delay, recording cancellation"""
+    state = {"cancelled": False}
+
+    async def call():
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+        if error:
+            raise error
+        return value
+
+    return call, state
+
+
+class TestHedgeBudget:
+    """Test the hedge budget"""
+
+    def test_budget_caps_hedge_rate(self):
+        """Test that hedges stay within the configured fraction of requests"""
+        budget = HedgeBudget(ratio=0.05, initial_balance=0)
+        granted = 0
+        for _ in range(200):
+            budget.record_primary()
+            granted += budget.try_acquire()
+
+        assert granted == 10
+        assert budget.get_stats()["hedge_rate_percent"] == 5.0
+
+    def test_delay_uses_p95_after_warmup(self):
+        """Test that the tracked p95 is used once enough samples exist"""
+        assert hedge_delay({"requests": 5, "p95_response_time_seconds": 2.0}, min_samples=20) == 10.0
+        assert hedge_delay({"requests": 50, "p95_response_time_seconds": 2.0}, min_samples=20) == 2.0
+        assert hedge_delay({"requests": 50, "p95_response_time_seconds": 0.1}, min_delay=0.5) == 0.5
+
+
+class TestRaceWithHedge:
+    """Test the primary/hedge race"""
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_not_hedged(self):
+        """Test that a primary answering before the delay sends no hedge"""
+        primary, _ = delayed("primary", 0)
+        hedge = AsyncMock(return_value="hedge")
+        budget = HedgeBudget()
+
+        assert await race_with_hedge(primary, hedge, 0.5, budget) == "primary"
+        hedge.assert_not_called()
+        assert budget.hedged_requests == 0
+
+    @pytest.mark.asyncio
+    async def test_hedge_wins_and_primary_cancelled(self):
+        """Test that a straggling primary is cancelled when the hedge answers first"""
+        primary, primary_state = delayed("primary", 5)
+        hedge, _ = delayed("hedge", 0.01)
+        before = HEDGED_REQUESTS.get(provider="test", result="hedge_won")
+
+        result = await race_with_hedge(primary, hedge, 0.02, HedgeBudget(), provider="test")
+
+        assert result == "hedge"
+        assert primary_state["cancelled"] is True
+        assert HEDGED_REQUESTS.get(provider="test", result="hedge_won") == before + 1
+
+    @pytest.mark.asyncio
+    async def test_failed_hedge_falls_back_to_primary(self):
+        """Test that a failing hedge does not fail the request"""
+        primary, _ = delayed("primary", 0.05)
+        hedge, _ = delayed(None, 0, error=RuntimeError("hedge failed"))
+
+        assert await race_with_hedge(primary, hedge, 0.01, HedgeBudget()) == "primary"
+
+    @pytest.mark.asyncio
+    async def test_budget_exhausted_waits_for_primary(self):
+        """Test that no hedge is sent once the budget is spent"""
+        primary, _ = delayed("primary", 0.05)
+        hedge = AsyncMock(return_value="hedge")
+
+        result = await race_with_hedge(primary, hedge, 0.01, HedgeBudget(initial_balance=0))
+
+        assert result == "primary"
+        hedge.assert_not_called()
+
+
+class TestUnifiedServiceHedging:
+    """Test hedging in UnifiedLLMService.query"""
+
+    @pytest.mark.asyncio
+    async def test_query_hedges_to_secondary_provider(self):
+        """Test that a slow primary provider is raced against the hedge provider"""
+        service = UnifiedLLMService()
+
+        async def slow_query(**kwargs):
+            await asyncio.sleep(5)
+            return "Slow response"
+
+        primary = AsyncMock()
+        primary.query.side_effect = slow_query
+        secondary = AsyncMock()
+        secondary.query.return_value = "Hedged response"
+
+        with patch.object(service, '_get_openai_service', return_value=primary), \
+             patch.object(service, '_get_anthropic_service', return_value=secondary), \
+             patch('services.llm_service.get_hedge_budget', return_value=HedgeBudget()), \
+             patch('services.llm_service.hedge_delay', return_value=0.01):
+            result = await service.query(
+                "Prompt", provider="openai", model="gpt-4o",
+                hedge=True, hedge_provider="anthropic"
+            )
+
+        assert result == "Hedged response"
+        assert secondary.query.call_args[1]["model"] is None
+        assert "hedge" not in primary.query.call_args[1]
@@ -0,0 +1,127 @@
+"""
+Unit tests for the shared LLM HTTP transport
+
+Tests connection reuse statistics, per-host concurrency limits and warm-up
+against a local keep-alive HTTP server, and that OpenAI-compatible services
+share the pooled client.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import Mock, patch
+
+from services.http_transport import LLMHttpTransport, get_llm_http_client
+
+
+class LocalServer:
+    """Minimal HTTP/1.1 keep-alive server answering every request after a delay"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.connections = 0
+        self._server = None
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                request = await reader.readuntil(b"\r\n\r\n")
+                if not request:
+                    break
+                await asyncio.sleep(self.delay)
+                body = b"{}" if not request.startswith(b"HEAD") else b""
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: 2\r\nConnection: keep-alive\r\n\r\n" + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._server.close()
+
+
+class TestLLMHttpTransport:
+    """Test the pooled transport"""
+
+    @pytest.mark.asyncio
+    async def test_sequential_requests_reuse_connection(self):
+        """Test that keep-alive connections are reused and reported"""
+        transport = LLMHttpTransport(http2=False)
+        async with LocalServer() as server:
+            for _ in range(5):
+                response = await transport.client.post(f"{server.url}/v1/chat/completions", json={})
+                assert response.status_code == 200
+            await transport.aclose()
+
+        stats = transport.get_stats()["hosts"]["127.0.0.1"]
+        assert server.connections == 1
+        assert stats["requests"] == 5
+        assert stats["new_connections"] == 1
+        assert stats["reused_connections"] == 4
+        assert stats["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_per_host_limit(self):
+        """Test that concurrent requests to one host are capped"""
+        transport = LLMHttpTransport(http2=False, max_connections_per_host=2)
+        async with LocalServer(delay=0.05) as server:
+            await asyncio.gather(*(transport.client.get(f"{server.url}/v1/models") for _ in range(6)))
+            await transport.aclose()
+
+        stats = transport.get_stats()["hosts"]["127.0.0.1"]
+        assert stats["requests"] == 6
+        assert stats["peak_in_flight"] == 2
+        assert stats["queued_for_slot"] > 0
+        assert server.connections == 2
+
+    @pytest.mark.asyncio
+    async def test_warm_up_opens_pooled_connection(self):
+        """Test that warm-up leaves a connection the first real request reuses"""
+        transport = LLMHttpTransport(http2=False)
+        async with LocalServer() as server:
+            result = await transport.warm_up([f"{server.url}/v1"])
+            await transport.client.get(f"{server.url}/v1/models")
+            await transport.aclose()
+
+        assert result == {"127.0.0.1": True}
+        assert server.connections == 1
+        assert transport.get_stats()["hosts"]["127.0.0.1"]["reused_connections"] == 1
+
+    @pytest.mark.asyncio
+    async def test_warm_up_tolerates_unreachable_host(self):
+        """Test that a failed warm-up is reported rather than raised"""
+        transport = LLMHttpTransport(http2=False, connect_timeout=0.5)
+        result = await transport.warm_up(["http://127.0.0.1:9/v1"], timeout=0.5)
+        await transport.aclose()
+
+        assert result == {"127.0.0.1": False}
+        assert transport.get_stats()["hosts"]["127.0.0.1"]["errors"] == 1
+
+
+class TestSharedClient:
+    """Test that OpenAI-compatible services use the shared client"""
+
+    @pytest.mark.parametrize("module, service_class, config_getter", [
+        ("services.openai_service", "OpenAIService", "get_openai_config"),
+        ("services.grok_service", "GrokService", "get_grok_config"),
+        ("services.deepseek_service", "DeepSeekService", "get_deepseek_config"),
+        ("services.llama_service", "LlamaService", "get_llama_config"),
+    ])
+    def test_services_share_http_client(self, module, service_class, config_getter):
+        """Test that each provider client is built on the pooled httpx client"""
+        service_module = __import__(module, fromlist=[service_class])
+        with patch(f"{module}.{config_getter}", return_value=Mock()), \
+             patch(f"{module}.openai.AsyncOpenAI") as mock_client:
+            getattr(service_module, service_class)()
+
+        assert mock_client.call_args[1]["http_client"] is get_llm_http_client()
@@ -11,6 +11,8 @@ from fastapi.testclient import TestClient
 from fastapi import FastAPI
 
 from routes.jobs.monitoring import router
+from job_pipeline import JobPipeline
+from job_progress import JobProgressRegistry
 from models import ApiResponse
 from auth import get_current_user
 
@@ -261,6 +263,62 @@ class TestJobLogsEndpoint:
                 assert log["level"] == "INFO"
 
 
+class TestJobProgressEndpoint:
+    """Test streamed job progress endpoint."""
+
+    def test_get_job_progress_incremental_reads(self, client, mock_user, mock_job):
+        """Test that passing back the offset returns only new output."""
+        pipeline = JobPipeline.__new__(JobPipeline)
+        pipeline.progress = JobProgressRegistry()
+        buffer = pipeline.progress.create("job123")
+        buffer.append("Hello")
+        
+        with patch('routes.jobs.monitoring.get_database_operations') as mock_db, \
+             patch('routes.jobs.monitoring.get_job_pipeline', return_value=pipeline):
+            mock_db_ops = AsyncMock()
+            mock_db_ops.get_job.return_value = {**mock_job, "status": "running"}
+            mock_db.return_value = mock_db_ops
+            
+            first = client.get("/jobs/job123/progress").json()
+            buffer.append(" world")
+            second = client.get(f"/jobs/job123/progress?offset={first['result']['offset']}").json()
+            
+            assert first["success"] is True
+            assert first["result"]["text"] == "Hello"
+            assert first["result"]["status"] == "running"
+            assert second["result"]["text"] == " world"
+            assert second["result"]["done"] is False
+
+    def test_get_job_progress_without_buffer(self, client, mock_user, mock_job):
+        """Test progress for a finished job with no buffered output."""
+        pipeline = JobPipeline.__new__(JobPipeline)
+        pipeline.progress = JobProgressRegistry()
+        
+        with patch('routes.jobs.monitoring.get_database_operations') as mock_db, \
+             patch('routes.jobs.monitoring.get_job_pipeline', return_value=pipeline):
+            mock_db_ops = AsyncMock()
+            mock_db_ops.get_job.return_value = mock_job
+            mock_db.return_value = mock_db_ops
+            
+            data = client.get("/jobs/job123/progress").json()
+            
+            assert data["success"] is True
+            assert data["result"]["text"] == ""
+            assert data["result"]["done"] is True
+
+    def test_get_job_progress_job_not_found(self, client, mock_user):
+        """Test that progress is not exposed for jobs the user cannot access."""
+        with patch('routes.jobs.monitoring.get_database_operations') as mock_db:
+            mock_db_ops = AsyncMock()
+            mock_db_ops.get_job.return_value = None
+            mock_db.return_value = mock_db_ops
+            
+            data = client.get("/jobs/other-job/progress").json()
+            
+            assert data["success"] is False
+            assert data["metadata"]["error_code"] == "JOB_NOT_FOUND"
+
+
 class TestJobAnalyticsEndpoint:
     """Test job analytics summary endpoint."""
 
@@ -18,8 +18,10 @@ from unittest.mock import Mock, AsyncMock, patch, MagicMock
 
 from job_pipeline import (
     JobPipeline, JobTask, JobExecutionStatus, JobPriority,
+    JobMetricsBuffer, SlidingWindowCounter,
     get_job_pipeline, start_job_pipeline, stop_job_pipeline
 )
+from job_progress import JobProgressBuffer, JobProgressRegistry, bind_job_progress, get_job_progress
 from models import JobStatus
 from agent import AgentExecutionResult
 
@@ -229,6 +231,100 @@ class TestJobExecutionStatus:
         assert metrics['total_processed'] == 2
         assert metrics['success_rate'] == 50.0
 
+    
+    def test_metrics_buffer_is_bounded(self):
+        """Test that the oldest job metrics are evicted once capacity is reached"""
+        status = JobExecutionStatus(metrics_capacity=3)
+        
+        for i in range(5):
+            status.start_job(f'job-{i}')
+            status.complete_job(f'job-{i}', success=True, execution_time=0.1)
+        
+        assert len(status.job_metrics) == 3
+        assert 'job-0' not in status.job_metrics
+        assert 'job-1' not in status.job_metrics
+        assert status.job_metrics['job-4']['status'] == JobStatus.completed
+        assert status.get_metrics()['tracked_jobs'] == 3
+    
+    def test_restart_keeps_retry_count(self):
+        """Test that re-running a retried job reuses its record"""
+        buffer = JobMetricsBuffer(capacity=2)
+        record = buffer.add('job-1')
+        record.retries = 1
+        
+        buffer.add('job-1')
+        
+        assert len(buffer) == 1
+        assert buffer['job-1']['retries'] == 1
+        assert buffer.get('missing') is None
+    
+    def test_sliding_window_rates(self):
+        """Test that rates only count events inside each window"""
+        clock = [1000.0]
+        counter = SlidingWindowCounter(horizon_seconds=900, clock=lambda: clock[0])
+        
+        counter.add('completed', 3)
+        clock[0] += 120
+        counter.add('completed')
+        counter.add('failed')
+        
+        assert counter.total('completed', 60) == 1
+        assert counter.total('completed', 300) == 4
+        assert counter.total('failed', 900) == 1
+        
+        # Events age out once the horizon wraps around
+        clock[0] += 900
+        assert counter.total('completed', 900) == 0
+    
+    def test_metrics_include_window_rates(self):
+        """Test that metrics expose 1m/5m/15m rates"""
+        status = JobExecutionStatus()
+        status.start_job('job-1')
+        status.complete_job('job-1', success=True, execution_time=1.0)
+        status.start_job('job-2')
+        status.complete_job('job-2', success=False, execution_time=1.0)
+        
+        metrics = status.get_metrics()
+        
+        assert set(metrics['rates']) == {'1m', '5m', '15m'}
+        assert metrics['rates']['1m']['jobs_per_minute'] == 2.0
+        assert metrics['rates']['5m']['success_rate'] == 50.0
+        assert metrics['jobs_per_minute'] == 2.0
+
+class TestJobProgress:
+    """Test streamed partial output buffers"""
+    
+    def test_buffer_keeps_tail_and_reports_truncation(self):
+        """Test that overflow drops the oldest text but keeps absolute offsets"""
+        buffer = JobProgressBuffer('job-1', max_chars=8)
+        buffer.append('Hello ')
+        buffer.append('world')
+        
+        read = buffer.read(0)
+        assert read['text'] == 'lo world'
+        assert read['truncated'] is True
+        assert read['offset'] == 11
+        assert buffer.read(9)['text'] == 'ld'
+        assert buffer.read(11)['text'] == ''
+    
+    def test_registry_bounded(self):
+        """Test that the oldest job's buffer is evicted"""
+        registry = JobProgressRegistry(capacity=2)
+        for job_id in ('a', 'b', 'c'):
+            registry.create(job_id)
+        
+        assert len(registry) == 2
+        assert registry.get('a') is None
+    
+    def test_binding_is_scoped(self):
+        """Test that the buffer is bound only inside the block and closed on exit"""
+        buffer = JobProgressBuffer('job-1')
+        with bind_job_progress(buffer):
+            assert get_job_progress() is buffer
+        
+        assert get_job_progress() is None
+        assert buffer.read()['done'] is True
+
 
 class TestJobPipeline:
     """Test JobPipeline functionality"""
@@ -282,7 +378,8 @@ class TestJobPipeline:
             status=JobStatus.failed.value,
             result=None,
             error_message='Unknown agent: unknown_agent',
-            result_format=None
+            result_format=None,
+            usage=None
         )
     
     @pytest.mark.asyncio
@@ -388,7 +485,8 @@ class TestJobPipeline:
             status=JobStatus.failed.value,
             result=None,
             error_message="Permanent failure",
-            result_format=None
+            result_format=None,
+            usage=None
         )
     
     @pytest.mark.asyncio
@@ -553,5 +651,175 @@ class TestPerformanceMetrics:
         await asyncio.sleep(0.1)
 
 
+class TestJobCancellation:
+    """Test cancelling scheduled, queued and running jobs"""
+    
+    @pytest.mark.asyncio
+    async def test_cancel_running_job(self, job_pipeline, mock_agent, mock_db_ops):
+        """Test that cancelling a running job stops it and frees the worker"""
+        started = asyncio.Event()
+        
+        async def slow_logic(job_data):
+            started.set()
+            await asyncio.sleep(10)
+            return AgentExecutionResult(success=True, result='{}')
+        
+        mock_agent._execute_job_logic.side_effect = slow_logic
+        await job_pipeline.start()
+        await job_pipeline.submit_job('job-1', 'user-1', 'test_agent', {'text': 'test'})
+        await asyncio.wait_for(started.wait(), timeout=2.0)
+        
+        result = await job_pipeline.cancel_job('job-1')
+        
+        assert result['state'] == 'running'
+        assert result['stopped'] is True
+        assert result['latency_ms'] < 1000
+        assert 'job-1' not in job_pipeline.active_tasks
+        assert job_pipeline.cancel_requests == {}
+        
+        metrics = job_pipeline.status_tracker.get_metrics()
+        assert metrics['cancelled_jobs'] == 1
+        assert metrics['failed_jobs'] == 0
+        statuses = [call.kwargs['status'] for call in mock_db_ops.update_job_status.call_args_list]
+        assert JobStatus.failed.value not in statuses
+        
+        # The worker picks up the next job
+        mock_agent._execute_job_logic.side_effect = None
+        await job_pipeline.submit_job('job-2', 'user-1', 'test_agent', {'text': 'test'})
+        for _ in range(50):
+            if job_pipeline.status_tracker.completed_jobs:
+                break
+            await asyncio.sleep(0.02)
+        assert job_pipeline.status_tracker.completed_jobs == 1
+    
+    @pytest.mark.asyncio
+    async def test_cancel_queued_job(self, job_pipeline, mock_agent):
+        """Test that a job cancelled while queued never runs"""
+        await job_pipeline.submit_job('job-1', 'user-1', 'test_agent', {'text': 'test'})
+        
+        result = await job_pipeline.cancel_job('job-1')
+        await job_pipeline.start()
+        for _ in range(50):
+            if job_pipeline.job_queue.empty():
+                break
+            await asyncio.sleep(0.02)
+        await asyncio.sleep(0.05)
+        
+        assert result['state'] == 'queued'
+        assert result['stopped'] is True
+        mock_agent._execute_job_logic.assert_not_called()
+        assert job_pipeline.queued_jobs == {}
+        assert job_pipeline.cancel_requests == {}
+        assert job_pipeline.status_tracker.cancelled_jobs == 1
+    
+    @pytest.mark.asyncio
+    async def test_cancel_scheduled_job(self, job_pipeline):
+        """Test that a scheduled job is removed from the schedule"""
+        scheduled_at = datetime.now(timezone.utc) + timedelta(hours=1)
+        await job_pipeline.submit_job('job-1', 'user-1', 'test_agent', {'text': 'test'}, scheduled_at=scheduled_at)
+        
+        result = await job_pipeline.cancel_job('job-1')
+        
+        assert result['state'] == 'scheduled'
+        assert job_pipeline.scheduled_jobs == []
+    
+    @pytest.mark.asyncio
+    async def test_cancel_unknown_job(self, job_pipeline):
+        """Test cancelling a job the pipeline does not hold"""
+        result = await job_pipeline.cancel_job('missing')
+        
+        assert result == {'job_id': 'missing', 'state': 'not_found', 'stopped': False, 'latency_ms': None}
+        assert job_pipeline.status_tracker.cancelled_jobs == 0
+
+
+class TestJobTimeouts:
+    """Test enforcing agent execution timeouts"""
+    
+    @pytest.fixture
+    def hanging_agent(self, mock_agent):
+        async def hang(job_data):
+            await asyncio.sleep(10)
+            return AgentExecutionResult(success=True, result='{}')
+        
+        mock_agent._execute_job_logic.side_effect = hang
+        return mock_agent
+    
+    @pytest.mark.asyncio
+    async def test_timed_out_job_fails_without_retries(self, job_pipeline, hanging_agent, mock_db_ops):
+        """Test that a hung job is stopped and fails once retries are exhausted"""
+        job_pipeline.job_timeout = 0.05
+        job_task = JobTask(job_id='job-1', user_id='user-1', agent_name='test_agent',
+                           job_data={'text': 'test'}, max_retries=0)
+        
+        outcome = await asyncio.wait_for(job_pipeline._run_job_task(job_task, 'worker-0'), timeout=2.0)
+        
+        assert outcome == 'failed'
+        last_call = mock_db_ops.update_job_status.call_args
+        assert last_call.kwargs['status'] == JobStatus.failed.value
+        assert 'timed out after 0.05s' in last_call.kwargs['error_message']
+        
+        metrics = job_pipeline.get_metrics()
+        assert metrics['timed_out_jobs'] == 1
+        assert metrics['timeouts_by_agent'] == {'test_agent': 1}
+    
+    @pytest.mark.asyncio
+    async def test_timed_out_job_is_retried(self, job_pipeline, hanging_agent):
+        """Test that a timeout counts as a retryable failure"""
+        job_pipeline.job_timeout = 0.05
+        job_task = JobTask(job_id='job-1', user_id='user-1', agent_name='test_agent',
+                           job_data={'text': 'test'}, max_retries=1)
+        
+        outcome = await job_pipeline._run_job_task(job_task, 'worker-0')
+        
+        assert outcome == 'retried'
+        assert job_pipeline.scheduled_jobs == [job_task]
+        assert job_pipeline.status_tracker.timeouts_by_agent == {'test_agent': 1}
+    
+    @pytest.mark.asyncio
+    async def test_batch_lane_job_timeout_is_not_retried(self, job_pipeline, mock_agent):
+        """Test that batch-lane jobs get the batch timeout and are not retried while their batch runs"""
+        from services.batch_lane import BatchLane
+        
+        lane = BatchLane(max_wait_seconds=0.01, poll_interval_seconds=0.01, timeout_seconds=10)
+        service = Mock()
+        service.submit_batch = AsyncMock(return_value='batch-1')
+        service.get_batch_results = AsyncMock(return_value=None)
+        service.cancel_batch = AsyncMock()
+        
+        async def batched_logic(job_data):
+            await lane.query('openai', service, None, 'Prompt')
+        
+        mock_agent._execute_job_logic.side_effect = batched_logic
+        job_pipeline.job_timeout = 0.05
+        job_task = JobTask(job_id='job-1', user_id='user-1', agent_name='test_agent',
+                           job_data={'text': 'test'}, priority=JobPriority.LOW, max_retries=3)
+        
+        with patch.object(JobPipeline, '_use_batch_lane', staticmethod(lambda job_task: True)), \
+             patch('job_pipeline.get_batch_lane', return_value=lane):
+            assert job_pipeline._execution_timeout(mock_agent, use_batch_lane=True) == pytest.approx(10.06)
+            # Time out while the job is parked, long before the lane's own deadline
+            with patch.object(JobPipeline, '_execution_timeout', lambda self, agent, use_batch_lane=False: 0.1):
+                outcome = await job_pipeline._run_job_task(job_task, 'worker-0')
+        
+        assert outcome == 'failed'
+        assert job_pipeline.scheduled_jobs == []
+        assert service.submit_batch.await_count == 1
+        assert job_pipeline.status_tracker.timeouts_by_agent == {'test_agent': 1}
+        
+        # The abandoned provider batch is cancelled
+        await asyncio.sleep(0.05)
+        service.cancel_batch.assert_awaited_once_with('batch-1')
+    
+    def test_timeout_comes_from_agent_config(self, job_pipeline, mock_agent):
+        """Test that agents' configured timeout_seconds override the pipeline default"""
+        from config.agent import AgentConfig
+        
+        assert job_pipeline._execution_timeout(mock_agent) == job_pipeline.job_timeout
+        
+        mock_agent.agent_config = AgentConfig(name='test_agent')
+        mock_agent.agent_config.execution.timeout_seconds = 42
+        assert job_pipeline._execution_timeout(mock_agent) == 42
+
+
 if __name__ == '__main__':
     pytest.main([__file__]) 
\ No newline at end of file
@@ -0,0 +1,277 @@
+"""
+Unit tests for the LLM response cache
+
+Tests the memory and disk tiers, TTL and size eviction, temperature bypass,
+near-duplicate lookup, and caching in UnifiedLLMService.
+"""
+
+import time
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from services.llm_cache import (
+    LLMResponseCache, SimilarityIndex, llm_cache_policy, get_cache_policy,
+    normalize_prompt, simhash
+)
+from services.llm_service import UnifiedLLMService
+
+
+class TestCachePolicy:
+    """Test context-scoped cache policies"""
+
+    def test_no_policy_by_default(self):
+        """Test that caching is off outside a policy block"""
+        cache = LLMResponseCache()
+
+        assert get_cache_policy() is None
+        assert cache.resolve_policy(temperature=0.0) is None
+
+    def test_policy_scoped_to_block(self):
+        """Test that the policy applies only inside the block"""
+        cache = LLMResponseCache()
+
+        with llm_cache_policy(enabled=True, ttl_seconds=60):
+            assert cache.resolve_policy(temperature=0.2).ttl_seconds == 60
+        with llm_cache_policy(enabled=False):
+            assert cache.resolve_policy(temperature=0.2) is None
+
+        assert get_cache_policy() is None
+
+    def test_high_temperature_bypasses(self):
+        """Test that non-deterministic requests bypass the cache"""
+        cache = LLMResponseCache(max_temperature=0.3)
+
+        with llm_cache_policy():
+            assert cache.resolve_policy(temperature=0.9) is None
+            assert cache.resolve_policy(temperature=0.2) is not None
+
+        assert cache.get_stats()["bypass"] == 1
+
+    def test_unset_temperature_bypasses(self):
+        """Test that requests using the provider's default temperature are not cached"""
+        cache = LLMResponseCache(max_temperature=0.3)
+
+        with llm_cache_policy():
+            assert cache.resolve_policy(temperature=None) is None
+
+        assert cache.get_stats()["bypass"] == 1
+
+    def test_key_covers_sampling_parameters(self):
+        """Test that differing parameters produce different keys"""
+        key = LLMResponseCache.make_key("query", "openai", "gpt-4o", "hi", temperature=0.0)
+
+        assert key == LLMResponseCache.make_key("query", "openai", "gpt-4o", "hi", temperature=0.0)
+        assert key != LLMResponseCache.make_key("query", "openai", "gpt-4o", "hi", temperature=0.1)
+        assert key != LLMResponseCache.make_key("query", "google", "gpt-4o", "hi", temperature=0.0)
+
+
+class TestMemoryTier:
+    """Test the in-memory LRU tier"""
+
+    @pytest.mark.asyncio
+    async def test_hit_and_miss(self):
+        """Test basic hit/miss accounting"""
+        cache = LLMResponseCache()
+
+        assert await cache.get("k") is None
+        await cache.set("k", "response", ttl_seconds=60)
+        assert await cache.get("k") == "response"
+
+        stats = cache.get_stats()
+        assert stats["memory_hit"] == 1
+        assert stats["miss"] == 1
+        assert stats["hit_rate_percent"] == 50.0
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted"""
+        cache = LLMResponseCache(max_entries=2)
+        await cache.set("a", "1", ttl_seconds=60)
+        await cache.set("b", "2", ttl_seconds=60)
+        await cache.get("a")
+        await cache.set("c", "3", ttl_seconds=60)
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") == "1"
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self):
+        """Test that expired entries are not served"""
+        cache = LLMResponseCache()
+        await cache.set("k", "response", ttl_seconds=60)
+
+        with patch("services.llm_cache.time.time", return_value=time.time() + 120):
+            assert await cache.get("k") is None
+
+    @pytest.mark.asyncio
+    async def test_structured_results_are_copied(self):
+        """Test that callers cannot mutate cached structured responses"""
+        cache = LLMResponseCache()
+        await cache.set("k", {"items": [1]}, ttl_seconds=60)
+
+        first = await cache.get("k")
+        first["items"].append(2)
+
+        assert await cache.get("k") == {"items": [1]}
+
+
+class TestDiskTier:
+    """Test the persistent SQLite tier"""
+
+    @pytest.mark.asyncio
+    async def test_survives_restart(self, tmp_path):
+        """Test that a new cache instance reads entries written by a previous one"""
+        path = str(tmp_path / "cache" / "llm.sqlite3")
+        await LLMResponseCache(disk_path=path).set("k", {"answer": 42}, ttl_seconds=60)
+
+        cache = LLMResponseCache(disk_path=path)
+        assert await cache.get("k") == {"answer": 42}
+        assert await cache.get("k") == {"answer": 42}
+
+        stats = cache.get_stats()
+        assert stats["disk_hit"] == 1
+        assert stats["memory_hit"] == 1
+        assert stats["disk"]["entries"] == 1
+
+    @pytest.mark.asyncio
+    async def test_size_eviction(self, tmp_path):
+        """Test that the oldest entries are dropped when over the size budget"""
+        cache = LLMResponseCache(disk_path=str(tmp_path / "llm.sqlite3"), disk_max_bytes=250)
+        for i in range(5):
+            await cache.set(f"k{i}", "x" * 100, ttl_seconds=60)
+
+        stats = cache.get_stats()["disk"]
+        assert stats["size_bytes"] <= 250
+        assert stats["entries"] == 2
+
+
+class TestSimilarityCache:
+    """Test SimHash fingerprints and the LSH index"""
+
+    PROMPT = (
+        "Summarize the following server report generated at 2024-05-01T10:15:00Z. "
+        "CPU usage stayed below forty percent, memory was stable, and no incidents were opened."
+    )
+
+    def test_normalization_masks_timestamps_and_whitespace(self):
+        """Test that volatile fragments do not change the normalized prompt"""
+        assert normalize_prompt("Report  at 2024-05-01 10:15\n") == normalize_prompt("report at 2024-06-02 11:00")
+        assert normalize_prompt("add 2 and 2") != normalize_prompt("add 3 and 3")
+
+    def test_simhash_near_duplicates_are_close(self):
+        """Test that small edits keep fingerprints within a few bits"""
+        edited = self.PROMPT.replace("stable", "steady")
+        unrelated = "Translate this poem about autumn leaves into French, keeping the rhyme scheme."
+
+        close = bin(simhash(self.PROMPT) ^ simhash(edited)).count("1")
+        far = bin(simhash(self.PROMPT) ^ simhash(unrelated)).count("1")
+
+        assert simhash(self.PROMPT) == simhash(self.PROMPT.replace("2024-05-01T10:15:00Z", "2024-05-02T08:00:00Z"))
+        assert close < far
+
+    def test_index_bounded_and_scoped(self):
+        """Test eviction and that lookups never cross scopes"""
+        index = SimilarityIndex(max_entries=2)
+        index.add("a", "scope-1", 0b1011)
+        index.add("b", "scope-1", 0b1010)
+        index.add("c", "scope-2", 0b1011)
+
+        assert len(index) == 2
+        assert index.find("scope-1", 0b1011, max_distance=1) == [(1, "b")]
+        assert index.find("scope-2", 0b1011, max_distance=0) == [(0, "c")]
+
+    def test_threshold_clamped_to_index_capacity(self):
+        """Test conversion from similarity threshold to Hamming distance"""
+        index = SimilarityIndex(bands=8)
+
+        assert index.distance_for(0.95) == 3
+        assert index.distance_for(0.5) == 7
+
+    @pytest.mark.asyncio
+    async def test_near_duplicate_served(self):
+        """Test that a near-duplicate prompt in the same scope returns the cached response"""
+        cache = LLMResponseCache()
+        await cache.set("exact", "cached answer", ttl_seconds=60, similarity_scope="scope", prompt=self.PROMPT)
+
+        edited = self.PROMPT.replace("2024-05-01T10:15:00Z", "2024-05-03T09:30:00Z") + "  "
+        assert await cache.get_similar("scope", edited, threshold=0.9) == "cached answer"
+        assert await cache.get_similar("other-scope", edited, threshold=0.9) is None
+        assert cache.get_stats()["similar_hit"] == 1
+
+
+class TestUnifiedServiceCaching:
+    """Test caching in UnifiedLLMService.query and query_structured"""
+
+    def setup_method(self):
+        self.service = UnifiedLLMService()
+        self.cache = LLMResponseCache()
+        self.mock_provider = AsyncMock()
+        self.mock_provider.query.return_value = "Cached response"
+        self.mock_provider.query_structured.return_value = {"result": "ok"}
+
+    @pytest.mark.asyncio
+    async def test_repeated_query_served_from_cache(self):
+        """Test that identical low-temperature prompts call the provider once"""
+        with patch.object(self.service, '_get_openai_service', return_value=self.mock_provider), \
+             patch('services.llm_service.get_llm_response_cache', return_value=self.cache), \
+             llm_cache_policy(ttl_seconds=60):
+            for _ in range(3):
+                result = await self.service.query("Same prompt", provider="openai", temperature=0.0)
+
+        assert result == "Cached response"
+        assert self.mock_provider.query.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_no_caching_without_policy(self):
+        """Test that calls outside an agent cache policy always hit the provider"""
+        with patch.object(self.service, '_get_openai_service', return_value=self.mock_provider), \
+             patch('services.llm_service.get_llm_response_cache', return_value=self.cache):
+            await self.service.query("Same prompt", provider="openai", temperature=0.0)
+            await self.service.query("Same prompt", provider="openai", temperature=0.0)
+
+        assert self.mock_provider.query.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_structured_query_cached(self):
+        """Test that structured queries are cached by schema"""
+        with patch.object(self.service, '_get_openai_service', return_value=self.mock_provider), \
+             patch('services.llm_service.get_llm_response_cache', return_value=self.cache), \
+             llm_cache_policy(ttl_seconds=60):
+            await self.service.query_structured("Prompt", {"result": "string"}, provider="openai", temperature=0.0)
+            await self.service.query_structured("Prompt", {"result": "string"}, provider="openai", temperature=0.0)
+            await self.service.query_structured("Prompt", {"other": "string"}, provider="openai", temperature=0.0)
+
+        assert self.mock_provider.query_structured.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_structured_query_errors_not_cached(self):
+        """Test that a failed structured query is retried at the provider, not replayed from cache"""
+        self.mock_provider.query_structured.side_effect = [{"error": "rate limited"}, {"result": "ok"}]
+        with patch.object(self.service, '_get_openai_service', return_value=self.mock_provider), \
+             patch('services.llm_service.get_llm_response_cache', return_value=self.cache), \
+             llm_cache_policy(ttl_seconds=60):
+            first = await self.service.query_structured("Prompt", {"result": "string"}, provider="openai", temperature=0.0)
+            second = await self.service.query_structured("Prompt", {"result": "string"}, provider="openai", temperature=0.0)
+
+        assert first == {"error": "rate limited"}
+        assert second == {"result": "ok"}
+        assert self.mock_provider.query_structured.call_count == 2
+        assert self.cache.get_stats()["memory_hit"] == 0
+
+    @pytest.mark.asyncio
+    async def test_similarity_threshold_from_policy(self):
+        """Test that prompts differing only by timestamp reuse the response when opted in"""
+        with patch.object(self.service, '_get_openai_service', return_value=self.mock_provider), \
+             patch('services.llm_service.get_llm_response_cache', return_value=self.cache):
+            with llm_cache_policy(ttl_seconds=60, similarity_threshold=0.95):
+                await self.service.query("Daily digest for 2024-05-01 09:00", provider="openai", temperature=0.0)
+                await self.service.query("Daily digest for 2024-05-02 09:00", provider="openai", temperature=0.0)
+            with llm_cache_policy(ttl_seconds=60):
+                await self.service.query("Daily digest for 2024-05-03 09:00", provider="openai", temperature=0.0)
+
+        assert self.mock_provider.query.call_count == 2
+        # A near-duplicate hit is counted once, not also as a miss
+        stats = self.cache.get_stats()
+        assert stats["similar_hit"] == 1
+        assert stats["miss"] == 2
+        assert stats["hit_rate_percent"] == 33.33
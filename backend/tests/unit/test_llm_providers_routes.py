@@ -616,4 +616,26 @@ class TestCrossProviderFunctionality:
             assert response.status_code == 200
             assert data["success"] is True
             assert data["result"]["models"] == []
-            assert data["metadata"]["model_count"] == 0 
\ No newline at end of file
+            assert data["metadata"]["model_count"] == 0 
+
+class TestProvidersHealthRoute:
+    """Test the aggregate provider health endpoint."""
+
+    def test_providers_health(self, client):
+        """Test that the monitor's snapshot is returned and refresh is passed through."""
+        health = {
+            "providers": {"openai": {"provider": "openai", "status": "healthy", "checks": {}}},
+            "summary": {"total_providers": 1, "healthy": 1, "degraded": 0, "unhealthy": 0},
+            "age_seconds": 0.0
+        }
+        with patch('services.provider_health.get_provider_health_monitor') as mock_monitor:
+            mock_monitor.return_value.get_health = AsyncMock(return_value=health)
+            
+            response = client.get("/llm/providers/health?refresh=true")
+            data = response.json()
+            
+            assert response.status_code == 200
+            assert data["success"] is True
+            assert data["result"]["providers"]["openai"]["status"] == "healthy"
+            assert data["metadata"]["healthy_providers"] == 1
+            mock_monitor.return_value.get_health.assert_awaited_once_with(refresh=True)
@@ -14,6 +14,7 @@ from services.llm_service import (
     LLMProvider, 
     get_unified_llm_service
 )
+from job_progress import JobProgressBuffer, bind_job_progress
 
 
 class TestUnifiedLLMService:
@@ -109,6 +110,41 @@ class TestUnifiedLLMService:
             assert result == "Complete response"
             mock_service.query.assert_called_once()
     
+    @pytest.mark.asyncio
+    async def test_query_stream_yields_provider_chunks(self):
+        """Test streaming query passes provider chunks through"""
+        async def stream(**kwargs):
+            for chunk in ["Hello", " world"]:
+                yield chunk
+        
+        mock_service = Mock()
+        mock_service.query_stream = Mock(side_effect=stream)
+        
+        with patch.object(self.service, '_get_openai_service', return_value=mock_service):
+            chunks = [chunk async for chunk in self.service.query_stream("Test prompt", provider="openai")]
+        
+        assert chunks == ["Hello", " world"]
+        assert mock_service.query_stream.call_args[1]['prompt'] == "Test prompt"
+    
+    @pytest.mark.asyncio
+    async def test_query_streams_into_job_progress(self):
+        """Test that queries inside a running job stream into its progress buffer"""
+        async def stream(**kwargs):
+            for chunk in ["Partial", " output"]:
+                yield chunk
+        
+        mock_service = Mock()
+        mock_service.query_stream = Mock(side_effect=stream)
+        buffer = JobProgressBuffer("job-1")
+        
+        with patch.object(self.service, '_get_openai_service', return_value=mock_service), \
+             bind_job_progress(buffer):
+            result = await self.service.query("Test prompt", provider="openai")
+        
+        assert result == "Partial output"
+        assert buffer.read()["text"] == "Partial output"
+        assert buffer.done is True
+    
     def test_get_all_providers_info(self):
         """Test getting all providers information"""
         mock_google = Mock()
@@ -0,0 +1,171 @@
+"""
+Unit tests for the local mock LLM provider
+
+Tests deterministic and templated responses, simulated latency, errors and
+429s, streaming and structured output, and that the provider stays
+unavailable to UnifiedLLMService unless explicitly enabled.
+"""
+
+import json
+import time
+import pytest
+from unittest.mock import patch
+
+from config.local import LocalConfig
+from services.llm_service import UnifiedLLMService
+from services.local_service import LocalLLMService
+from services.rate_limiter import RateLimiterRegistry, is_rate_limit_error, retry_after_seconds
+
+
+@pytest.fixture
+def local_env(monkeypatch):
+    """Enable the local provider with zero latency and a fixed seed"""
+    monkeypatch.setenv("LOCAL_LLM_ENABLED", "true")
+    monkeypatch.setenv("LOCAL_LLM_LATENCY_MS", "0")
+    monkeypatch.setenv("LOCAL_LLM_STREAM_CHUNK_DELAY_MS", "0")
+    monkeypatch.setenv("LOCAL_LLM_SEED", "7")
+    monkeypatch.setattr("services.rate_limiter.get_rate_limiters", lambda: RateLimiterRegistry())
+    return monkeypatch
+
+
+def make_service() -> LocalLLMService:
+    with patch("services.local_service.get_local_config", return_value=LocalConfig()):
+        return LocalLLMService()
+
+
+class TestLocalConfig:
+    """Test the local provider configuration"""
+
+    def test_disabled_by_default(self, monkeypatch):
+        """Test that the provider refuses to load unless opted into"""
+        monkeypatch.delenv("LOCAL_LLM_ENABLED", raising=False)
+        with pytest.raises(ValueError, match="LOCAL_LLM_ENABLED"):
+            LocalConfig()
+
+    def test_rejects_unknown_distribution(self, local_env):
+        local_env.setenv("LOCAL_LLM_LATENCY_DISTRIBUTION", "bimodal")
+        with pytest.raises(ValueError, match="LATENCY_DISTRIBUTION"):
+            LocalConfig()
+
+
+class TestLocalLLMService:
+    """Test simulated responses"""
+
+    @pytest.mark.asyncio
+    async def test_responses_are_deterministic(self, local_env):
+        """Test that the same request always yields the same text"""
+        service = make_service()
+        first = await service.query("Hello there", system_instruction="Be brief")
+        second = await service.query("Hello there", system_instruction="Be brief")
+        other = await service.query("Something else")
+
+        assert first == second
+        assert first != other
+        assert first.startswith("[local-echo] Response to prompt ")
+
+    @pytest.mark.asyncio
+    async def test_template_and_max_tokens(self, local_env):
+        """Test the response template placeholders and max_tokens truncation"""
+        local_env.setenv("LOCAL_LLM_RESPONSE_TEMPLATE", "{model}|{prompt}|{unknown}")
+        service = make_service()
+
+        assert await service.query("abc", model="local-large-context") == "local-large-context|abc|{unknown}"
+        assert await service.query("x" * 100, max_tokens=2) == "local-ec"
+
+    def test_latency_distributions_are_seeded_and_clamped(self, local_env):
+        """Test that latency samples are reproducible and respect the bounds"""
+        local_env.setenv("LOCAL_LLM_LATENCY_DISTRIBUTION", "lognormal")
+        local_env.setenv("LOCAL_LLM_LATENCY_MS", "100")
+        local_env.setenv("LOCAL_LLM_LATENCY_STDDEV_MS", "50")
+        local_env.setenv("LOCAL_LLM_LATENCY_MAX_MS", "150")
+
+        samples = [make_service()._sample_latency() for _ in range(2)]
+        service = make_service()
+        many = [service._sample_latency() for _ in range(500)]
+
+        assert samples[0] == samples[1]
+        assert max(many) <= 0.15
+        assert 0.07 < sum(many) / len(many) < 0.11
+
+    @pytest.mark.asyncio
+    async def test_latency_is_simulated(self, local_env):
+        local_env.setenv("LOCAL_LLM_LATENCY_MS", "30")
+        service = make_service()
+        start = time.perf_counter()
+        await service.query("Prompt")
+        assert time.perf_counter() - start >= 0.025
+
+    @pytest.mark.asyncio
+    async def test_simulated_429_is_seen_by_rate_limiter(self, local_env):
+        """Test that simulated 429s carry a retry-after the shared limiter understands"""
+        local_env.setenv("LOCAL_LLM_RATE_LIMIT_RATE", "1")
+        local_env.setenv("LOCAL_LLM_RETRY_AFTER_SECONDS", "2.5")
+        service = make_service()
+
+        with pytest.raises(RuntimeError) as exc_info:
+            await service.query("Prompt")
+
+        assert is_rate_limit_error(exc_info.value)
+        assert retry_after_seconds(exc_info.value) == 2.5
+
+    @pytest.mark.asyncio
+    async def test_error_rate(self, local_env):
+        """Test that roughly the configured fraction of requests fail"""
+        local_env.setenv("LOCAL_LLM_ERROR_RATE", "0.3")
+        service = make_service()
+        failures = 0
+        for i in range(200):
+            try:
+                await service.query(f"Prompt {i}")
+            except RuntimeError as e:
+                assert not is_rate_limit_error(e)
+                failures += 1
+
+        assert 30 <= failures <= 90
+
+    @pytest.mark.asyncio
+    async def test_stream_reassembles_to_query_response(self, local_env):
+        """Test that streamed chunks add up to the non-streamed response"""
+        local_env.setenv("LOCAL_LLM_STREAM_CHUNK_CHARS", "5")
+        service = make_service()
+
+        chunks = [chunk async for chunk in service.query_stream("Stream me")]
+
+        assert len(chunks) > 1
+        assert all(len(chunk) <= 5 for chunk in chunks)
+        assert "".join(chunks) == await service.query("Stream me")
+
+    @pytest.mark.asyncio
+    async def test_structured_output_matches_schema(self, local_env):
+        """Test that structured queries return an object shaped like the schema"""
+        service = make_service()
+        result = await service.analyze_sentiment("Great product")
+
+        assert set(result) == {"sentiment", "confidence", "emotions", "explanation"}
+        assert isinstance(result["confidence"], float)
+        assert isinstance(result["emotions"], list)
+        assert result == await service.analyze_sentiment("Great product")
+        json.dumps(result)
+
+
+class TestUnifiedServiceLocalProvider:
+    """Test the local provider through UnifiedLLMService"""
+
+    def test_not_available_unless_enabled(self, monkeypatch):
+        """Test that a disabled local provider is not loaded nor reported as failed"""
+        monkeypatch.delenv("LOCAL_LLM_ENABLED", raising=False)
+        service = UnifiedLLMService()
+
+        assert service._get_service_for_provider("local") is None
+        assert "local" not in service._service_failures
+        assert service.get_service_health()["service_details"]["local"]["status"] == "not_loaded"
+
+    @pytest.mark.asyncio
+    async def test_query_through_unified_service(self, local_env):
+        service = UnifiedLLMService()
+        with patch("services.local_service.get_local_config", return_value=LocalConfig()), \
+             patch("services.local_service._local_service", None):
+            result = await service.query("Benchmark prompt", provider="local")
+
+        assert result.startswith("[local-echo]")
+        assert "local" in service.get_available_providers()
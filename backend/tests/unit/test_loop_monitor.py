@@ -0,0 +1,105 @@
+"""
+Unit tests for the event loop lag monitor.
+"""
+
+import asyncio
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from loop_monitor import EventLoopMonitor, LOOP_BLOCKED
+from auth import get_current_user
+
+
+def blocking_sleep(seconds):
+    """Stand-in for a blocking library call made from a coroutine"""
+    time.sleep(seconds)
+
+
+class TestLagRecording:
+    """Test lag statistics"""
+
+    def test_lag_below_threshold_not_blocked(self):
+        """Test that small lags are recorded but not reported as blocks"""
+        monitor = EventLoopMonitor(block_threshold=0.1)
+        monitor.record_lag(0.002)
+        monitor.record_lag(0.004)
+
+        report = monitor.get_report()
+        assert report["samples"] == 2
+        assert report["lag_seconds"]["max"] == 0.004
+        assert report["blocked_count"] == 0
+        assert report["recent_blocks"] == []
+
+    def test_lag_above_threshold_reported(self):
+        """Test that stalls are counted and reported newest first"""
+        monitor = EventLoopMonitor(block_threshold=0.1)
+        before = LOOP_BLOCKED.get()
+
+        monitor.record_lag(0.2)
+        monitor.record_lag(0.5)
+
+        report = monitor.get_report()
+        assert report["blocked_count"] == 2
+        assert [b["lag_seconds"] for b in report["recent_blocks"]] == [0.5, 0.2]
+        assert report["recent_blocks"][0]["stack"] is None
+        assert LOOP_BLOCKED.get() == before + 2
+
+
+class TestBlockingDetection:
+    """Test detection against a real event loop"""
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_measures_blocking(self):
+        """Test that a blocking call shows up as loop lag"""
+        monitor = EventLoopMonitor(interval=0.02, block_threshold=0.1)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            blocking_sleep(0.25)
+            await asyncio.sleep(0.05)
+        finally:
+            await monitor.stop()
+
+        report = monitor.get_report()
+        assert report["blocked_count"] >= 1
+        assert report["lag_seconds"]["max"] >= 0.1
+        assert not report["running"]
+
+    @pytest.mark.asyncio
+    async def test_stack_captured_in_debug_mode(self):
+        """Test that the watchdog captures the blocking frame"""
+        monitor = EventLoopMonitor(interval=0.02, block_threshold=0.05, capture_stacks=True)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            blocking_sleep(0.3)
+            await asyncio.sleep(0.05)
+        finally:
+            await monitor.stop()
+
+        stacks = [b["stack"] for b in monitor.get_report()["recent_blocks"] if b["stack"]]
+        assert stacks
+        assert any("blocking_sleep" in frame for frame in stacks[0])
+
+
+class TestLoopDiagnosticsEndpoint:
+    """Test the /system/diagnostics/loop endpoint"""
+
+    def test_returns_report(self):
+        """Test that the endpoint returns the monitor report"""
+        from routes.system import router
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_current_user] = lambda: {"id": "user123"}
+
+        monitor = EventLoopMonitor()
+        monitor.record_lag(0.3)
+        with patch('routes.system.get_loop_monitor', return_value=monitor):
+            response = TestClient(app).get("/system/diagnostics/loop")
+
+        data = response.json()
+        assert data["success"] is True
+        assert data["result"]["blocked_count"] == 1
@@ -305,6 +305,45 @@ def test_preflight_options_request():
     assert response.status_code == 200
 
 
+def test_stop_http_warmup_cancels_pending_task():
+    """Test that shutdown cancels a warm-up that is still running"""
+    import asyncio
+    from fastapi import FastAPI
+    from main import stop_http_warmup, _log_http_warmup_result
+
+    async def run():
+        warmup_app = FastAPI()
+        warmup_app.state.http_warmup_task = asyncio.create_task(asyncio.sleep(60))
+        warmup_app.state.http_warmup_task.add_done_callback(_log_http_warmup_result)
+        task = warmup_app.state.http_warmup_task
+        await stop_http_warmup(warmup_app)
+        return warmup_app, task
+
+    warmup_app, task = asyncio.run(run())
+    assert task.cancelled()
+    assert warmup_app.state.http_warmup_task is None
+
+
+@patch('main.logger')
+def test_http_warmup_failure_is_logged(mock_logger):
+    """Test that a failed background warm-up is logged instead of lost"""
+    import asyncio
+    from main import _log_http_warmup_result
+
+    async def fail():
+        raise RuntimeError("connect failed")
+
+    async def run():
+        task = asyncio.create_task(fail())
+        task.add_done_callback(_log_http_warmup_result)
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    mock_logger.warning.assert_called_once()
+    assert mock_logger.warning.call_args.kwargs['error'] == "connect failed"
+
+
 # Google AI endpoint tests
 # @patch('main.validate_google_ai_environment')
 # def test_google_ai_validate_endpoint_success(mock_validate_google_ai):
@@ -0,0 +1,180 @@
+"""
+Unit tests for the Prometheus-compatible metrics module.
+"""
+
+import pytest
+from unittest.mock import patch, MagicMock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from metrics import (
+    Counter, Gauge, Histogram, MetricsRegistry, MetricsMiddleware,
+    DB_QUERY_DURATION, LLM_REQUEST_DURATION
+)
+from logging_system import get_database_logger
+from services.llm_service import SERVICE_NAMES
+from services.llm_utils import instrument_llm_call
+from services.model_registry import ModelRegistry
+
+
+class TestHistogram:
+    """Test fixed-bucket histograms"""
+
+    def test_observations_are_bucketed(self):
+        """Test that observations land in the first bucket whose bound is >= value"""
+        histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, route="/a")
+        histogram.observe(0.1, route="/a")
+        histogram.observe(0.5, route="/a")
+        histogram.observe(5.0, route="/a")
+
+        lines = histogram.render()
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{route="/a",le="1"} 3' in lines
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+        assert 'latency_seconds_count{route="/a"} 4' in lines
+        assert histogram.get_sum(route="/a") == pytest.approx(5.65)
+
+    def test_label_sets_are_independent(self):
+        """Test that each label combination has its own series"""
+        histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(1.0,))
+        histogram.observe(0.5, route="/a")
+        histogram.observe(0.5, route="/b")
+        histogram.observe(0.5, route="/b")
+
+        assert histogram.get_count(route="/a") == 1
+        assert histogram.get_count(route="/b") == 2
+
+    def test_wrong_labels_rejected(self):
+        """Test that observations with missing labels raise"""
+        histogram = Histogram("latency_seconds", "Latency", ("route", "method"))
+
+        with pytest.raises(ValueError):
+            histogram.observe(1.0, route="/a")
+
+
+class TestRegistry:
+    """Test metric registration and text exposition"""
+
+    def test_render_exposition_format(self):
+        """Test HELP/TYPE headers and label escaping"""
+        registry = MetricsRegistry()
+        counter = registry.counter("requests_total", "Total requests", ("path",))
+        counter.inc(path='/say "hi"')
+        registry.gauge("queue_size", "Queue size", callback=lambda: 3)
+
+        output = registry.render()
+
+        assert "# HELP requests_total Total requests" in output
+        assert "# TYPE requests_total counter" in output
+        assert 'requests_total{path="/say \\"hi\\""} 1' in output
+        assert "# TYPE queue_size gauge\nqueue_size 3" in output
+        assert output.endswith("\n")
+
+    def test_register_returns_existing(self):
+        """Test that registering a metric twice returns the original"""
+        registry = MetricsRegistry()
+        first = registry.counter("jobs_total", "Jobs")
+        second = registry.counter("jobs_total", "Jobs")
+
+        assert first is second
+
+    def test_gauge_set_and_dec(self):
+        """Test gauge updates"""
+        gauge = Gauge("in_flight", "In-flight requests")
+        gauge.set(5)
+        gauge.dec(2)
+
+        assert gauge.get() == 3
+
+
+class TestMetricsMiddleware:
+    """Test per-route request latency recording"""
+
+    def test_records_route_template(self):
+        """Test that requests are labelled by route template and status"""
+        histogram = Histogram("http_seconds", "HTTP", ("method", "route", "status"))
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        async def get_item(item_id: str):
+            return {"id": item_id}
+
+        app.add_middleware(MetricsMiddleware, histogram=histogram)
+        client = TestClient(app)
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/missing")
+
+        assert histogram.get_count(method="GET", route="/items/{item_id}", status="200") == 2
+        assert histogram.get_count(method="GET", route="unmatched", status="404") == 1
+
+
+class TestInstrumentation:
+    """Test metrics fed by the database logger and LLM services"""
+
+    def test_db_query_duration_recorded(self):
+        """Test that DatabaseLogger.log_query feeds the query histogram"""
+        before = DB_QUERY_DURATION.get_count(table="metrics_test", operation="SELECT", status="success")
+        failed_before = DB_QUERY_DURATION.get_count(table="metrics_test", operation="UPDATE", status="error")
+
+        db_logger = get_database_logger()
+        db_logger.log_query("SELECT", "metrics_test", 0.01, rows_returned=1)
+        db_logger.log_query("update", "metrics_test", 0.02, error="boom")
+
+        assert DB_QUERY_DURATION.get_count(table="metrics_test", operation="SELECT", status="success") == before + 1
+        assert DB_QUERY_DURATION.get_count(table="metrics_test", operation="UPDATE", status="error") == failed_before + 1
+
+    @pytest.mark.asyncio
+    async def test_llm_latency_recorded(self):
+        """Test that instrumented LLM calls record latency per provider and catalog model"""
+        class FakeService:
+            @instrument_llm_call("MetricsTest")
+            async def query(self, prompt, model=None, **kwargs):
+                if prompt == "fail":
+                    raise RuntimeError("provider down")
+                return "ok"
+
+        registry = ModelRegistry(remote_refresh=False)
+        registry.register("metrics_test", lambda: ["test-model"])
+        service = FakeService()
+        with patch.dict(SERVICE_NAMES, {"metrics_test": "MetricsTest"}), \
+             patch('services.llm_utils.get_model_registry', return_value=registry):
+            await service.query("hello", model="TEST-MODEL")
+            await service.query("hello", model="made-up-model-1")
+            await service.query("hello", model="made-up-model-2")
+            with pytest.raises(RuntimeError):
+                await service.query("fail")
+
+        assert LLM_REQUEST_DURATION.get_count(provider="MetricsTest", model="test-model", status="success") == 1
+        # Names outside the catalog share one series
+        assert LLM_REQUEST_DURATION.get_count(provider="MetricsTest", model="other", status="success") == 2
+        assert LLM_REQUEST_DURATION.get_count(provider="MetricsTest", model="made-up-model-1", status="success") == 0
+        assert LLM_REQUEST_DURATION.get_count(provider="MetricsTest", model="default", status="error") == 1
+
+
+class TestMetricsEndpoint:
+    """Test the /metrics endpoint"""
+
+    @pytest.fixture
+    def client(self):
+        from routes.system import router
+        app = FastAPI()
+        app.include_router(router)
+        return TestClient(app)
+
+    def test_exposes_prometheus_text(self, client):
+        """Test that the endpoint serves the text exposition format"""
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE job_queue_wait_seconds histogram" in response.text
+        assert "# TYPE db_query_duration_seconds histogram" in response.text
+
+    def test_disabled(self, client):
+        """Test that the endpoint is hidden when metrics are disabled"""
+        with patch('routes.system.get_settings', return_value=MagicMock(metrics_enabled=False)):
+            response = client.get("/metrics")
+
+        assert response.status_code == 404
@@ -0,0 +1,153 @@
+"""
+Unit tests for the model registry
+
+Tests case-insensitive model lookups in model catalogs, building catalogs
+from the configured and provider-listed models, TTL refresh in the
+background, cached provider info, and model selection through the registry.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from services.llm_utils import get_model_info, safe_model_selection, validate_model_name
+from services.model_registry import ModelCatalog, ModelRegistry
+from tests.conftest import FakeClock
+
+
+class TestModelCatalog:
+    """Test catalog lookups"""
+
+    def test_resolve_is_case_insensitive(self):
+        catalog = ModelCatalog(["gpt-4o", "GPT-4o-mini", "gpt-4o"])
+
+        assert catalog.resolve("GPT-4O") == "gpt-4o"
+        assert catalog.resolve("gpt-4o-MINI") == "GPT-4o-mini"
+        assert catalog.resolve("gpt-5") is None
+        assert "Gpt-4o" in catalog
+        assert list(catalog) == ["gpt-4o", "GPT-4o-mini"]
+
+    def test_validation_uses_the_catalog(self):
+        catalog = ModelCatalog(["claude-3-opus", "claude-3-haiku"])
+
+        assert validate_model_name("Anthropic", "CLAUDE-3-OPUS", catalog, "claude-3-haiku") == "claude-3-opus"
+        assert safe_model_selection("Anthropic", "unknown", catalog, "claude-3-haiku") == "claude-3-haiku"
+        with pytest.raises(ValueError, match="Available models: claude-3-opus, claude-3-haiku"):
+            validate_model_name("Anthropic", "unknown", catalog, "claude-3-haiku", allow_fallback=False)
+
+    def test_model_info_suggestions(self):
+        info = get_model_info("claude-3", ["claude-3-opus", "claude-3-haiku", "gpt-4o"])
+
+        assert info["is_available"] is False
+        assert info["suggested_models"] == ["claude-3-opus", "claude-3-haiku"]
+        assert get_model_info("GPT-4O", ["gpt-4o"])["exact_match"] == "gpt-4o"
+
+
+class TestModelRegistry:
+    """Test catalog loading and refresh"""
+
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.registry = ModelRegistry(ttl_seconds=60, clock=self.clock)
+
+    def test_catalog_is_loaded_once_per_ttl(self):
+        load_models = Mock(return_value=["local-echo"])
+        self.registry.register("local", load_models)
+
+        for _ in range(5):
+            assert self.registry.get_catalog("local").resolve("LOCAL-ECHO") == "local-echo"
+        assert load_models.call_count == 1
+
+        self.clock.now += 61
+        self.registry.get_catalog("local")
+        assert load_models.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_stale_catalog_is_served_while_refreshing(self):
+        """Test that a stale catalog is refreshed in the background with the provider's models"""
+        listed = asyncio.Event()
+
+        async def list_models():
+            listed.set()
+            return ["gpt-4.1"]
+
+        self.registry.register("openai", lambda: ["gpt-4o"], list_models)
+        assert list(self.registry.get_catalog("openai")) == ["gpt-4o"]
+
+        self.clock.now += 61
+        stale = self.registry.get_catalog("openai")
+        assert list(stale) == ["gpt-4o"]
+
+        await asyncio.wait_for(listed.wait(), timeout=1.0)
+        await asyncio.sleep(0)
+        refreshed = self.registry.get_catalog("openai")
+        assert list(refreshed) == ["gpt-4o", "gpt-4.1"]
+        assert refreshed.source == "provider"
+
+    @pytest.mark.asyncio
+    async def test_failed_listing_keeps_configured_models(self):
+        self.registry.register("anthropic", lambda: ["claude-3-opus"], AsyncMock(side_effect=RuntimeError("401")))
+
+        catalog = await self.registry.refresh("anthropic")
+
+        assert list(catalog) == ["claude-3-opus"]
+        assert catalog.source == "config"
+
+    @pytest.mark.asyncio
+    async def test_remote_refresh_can_be_disabled(self):
+        list_models = AsyncMock(return_value=["gpt-4.1"])
+        registry = ModelRegistry(remote_refresh=False)
+        registry.register("openai", lambda: ["gpt-4o"], list_models)
+
+        await registry.refresh_all()
+
+        assert list(registry.get_catalog("openai")) == ["gpt-4o"]
+        list_models.assert_not_called()
+
+    def test_provider_info_is_cached(self):
+        build_info = Mock(return_value={"service": "Local", "available_models": []})
+        self.registry.register("local", lambda: ["local-echo"])
+
+        self.registry.get_info("local", build_info)
+        info = self.registry.get_info("local", build_info)
+
+        assert build_info.call_count == 1
+        assert info["available_models"] == ["local-echo"]
+        self.clock.now += 61
+        self.registry.get_info("local", build_info)
+        assert build_info.call_count == 2
+
+
+class TestServiceModelSelection:
+    """Test that provider services validate models through the registry"""
+
+    @pytest.mark.asyncio
+    async def test_openai_lists_chat_models(self):
+        from services.openai_service import OpenAIService
+
+        with patch('services.openai_service.get_openai_config'), \
+             patch('services.openai_service.openai.AsyncOpenAI'):
+            service = OpenAIService()
+
+        async def models():
+            for model_id in ("gpt-4o", "gpt-4o-realtime-preview", "text-embedding-3-small", "o3-mini"):
+                yield Mock(id=model_id)
+
+        service._client.models.list = Mock(return_value=models())
+
+        assert await service.list_models() == ["gpt-4o", "o3-mini"]
+
+    def test_openai_selection_is_case_insensitive(self):
+        from services.openai_service import OpenAIService
+
+        with patch('services.openai_service.get_openai_config'), \
+             patch('services.openai_service.openai.AsyncOpenAI'):
+            service = OpenAIService()
+        service._openai_config.get_available_models.return_value = ['gpt-4o', 'gpt-4o-mini']
+        service._openai_config.default_model = 'gpt-4o-mini'
+
+        config = service._prepare_generation_config("Hi", "GPT-4o", None, None, None)
+        service._prepare_generation_config("Hi", "gpt-4o-mini", None, None, None)
+
+        assert config["model"] == "gpt-4o"
+        service._openai_config.get_available_models.assert_called_once()
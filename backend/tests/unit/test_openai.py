@@ -356,6 +356,25 @@ class TestOpenAIService:
         with pytest.raises(RuntimeError):
             await self.service.query("Test prompt")
 
+    @pytest.mark.asyncio
+    async def test_query_stream_success(self):
+        """Test streaming query yields delta content"""
+        async def stream():
+            for text in ["Hello", None, " world"]:
+                chunk = Mock()
+                chunk.choices = [Mock()]
+                chunk.choices[0].delta.content = text
+                yield chunk
+        
+        self.service._client.chat.completions.create = AsyncMock(return_value=stream())
+        self.service._openai_config.get_available_models.return_value = ['gpt-4o-mini']
+        self.service._openai_config.default_model = 'gpt-4o-mini'
+        
+        chunks = [chunk async for chunk in self.service.query_stream("Test prompt")]
+        
+        assert chunks == ["Hello", " world"]
+        assert self.service._client.chat.completions.create.call_args[1]['stream'] is True
+
     @pytest.mark.asyncio
     async def test_query_structured_success(self):
         """Test successful structured query"""
@@ -418,6 +437,32 @@ class TestOpenAIService:
         assert results[1] == "Response 2"
         assert results[2] == "Response 3"
 
+    @pytest.mark.asyncio
+    async def test_batch_results_priced_by_requested_model(self):
+        """Test that the requested model travels with the batch instead of process state"""
+        from services.batch_lane import BatchRequest
+        
+        self.service._openai_config.get_available_models.return_value = ['gpt-4o-mini']
+        self.service._openai_config.default_model = 'gpt-4o-mini'
+        self.service._client.files.create = AsyncMock(return_value=Mock(id="file-1"))
+        self.service._client.batches.create = AsyncMock(return_value=Mock(id="batch-1"))
+        
+        batch_id = await self.service.submit_batch([BatchRequest(custom_id="r1", prompt="Hi")])
+        
+        metadata = self.service._client.batches.create.call_args.kwargs["metadata"]
+        assert metadata == {"model": "gpt-4o-mini"}
+        
+        line = '{"custom_id": "r1", "response": {"status_code": 200, "body": {"model": "gpt-4o-mini-2024-07-18", "choices": [{"message": {"content": "Hello"}}]}}}'
+        self.service._client.batches.retrieve = AsyncMock(return_value=Mock(
+            status="completed", output_file_id="out-1", error_file_id=None, metadata=metadata
+        ))
+        self.service._client.files.content = AsyncMock(return_value=Mock(text=line))
+        
+        results = await self.service.get_batch_results(batch_id)
+        
+        assert results[0].text == "Hello"
+        assert results[0].model == "gpt-4o-mini"
+
     @pytest.mark.asyncio
     async def test_analyze_sentiment(self):
         """Test sentiment analysis convenience method"""
@@ -0,0 +1,176 @@
+"""
+Unit tests for prompt-prefix caching
+
+Tests which system instructions are marked as cacheable prefixes, how the
+mark maps onto Anthropic cache_control and Gemini cached content, and hit
+rates from the local mock's simulated cache in the health status.
+"""
+
+import asyncio
+import threading
+import pytest
+from unittest.mock import Mock, patch
+
+from config.environment import get_settings
+from config.local import LocalConfig
+from services.llm_service import UnifiedLLMService
+from services.prefix_cache import cacheable_prefix, get_prefix_cache_stats, is_cacheable_prefix
+from services.rate_limiter import RateLimiterRegistry
+from services.usage import record_llm_usage
+
+LONG_INSTRUCTION = "You are a meticulous research assistant. " * 400
+
+
+@pytest.fixture(autouse=True)
+def prefix_cache_settings(monkeypatch):
+    monkeypatch.setattr(get_settings(), "llm_prefix_cache_enabled", True)
+    monkeypatch.setattr(get_settings(), "llm_prefix_cache_min_tokens", 1024)
+    get_prefix_cache_stats().reset()
+    yield
+    get_prefix_cache_stats().reset()
+
+
+class TestPrefixMarking:
+    """Test marking cacheable prefixes"""
+
+    def test_short_instructions_are_not_marked(self):
+        assert is_cacheable_prefix("anthropic", None, LONG_INSTRUCTION)
+        assert not is_cacheable_prefix("anthropic", None, "Be concise.")
+        assert not is_cacheable_prefix("llama", None, LONG_INSTRUCTION)
+        assert not is_cacheable_prefix("anthropic", None, None)
+
+    def test_provider_minimum_applies(self, monkeypatch):
+        """Test that Gemini's larger minimum is respected with a lower setting"""
+        monkeypatch.setattr(get_settings(), "llm_prefix_cache_min_tokens", 0)
+        medium = "word " * 2000
+
+        assert is_cacheable_prefix("anthropic", None, medium)
+        assert not is_cacheable_prefix("google", None, medium)
+
+    def test_explicit_providers_get_request_kwargs(self):
+        with cacheable_prefix("anthropic", None, LONG_INSTRUCTION) as kwargs:
+            assert kwargs == {"cache_prefix": True}
+        with cacheable_prefix("openai", None, LONG_INSTRUCTION) as kwargs:
+            assert kwargs == {}
+        with cacheable_prefix("anthropic", None, LONG_INSTRUCTION, enabled=False) as kwargs:
+            assert kwargs == {}
+
+    def test_only_marked_requests_count_towards_hit_rate(self):
+        with patch("services.usage.get_usage_accounting"):
+            record_llm_usage("openai", "gpt-4o", 2000, 10, cached_tokens=1500)
+            with cacheable_prefix("openai", "gpt-4o", LONG_INSTRUCTION):
+                record_llm_usage("openai", "gpt-4o", 2000, 10, cached_tokens=1500)
+                record_llm_usage("openai", "gpt-4o", 2000, 10)
+
+        stats = get_prefix_cache_stats().get_stats("openai")
+        assert (stats["requests"], stats["hits"], stats["hit_rate_percent"]) == (2, 1, 50.0)
+        assert stats["mechanism"] == "automatic"
+
+
+class TestProviderMechanisms:
+    """Test the provider-specific caching mechanisms"""
+
+    def test_anthropic_cache_control(self):
+        from services.anthropic_service import AnthropicService
+
+        with patch('services.anthropic_service.get_anthropic_config'), \
+             patch('services.anthropic_service.anthropic.AsyncAnthropic'):
+            service = AnthropicService()
+        service._anthropic_config.get_available_models.return_value = ['claude-3-5-haiku-20241022']
+
+        config = service._prepare_generation_config("Hi", None, "System", None, None, cache_prefix=True)
+        plain = service._prepare_generation_config("Hi", None, "System", None, None)
+
+        assert config["system"] == [{"type": "text", "text": "System", "cache_control": {"type": "ephemeral"}}]
+        assert plain["system"] == "System"
+        assert "cache_prefix" not in config
+
+    @pytest.mark.asyncio
+    async def test_gemini_cached_content_is_reused(self):
+        from services.google_ai_service import GoogleAIService
+
+        with patch('services.google_ai_service.get_google_ai_config') as mock_config:
+            mock_config.return_value.default_model = 'gemini-2.0-flash'
+            service = GoogleAIService()
+
+        with patch('services.google_ai_service.caching.CachedContent.create') as mock_create, \
+             patch('services.google_ai_service.genai.GenerativeModel.from_cached_content') as mock_from_cache:
+            first = await service._get_request_model(None, LONG_INSTRUCTION, cache_prefix=True)
+            second = await service._get_request_model(None, LONG_INSTRUCTION, cache_prefix=True)
+
+        assert first is second is mock_from_cache.return_value
+        mock_create.assert_called_once()
+        assert mock_create.call_args[1]["model"] == "models/gemini-2.0-flash"
+
+    @pytest.mark.asyncio
+    async def test_gemini_falls_back_when_caching_fails(self):
+        from services.google_ai_service import GoogleAIService
+
+        with patch('services.google_ai_service.get_google_ai_config') as mock_config:
+            mock_config.return_value.default_model = 'gemini-2.0-flash'
+            service = GoogleAIService()
+
+        with patch('services.google_ai_service.caching.CachedContent.create', side_effect=RuntimeError("too short")) as mock_create:
+            await service._get_request_model(None, LONG_INSTRUCTION, cache_prefix=True)
+            llm_model = await service._get_request_model(None, LONG_INSTRUCTION, cache_prefix=True)
+
+        assert llm_model is mock_config.return_value.get_generative_model.return_value
+        mock_create.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_gemini_cache_creation_only_blocks_the_same_key(self):
+        """Test that concurrent callers share one creation per key and other keys proceed"""
+        from services.google_ai_service import GoogleAIService
+
+        with patch('services.google_ai_service.get_google_ai_config') as mock_config:
+            mock_config.return_value.default_model = 'gemini-2.0-flash'
+            service = GoogleAIService()
+
+        release = threading.Event()
+
+        def create(model, system_instruction, ttl):
+            if system_instruction == LONG_INSTRUCTION:
+                release.wait(timeout=2.0)
+            return Mock(name=system_instruction[:10])
+
+        other_instruction = "Other " + LONG_INSTRUCTION
+        with patch('services.google_ai_service.caching.CachedContent.create', side_effect=create) as mock_create, \
+             patch('services.google_ai_service.genai.GenerativeModel.from_cached_content'):
+            slow = [asyncio.create_task(service._get_request_model(None, LONG_INSTRUCTION, cache_prefix=True))
+                    for _ in range(3)]
+            await asyncio.sleep(0.01)
+            # A different instruction is not stuck behind the slow creation
+            await asyncio.wait_for(service._get_request_model(None, other_instruction, cache_prefix=True), timeout=1.0)
+            assert not any(task.done() for task in slow)
+
+            release.set()
+            models = await asyncio.gather(*slow)
+
+        assert models[0] is models[1] is models[2]
+        assert mock_create.call_count == 2
+        assert service._context_cache_creations == {}
+
+
+class TestUnifiedServicePrefixCache:
+    """Test prefix caching through UnifiedLLMService with the local mock"""
+
+    @pytest.mark.asyncio
+    async def test_hit_rate_in_health_status(self, monkeypatch):
+        monkeypatch.setenv("LOCAL_LLM_ENABLED", "true")
+        monkeypatch.setenv("LOCAL_LLM_LATENCY_MS", "0")
+        monkeypatch.setattr("services.rate_limiter.get_rate_limiters", lambda: RateLimiterRegistry())
+        service = UnifiedLLMService()
+
+        with patch("services.local_service.get_local_config", return_value=LocalConfig()), \
+             patch("services.local_service._local_service", None), \
+             patch("services.usage.get_usage_accounting"):
+            for question in ("First question", "Second question", "Third question"):
+                await service.query(question, provider="local", system_instruction=LONG_INSTRUCTION)
+            await service.query("Uncached", provider="local", system_instruction=LONG_INSTRUCTION, cache_prefix=False)
+
+            prefix_cache = service.get_connection_health_status()["services"]["local"]["prefix_cache"]
+
+        assert prefix_cache["requests"] == 3
+        assert prefix_cache["hits"] == 2
+        assert prefix_cache["hit_rate_percent"] == pytest.approx(66.67)
+        assert prefix_cache["cached_token_percent"] > 60
@@ -0,0 +1,153 @@
+"""
+Unit tests for aggregate provider health
+
+Tests concurrent checks across providers, per-check timeouts with partial
+results, snapshot caching, the background refresher, and the single
+provider connection test on UnifiedLLMService.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from services.llm_service import UnifiedLLMService
+from services.provider_health import PROVIDER_VALIDATORS, ProviderHealthMonitor
+from tests.conftest import FakeClock
+
+
+@pytest.fixture
+def llm_service():
+    """Unified service whose providers all answer immediately"""
+    service = Mock()
+    service.get_available_models = AsyncMock(return_value=["model-a"])
+    service.test_connection = AsyncMock(return_value={"success": True, "response_time": 0.01})
+    with patch("services.llm_service.get_unified_llm_service", return_value=service), \
+         patch.object(ProviderHealthMonitor, "_validate", lambda self, provider: asyncio.sleep(0, result={"valid": True})):
+        yield service
+
+
+class TestProviderHealthMonitor:
+    """Test checking all providers"""
+
+    @pytest.mark.asyncio
+    async def test_all_providers_are_reported(self, llm_service):
+        health = await ProviderHealthMonitor().get_health()
+
+        assert set(health["providers"]) == set(PROVIDER_VALIDATORS)
+        assert health["summary"]["healthy"] == len(PROVIDER_VALIDATORS)
+        assert health["providers"]["openai"]["checks"]["models"]["result"] == ["model-a"]
+
+    @pytest.mark.asyncio
+    async def test_providers_are_checked_concurrently(self, llm_service):
+        async def slow_connection(provider):
+            await asyncio.sleep(0.05)
+            return {"success": True}
+
+        llm_service.test_connection.side_effect = slow_connection
+
+        health = await ProviderHealthMonitor().get_health()
+
+        # Sequential checks would take 7 x 50ms
+        assert health["duration_ms"] < 200
+
+    @pytest.mark.asyncio
+    async def test_hanging_provider_times_out_with_partial_results(self, llm_service):
+        async def connection(provider):
+            if provider == "grok":
+                await asyncio.sleep(10)
+            return {"success": True}
+
+        llm_service.test_connection.side_effect = connection
+        monitor = ProviderHealthMonitor(timeout_seconds=0.05)
+
+        health = await asyncio.wait_for(monitor.get_health(), timeout=1.0)
+        grok = health["providers"]["grok"]
+
+        assert grok["status"] == "unhealthy"
+        assert grok["checks"]["connection"]["timed_out"] is True
+        assert grok["checks"]["models"]["ok"] is True
+        assert health["providers"]["openai"]["status"] == "healthy"
+
+    @pytest.mark.asyncio
+    async def test_failed_checks_set_status(self, llm_service):
+        async def models(provider):
+            if provider == "llama":
+                raise RuntimeError("llama service is not available")
+            return []
+
+        async def connection(provider):
+            return {"success": provider != "deepseek", "error": "bad key"}
+
+        llm_service.get_available_models.side_effect = models
+        llm_service.test_connection.side_effect = connection
+
+        providers = (await ProviderHealthMonitor().get_health())["providers"]
+
+        assert providers["llama"]["status"] == "degraded"
+        assert providers["llama"]["checks"]["models"]["error"] == "llama service is not available"
+        assert providers["deepseek"]["status"] == "unhealthy"
+        assert providers["deepseek"]["checks"]["connection"]["error"] == "bad key"
+
+    @pytest.mark.asyncio
+    async def test_snapshot_is_cached(self, llm_service):
+        clock = FakeClock()
+        monitor = ProviderHealthMonitor(cache_seconds=30, clock=clock)
+
+        await monitor.get_health()
+        clock.now += 10
+        cached = await monitor.get_health()
+        calls = llm_service.test_connection.await_count
+
+        assert cached["age_seconds"] == 10
+        assert calls == len(PROVIDER_VALIDATORS)
+
+        await monitor.get_health(refresh=True)
+        clock.now += 31
+        await monitor.get_health()
+        assert llm_service.test_connection.await_count == 3 * calls
+
+    @pytest.mark.asyncio
+    async def test_concurrent_readers_share_one_check(self, llm_service):
+        monitor = ProviderHealthMonitor()
+
+        await asyncio.gather(*(monitor.get_health() for _ in range(5)))
+
+        assert llm_service.test_connection.await_count == len(PROVIDER_VALIDATORS)
+
+    @pytest.mark.asyncio
+    async def test_background_refresher_warms_the_cache(self, llm_service):
+        monitor = ProviderHealthMonitor(refresh_interval_seconds=60)
+
+        monitor.start()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+        assert monitor._snapshot is not None
+        assert not monitor.is_running
+
+
+class TestUnifiedConnectionTest:
+    """Test UnifiedLLMService.test_connection"""
+
+    @pytest.mark.asyncio
+    async def test_connection_result(self):
+        service = Mock()
+        service.test_connection.return_value = {"status": "error", "error": "No API key"}
+        unified = UnifiedLLMService()
+
+        with patch.object(unified, "_get_service_for_provider", return_value=service):
+            result = await unified.test_connection("openai")
+
+        assert result["success"] is False
+        assert result["error"] == "No API key"
+        assert result["response_time"] is not None
+
+    @pytest.mark.asyncio
+    async def test_unavailable_service(self):
+        unified = UnifiedLLMService()
+
+        with patch.object(unified, "_get_service_for_provider", return_value=None):
+            result = await unified.test_connection("grok")
+
+        assert result == {"success": False, "error": "grok service is not available", "response_time": None}
+
@@ -0,0 +1,194 @@
+"""
+Unit tests for the shared LLM provider rate limiter
+
+Tests token bucket refill, requests/tokens per minute limits, priority
+ordering of queued requests, 429 handling, and the service decorator.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import Mock
+
+from services.model_registry import ModelRegistry
+from services.rate_limiter import (
+    TokenBucket, RateLimiter, RateLimiterRegistry, RateLimitTimeout,
+    estimate_request_tokens, is_rate_limit_error, llm_request_priority, rate_limited
+)
+from tests.conftest import FakeClock
+
+
+class TestTokenBucket:
+    """Test the token bucket"""
+
+    def test_refills_up_to_capacity(self):
+        """Test that tokens refill over time without exceeding capacity"""
+        clock = FakeClock()
+        bucket = TokenBucket(capacity=10, refill_per_second=2, clock=clock)
+        assert bucket.try_consume(10)
+        assert not bucket.try_consume(1)
+        assert bucket.time_until(4) == 2.0
+
+        clock.now += 2
+        assert bucket.try_consume(4)
+        clock.now += 100
+        assert bucket.available == 10
+
+
+class TestRateLimiter:
+    """Test the provider/model limiter"""
+
+    @pytest.mark.asyncio
+    async def test_unlimited_limiter_never_waits(self):
+        """Test that a limiter with no limits grants immediately"""
+        limiter = RateLimiter("openai", "gpt-4o")
+        assert not limiter.enabled
+        assert await limiter.acquire(10 ** 9) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_requests_per_minute_throttles(self):
+        """Test that requests beyond the bucket wait for refill"""
+        limiter = RateLimiter("openai", "gpt-4o", requests_per_minute=600)
+        limiter._request_bucket._tokens = 1
+
+        assert await limiter.acquire() == 0.0
+        waited = await limiter.acquire()
+        assert 0.05 <= waited < 1.0
+        assert limiter.get_stats()["throttled_requests"] == 1
+
+    @pytest.mark.asyncio
+    async def test_tokens_per_minute_throttles(self):
+        """Test that estimated tokens draw from the tokens-per-minute bucket"""
+        limiter = RateLimiter("anthropic", requests_per_minute=0, tokens_per_minute=60000)
+        assert await limiter.acquire(59900) == 0.0
+        waited = await limiter.acquire(200)
+        assert 0.05 <= waited < 1.0
+
+    @pytest.mark.asyncio
+    async def test_oversized_request_is_capped_to_bucket(self):
+        """Test that a request larger than the bucket does not wait forever"""
+        limiter = RateLimiter("anthropic", tokens_per_minute=1000)
+        assert await limiter.acquire(5000) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_higher_priority_jumps_the_line(self):
+        """Test that queued requests are served by priority, then arrival"""
+        limiter = RateLimiter("openai", "gpt-4o", requests_per_minute=1200)
+        limiter._request_bucket._tokens = 0
+        order = []
+
+        async def request(name, priority):
+            await limiter.acquire(priority=priority)
+            order.append(name)
+
+        low = asyncio.create_task(request("low", 0))
+        normal = asyncio.create_task(request("normal", 5))
+        await asyncio.sleep(0)
+        with llm_request_priority(10):
+            critical = asyncio.create_task(request("critical", None))
+        await asyncio.gather(low, normal, critical)
+
+        assert order == ["critical", "normal", "low"]
+
+    @pytest.mark.asyncio
+    async def test_timeout_releases_queue(self):
+        """Test that a timed-out waiter does not block the requests behind it"""
+        limiter = RateLimiter("openai", requests_per_minute=60, tokens_per_minute=0)
+        limiter._request_bucket._tokens = 0
+
+        with pytest.raises(RateLimitTimeout):
+            await limiter.acquire(priority=10, timeout=0.01)
+        assert limiter.get_stats()["waiting"] == 0
+
+    @pytest.mark.asyncio
+    async def test_penalize_pauses_limiter(self):
+        """Test that a 429 pauses the limiter for the retry-after period"""
+        limiter = RateLimiter("grok", requests_per_minute=600)
+        limiter.penalize(0.1)
+
+        assert limiter.get_stats()["rate_limited_responses"] == 1
+        waited = await limiter.acquire()
+        assert waited >= 0.05
+
+
+class TestHelpers:
+    """Test token estimation and 429 detection"""
+
+    def test_estimate_request_tokens(self):
+        """Test the characters-per-token estimate plus output allowance"""
+        assert estimate_request_tokens("x" * 400, "y" * 40, max_tokens=100) == 211
+        assert estimate_request_tokens("x" * 4) == 514
+
+    def test_detects_wrapped_rate_limit_error(self):
+        """Test that 429s are recognised through the services' RuntimeError wrapping"""
+        provider_error = Exception("Too many requests")
+        provider_error.status_code = 429
+        try:
+            try:
+                raise provider_error
+            except Exception as e:
+                raise RuntimeError(f"LLM query failed: {e}")
+        except RuntimeError as wrapped:
+            assert is_rate_limit_error(wrapped)
+
+        assert not is_rate_limit_error(RuntimeError("LLM query failed: boom"))
+
+
+class TestRateLimitedDecorator:
+    """Test the service method decorator"""
+
+    @pytest.mark.asyncio
+    async def test_uses_config_limits_and_penalizes_429(self, monkeypatch):
+        """Test that limits come from the provider config and 429s pause the limiter"""
+        registry = RateLimiterRegistry()
+        monkeypatch.setattr("services.rate_limiter.get_rate_limiters", lambda: registry)
+
+        class Service:
+            def __init__(self):
+                self._config = Mock(default_model="model-a")
+                self._config.get_rate_limits.return_value = {"requests_per_minute": 100, "tokens_per_minute": 0}
+
+            @rate_limited("fake", "_config")
+            async def query(self, prompt, model=None, **kwargs):
+                if prompt == "fail":
+                    error = Exception("rate limited")
+                    error.status_code = 429
+                    raise error
+                return "ok"
+
+        service = Service()
+        assert await service.query("hello") == "ok"
+        service._config.get_rate_limits.assert_called_with("model-a")
+
+        with pytest.raises(Exception):
+            await service.query("fail")
+
+        stats = registry.get_provider_stats("fake")["model-a"]
+        assert stats["requests_per_minute"] == 100
+        assert stats["total_requests"] == 2
+        assert stats["rate_limited_responses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_model_spellings_share_one_limiter(self, monkeypatch):
+        """Test that casings and unknown names of a model cannot bypass the shared budget"""
+        registry = RateLimiterRegistry()
+        models = ModelRegistry(remote_refresh=False)
+        models.register("fake", lambda: ["model-a", "model-b"])
+        monkeypatch.setattr("services.rate_limiter.get_rate_limiters", lambda: registry)
+        monkeypatch.setattr("services.llm_utils.get_model_registry", lambda: models)
+
+        class Service:
+            def __init__(self):
+                self._config = Mock(default_model="model-a")
+                self._config.get_rate_limits.return_value = {"requests_per_minute": 100}
+
+            @rate_limited("fake", "_config")
+            async def query(self, prompt, model=None, **kwargs):
+                return "ok"
+
+        service = Service()
+        for model in (None, "model-a", "MODEL-A", "modle-a", "model-b"):
+            await service.query("hello", model=model)
+
+        stats = registry.get_provider_stats("fake")
+        assert set(stats) == {"model-a", "model-b"}
+        assert stats["model-a"]["total_requests"] == 4
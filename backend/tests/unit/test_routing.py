@@ -0,0 +1,133 @@
+"""
+Unit tests for LLM provider routing
+
+Tests EWMA tracking in ConnectionHealthTracker, the routing policies, and
+routing decisions made by UnifiedLLMService.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from services.circuit_breaker import CircuitBreakerRegistry
+from services.llm_service import UnifiedLLMService
+from services.llm_utils import ConnectionHealthTracker
+from services.routing import (
+    ProviderRouter, RouteCandidate, NoRouteError, bind_routing_log, record_routing_decision
+)
+
+
+def candidates():
+    return [
+        RouteCandidate("openai", "gpt-4o", latency_seconds=2.0, cost_per_1k_tokens=0.02, context_window=128000),
+        RouteCandidate("google", latency_seconds=0.8, cost_per_1k_tokens=0.0005, context_window=1048576),
+        RouteCandidate("anthropic", latency_seconds=0.5, error_rate=0.7, cost_per_1k_tokens=0.018),
+        RouteCandidate("grok", latency_seconds=0.6, cost_per_1k_tokens=0.0001, context_window=8192),
+    ]
+
+
+class TestEwmaTracking:
+    """Test EWMA latency and error rate in ConnectionHealthTracker"""
+
+    def test_ewma_follows_recent_outcomes(self):
+        """Test that the averages move toward recent outcomes"""
+        tracker = ConnectionHealthTracker("test", ewma_alpha=0.5)
+        tracker.record_request(success=True, response_time=1.0)
+        tracker.record_request(success=True, response_time=3.0)
+        tracker.record_request(success=False, response_time=30.0)
+
+        assert tracker.ewma_response_time == 2.0
+        assert tracker.ewma_error_rate == 0.5
+        status = tracker.get_health_status()
+        assert status["ewma_response_time_seconds"] == 2.0
+        assert status["ewma_error_rate_percent"] == 50.0
+
+
+class TestProviderRouter:
+    """Test routing policies"""
+
+    def setup_method(self):
+        self.router = ProviderRouter(max_error_rate=0.5)
+
+    def test_fastest_skips_unhealthy(self):
+        """Test that the fastest healthy candidate wins over a faster failing one"""
+        decision = self.router.choose("fastest", "openai", "gpt-4o", candidates())
+        assert decision.provider == "grok"
+        assert decision.rerouted
+
+    def test_fastest_respects_context_window(self):
+        """Test that candidates too small for the request are excluded"""
+        decision = self.router.choose("fastest", "openai", "gpt-4o", candidates(), required_tokens=50000)
+        assert decision.provider == "google"
+
+    def test_cheapest(self):
+        """Test that the cheapest healthy candidate is chosen"""
+        decision = self.router.choose("cheapest", "openai", "gpt-4o", candidates(), required_tokens=20000)
+        assert decision.provider == "google"
+        assert decision.reason == "lowest cost per token"
+
+    def test_preferred_keeps_available_provider(self):
+        """Test that the requested provider is used while it is available"""
+        decision = self.router.choose("preferred", "openai", "gpt-4o", candidates())
+        assert (decision.provider, decision.model) == ("openai", "gpt-4o")
+        assert not decision.rerouted
+
+    def test_preferred_falls_back_to_fastest(self):
+        """Test that an unavailable requested provider falls back to the fastest healthy one"""
+        routes = candidates()
+        routes[0].available = False
+        decision = self.router.choose("preferred", "openai", "gpt-4o", routes)
+        assert decision.provider == "grok"
+        assert decision.reason.startswith("requested provider unavailable")
+
+    def test_pinned_never_falls_back(self):
+        """Test that a pinned provider raises instead of rerouting"""
+        routes = candidates()
+        routes[0].available = False
+        with pytest.raises(NoRouteError):
+            self.router.choose("pinned", "openai", "gpt-4o", routes)
+
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError):
+            self.router.choose("random", "openai", None, candidates())
+
+    def test_decisions_recorded_in_bound_log(self):
+        """Test that decisions are collected only while a routing log is bound"""
+        decision = self.router.choose("fastest", "openai", "gpt-4o", candidates())
+        record_routing_decision(decision)
+
+        with bind_routing_log() as routing_log:
+            record_routing_decision(decision)
+
+        assert len(routing_log) == 1
+        assert routing_log[0]["provider"] == "grok"
+        assert routing_log[0]["requested_provider"] == "openai"
+        assert len(routing_log[0]["candidates"]) == 4
+
+
+class TestUnifiedServiceRouting:
+    """Test routing in UnifiedLLMService"""
+
+    @pytest.mark.asyncio
+    async def test_fastest_routes_by_tracked_latency(self):
+        """Test that the fastest policy sends the request to the lowest-latency provider"""
+        service = UnifiedLLMService()
+        breakers = CircuitBreakerRegistry()
+        slow, fast = AsyncMock(), AsyncMock()
+        slow.query.return_value = "slow"
+        fast.query.return_value = "fast"
+        breakers.get("openai").tracker.record_request(success=True, response_time=3.0)
+        breakers.get("google").tracker.record_request(success=True, response_time=0.5)
+
+        with patch.object(service, '_get_openai_service', return_value=slow), \
+             patch.object(service, '_get_google_service', return_value=fast), \
+             patch.object(service, 'get_available_providers', return_value=["openai", "google"]), \
+             patch.object(service, '_get_model_info', return_value={}), \
+             patch('services.llm_service.get_circuit_breakers', return_value=breakers):
+            with bind_routing_log() as routing_log:
+                result = await service.query("Prompt", provider="openai", routing="fastest")
+                pinned = await service.query("Prompt", provider="openai", routing="pinned")
+
+        assert result == "fast"
+        assert pinned == "slow"
+        assert [entry["provider"] for entry in routing_log] == ["google", "openai"]
+        assert routing_log[0]["rerouted"] is True
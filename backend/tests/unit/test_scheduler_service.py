@@ -90,7 +90,7 @@ class MockJobPipelineScheduler:
         
     async def submit_job(self, job_id: str, user_id: str, agent_name: str, 
                         job_data: Dict[str, Any], priority: int = 5, 
-                        tags: List[str] = None) -> bool:
+                        tags: List[str] = None, metadata: Dict[str, Any] = None) -> bool:
         """Mock job submission."""
         if hasattr(self, 'submission_error'):
             raise self.submission_error
@@ -101,7 +101,8 @@ class MockJobPipelineScheduler:
             "agent_name": agent_name,
             "job_data": job_data,
             "priority": priority,
-            "tags": tags or []
+            "tags": tags or [],
+            "metadata": metadata or {}
         }
         self.submitted_jobs.append(job_record)
         return True
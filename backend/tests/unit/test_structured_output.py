@@ -0,0 +1,141 @@
+"""
+Unit tests for structured LLM output parsing
+
+Tests one-pass extraction of the first balanced JSON value from LLM output,
+validation against example-style and JSON Schema style schemas, and native
+JSON modes in the providers' structured queries.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from services.llm_utils import (
+    SENTIMENT_ANALYSIS_SCHEMA, extract_json, parse_json_response, validate_json_schema
+)
+
+
+class TestExtractJson:
+    """Test locating JSON in LLM output"""
+
+    def test_bare_fenced_and_surrounded_json(self):
+        assert extract_json('{"a": 1}') == {"a": 1}
+        assert extract_json('```json\n{"a": [1, 2]}\n```') == {"a": [1, 2]}
+        assert extract_json('Sure! Here it is: {"a": 1} Hope that helps {really}.') == {"a": 1}
+
+    def test_brackets_inside_strings_are_ignored(self):
+        text = 'Result: {"text": "a } tricky \\" { string ]", "n": 2} done'
+        assert extract_json(text) == {"text": 'a } tricky " { string ]', "n": 2}
+
+    def test_skips_invalid_candidates(self):
+        """Test that prose in braces is skipped, and nested fragments of it are never returned"""
+        assert extract_json('Use {placeholders like {"x": 1} here} then {"a": 1}') == {"a": 1}
+        assert extract_json('See [1] for details: {"a": 1}', expected_type=dict) == {"a": 1}
+        assert extract_json('Items: [{"a": 1}]', expected_type=list) == [{"a": 1}]
+
+    def test_truncated_json_is_not_parsed(self):
+        """Test that a truncated object does not yield its complete inner object"""
+        with pytest.raises(ValueError):
+            extract_json('{"outer": {"inner": 1}, "rest": "cut o')
+        with pytest.raises(ValueError):
+            extract_json("No JSON here")
+
+
+class TestSchemaValidation:
+    """Test validation against structured query schemas"""
+
+    def test_example_schema(self):
+        valid = {"sentiment": "positive", "confidence": 0.9, "emotions": ["joy"], "explanation": "..."}
+        assert validate_json_schema(valid, SENTIMENT_ANALYSIS_SCHEMA) == []
+
+        errors = validate_json_schema(
+            {"sentiment": "positive", "confidence": "high", "emotions": "joy"}, SENTIMENT_ANALYSIS_SCHEMA
+        )
+        assert "field 'confidence': expected number, got string" in errors
+        assert "field 'emotions': expected array, got string" in errors
+        assert "missing required field 'explanation'" in errors
+
+    def test_nested_placeholder_keys_are_not_required(self):
+        schema = {"categories": {"keyword": "category mappings"}}
+        assert validate_json_schema({"categories": {"python": "language"}}, schema) == []
+
+    def test_json_schema_style(self):
+        schema = {"type": "object", "properties": {"name": {"type": "string"}}, "required": ["name"]}
+        assert validate_json_schema({"name": "x"}, schema) == []
+        assert validate_json_schema({}, schema) == ["missing required field 'name'"]
+
+    def test_parse_json_response_reports_validation_errors(self):
+        result = parse_json_response('{"result": "ok"}', {"result": "string", "score": "number"})
+
+        assert result["error"] == "JSON response does not match the requested schema"
+        assert result["validation_errors"] == ["missing required field 'score'"]
+        assert parse_json_response('{"result": "ok"}', {"score": "number"}, validate=False) == {"result": "ok"}
+
+
+class TestNativeJsonModes:
+    """Test that structured queries request native JSON output"""
+
+    @pytest.mark.asyncio
+    async def test_openai_requests_json_object(self):
+        from services.openai_service import OpenAIService
+
+        with patch('services.openai_service.get_openai_config'), \
+             patch('services.openai_service.openai.AsyncOpenAI'):
+            service = OpenAIService()
+        service._openai_config.default_model = 'gpt-4o-mini'
+        service.query = AsyncMock(return_value='{"result": "ok"}')
+
+        result = await service.query_structured("Prompt", {"result": "string"})
+
+        assert result == {"result": "ok"}
+        assert service.query.call_args[1]["response_format"] == {"type": "json_object"}
+
+    @pytest.mark.asyncio
+    async def test_anthropic_prefills_reply(self):
+        """Test that the prefilled brace is sent and restored in the response"""
+        from services.anthropic_service import AnthropicService
+
+        with patch('services.anthropic_service.get_anthropic_config'), \
+             patch('services.anthropic_service.anthropic.AsyncAnthropic'):
+            service = AnthropicService()
+        service._anthropic_config.get_available_models.return_value = ['claude-3-5-haiku-20241022']
+        service._anthropic_config.default_model = 'claude-3-5-haiku-20241022'
+        response = Mock()
+        response.content = [Mock(text='"result": "ok"}')]
+        service._client.messages.create = AsyncMock(return_value=response)
+
+        result = await service.query_structured("Prompt", {"result": "string"})
+
+        assert result == {"result": "ok"}
+        messages = service._client.messages.create.call_args[1]["messages"]
+        assert messages[-1] == {"role": "assistant", "content": "{"}
+
+    @pytest.mark.asyncio
+    async def test_malformed_output_retries_without_delay(self):
+        from services.openai_service import OpenAIService
+
+        with patch('services.openai_service.get_openai_config'), \
+             patch('services.openai_service.openai.AsyncOpenAI'):
+            service = OpenAIService()
+        service._openai_config.default_model = 'gpt-4o-mini'
+        service.query = AsyncMock(side_effect=['{"result": ', '{"result": "ok"}'])
+
+        with patch('services.openai_service.asyncio.sleep') as mock_sleep:
+            result = await service.query_structured("Prompt", {"result": "string"})
+
+        assert result == {"result": "ok"}
+        assert service.query.call_count == 2
+        mock_sleep.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_native_json_mode_can_be_disabled(self):
+        from services.openai_service import OpenAIService
+
+        with patch('services.openai_service.get_openai_config'), \
+             patch('services.openai_service.openai.AsyncOpenAI'):
+            service = OpenAIService()
+        service.query = AsyncMock(return_value='{"result": "ok"}')
+
+        with patch('config.environment.get_settings', return_value=Mock(llm_native_json_mode=False)):
+            await service.query_structured("Prompt", {"result": "string"})
+
+        assert "response_format" not in service.query.call_args[1]
@@ -0,0 +1,207 @@
+"""
+Unit tests for token estimation and context-window budgeting
+
+Tests the per-family heuristics and tokenizer plug-ins, trimming and
+chunking on natural boundaries, the overflow policies, and budgeting in
+UnifiedLLMService before requests reach a provider.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from config.anthropic import AnthropicConfig
+from job_progress import JobProgressBuffer, bind_job_progress
+from services.llm_service import UnifiedLLMService
+from services.token_budget import (
+    TRIM_MARKER, ContextWindowExceededError, TokenEstimator, budget_prompt,
+    get_context_window
+)
+
+
+def long_prompt(sentences=2000):
+    body = " ".join(f"Sentence number {i} says something." for i in range(sentences))
+    return f"Follow these instructions.\n\n{body}\n\nWhat is the answer?"
+
+
+class TestTokenEstimator:
+    """Test token estimates"""
+
+    def setup_method(self):
+        self.estimator = TokenEstimator()
+
+    def test_family_heuristics(self):
+        """Test characters-per-token ratios per provider family"""
+        text = "x" * 700
+        assert self.estimator.estimate(text, "openai") == 175
+        assert self.estimator.estimate(text, "anthropic") == 200
+        assert self.estimator.estimate("", "openai") == 0
+        assert self.estimator.estimate(None) == 0
+
+    def test_non_ascii_counts_about_one_token_per_character(self):
+        assert self.estimator.estimate("日本語のテキスト", "google") == 8
+        assert self.estimator.estimate("abcd日本", "openai") == 3
+
+    def test_tokenizer_plugin_takes_precedence(self):
+        """Test that a registered counter replaces the heuristic for its provider family"""
+        self.estimator.register_tokenizer("openai", lambda text, model: len(text.split()))
+
+        assert self.estimator.estimate("one two three", "grok") == 3
+        assert self.estimator.estimate("one two three", "anthropic") == 4
+
+    def test_estimate_request_includes_output_and_overhead(self):
+        assert self.estimator.estimate_request("x" * 400, "y" * 40, 100, "openai") == 100 + 10 + 8 + 100
+
+
+class TestTrimAndSplit:
+    """Test fitting text to a budget"""
+
+    def setup_method(self):
+        self.estimator = TokenEstimator()
+
+    def test_truncate_ends_on_sentence_boundary(self):
+        text = long_prompt()
+        truncated = self.estimator.truncate(text, 300, "openai")
+
+        assert self.estimator.estimate(truncated, "openai") <= 300
+        assert truncated.endswith("something.")
+        assert self.estimator.truncate("short", 300, "openai") == "short"
+
+    def test_trim_middle_keeps_instructions_and_question(self):
+        """Test that trimming keeps the start and end of the prompt"""
+        trimmed = self.estimator.trim_middle(long_prompt(), 500, "openai")
+
+        assert self.estimator.estimate(trimmed, "openai") <= 500
+        assert trimmed.startswith("Follow these instructions.")
+        assert trimmed.endswith("What is the answer?")
+        assert TRIM_MARKER in trimmed
+
+    def test_split_covers_text_in_fitting_chunks(self):
+        """Test that chunks fit the budget and together hold all the text"""
+        text = long_prompt()
+        chunks = self.estimator.split(text, 1000, "openai")
+
+        assert len(chunks) > 1
+        assert all(self.estimator.estimate(chunk, "openai") <= 1000 for chunk in chunks)
+        assert " ".join(chunks).split() == text.split()
+
+
+class TestBudgetPrompt:
+    """Test the overflow policies"""
+
+    def test_fitting_prompt_is_unchanged(self):
+        assert budget_prompt("Hello", 8192, "error", "openai") == ["Hello"]
+        assert budget_prompt(long_prompt(), None, "error", "openai") == [long_prompt()]
+        assert budget_prompt(long_prompt(), 1000, "off", "openai") == [long_prompt()]
+
+    def test_policies(self):
+        """Test that over-length prompts are trimmed, chunked or rejected"""
+        prompt = long_prompt()
+        estimator = TokenEstimator()
+
+        trimmed = budget_prompt(prompt, 4096, "trim", "openai", max_tokens=1000)
+        assert len(trimmed) == 1
+        assert estimator.estimate_request(trimmed[0], None, 1000, "openai") <= 4096
+
+        chunks = budget_prompt(prompt, 4096, "chunk", "openai", max_tokens=1000)
+        assert len(chunks) > 1
+
+        with pytest.raises(ContextWindowExceededError) as exc_info:
+            budget_prompt(prompt, 4096, "error", "openai", max_tokens=1000)
+        assert exc_info.value.context_window == 4096
+
+    def test_no_room_for_prompt_raises(self):
+        """Test that trimming is not attempted when the output allowance fills the window"""
+        with pytest.raises(ContextWindowExceededError):
+            budget_prompt(long_prompt(), 4096, "trim", "openai", max_tokens=4090)
+
+
+class TestContextWindowRegistry:
+    """Test context windows in the provider configurations"""
+
+    def test_config_context_windows(self, monkeypatch):
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test")
+        config = AnthropicConfig()
+
+        assert config.get_context_window("claude-3-5-haiku-20241022") == 200000
+        assert config.get_context_window("claude-unknown") is None
+
+    def test_model_without_specs_is_not_budgeted(self, monkeypatch):
+        """Test that a prompt for a model with an unknown window is sent whole"""
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        prompt = "word " * 40000
+
+        context_window = get_context_window("openai", "gpt-4.1")
+
+        assert context_window is None
+        assert budget_prompt(prompt, context_window, "trim", "openai", "gpt-4.1") == [prompt]
+
+
+class TestUnifiedServiceBudgeting:
+    """Test budgeting in UnifiedLLMService"""
+
+    def setup_method(self):
+        self.service = UnifiedLLMService()
+        self.provider = AsyncMock()
+        self.provider.query.side_effect = lambda prompt, **kwargs: f"answer {len(prompt)}"
+
+    def patched(self, context_window=4096):
+        return patch.multiple(
+            self.service,
+            _get_openai_service=lambda: self.provider,
+            _get_context_window=lambda provider, model=None: context_window
+        )
+
+    @pytest.mark.asyncio
+    async def test_query_trims_before_sending(self):
+        """Test that an over-length prompt is trimmed rather than rejected by the provider"""
+        with self.patched():
+            await self.service.query(long_prompt(), provider="openai", context_overflow="trim")
+
+        sent = self.provider.query.call_args[1]["prompt"]
+        assert TRIM_MARKER in sent
+        assert sent.endswith("What is the answer?")
+
+    @pytest.mark.asyncio
+    async def test_query_chunks_and_joins_answers(self):
+        with self.patched():
+            result = await self.service.query(long_prompt(), provider="openai", context_overflow="chunk")
+
+        assert self.provider.query.call_count > 1
+        assert result.count("answer") == self.provider.query.call_count
+
+    @pytest.mark.asyncio
+    async def test_chunked_query_streams_into_job_progress_in_order(self):
+        """Test that chunk answers inside a job do not interleave in its progress buffer"""
+        async def stream(prompt, **kwargs):
+            for word in f"answer {len(prompt)}".split(" "):
+                await asyncio.sleep(0)
+                yield word + " "
+
+        self.provider.query_stream = stream
+        buffer = JobProgressBuffer("job-1")
+        with self.patched(), bind_job_progress(buffer):
+            result = await self.service.query(long_prompt(), provider="openai", context_overflow="chunk")
+
+        assert result.count("answer") > 1
+        assert buffer.read()["text"] == result
+
+    @pytest.mark.asyncio
+    async def test_error_policy_skips_provider_call(self):
+        """Test that the error policy fails fast without a wasted round trip"""
+        with self.patched():
+            with pytest.raises(ContextWindowExceededError):
+                await self.service.query(long_prompt(), provider="openai", context_overflow="error")
+
+        self.provider.query.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_structured_query_trims_instead_of_chunking(self):
+        self.provider.query_structured.return_value = {"ok": True}
+        with self.patched():
+            await self.service.query_structured(
+                long_prompt(), {"ok": "bool"}, provider="openai", context_overflow="chunk"
+            )
+
+        assert self.provider.query_structured.call_count == 1
+        assert TRIM_MARKER in self.provider.query_structured.call_args[1]["prompt"]
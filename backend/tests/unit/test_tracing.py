@@ -0,0 +1,284 @@
+"""
+Unit tests for the in-process tracing system.
+"""
+
+import asyncio
+import json
+import time
+import pytest
+from unittest.mock import patch, AsyncMock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from tracing import (
+    Tracer, RingBufferExporter, OTLPFileExporter, TracingMiddleware, SpanContext,
+    get_current_span, get_current_span_context, STATUS_ERROR
+)
+from auth import get_current_user
+from services.llm_utils import instrument_llm_call, instrument_llm_stream
+from services.usage import record_llm_usage
+
+
+@pytest.fixture
+def tracer():
+    """Create an isolated tracer with a small ring buffer."""
+    return Tracer(ring_buffer=RingBufferExporter(capacity=100))
+
+
+class TestSpans:
+    """Test span creation and parent/child links"""
+
+    def test_nested_spans_share_trace(self, tracer):
+        """Test that nested spans are linked to their parent"""
+        with tracer.start_span("parent") as parent:
+            with tracer.start_span("child") as child:
+                assert get_current_span() is child
+            assert get_current_span() is parent
+
+        assert child.trace_id == parent.trace_id
+        assert child.parent_id == parent.span_id
+        assert parent.parent_id is None
+        assert get_current_span() is None
+
+    def test_explicit_parent(self, tracer):
+        """Test that an explicit parent context links spans across tasks"""
+        parent = SpanContext(trace_id="a" * 32, span_id="b" * 16)
+
+        with tracer.start_span("job", parent=parent) as span:
+            pass
+
+        assert span.trace_id == "a" * 32
+        assert span.parent_id == "b" * 16
+
+    def test_exception_marks_span_failed(self, tracer):
+        """Test that exceptions are recorded on the span and re-raised"""
+        with pytest.raises(ValueError):
+            with tracer.start_span("failing") as span:
+                raise ValueError("boom")
+
+        assert span.status_code == STATUS_ERROR
+        assert "boom" in span.status_message
+        assert span.end_time_ns is not None
+
+    def test_attributes_skip_none(self, tracer):
+        """Test that None attribute values are not recorded"""
+        with tracer.start_span("llm.query", attributes={"llm.model": None, "llm.service": "OpenAI"}) as span:
+            span.set_attribute("llm.response_chars", None)
+
+        assert span.attributes == {"llm.service": "OpenAI"}
+
+    def test_record_span(self, tracer):
+        """Test recording an already-finished operation"""
+        end = time.time_ns()
+        with tracer.start_span("job") as parent:
+            span = tracer.record_span("db.update jobs", start_time_ns=end - 5_000_000, end_time_ns=end)
+
+        assert span.parent_id == parent.span_id
+        assert span.duration_ms == pytest.approx(5.0)
+
+    def test_disabled_tracer_records_nothing(self):
+        """Test that a disabled tracer hands out non-recording spans"""
+        tracer = Tracer(ring_buffer=RingBufferExporter(capacity=10), enabled=False)
+
+        with tracer.start_span("ignored") as span:
+            span.set_attribute("key", "value")
+            assert get_current_span_context() is None
+
+        assert not span.is_recording
+        assert len(tracer.ring_buffer) == 0
+
+    @pytest.mark.asyncio
+    async def test_context_propagates_to_tasks(self, tracer):
+        """Test that spans started in child tasks link to the creating span"""
+        async def child():
+            with tracer.start_span("child") as span:
+                return span
+
+        with tracer.start_span("parent") as parent:
+            child_span = await asyncio.create_task(child())
+
+        assert child_span.parent_id == parent.span_id
+
+
+class TestLLMSpans:
+    """Test the spans of instrumented LLM service calls"""
+
+    class FakeService:
+        @instrument_llm_call("TraceTest")
+        async def query(self, prompt, model=None, **kwargs):
+            record_llm_usage("trace_test", model, 120, 30, cached_tokens=100)
+            return "ok"
+
+        @instrument_llm_stream("TraceTest")
+        async def query_stream(self, prompt, model=None, **kwargs):
+            yield "o"
+            yield "k"
+            record_llm_usage("trace_test", model, 40, 2)
+
+    def llm_spans(self, tracer):
+        return tracer.ring_buffer.get_spans(tracer.ring_buffer.find_trace_ids("llm.service", "TraceTest"))
+
+    @pytest.mark.asyncio
+    async def test_query_span_has_token_counts(self, tracer):
+        """Test that token counts reported by the provider are set on llm.query spans"""
+        with patch('tracing.get_tracer', return_value=tracer):
+            await self.FakeService().query("hello")
+
+        span = self.llm_spans(tracer)[0]
+        assert span.attributes["llm.prompt_tokens"] == 120
+        assert span.attributes["llm.completion_tokens"] == 30
+        assert span.attributes["llm.cached_tokens"] == 100
+
+    @pytest.mark.asyncio
+    async def test_stream_span_has_token_counts_of_the_stream_only(self, tracer):
+        """Test that the consumer's own LLM calls between chunks are not counted on the stream span"""
+        service = self.FakeService()
+        with patch('tracing.get_tracer', return_value=tracer):
+            async for chunk in service.query_stream("hello"):
+                record_llm_usage("trace_test", None, 1000, 1000)
+
+        span = next(s for s in self.llm_spans(tracer) if s.name == "llm.stream")
+        assert span.attributes["llm.prompt_tokens"] == 40
+        assert span.attributes["llm.completion_tokens"] == 2
+
+
+class TestRingBuffer:
+    """Test the in-memory ring buffer exporter"""
+
+    def test_capacity_bound(self):
+        """Test that the buffer keeps only the newest spans"""
+        tracer = Tracer(ring_buffer=RingBufferExporter(capacity=5))
+        for i in range(20):
+            with tracer.start_span(f"span-{i}"):
+                pass
+
+        assert len(tracer.ring_buffer) == 5
+
+
+class TestJobWaterfall:
+    """Test per-job waterfall construction"""
+
+    def test_waterfall_includes_whole_trace(self, tracer):
+        """Test that all spans of a job's traces are returned in order with depth"""
+        with tracer.start_span("HTTP POST") as request_span:
+            request_context = request_span.context
+
+        with tracer.start_span("job", parent=request_context, attributes={"job.id": "job-1"}):
+            with tracer.start_span("agent.execute"):
+                with tracer.start_span("llm.query", attributes={"llm.service": "OpenAI"}):
+                    pass
+
+        with tracer.start_span("job", attributes={"job.id": "other-job"}):
+            pass
+
+        waterfall = tracer.get_job_waterfall("job-1")
+
+        names = [s["name"] for s in waterfall["spans"]]
+        assert names == ["HTTP POST", "job", "agent.execute", "llm.query"]
+        assert [s["depth"] for s in waterfall["spans"]] == [0, 1, 2, 3]
+        assert waterfall["spans"][0]["offset_ms"] == 0
+        assert "llm.query" in waterfall["breakdown_ms"]
+
+    def test_waterfall_unknown_job(self, tracer):
+        """Test waterfall for a job with no spans"""
+        waterfall = tracer.get_job_waterfall("missing")
+
+        assert waterfall["span_count"] == 0
+        assert waterfall["spans"] == []
+
+
+class TestOTLPFileExporter:
+    """Test OTLP/JSON file export"""
+
+    def test_writes_otlp_json_lines(self, tmp_path):
+        """Test that spans are written as OTLP export requests"""
+        path = tmp_path / "traces" / "spans.jsonl"
+        exporter = OTLPFileExporter(str(path), batch_size=2)
+        tracer = Tracer(ring_buffer=RingBufferExporter(capacity=10), exporters=[exporter])
+
+        with tracer.start_span("parent", attributes={"llm.prompt_chars": 42, "ok": True}):
+            with tracer.start_span("child"):
+                pass
+        exporter.shutdown()
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 1
+        request = json.loads(lines[0])
+        spans = request["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert [s["name"] for s in spans] == ["child", "parent"]
+        assert spans[0]["parentSpanId"] == spans[1]["spanId"]
+        assert {"key": "llm.prompt_chars", "value": {"intValue": "42"}} in spans[1]["attributes"]
+
+    def test_shutdown_flushes_partial_batch(self, tmp_path):
+        """Test that pending spans are flushed on shutdown"""
+        path = tmp_path / "spans.jsonl"
+        exporter = OTLPFileExporter(str(path), batch_size=100)
+        tracer = Tracer(ring_buffer=RingBufferExporter(capacity=10), exporters=[exporter])
+
+        with tracer.start_span("only"):
+            pass
+        assert not path.exists()
+
+        tracer.shutdown()
+        assert len(path.read_text().splitlines()) == 1
+
+
+class TestTracingMiddleware:
+    """Test HTTP request root spans"""
+
+    def test_request_span_recorded(self, tracer):
+        """Test that requests produce a root span with HTTP attributes"""
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        async def get_item(item_id: str):
+            with tracer.start_span("handler"):
+                return {"id": item_id}
+
+        app.add_middleware(TracingMiddleware, tracer=tracer)
+        response = TestClient(app).get("/items/1")
+
+        assert response.status_code == 200
+        spans = {s.name: s for s in tracer.ring_buffer.get_spans(
+            {s.trace_id for s in tracer.ring_buffer._spans})}
+        assert spans["HTTP GET"].attributes["http.status_code"] == 200
+        assert spans["handler"].parent_id == spans["HTTP GET"].span_id
+
+
+class TestJobTraceEndpoint:
+    """Test the /system/traces/{job_id} endpoint"""
+
+    @pytest.fixture
+    def client(self):
+        from routes.system import router
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_current_user] = lambda: {"id": "user123"}
+        return TestClient(app)
+
+    def test_returns_waterfall(self, client, tracer):
+        """Test waterfall retrieval for an owned job"""
+        with tracer.start_span("job", attributes={"job.id": "job-1"}):
+            pass
+
+        mock_db = AsyncMock()
+        mock_db.get_job.return_value = {"id": "job-1", "user_id": "user123"}
+        with patch('routes.system.get_database_operations', return_value=mock_db), \
+             patch('routes.system.get_tracer', return_value=tracer):
+            response = client.get("/system/traces/job-1")
+
+        data = response.json()
+        assert data["success"] is True
+        assert data["result"]["span_count"] == 1
+        mock_db.get_job.assert_called_once_with("job-1", user_id="user123")
+
+    def test_job_not_found(self, client):
+        """Test that traces of other users' jobs are not returned"""
+        mock_db = AsyncMock()
+        mock_db.get_job.return_value = None
+        with patch('routes.system.get_database_operations', return_value=mock_db):
+            response = client.get("/system/traces/job-1")
+
+        data = response.json()
+        assert data["success"] is False
+        assert data["metadata"]["error_code"] == "JOB_NOT_FOUND"
@@ -0,0 +1,191 @@
+"""
+Unit tests for LLM token and cost accounting
+
+Tests usage extraction from provider responses, cost estimates with cached
+token discounts, per-job usage ledgers and the daily rollups behind
+/pipeline/usage.
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+from config.local import LocalConfig
+from services.local_service import LocalLLMService
+from services.model_registry import ModelRegistry
+from services.rate_limiter import RateLimiterRegistry
+from services.usage import (
+    LLM_TOKENS, UsageAccounting, UsageLedger, bind_usage_ledger, estimate_cost, get_usage_accounting,
+    get_usage_ledger, record_llm_usage, usage_from_anthropic, usage_from_gemini, usage_from_openai
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_accounting():
+    get_usage_accounting().clear()
+    yield
+    get_usage_accounting().clear()
+
+
+class TestUsageExtraction:
+    """Test token counts from provider SDK responses"""
+
+    def test_openai_and_deepseek_cached_tokens(self):
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=20,
+                                prompt_tokens_details=SimpleNamespace(cached_tokens=64))
+        assert usage_from_openai(usage) == {"prompt_tokens": 100, "completion_tokens": 20, "cached_tokens": 64}
+
+        deepseek = SimpleNamespace(prompt_tokens=100, completion_tokens=20, prompt_cache_hit_tokens=80)
+        assert usage_from_openai(deepseek)["cached_tokens"] == 80
+
+    def test_anthropic_prompt_includes_cache_reads_and_writes(self):
+        usage = SimpleNamespace(input_tokens=10, output_tokens=5, cache_read_input_tokens=300,
+                                cache_creation_input_tokens=50)
+        assert usage_from_anthropic(usage) == {
+            "prompt_tokens": 360, "completion_tokens": 5, "cached_tokens": 300, "cache_write_tokens": 50
+        }
+        assert usage_from_anthropic(usage, output_tokens=42)["completion_tokens"] == 42
+
+    def test_gemini(self):
+        metadata = SimpleNamespace(prompt_token_count=12, candidates_token_count=3, cached_content_token_count=None)
+        assert usage_from_gemini(metadata) == {"prompt_tokens": 12, "completion_tokens": 3, "cached_tokens": 0}
+
+    def test_missing_or_mocked_usage_is_ignored(self):
+        assert usage_from_openai(None) is None
+        assert usage_from_openai(Mock()) is None
+        assert usage_from_anthropic(Mock()) is None
+        assert usage_from_gemini(None) is None
+
+
+class TestCostEstimate:
+    """Test pricing from the provider configurations"""
+
+    def test_cached_tokens_are_discounted(self):
+        with patch('services.usage.get_model_costs', return_value=(1.0, 2.0)):
+            assert estimate_cost("openai", "gpt-4o", 1000, 500) == pytest.approx(2.0)
+            assert estimate_cost("openai", "gpt-4o", 1000, 500, cached_tokens=1000) == pytest.approx(1.5)
+            assert estimate_cost("grok", "grok-3", 1000, 0, cached_tokens=1000) == pytest.approx(1.0)
+
+    def test_cache_writes_are_priced_at_the_write_rate(self):
+        with patch('services.usage.get_model_costs', return_value=(1.0, 2.0)):
+            assert estimate_cost("anthropic", "claude", 1000, 0, cache_write_tokens=1000) == pytest.approx(1.25)
+            assert estimate_cost("anthropic", "claude", 2000, 0, cached_tokens=1000,
+                                 cache_write_tokens=1000) == pytest.approx(1.35)
+
+    def test_unknown_prices(self):
+        with patch('services.usage.get_model_costs', return_value=None):
+            assert estimate_cost("grok", "grok-3", 1000, 500) is None
+
+
+class TestUsageLedger:
+    """Test per-job usage"""
+
+    def test_totals_by_provider_and_model(self):
+        ledger = UsageLedger(user_id="user-1", agent="simple_prompt")
+        ledger.record("openai", "gpt-4o", 100, 10, 0, 0.01)
+        ledger.record("openai", "gpt-4o-mini", 50, 5, 20, 0.001)
+        ledger.record("grok", "grok-3", 10, 1, 0, None)
+
+        data = ledger.to_dict()
+
+        assert data["calls"] == 3
+        assert data["total_tokens"] == 176
+        assert data["cost_usd"] == pytest.approx(0.011)
+        assert data["unpriced_calls"] == 1
+        assert data["by_provider"]["openai"]["cached_tokens"] == 20
+        assert set(data["by_provider"]["openai"]["models"]) == {"gpt-4o", "gpt-4o-mini"}
+
+    def test_nested_bindings_share_the_ledger(self):
+        """Test that an agent's binding inside the pipeline's does not split the job's usage"""
+        with bind_usage_ledger(user_id="user-1") as outer:
+            with bind_usage_ledger(agent="ignored") as inner:
+                record_llm_usage("grok", "grok-3", 10, 2)
+            assert inner is outer
+        assert outer.calls == 1
+        assert get_usage_ledger() is None
+
+    def test_metrics_use_catalog_model_label(self):
+        """Test that unvalidated model names share one metric series but stay in the ledger"""
+        registry = ModelRegistry(remote_refresh=False)
+        registry.register("grok", lambda: ["grok-3"])
+        before = LLM_TOKENS.get(provider="grok", model="other", kind="prompt")
+
+        with patch('services.llm_utils.get_model_registry', return_value=registry), \
+             bind_usage_ledger() as ledger:
+            record_llm_usage("grok", "GROK-3", 10, 2)
+            record_llm_usage("grok", "made-up-model", 7, 1)
+
+        assert LLM_TOKENS.get(provider="grok", model="other", kind="prompt") == before + 7
+        assert LLM_TOKENS.get(provider="grok", model="made-up-model", kind="prompt") == 0
+        assert set(ledger.to_dict()["by_provider"]["grok"]["models"]) == {"GROK-3", "made-up-model"}
+
+    @pytest.mark.asyncio
+    async def test_local_provider_usage_is_recorded(self, monkeypatch):
+        monkeypatch.setenv("LOCAL_LLM_ENABLED", "true")
+        monkeypatch.setenv("LOCAL_LLM_LATENCY_MS", "0")
+        monkeypatch.setattr("services.rate_limiter.get_rate_limiters", lambda: RateLimiterRegistry())
+        with patch("services.local_service.get_local_config", return_value=LocalConfig()):
+            service = LocalLLMService()
+
+        with bind_usage_ledger(user_id="user-1", agent="simple_prompt") as ledger:
+            await service.query("Summarize this text please")
+
+        assert ledger.calls == 1
+        assert ledger.total.prompt_tokens > 0
+        assert ledger.total.completion_tokens > 0
+
+    @pytest.mark.asyncio
+    async def test_openai_response_usage_is_recorded(self):
+        from services.openai_service import OpenAIService
+
+        with patch('services.openai_service.get_openai_config'), \
+             patch('services.openai_service.openai.AsyncOpenAI'):
+            service = OpenAIService()
+        service._openai_config.get_available_models.return_value = ['gpt-4o-mini']
+        service._openai_config.default_model = 'gpt-4o-mini'
+        response = Mock()
+        response.choices = [Mock(message=Mock(content="Hello"))]
+        response.usage = SimpleNamespace(prompt_tokens=30, completion_tokens=4, prompt_tokens_details=None)
+        service._client.chat.completions.create = AsyncMock(return_value=response)
+
+        with bind_usage_ledger() as ledger:
+            await service.query("Hi")
+
+        assert ledger.to_dict()["by_provider"]["openai"]["models"]["gpt-4o-mini"]["total_tokens"] == 34
+
+
+class TestUsageRollups:
+    """Test daily rollups"""
+
+    def setup_method(self):
+        self.now = datetime(2025, 3, 10, 12, tzinfo=timezone.utc)
+        self.accounting = UsageAccounting(retention_days=7, clock=lambda: self.now)
+
+    def test_group_by_and_user_filter(self):
+        self.accounting.record("openai", 100, 10, 0, 0.5, user_id="u1", agent="research")
+        self.accounting.record("openai", 100, 10, 0, 0.1, user_id="u1", agent="summary")
+        self.accounting.record("grok", 100, 10, 0, 0.2, user_id="u2", agent="research")
+
+        by_agent = self.accounting.get_rollups(group_by=["agent"])
+        assert [(row["agent"], row["calls"]) for row in by_agent] == [("research", 2), ("summary", 1)]
+        assert by_agent[0]["cost_usd"] == pytest.approx(0.7)
+
+        mine = self.accounting.get_rollups(group_by=["provider"], user_id="u1")
+        assert [(row["provider"], row["calls"]) for row in mine] == [("openai", 2)]
+
+    def test_days_window_and_retention(self):
+        self.accounting.record("openai", 100, 0, 0, 0.1, user_id="u1")
+        self.now += timedelta(days=3)
+        self.accounting.record("openai", 100, 0, 0, 0.1, user_id="u1")
+
+        assert len(self.accounting.get_rollups(group_by=["day"])) == 2
+        assert len(self.accounting.get_rollups(group_by=["day"], days=1)) == 1
+
+        self.now += timedelta(days=6)
+        self.accounting.record("openai", 100, 0, 0, 0.1, user_id="u1")
+        assert sorted(row["day"] for row in self.accounting.get_rollups(group_by=["day"])) == ["2025-03-13", "2025-03-19"]
+
+    def test_unknown_dimension(self):
+        with pytest.raises(ValueError, match="Unknown usage dimension"):
+            self.accounting.get_rollups(group_by=["model"])
@@ -0,0 +1,487 @@
+"""
+Lightweight in-process tracing for the AI Agent Platform.
+
+This module provides:
+- Spans with parent/child links propagated through contextvars
+- An in-memory ring buffer of finished spans for per-job waterfalls
+- Optional export to OTLP-compatible JSON files
+- Middleware that opens a root span for every HTTP request
+"""
+
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set
+
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from config.environment import get_settings
+from logging_system import get_logger
+
+logger = get_logger(__name__)
+
+SERVICE_NAME = "ai-agent-platform"
+
+# OTLP status codes
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('current_span', default=None)
+
+@dataclass(frozen=True)
+class SpanContext:
+    """Identifies a span so it can be used as a parent across tasks"""
+    trace_id: str
+    span_id: str
+
+class Span:
+    """A timed operation within a trace"""
+
+    __slots__ = (
+        'name', 'trace_id', 'span_id', 'parent_id', 'attributes',
+        'start_time_ns', 'end_time_ns', 'status_code', 'status_message'
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        span_id: str,
+        parent_id: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        start_time_ns: Optional[int] = None
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.attributes: Dict[str, Any] = attributes or {}
+        self.start_time_ns = start_time_ns if start_time_ns is not None else time.time_ns()
+        self.end_time_ns: Optional[int] = None
+        self.status_code = STATUS_UNSET
+        self.status_message: Optional[str] = None
+
+    @property
+    def context(self) -> SpanContext:
+        return SpanContext(self.trace_id, self.span_id)
+
+    @property
+    def is_recording(self) -> bool:
+        return True
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_time_ns is None:
+            return None
+        return (self.end_time_ns - self.start_time_ns) / 1_000_000
+
+    def set_attribute(self, key: str, value: Any):
+        """Set a single span attribute"""
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        """Set several span attributes"""
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_exception(self, exception: BaseException):
+        """Mark the span as failed with the given exception"""
+        self.status_code = STATUS_ERROR
+        self.status_message = f"{type(exception).__name__}: {exception}"
+
+    def end(self, end_time_ns: Optional[int] = None):
+        """End the span"""
+        if self.end_time_ns is None:
+            self.end_time_ns = end_time_ns if end_time_ns is not None else time.time_ns()
+            if self.status_code == STATUS_UNSET:
+                self.status_code = STATUS_OK
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert span to a plain dictionary"""
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time_ns": self.start_time_ns,
+            "end_time_ns": self.end_time_ns,
+            "duration_ms": self.duration_ms,
+            "status": "error" if self.status_code == STATUS_ERROR else "ok",
+            "status_message": self.status_message,
+            "attributes": dict(self.attributes)
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Convert span to the OTLP/JSON span representation"""
+        otlp_span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_time_ns),
+            "endTimeUnixNano": str(self.end_time_ns or self.start_time_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": self.status_code}
+        }
+        if self.parent_id:
+            otlp_span["parentSpanId"] = self.parent_id
+        if self.status_message:
+            otlp_span["status"]["message"] = self.status_message
+        return otlp_span
+
+class _NonRecordingSpan(Span):
+    """Span handed out when tracing is disabled; records nothing"""
+
+    def __init__(self):
+        super().__init__("noop", "0" * 32, "0" * 16)
+
+    @property
+    def is_recording(self) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def record_exception(self, exception: BaseException):
+        pass
+
+_NOOP_SPAN = _NonRecordingSpan()
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    """Encode an attribute as an OTLP KeyValue"""
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+class RingBufferExporter:
+    """Keeps the most recent finished spans in memory"""
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self._spans: Deque[Span] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        with self._lock:
+            self._spans.extend(spans)
+
+    def find_trace_ids(self, attribute: str, value: Any) -> Set[str]:
+        """Find traces containing a span with the given attribute value"""
+        with self._lock:
+            return {s.trace_id for s in self._spans if s.attributes.get(attribute) == value}
+
+    def get_spans(self, trace_ids: Set[str]) -> List[Span]:
+        """Get all buffered spans belonging to the given traces"""
+        with self._lock:
+            return [s for s in self._spans if s.trace_id in trace_ids]
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def shutdown(self):
+        pass
+
+class OTLPFileExporter:
+    """
+    Appends spans to a file as OTLP/JSON export requests, one request per line.
+
+    Spans are batched in memory and written when the batch is full or on
+    shutdown. Full batches are serialized and written by a writer thread, so
+    only the list swap happens on the caller's (event loop) thread.
+    """
+
+    def __init__(self, path: str, batch_size: int = 100):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending: List[Span] = []
+        self._lock = threading.Lock()
+        self._writer: Optional[ThreadPoolExecutor] = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: List[Span]):
+        with self._lock:
+            self._pending.extend(spans)
+            if len(self._pending) < self.batch_size:
+                return
+            batch, self._pending = self._pending, []
+        self._submit(batch)
+
+    def flush(self):
+        """Hand the pending spans to the writer thread"""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._submit(batch)
+
+    def shutdown(self):
+        """Write the pending spans and wait for the writer thread"""
+        self.flush()
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.shutdown(wait=True)
+
+    def _submit(self, spans: List[Span]):
+        # One writer thread keeps batches in export order
+        with self._lock:
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="otlp-export")
+            writer = self._writer
+        writer.submit(self._write, spans).add_done_callback(self._log_write_error)
+
+    @staticmethod
+    def _log_write_error(future: Future):
+        if future.exception() is not None:
+            logger.error(f"Failed to write trace spans: {future.exception()}")
+
+    def _write(self, spans: List[Span]):
+        request = {
+            "resourceSpans": [{
+                "resource": {
+                    "attributes": [_otlp_attribute("service.name", SERVICE_NAME)]
+                },
+                "scopeSpans": [{
+                    "scope": {"name": SERVICE_NAME},
+                    "spans": [span.to_otlp() for span in spans]
+                }]
+            }]
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(request, separators=(",", ":")) + "\n")
+
+class Tracer:
+    """Creates spans and hands finished spans to the configured exporters"""
+
+    def __init__(
+        self,
+        ring_buffer: Optional[RingBufferExporter] = None,
+        exporters: Optional[List[Any]] = None,
+        enabled: bool = True
+    ):
+        self.enabled = enabled
+        self.ring_buffer = ring_buffer if ring_buffer is not None else RingBufferExporter()
+        self.exporters: List[Any] = [self.ring_buffer] + list(exporters or [])
+
+    def _new_span(
+        self,
+        name: str,
+        parent: Optional[SpanContext],
+        attributes: Dict[str, Any],
+        start_time_ns: Optional[int] = None
+    ) -> Span:
+        if parent is None:
+            current = _current_span.get()
+            if current is not None and current.is_recording:
+                parent = current.context
+
+        return Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            attributes={k: v for k, v in attributes.items() if v is not None},
+            start_time_ns=start_time_ns
+        )
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        parent: Optional[SpanContext] = None,
+        start_time_ns: Optional[int] = None,
+        attributes: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Span]:
+        """
+        Open a span as the current span for the enclosed block.
+
+        Args:
+            name: Span name
+            parent: Explicit parent (defaults to the current span)
+            start_time_ns: Optional start time override (Unix epoch nanoseconds)
+            attributes: Initial span attributes
+        """
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+
+        span = self._new_span(name, parent, attributes or {}, start_time_ns)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            self._export(span)
+
+    def record_span(
+        self,
+        name: str,
+        start_time_ns: int,
+        end_time_ns: Optional[int] = None,
+        parent: Optional[SpanContext] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ) -> Span:
+        """Record an already-finished operation as a span"""
+        if not self.enabled:
+            return _NOOP_SPAN
+
+        span = self._new_span(name, parent, attributes or {}, start_time_ns)
+        if error:
+            span.status_code = STATUS_ERROR
+            span.status_message = error
+        span.end(end_time_ns)
+        self._export(span)
+        return span
+
+    def _export(self, span: Span):
+        for exporter in self.exporters:
+            try:
+                exporter.export([span])
+            except Exception:
+                # Tracing must never break the traced operation
+                pass
+
+    def get_job_waterfall(self, job_id: str) -> Dict[str, Any]:
+        """
+        Build a waterfall view of all buffered spans for a job.
+
+        Returns spans ordered by start time with their offset from the start
+        of the trace, nesting depth and duration, plus a per-span-name
+        breakdown of where the time went.
+        """
+        trace_ids = self.ring_buffer.find_trace_ids("job.id", job_id)
+        spans = sorted(self.ring_buffer.get_spans(trace_ids), key=lambda s: s.start_time_ns)
+
+        if not spans:
+            return {
+                "job_id": job_id,
+                "trace_ids": [],
+                "span_count": 0,
+                "total_duration_ms": 0.0,
+                "breakdown_ms": {},
+                "spans": []
+            }
+
+        by_id = {s.span_id: s for s in spans}
+        depths: Dict[str, int] = {}
+
+        def depth_of(span: Span) -> int:
+            if span.span_id not in depths:
+                parent = by_id.get(span.parent_id) if span.parent_id else None
+                depths[span.span_id] = depth_of(parent) + 1 if parent else 0
+            return depths[span.span_id]
+
+        trace_start = spans[0].start_time_ns
+        trace_end = max(s.end_time_ns or s.start_time_ns for s in spans)
+
+        breakdown: Dict[str, float] = {}
+        waterfall = []
+        for span in spans:
+            entry = span.to_dict()
+            entry["depth"] = depth_of(span)
+            entry["offset_ms"] = round((span.start_time_ns - trace_start) / 1_000_000, 3)
+            waterfall.append(entry)
+            breakdown[span.name] = round(breakdown.get(span.name, 0.0) + (span.duration_ms or 0.0), 3)
+
+        return {
+            "job_id": job_id,
+            "trace_ids": sorted(trace_ids),
+            "span_count": len(waterfall),
+            "total_duration_ms": round((trace_end - trace_start) / 1_000_000, 3),
+            "breakdown_ms": breakdown,
+            "spans": waterfall
+        }
+
+    def shutdown(self):
+        """Flush and shut down all exporters"""
+        for exporter in self.exporters:
+            try:
+                exporter.shutdown()
+            except Exception:
+                pass
+
+class TracingMiddleware(BaseHTTPMiddleware):
+    """Middleware that opens a root span for every HTTP request"""
+
+    def __init__(self, app, tracer: 'Tracer'):
+        super().__init__(app)
+        self.tracer = tracer
+
+    async def dispatch(self, request: Request, call_next):
+        attributes = {
+            "http.method": request.method,
+            "http.target": request.url.path
+        }
+        with self.tracer.start_span(f"HTTP {request.method}", attributes=attributes) as span:
+            response = await call_next(request)
+            route = request.scope.get("route")
+            span.set_attribute("http.route", getattr(route, "path", None))
+            span.set_attribute("http.status_code", response.status_code)
+            if response.status_code >= 500:
+                span.status_code = STATUS_ERROR
+            return response
+
+# Global tracer instance
+_tracer: Optional[Tracer] = None
+
+def get_tracer() -> Tracer:
+    """Get or create the global tracer configured from settings"""
+    global _tracer
+    if _tracer is None:
+        settings = get_settings()
+        exporters = []
+        if settings.tracing_export_path:
+            exporters.append(OTLPFileExporter(settings.tracing_export_path))
+        _tracer = Tracer(
+            ring_buffer=RingBufferExporter(settings.tracing_buffer_size),
+            exporters=exporters,
+            enabled=settings.tracing_enabled
+        )
+    return _tracer
+
+def get_current_span() -> Optional[Span]:
+    """Get the span active in the current context, if any"""
+    return _current_span.get()
+
+def get_current_span_context() -> Optional[SpanContext]:
+    """Get the context of the current span, for propagating to other tasks"""
+    span = _current_span.get()
+    if span is None or not span.is_recording:
+        return None
+    return span.context
+
+def setup_tracing_middleware(app):
+    """Set up request tracing middleware for FastAPI app"""
+    app.add_middleware(TracingMiddleware, tracer=get_tracer())
+
+def shutdown_tracing():
+    """Flush buffered spans to exporters"""
+    if _tracer is not None:
+        _tracer.shutdown()
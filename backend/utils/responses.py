@@ -5,11 +5,13 @@ Helper functions for creating consistent ApiResponse instances across all endpoi
 These utilities ensure uniform response patterns throughout the AI Agent Platform.
 """
 
-from typing import Optional, Any, Dict, List, Type, TypeVar, Union
+import json
+from typing import Optional, Any, Dict, List, Type, TypeVar, Union, AsyncIterator
 from datetime import datetime
 from pydantic import ValidationError, BaseModel
 from functools import wraps
 from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
 
 from models import ApiResponse, T
 
@@ -128,6 +130,52 @@ def create_validation_error_response(
     )
 
 
+def format_sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a single Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def create_sse_response(
+    chunks: AsyncIterator[str],
+    metadata: Optional[Dict[str, Any]] = None
+) -> StreamingResponse:
+    """
+    Create a Server-Sent Events response from an async iterator of text chunks.
+    
+    Each chunk is sent as a ``chunk`` event. The stream ends with a ``done``
+    event carrying the metadata, or an ``error`` event if the iterator fails
+    part-way (the HTTP status has already been sent by then).
+    
+    Args:
+        chunks: Async iterator yielding response text
+        metadata: Optional metadata included in the final ``done`` event
+        
+    Returns:
+        StreamingResponse with ``text/event-stream`` media type
+        
+    Example:
+        return create_sse_response(llm_service.query_stream(prompt))
+    """
+    async def events():
+        try:
+            async for chunk in chunks:
+                yield format_sse_event("chunk", {"text": chunk})
+        except Exception as e:
+            yield format_sse_event("error", {
+                "error": str(e),
+                "error_type": type(e).__name__,
+                "timestamp": datetime.utcnow().isoformat()
+            })
+            return
+        yield format_sse_event("done", {"metadata": metadata or {}})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # Response Model Validation Utilities
 
 def validate_api_response_format(response_data: Any, expected_result_type: Optional[Type] = None) -> bool:
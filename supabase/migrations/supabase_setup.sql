@@ -40,7 +40,7 @@ CREATE TABLE IF NOT EXISTS jobs (
     title TEXT,
     
     -- Job status and lifecycle
-    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'running', 'completed', 'failed')),
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'running', 'completed', 'failed', 'cancelled')),
     priority INTEGER DEFAULT 5 CHECK (priority >= 0 AND priority <= 10),
     tags TEXT[] DEFAULT '{}',
     
@@ -49,6 +49,7 @@ CREATE TABLE IF NOT EXISTS jobs (
     result JSONB,
     result_format TEXT,
     error_message TEXT,
+    usage JSONB,
     
     -- Scheduling fields (added for agent scheduling functionality)
     schedule_id UUID,
@@ -89,6 +90,13 @@ CREATE TABLE IF NOT EXISTS schedules (
     CONSTRAINT schedules_agent_name_check CHECK (length(agent_name) > 0)
 );
 
+-- Columns added after the initial release
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS usage JSONB;
+
+-- Statuses added after the initial release (the constraint is recreated so reruns stay idempotent)
+ALTER TABLE jobs DROP CONSTRAINT IF EXISTS jobs_status_check;
+ALTER TABLE jobs ADD CONSTRAINT jobs_status_check CHECK (status IN ('pending', 'running', 'completed', 'failed', 'cancelled'));
+
 -- ============================================================================
 -- FOREIGN KEY RELATIONSHIPS
 -- ============================================================================
@@ -216,6 +224,28 @@ LEFT JOIN jobs j ON s.id = j.schedule_id
 GROUP BY s.id, s.title, s.agent_name, s.next_run
 ORDER BY s.created_at DESC;
 
+-- Daily LLM token and cost usage by user, agent, schedule and provider.
+-- security_invoker applies the caller's RLS policies on jobs, so users only see their own usage.
+CREATE OR REPLACE VIEW job_usage_daily WITH (security_invoker = true) AS
+SELECT 
+    DATE(COALESCE(j.completed_at, j.failed_at, j.updated_at)) as day,
+    j.user_id,
+    j.agent_identifier,
+    j.schedule_id,
+    p.key as provider,
+    COUNT(DISTINCT j.id) as jobs,
+    SUM((p.value->>'calls')::BIGINT) as calls,
+    SUM((p.value->>'prompt_tokens')::BIGINT) as prompt_tokens,
+    SUM((p.value->>'completion_tokens')::BIGINT) as completion_tokens,
+    SUM((p.value->>'cached_tokens')::BIGINT) as cached_tokens,
+    SUM((p.value->>'cost_usd')::NUMERIC) as cost_usd,
+    SUM((p.value->>'cache_write_tokens')::BIGINT) as cache_write_tokens
+FROM jobs j
+CROSS JOIN LATERAL jsonb_each(j.usage->'by_provider') p
+WHERE j.usage IS NOT NULL
+GROUP BY 1, j.user_id, j.agent_identifier, j.schedule_id, p.key
+ORDER BY day DESC, cost_usd DESC;
+
 -- ============================================================================
 -- SECURITY AND PERMISSIONS
 -- ============================================================================
@@ -267,6 +297,7 @@ GRANT SELECT, INSERT, UPDATE, DELETE ON jobs TO authenticated;
 GRANT SELECT, INSERT, UPDATE, DELETE ON schedules TO authenticated;
 GRANT SELECT ON job_stats TO authenticated;
 GRANT SELECT ON schedule_job_stats TO authenticated;
+GRANT SELECT ON job_usage_daily TO authenticated;
 
 -- ============================================================================
 -- DOCUMENTATION AND COMMENTS
@@ -280,13 +311,14 @@ COMMENT ON COLUMN jobs.id IS 'Unique identifier for each job (UUID)';
 COMMENT ON COLUMN jobs.user_id IS 'ID of the user who created the job (references auth.users)';
 COMMENT ON COLUMN jobs.agent_identifier IS 'Generic string identifier for the agent that will process this job (e.g., simple_prompt, custom_research)';
 COMMENT ON COLUMN jobs.title IS 'Human-readable title for the job for identification and organization';
-COMMENT ON COLUMN jobs.status IS 'Current status of the job (pending, running, completed, failed)';
+COMMENT ON COLUMN jobs.status IS 'Current status of the job (pending, running, completed, failed, cancelled)';
 COMMENT ON COLUMN jobs.priority IS 'Job priority level (0=low, 5=normal, 8=high, 10=critical)';
 COMMENT ON COLUMN jobs.tags IS 'Array of tags for job organization and filtering';
 COMMENT ON COLUMN jobs.data IS 'Input data and parameters for the job stored as JSON';
 COMMENT ON COLUMN jobs.result IS 'Job execution result or output stored as JSON';
 COMMENT ON COLUMN jobs.result_format IS 'Format of the result data';
 COMMENT ON COLUMN jobs.error_message IS 'Error message if job failed';
+COMMENT ON COLUMN jobs.usage IS 'LLM calls, prompt/completion/cached tokens and estimated cost of the job, in total and by provider and model';
 COMMENT ON COLUMN jobs.schedule_id IS 'ID of the schedule that created this job (NULL for manually created jobs)';
 COMMENT ON COLUMN jobs.execution_source IS 'Source of job execution: "manual" for user-created jobs, "scheduled" for automatically scheduled jobs';
 COMMENT ON COLUMN jobs.created_at IS 'Timestamp when the job was created';
@@ -315,4 +347,5 @@ COMMENT ON COLUMN schedules.updated_at IS 'Timestamp when the schedule was last
 -- Views documentation
 COMMENT ON VIEW job_stats IS 'Provides summary statistics for jobs by status, agent_identifier, execution_source, and priority';
 COMMENT ON VIEW schedule_job_stats IS 'Provides execution statistics for each schedule including success rates and job counts';
+COMMENT ON VIEW job_usage_daily IS 'Provides daily LLM token and cost totals by user, agent, schedule and provider from jobs.usage';
 